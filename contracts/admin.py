@@ -5,6 +5,7 @@ from .models import (
     RegularContract,
     OccasionalContract,
     Movement,
+    OpenMovement,
     Ticket,
 )
 
@@ -27,6 +28,7 @@ class RegularContractAdmin(admin.ModelAdmin):
     """
 
     list_display = ("id", "vehicle", "customer", "valid_from", "valid_to", "price")
+    list_select_related = ("vehicle__owner", "customer")
     list_filter = ("valid_from", "valid_to")
     search_fields = ("id", "vehicle__license_plate", "customer__username")
 
@@ -38,6 +40,7 @@ class OccasionalContractAdmin(admin.ModelAdmin):
     """
 
     list_display = ("id", "vehicle", "valid_from", "valid_to", "price")
+    list_select_related = ("vehicle__owner",)
     list_filter = ("valid_from", "valid_to")
     search_fields = ("id", "vehicle__license_plate")
 
@@ -49,10 +52,28 @@ class MovementAdmin(admin.ModelAdmin):
     """
 
     list_display = ("id", "contract", "entry_time", "exit_time")
+    list_select_related = ("contract__vehicle__owner",)
     list_filter = ("entry_time", "exit_time")
     search_fields = ("id",)
 
 
+@admin.register(OpenMovement)
+class OpenMovementAdmin(admin.ModelAdmin):
+    """
+    Read-only view of the "currently parked" projection.
+    """
+
+    list_display = ("movement", "contract", "entry_time")
+    list_select_related = ("movement", "contract__vehicle__owner")
+    ordering = ("entry_time",)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
 @admin.register(Ticket)
 class TicketAdmin(admin.ModelAdmin):
     """
@@ -60,10 +81,13 @@ class TicketAdmin(admin.ModelAdmin):
     """
 
     list_display = ("id", "contract", "issued_at", "deactivated_at")
+    list_select_related = ("contract__vehicle__owner",)
     list_filter = ("issued_at",)
     search_fields = ("id",)
 
 @admin.register(OccasionalTicket)
 class OccasionalTicketAdmin(admin.ModelAdmin):
     list_display = ("license_plate", "slot", "entry_time", "exit_time", "amount_due", "amount_paid")
+    # ParkingSlot.__str__ shows the area and the slot type.
+    list_select_related = ("slot__area", "slot__slot_type")
     search_fields = ("license_plate",)
\ No newline at end of file
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class ContractsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'contracts'
+
+    def ready(self):
+        # Register the signal handlers (cache invalidation).
+        from contracts import signals  # noqa: F401
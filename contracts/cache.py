@@ -0,0 +1,171 @@
+"""
+Process-local cache of normalized license plate -> active season contract.
+
+Gate decisions (UC2 entry / exit) need the active RegularContract of a
+plate on every event, but that mapping only changes a few times a day.
+The cache keeps (contract id, vehicle id, validity window) per plate:
+
+- entries expire after PLATE_CACHE_TTL seconds and are never returned
+  outside their validity window (contract expiry),
+- at most PLATE_CACHE_MAX_ENTRIES plates are kept (LRU eviction),
+- contract / vehicle changes invalidate the vehicle's plate explicitly
+  (see contracts.signals).
+
+Only plates *with* an active contract are cached. A hit is a hint: the
+gate path still re-checks the contract row together with the
+open-movement query, so a stale entry costs a fallback, never a wrong
+decision.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+
+from django.conf import settings
+
+DEFAULT_TTL_SECONDS = 300
+DEFAULT_MAX_ENTRIES = 10_000
+
+
+@dataclass(frozen=True)
+class CachedContract:
+    contract_id: object
+    vehicle_id: int
+    valid_from: datetime
+    valid_to: datetime
+
+    def is_active_at(self, at) -> bool:
+        return self.valid_from <= at <= self.valid_to
+
+
+class ActiveContractCache:
+    """
+    Thread-safe TTL + LRU map: normalized plate -> CachedContract.
+    """
+
+    def __init__(self, ttl_seconds=None, max_entries=None):
+        if ttl_seconds is None:
+            ttl_seconds = getattr(settings, "PLATE_CACHE_TTL", DEFAULT_TTL_SECONDS)
+        if max_entries is None:
+            max_entries = getattr(settings, "PLATE_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)
+        self._ttl_seconds = ttl_seconds
+        self._max_entries = max_entries
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # plate -> (CachedContract, stored_at)
+        self._plates_by_vehicle = {}  # vehicle_id -> plate
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def get(self, plate: str, at) -> CachedContract | None:
+        """
+        Returns the cached contract of the plate if it is fresh and active at 'at'.
+        """
+        with self._lock:
+            item = self._entries.get(plate)
+            if item is not None:
+                cached, stored_at = item
+                if time.monotonic() - stored_at <= self._ttl_seconds and cached.is_active_at(at):
+                    self._entries.move_to_end(plate)
+                    self.hits += 1
+                    return cached
+                # Expired entry or expired contract
+                self._drop(plate)
+            self.misses += 1
+            return None
+
+    def put(self, plate: str, cached: CachedContract):
+        with self._lock:
+            if plate in self._entries:
+                self._drop(plate)
+            self._entries[plate] = (cached, time.monotonic())
+            self._plates_by_vehicle[cached.vehicle_id] = plate
+            while len(self._entries) > self._max_entries:
+                self._drop(next(iter(self._entries)))
+
+    def remember(self, plate: str, row: dict):
+        """
+        Caches a contract row with pk, vehicle_id, valid_from and valid_to.
+        """
+        self.put(
+            plate,
+            CachedContract(
+                contract_id=row["pk"],
+                vehicle_id=row["vehicle_id"],
+                valid_from=row["valid_from"],
+                valid_to=row["valid_to"],
+            ),
+        )
+
+    def invalidate(self, plate: str):
+        with self._lock:
+            self._drop(plate)
+
+    def invalidate_vehicle(self, vehicle_id):
+        """
+        Drops the plate of a vehicle (its contracts or plate changed).
+        """
+        with self._lock:
+            plate = self._plates_by_vehicle.get(vehicle_id)
+            if plate is not None:
+                self._drop(plate)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._plates_by_vehicle.clear()
+
+    def _drop(self, plate):
+        # Caller holds the lock.
+        item = self._entries.pop(plate, None)
+        if item is not None:
+            cached = item[0]
+            if self._plates_by_vehicle.get(cached.vehicle_id) == plate:
+                del self._plates_by_vehicle[cached.vehicle_id]
+
+
+class NullContractCache:
+    """
+    Cache that never hits. Used when the service runs on injected
+    repositories, whose contracts must not mix with the process cache.
+    """
+
+    def get(self, plate, at):
+        return None
+
+    def put(self, plate, cached):
+        pass
+
+    def remember(self, plate, row):
+        pass
+
+    def invalidate(self, plate):
+        pass
+
+    def invalidate_vehicle(self, vehicle_id):
+        pass
+
+    def clear(self):
+        pass
+
+
+_active_contract_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_active_contract_cache() -> ActiveContractCache:
+    """
+    Returns the process-wide plate -> active contract cache.
+    """
+    global _active_contract_cache
+    if _active_contract_cache is None:
+        with _cache_lock:
+            if _active_contract_cache is None:
+                _active_contract_cache = ActiveContractCache()
+    return _active_contract_cache
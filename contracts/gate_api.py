@@ -0,0 +1,171 @@
+"""
+JSON API for barrier controllers (gate devices).
+
+The gate_* views are HTML forms for people. Devices call this endpoint
+instead: token authentication, no session / CSRF / template rendering,
+and a batch of events per request:
+
+    POST /tickets/api/gate-events/
+    Authorization: Token <key>
+
+    {"events": [
+        {"id": "e1", "type": "season_entry", "plate": "AA-00-AA", "gate_id": "<uuid>"},
+        {"id": "e2", "type": "occasional_exit", "plate": "BB-11-BB", "gate_id": "<uuid>"}
+    ]}
+
+Response (200), one result per event, in order:
+
+    {"results": [
+        {"id": "e1", "type": "season_entry", "success": true,
+         "open_gate": true, "message": "Gate opened.", "data": {...}},
+        ...
+    ]}
+
+A batch runs in one transaction. Each event gets its own savepoint, so
+a database error in one event rolls back only that event and is reported
+in its result; the other events still commit.
+"""
+
+import json
+import logging
+import uuid
+from contextlib import nullcontext
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import DatabaseError, transaction
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+
+from core.event_coordinator import EventCoordinator
+from parking.models import GateDeviceToken
+from parking.services import PaymentService, PricingService, SlotService
+from vehicles.services import VehicleService
+from .services import TicketService
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BATCH = 100
+
+
+def _build_event_coordinator() -> EventCoordinator:
+    pricing = PricingService()
+    payment = PaymentService()
+    return EventCoordinator(
+        ticket_service=TicketService(pricing_service=pricing, payment_service=payment),
+        slot_service=SlotService(),
+        pricing_service=pricing,
+        payment_service=payment,
+        vehicle_service=VehicleService(),
+    )
+
+
+# event type -> EventCoordinator flow
+EVENT_FLOWS = {
+    "season_entry": "enter_parking_flow",
+    "season_exit": "exit_parking_flow",
+    "occasional_entry": "occasional_entry_flow",
+    "occasional_exit": "occasional_exit_flow",
+}
+
+
+def _authenticate(request) -> GateDeviceToken | None:
+    scheme, _, key = request.headers.get("Authorization", "").partition(" ")
+    if scheme.lower() != "token" or not key.strip():
+        return None
+    return (
+        GateDeviceToken.objects
+        .filter(key_digest=GateDeviceToken.digest(key.strip()), is_active=True)
+        .first()
+    )
+
+
+def _error(status, message):
+    response = JsonResponse({"error": message}, status=status)
+    if status == 401:
+        response["WWW-Authenticate"] = "Token"
+    return response
+
+
+def _rejected(event_id, event_type, message):
+    return {
+        "id": event_id,
+        "type": event_type,
+        "success": False,
+        "open_gate": False,
+        "message": message,
+        "data": None,
+    }
+
+
+def _process_event(coordinator, token, event) -> dict:
+    if not isinstance(event, dict):
+        return _rejected(None, None, "Event must be an object.")
+
+    event_id = event.get("id")
+    event_type = event.get("type")
+    plate = str(event.get("plate") or "").strip()
+    gate_id = event.get("gate_id")
+
+    flow_name = EVENT_FLOWS.get(event_type)
+    if flow_name is None:
+        return _rejected(event_id, event_type, "Unknown event type.")
+    if not plate or not gate_id:
+        return _rejected(event_id, event_type, "plate and gate_id are required.")
+    try:
+        gate_id = uuid.UUID(str(gate_id))
+    except ValueError:
+        return _rejected(event_id, event_type, "Gate not found.")
+    if not token.allows_gate(gate_id):
+        return _rejected(event_id, event_type, "Token is not valid for this gate.")
+
+    try:
+        with transaction.atomic():
+            flow = getattr(coordinator, flow_name)(plate.upper(), gate_id)
+    except (DatabaseError, ValidationError):
+        logger.exception("Gate event %s (%s) failed", event_id, event_type)
+        return _rejected(event_id, event_type, "Event could not be processed. Please retry.")
+
+    data = flow.data or {}
+    return {
+        "id": event_id,
+        "type": event_type,
+        "success": flow.success,
+        "open_gate": bool(data.get("open_gate", flow.success)),
+        "message": flow.message,
+        "data": data,
+    }
+
+
+@csrf_exempt
+def gate_events(request):
+    """
+    Machine endpoint for barrier controllers: processes a batch of
+    entry / exit events and returns one result per event.
+    """
+    if request.method != "POST":
+        return _error(405, "Only POST allowed")
+
+    token = _authenticate(request)
+    if token is None:
+        return _error(401, "Invalid or missing token.")
+
+    try:
+        payload = json.loads(request.body)
+    except (ValueError, UnicodeDecodeError):
+        return _error(400, "Body must be JSON.")
+
+    events = payload.get("events") if isinstance(payload, dict) else None
+    if not isinstance(events, list) or not events:
+        return _error(400, "'events' must be a non-empty list.")
+
+    max_batch = getattr(settings, "GATE_API_MAX_BATCH", DEFAULT_MAX_BATCH)
+    if len(events) > max_batch:
+        return _error(400, f"At most {max_batch} events per request.")
+
+    coordinator = _build_event_coordinator()
+    # A single event is its own transaction (the per-event atomic block).
+    with transaction.atomic() if len(events) > 1 else nullcontext():
+        results = [_process_event(coordinator, token, event) for event in events]
+
+    return JsonResponse({"results": results})
@@ -0,0 +1,198 @@
+import json
+import time
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from contracts.models import Movement, RegularContract
+from core.benchmarking import QueryCounter, summarize, timed
+from customers.models import Customer
+from parking.models import Gate, GateDeviceToken, ParkingArea, ParkingSlot, SlotType
+from vehicles.models import PlateRegistryVersion, Vehicle
+from vehicles.plate_filter import get_registered_plate_filter
+
+
+class Command(BaseCommand):
+    """
+    Throughput benchmark: gate form views vs. the JSON gate-device API.
+
+    Creates a temporary area with season-ticket holders and lets every
+    vehicle enter and leave once per mode:
+
+    - form: one POST to gate_entry / gate_exit per event (session auth,
+      template rendering and the gate list query included),
+    - api xN: POSTs to the gate-events API with N events per request.
+
+    Reports events per second, request latency and queries per event,
+    then removes everything it created. Requests go through the full
+    middleware stack via django.test.Client (no network).
+    """
+
+    help = "Benchmark the gate form views against the JSON gate-device API."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--vehicles",
+            type=int,
+            default=200,
+            help="Season-ticket holders entering and leaving per mode (default: 200).",
+        )
+        parser.add_argument(
+            "--batch-sizes",
+            default="1,10,50",
+            help="Comma-separated API batch sizes (default: 1,10,50).",
+        )
+        parser.add_argument("--json", action="store_true", help="Print the results as JSON.")
+
+    def handle(self, *args, **options):
+        try:
+            batch_sizes = [int(value) for value in options["batch_sizes"].split(",") if value.strip()]
+        except ValueError:
+            raise CommandError("--batch-sizes must be a comma-separated list of integers.")
+        if not batch_sizes or min(batch_sizes) < 1 or options["vehicles"] < 1:
+            raise CommandError("Batch sizes and --vehicles must be positive.")
+
+        results = self._run(options["vehicles"], batch_sizes)
+
+        if options["json"]:
+            self.stdout.write(json.dumps({"vendor": connection.vendor, "runs": results}, indent=2))
+            return
+
+        self.stdout.write(f"Backend: {connection.vendor}, vehicles: {options['vehicles']}")
+        self.stdout.write(
+            f"{'mode':>10} {'events':>7} {'errors':>6} {'events/s':>9} {'q/event':>8} "
+            f"{'p50 ms':>8} {'p95 ms':>8} {'max ms':>8}"
+        )
+        for run in results:
+            latency = run["request_latency"]
+            self.stdout.write(
+                f"{run['mode']:>10} {run['events']:>7} {run['errors']:>6} "
+                f"{run['throughput_per_s']:>9.1f} {run['queries_per_event']:>8.1f} "
+                f"{latency['p50_ms']:>8.2f} {latency['p95_ms']:>8.2f} {latency['max_ms']:>8.2f}"
+            )
+
+    # ------------------------------------------------------------------
+    # Fixture
+    # ------------------------------------------------------------------
+    def _run(self, vehicle_count: int, batch_sizes) -> list:
+        tag = uuid.uuid4().hex[:8]
+        slot_type = SlotType.objects.create(code=f"BENCH-{tag}", name="Benchmark", size_rank=1)
+        area = ParkingArea.objects.create(name=f"bench-gate-api-{tag}", description="Temporary benchmark area")
+        user = Customer.objects.create_user(username=f"bench-gate-{tag}")
+        token = None
+        try:
+            gate = Gate.objects.create(area=area, name="Benchmark gate")
+            token, key = GateDeviceToken.issue(f"bench-{tag}", gate=gate)
+
+            slots = ParkingSlot.objects.bulk_create(
+                [ParkingSlot(area=area, number=f"G{i}", slot_type=slot_type) for i in range(vehicle_count)]
+            )
+            vehicles = Vehicle.objects.bulk_create(
+                [Vehicle(owner=user, license_plate=f"GB-{tag.upper()}-{i}") for i in range(vehicle_count)]
+            )
+            # bulk_create bypasses the post_save signal feeding the plate filter
+            plate_filter = get_registered_plate_filter()
+            for vehicle in vehicles:
+                plate_filter.add(vehicle.license_plate)
+            PlateRegistryVersion.bump()
+
+            now = timezone.now()
+            for vehicle, slot in zip(vehicles, slots):
+                RegularContract.objects.create(
+                    vehicle=vehicle,
+                    customer=user,
+                    valid_from=now - timedelta(days=1),
+                    valid_to=now + timedelta(days=30),
+                    reserved_slot=slot,
+                    price=Decimal("0.00"),
+                )
+            plates = [vehicle.license_plate for vehicle in vehicles]
+
+            client = Client(HTTP_HOST="localhost")
+            client.force_login(user)
+
+            runs = [self._run_forms(client, plates, gate)]
+            for batch_size in batch_sizes:
+                runs.append(self._run_api(client, key, plates, gate, batch_size))
+            return runs
+        finally:
+            Movement.objects.filter(contract__vehicle__owner=user).delete()
+            RegularContract.objects.filter(customer=user).delete()
+            if token is not None:
+                token.delete()
+            area.delete()
+            slot_type.delete()
+            user.delete()
+
+    # ------------------------------------------------------------------
+    # Modes
+    # ------------------------------------------------------------------
+    def _run_forms(self, client, plates, gate) -> dict:
+        durations = []
+        # The form views only render their result: count outcomes in the DB.
+        open_movements = Movement.objects.filter(contract__reserved_slot__area=gate.area, exit_time__isnull=True)
+
+        queries = QueryCounter()
+        elapsed = 0.0
+        errors = 0
+        for url_name in ("contracts:gate_entry", "contracts:gate_exit"):
+            with connection.execute_wrapper(queries):
+                started = time.perf_counter()
+                for plate in plates:
+                    with timed(durations):
+                        client.post(reverse(url_name), {"license_plate": plate, "gate_id": str(gate.pk)})
+                elapsed += time.perf_counter() - started
+            if url_name == "contracts:gate_entry":
+                errors += len(plates) - open_movements.count()
+            else:
+                errors += open_movements.count()
+
+        return self._result("form", 2 * len(plates), errors, elapsed, queries.count, durations)
+
+    def _run_api(self, client, key, plates, gate, batch_size) -> dict:
+        durations = []
+        errors = 0
+        url = reverse("contracts:api_gate_events")
+
+        queries = QueryCounter()
+        with connection.execute_wrapper(queries):
+            started = time.perf_counter()
+            for event_type in ("season_entry", "season_exit"):
+                for offset in range(0, len(plates), batch_size):
+                    events = [
+                        {"id": plate, "type": event_type, "plate": plate, "gate_id": str(gate.pk)}
+                        for plate in plates[offset:offset + batch_size]
+                    ]
+                    with timed(durations):
+                        response = client.post(
+                            url,
+                            data=json.dumps({"events": events}),
+                            content_type="application/json",
+                            HTTP_AUTHORIZATION=f"Token {key}",
+                        )
+                    if response.status_code != 200:
+                        errors += len(events)
+                        continue
+                    errors += sum(not result["success"] for result in response.json()["results"])
+            elapsed = time.perf_counter() - started
+
+        return self._result(f"api x{batch_size}", 2 * len(plates), errors, elapsed, queries.count, durations)
+
+    @staticmethod
+    def _result(mode, events, errors, elapsed, query_count, durations) -> dict:
+        return {
+            "mode": mode,
+            "events": events,
+            "errors": errors,
+            "requests": len(durations),
+            "elapsed_s": round(elapsed, 4),
+            "throughput_per_s": round(events / elapsed, 1) if elapsed else 0.0,
+            "queries_per_event": round(query_count / events, 2),
+            "request_latency": summarize(durations),
+        }
@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from contracts.models import Movement, OpenMovement
+
+
+class Command(BaseCommand):
+    """
+    Rebuilds the OpenMovement projection from the movement history.
+
+    The projection is maintained by signals; run this after bulk changes
+    that bypass them (QuerySet.update, bulk_create, raw SQL) or to check
+    for drift.
+    """
+
+    help = "Rebuild the 'currently parked' projection from the Movement history."
+
+    def handle(self, *args, **options):
+        latest = {}
+        rows = (
+            Movement.objects.filter(exit_time__isnull=True)
+            .order_by("entry_time")
+            .values_list("pk", "contract_id", "entry_time")
+        )
+        for pk, contract_id, entry_time in rows.iterator(chunk_size=5000):
+            # At most one open movement per contract: keep the latest.
+            latest[contract_id] = (pk, entry_time)
+
+        with transaction.atomic():
+            before = set(OpenMovement.objects.values_list("movement_id", flat=True))
+            OpenMovement.objects.all().delete()
+            OpenMovement.objects.bulk_create(
+                [
+                    OpenMovement(movement_id=pk, contract_id=contract_id, entry_time=entry_time)
+                    for contract_id, (pk, entry_time) in latest.items()
+                ],
+                batch_size=1000,
+            )
+
+        after = {pk for pk, _ in latest.values()}
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Open movements rebuilt: {len(after)} open, "
+                f"{len(after - before)} added, {len(before - after)} removed."
+            )
+        )
@@ -0,0 +1,49 @@
+# Generated by Django 6.1.2 on 2026-10-17 23:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def fill_open_movements(apps, schema_editor):
+    """
+    One row per contract with an open movement (the latest one, should
+    the history contain several).
+    """
+    Movement = apps.get_model("contracts", "Movement")
+    OpenMovement = apps.get_model("contracts", "OpenMovement")
+
+    latest = {}
+    rows = (
+        Movement.objects.filter(exit_time__isnull=True)
+        .order_by("entry_time")
+        .values_list("pk", "contract_id", "entry_time")
+    )
+    for pk, contract_id, entry_time in rows.iterator(chunk_size=5000):
+        latest[contract_id] = (pk, entry_time)
+
+    OpenMovement.objects.bulk_create(
+        [
+            OpenMovement(movement_id=pk, contract_id=contract_id, entry_time=entry_time)
+            for contract_id, (pk, entry_time) in latest.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contracts', '0002_occasionalticket'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OpenMovement',
+            fields=[
+                ('movement', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='open_entry', serialize=False, to='contracts.movement')),
+                ('entry_time', models.DateTimeField()),
+                ('contract', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='open_entry', to='contracts.contract')),
+            ],
+        ),
+        migrations.RunPython(fill_open_movements, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 6.1.2 on 2026-10-17 23:38
+
+import datetime
+import django.db.models.deletion
+from django.db import migrations, models
+
+OPEN_END = datetime.datetime(9999, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+def fill_occupancy_ledger(apps, schema_editor):
+    """
+    One interval per season movement (on the contract's reserved slot)
+    and per occasional ticket.
+    """
+    Movement = apps.get_model("contracts", "Movement")
+    OccasionalTicket = apps.get_model("contracts", "OccasionalTicket")
+    OccupancyInterval = apps.get_model("contracts", "OccupancyInterval")
+
+    batch = []
+
+    def add(interval):
+        batch.append(interval)
+        if len(batch) >= 2000:
+            OccupancyInterval.objects.bulk_create(batch)
+            batch.clear()
+
+    movements = Movement.objects.values_list("pk", "contract__reserved_slot_id", "entry_time", "exit_time")
+    for pk, slot_id, entry_time, exit_time in movements.iterator(chunk_size=5000):
+        add(OccupancyInterval(
+            kind="SEASON", movement_id=pk, slot_id=slot_id,
+            start_time=entry_time, end_time=exit_time or OPEN_END,
+        ))
+
+    tickets = OccasionalTicket.objects.values_list("pk", "slot_id", "entry_time", "exit_time", "is_closed")
+    for pk, slot_id, entry_time, exit_time, is_closed in tickets.iterator(chunk_size=5000):
+        if is_closed and exit_time is None:
+            exit_time = entry_time
+        add(OccupancyInterval(
+            kind="OCCASIONAL", ticket_id=pk, slot_id=slot_id,
+            start_time=entry_time, end_time=exit_time or OPEN_END,
+        ))
+
+    OccupancyInterval.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contracts', '0003_openmovement'),
+        ('parking', '0008_occupancycounter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OccupancyInterval',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('SEASON', 'Season movement'), ('OCCASIONAL', 'Occasional ticket')], max_length=10)),
+                ('start_time', models.DateTimeField()),
+                ('end_time', models.DateTimeField(default=datetime.datetime(9999, 1, 1, 0, 0, tzinfo=datetime.timezone.utc))),
+                ('movement', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='occupancy_interval', to='contracts.movement')),
+                ('slot', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='occupancy_intervals', to='parking.parkingslot')),
+                ('ticket', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='occupancy_interval', to='contracts.occasionalticket')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['end_time', 'start_time'], name='occupancy_interval_range_idx')],
+            },
+        ),
+        migrations.RunPython(fill_occupancy_ledger, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 6.1.2 on 2026-10-18 00:54
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contracts', '0004_occupancyinterval'),
+        ('parking', '0010_dwelltimesketch'),
+        migrations.swappable_dependency(settings.VEHICLE_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='contract',
+            index=models.Index(fields=['vehicle', 'valid_from', 'valid_to'], name='contract_vehicle_period_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contract',
+            index=models.Index(fields=['reserved_slot', 'valid_from', 'valid_to'], name='contract_slot_period_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='movement',
+            index=models.Index(condition=models.Q(('exit_time__isnull', True)), fields=['contract'], name='movement_open_contract_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='occasionalticket',
+            index=models.Index(fields=['license_plate', 'is_closed', '-entry_time'], name='ticket_plate_open_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='occasionalticket',
+            index=models.Index(fields=['slot', 'is_closed'], name='ticket_slot_open_idx'),
+        ),
+        # The new indexes start with the foreign key / plate columns: drop
+        # the single-column indexes of those once they exist.
+        migrations.AlterField(
+            model_name='contract',
+            name='reserved_slot',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='contracts', to='parking.parkingslot'),
+        ),
+        migrations.AlterField(
+            model_name='contract',
+            name='vehicle',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='contracts', to=settings.VEHICLE_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='occasionalticket',
+            name='license_plate',
+            field=models.CharField(max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='occasionalticket',
+            name='slot',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.PROTECT, related_name='occasional_tickets', to='parking.parkingslot'),
+        ),
+    ]
@@ -1,5 +1,8 @@
 import uuid
+from datetime import datetime, timezone as dt_timezone
+
 from django.conf import settings
+from django.core.exceptions import ValidationError
 from django.db import models
 from django.utils import timezone
 from parking.models import ParkingSlot
@@ -44,10 +47,12 @@ class Contract(models.Model):
     This model is concrete so that other models (e.g. Movement) can reference it.
     """
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    # Both foreign keys are indexed by the (key, period) indexes in Meta.
     vehicle = models.ForeignKey(
         settings.VEHICLE_MODEL,
         on_delete=models.CASCADE,
         related_name="contracts",
+        db_index=False,
     )
 
     valid_from = models.DateTimeField()
@@ -58,11 +63,18 @@ class Contract(models.Model):
         null=True,
         blank=True,
         related_name="contracts",
+        db_index=False,
     )
 
     class Meta:
         verbose_name = "Contract"
         verbose_name_plural = "Contracts"
+        indexes = [
+            # Active contract of a vehicle (gates) and overlapping
+            # contracts of a slot (purchase, availability).
+            models.Index(fields=["vehicle", "valid_from", "valid_to"], name="contract_vehicle_period_idx"),
+            models.Index(fields=["reserved_slot", "valid_from", "valid_to"], name="contract_slot_period_idx"),
+        ]
 
     def __str__(self) -> str:
         return f"{self.__class__.__name__} for {self.vehicle} [{self.valid_from} - {self.valid_to}]"
@@ -77,15 +89,16 @@ class Contract(models.Model):
 
     def has_open_movement(self) -> bool:
         """
-        Returns True if there is at least one movement without exit_time.
+        Returns True if there is a movement without exit_time
+        (read from the OpenMovement projection).
         """
-        return self.movements.filter(exit_time__isnull=True).exists()
+        return OpenMovement.objects.filter(contract_id=self.pk).exists()
 
     def get_active_movement(self):
         """
-        Returns the first movement without exit_time, or None if there is none.
+        Returns the movement without exit_time, or None if there is none.
         """
-        return self.movements.filter(exit_time__isnull=True).first()
+        return Movement.objects.filter(open_entry__contract_id=self.pk).first()
 
     def total_parked_minutes(self) -> int:
         """
@@ -134,6 +147,17 @@ class Movement(models.Model):
     entry_time = models.DateTimeField()
     exit_time = models.DateTimeField(null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            # Open movements only, a few hundred rows out of the history
+            # (IS NULL is no parameter, so SQLite plans it once).
+            models.Index(
+                fields=["contract"],
+                condition=models.Q(exit_time__isnull=True),
+                name="movement_open_contract_idx",
+            ),
+        ]
+
     def duration_minutes(self) -> int:
         """
         Returns the movement duration in minutes.
@@ -146,6 +170,106 @@ class Movement(models.Model):
     def is_open(self):
         return self.exit_time is None
 
+    def clean(self):
+        """
+        Rejects a second open movement of a contract (admin forms), which
+        the OpenMovement projection would refuse with an IntegrityError.
+        """
+        super().clean()
+        if self.is_open() and self.contract_id is not None:
+            if OpenMovement.objects.filter(contract_id=self.contract_id).exclude(movement_id=self.pk).exists():
+                raise ValidationError({"contract": "Season ticket already in use."})
+
+
+class OpenMovement(models.Model):
+    """
+    "Currently parked" projection of Movement: one row per open movement.
+
+    Gate checks (ticket already in use / anti-passback) and current
+    occupancy read this small table instead of scanning the movement
+    history for exit_time IS NULL. Rows are kept in sync with Movement
+    by contracts.signals; 'manage.py rebuild_open_movements' rebuilds
+    the table from the history.
+
+    A contract can have at most one open movement (one-to-one), so a
+    second entry on the same season ticket fails at the database level:
+    the season-entry gate reports it as "already in use", and
+    Movement.clean() rejects it in admin forms before the save.
+    """
+
+    movement = models.OneToOneField(
+        Movement,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="open_entry",
+    )
+    contract = models.OneToOneField(
+        Contract,
+        on_delete=models.CASCADE,
+        related_name="open_entry",
+    )
+    entry_time = models.DateTimeField()
+
+    def __str__(self) -> str:
+        return f"Open: {self.movement_id} since {self.entry_time}"
+
+# end_time of intervals that are still open ("until further notice")
+OPEN_END = datetime(9999, 1, 1, tzinfo=dt_timezone.utc)
+
+
+class OccupancyInterval(models.Model):
+    """
+    Occupancy ledger: one [start_time, end_time) interval per slot use,
+    for season movements and occasional tickets alike.
+
+    "Occupied at T" is start_time <= T < end_time on the
+    (end_time, start_time) index; open intervals end at OPEN_END, so
+    "occupied now" is the same lookup with T = now. Rows are written by
+    contracts.signals together with the movement / ticket.
+    """
+
+    class Kind(models.TextChoices):
+        SEASON = "SEASON", "Season movement"
+        OCCASIONAL = "OCCASIONAL", "Occasional ticket"
+
+    kind = models.CharField(max_length=10, choices=Kind.choices)
+    # Null for a season contract without a reserved slot.
+    slot = models.ForeignKey(
+        ParkingSlot,
+        on_delete=models.CASCADE,
+        null=True,
+        related_name="occupancy_intervals",
+    )
+    movement = models.OneToOneField(
+        Movement,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="occupancy_interval",
+    )
+    ticket = models.OneToOneField(
+        "OccasionalTicket",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="occupancy_interval",
+    )
+    start_time = models.DateTimeField()
+    end_time = models.DateTimeField(default=OPEN_END)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["end_time", "start_time"], name="occupancy_interval_range_idx"),
+        ]
+
+    @property
+    def is_open(self) -> bool:
+        return self.end_time == OPEN_END
+
+    def __str__(self) -> str:
+        return f"{self.kind} slot {self.slot_id}: {self.start_time} - {self.end_time}"
+
+
 class Ticket(models.Model):
     """
     Ticket for occasional contracts only.
@@ -184,8 +308,14 @@ class OccasionalTicket(models.Model):
     """
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
 
-    license_plate = models.CharField(max_length=20, db_index=True)
-    slot = models.ForeignKey(ParkingSlot, on_delete=models.PROTECT, related_name="occasional_tickets")
+    # Both are indexed by the (key, is_closed) indexes in Meta.
+    license_plate = models.CharField(max_length=20)
+    slot = models.ForeignKey(
+        ParkingSlot,
+        on_delete=models.PROTECT,
+        related_name="occasional_tickets",
+        db_index=False,
+    )
 
     entry_time = models.DateTimeField()
     exit_time = models.DateTimeField(null=True, blank=True)
@@ -203,6 +333,16 @@ class OccasionalTicket(models.Model):
 
     class Meta:
         ordering = ["-entry_time"]
+        indexes = [
+            # Open ticket of a plate, newest first (cash device, exit
+            # gate), and of a slot (free-slot checks). Not partial on
+            # is_closed = False: Django passes False as a parameter, and
+            # SQLite re-prepares such statements on every execution to
+            # match them against a partial index, which costs more than
+            # the smaller index saves.
+            models.Index(fields=["license_plate", "is_closed", "-entry_time"], name="ticket_plate_open_idx"),
+            models.Index(fields=["slot", "is_closed"], name="ticket_slot_open_idx"),
+        ]
 
     def __str__(self):
         return f"OccasionalTicket {self.license_plate} @ {self.slot} ({self.entry_time})"
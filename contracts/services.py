@@ -1,12 +1,18 @@
-from django.db import transaction
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Exists, OuterRef
 from django.utils import timezone
-from datetime import timedelta
+from datetime import datetime, timedelta
 from core.services import ITicketService, IPricingService, IPaymentService
-from contracts.models import RegularContract, Movement
+from core.tracing import span, traced
+from contracts.models import RegularContract, Movement, OpenMovement
 from vehicles.models import Vehicle
 from parking.models import ParkingSlot, Gate
 from parking.services import PricingService, PaymentService
-from django.db.models import Exists, OuterRef
+from parking.availability import record_reservation
+from parking.data import FreeSlotPool
+from parking.allocation import get_default_allocator
+from contracts.cache import CachedContract, NullContractCache, get_active_contract_cache
+from vehicles.plate_filter import NullPlateFilter, get_registered_plate_filter
 from .models import RegularContract, OccasionalTicket
 from parking.models import ParkingSlot
 
@@ -34,6 +40,11 @@ class TicketService(ITicketService):
         contract_repo=None,
         movement_repo=None,
         gate_repo=None,
+        open_movement_repo=None,
+        slot_pool=None,
+        allocator=None,
+        plate_cache=None,
+        plate_filter=None,
     ):
         """
         All collaborators are injected to make the service easy to test.
@@ -50,7 +61,21 @@ class TicketService(ITicketService):
         self._contract_repo = contract_repo or RegularContract.objects
         self._movement_repo = movement_repo or Movement.objects
         self._gate_repo = gate_repo or Gate.objects
-
+        # "Currently parked" projection: in-use / open-entry checks
+        self._open_movement_repo = open_movement_repo or OpenMovement.objects
+        self._slot_pool = slot_pool or FreeSlotPool()
+        self._allocator = allocator or get_default_allocator()
+        # The process-wide plate cache describes the default database only:
+        # injected contract repos (tests, fakes) get a cache that never hits.
+        if plate_cache is None:
+            plate_cache = get_active_contract_cache() if contract_repo is None else NullContractCache()
+        self._plate_cache = plate_cache
+        # Same for the registered-plate filter and injected vehicle repos.
+        if plate_filter is None:
+            plate_filter = get_registered_plate_filter() if vehicle_repo is None else NullPlateFilter()
+        self._plate_filter = plate_filter
+
+    @traced("TicketService.purchase_season_ticket")
     @transaction.atomic
     def purchase_season_ticket(
         self,
@@ -69,22 +94,33 @@ class TicketService(ITicketService):
         - process the payment
         - create a regular contract and reserve the slot
         - guarantee atomicity using a database transaction
+
+        Naive valid_from / valid_to are read in the current timezone, like
+        the model fields do, so the post-commit index updates compare them
+        with the aware datetimes they hold.
         """
 
+        valid_from, valid_to = (
+            timezone.make_aware(value) if isinstance(value, datetime) and timezone.is_naive(value) else value
+            for value in (valid_from, valid_to)
+        )
+
         # 1) Load vehicle and slot
         normalized_plate = vehicle_plate.strip().upper()
-        vehicle = self._vehicle_repo.select_for_update().get(
-            owner_id=customer_id,
-            license_plate=normalized_plate,
-        )
-        slot = self._slot_repo.select_for_update().get(pk=slot_id)
+        with span("load_vehicle_and_slot"):
+            vehicle = self._vehicle_repo.select_for_update().get(
+                owner_id=customer_id,
+                license_plate=normalized_plate,
+            )
+            slot = self._slot_repo.select_for_update().get(pk=slot_id)
 
         # 2) Check that there is no overlapping contract on this slot
-        overlapping = self._contract_repo.filter(
-            reserved_slot=slot,
-            valid_from__lt=valid_to,
-            valid_to__gt=valid_from,
-        ).exists()
+        with span("check_overlap"):
+            overlapping = self._contract_repo.filter(
+                reserved_slot=slot,
+                valid_from__lt=valid_to,
+                valid_to__gt=valid_from,
+            ).exists()
 
         if overlapping:
             return {
@@ -93,16 +129,18 @@ class TicketService(ITicketService):
             }
 
         # 3) Calculate price using pricing service
-        price = self.pricing_service.get_season_price(
-            slot_id=slot_id,
-            period=(valid_from, valid_to),
-        )
+        with span("compute_price"):
+            price = self.pricing_service.get_season_price(
+                slot_id=slot_id,
+                period=(valid_from, valid_to),
+            )
 
         # 4) Process payment
-        payment_success = self.payment_service.process_payment(
-            customer_id=customer_id,
-            amount=price,
-        )
+        with span("process_payment"):
+            payment_success = self.payment_service.process_payment(
+                customer_id=customer_id,
+                amount=price,
+            )
         if not payment_success:
             return {
                 "success": False,
@@ -110,13 +148,20 @@ class TicketService(ITicketService):
             }
 
         # 5) Create regular contract (the season ticket)
-        contract = self._contract_repo.create(
-            vehicle=vehicle,
-            customer=vehicle.owner,
-            valid_from=valid_from,
-            valid_to=valid_to,
-            reserved_slot=slot,
-            price = price,
+        with span("create_contract"):
+            contract = self._contract_repo.create(
+                vehicle=vehicle,
+                customer=vehicle.owner,
+                valid_from=valid_from,
+                valid_to=valid_to,
+                reserved_slot=slot,
+                price = price,
+            )
+
+        # 6) Keep the in-memory availability index and the free-slot pool
+        #    in sync once committed
+        transaction.on_commit(
+            lambda: self._after_reservation(slot.pk, valid_from, valid_to)
         )
 
         return {
@@ -125,6 +170,16 @@ class TicketService(ITicketService):
             "contract_id": contract.pk,
         }
 
+    def _after_reservation(self, slot_id, valid_from, valid_to):
+        """
+        Post-commit hook of purchase_season_ticket.
+        """
+        record_reservation(slot_id, valid_from, valid_to)
+        if valid_from <= timezone.now() <= valid_to:
+            # The slot is reserved right now: stop offering it to occasional customers.
+            self._slot_pool.discard(slot_id)
+
+    @traced("TicketService.enter_with_season_ticket")
     def enter_with_season_ticket(
         self,
         license_plate,
@@ -136,64 +191,98 @@ class TicketService(ITicketService):
         - Identify the vehicle and its active season ticket by license plate.
         - Ensure the ticket is not already in use.
         - Record the entry movement and instruct the gate to open.
-        """
 
-        now = timezone.now()
-        normalized_plate = license_plate.strip().upper()
-        # 1) Find vehicle by license plate
-        try:
-            vehicle = self._vehicle_repo.get(license_plate=normalized_plate)
-        except self._vehicle_repo.model.DoesNotExist:
-            return {
-                "success": False,
-                "open_gate": False,
-                "reason": "No vehicle with this license plate.",
-            }
+        Plate -> active contract -> open-movement flag -> gate validity is
+        resolved in one query that also locks the contract row, so the
+        happy path is two round trips (resolve + insert movement) inside
+        one transaction. Only a failed lookup costs one more query, to tell
+        "unknown vehicle" from "no active season ticket".
 
-        # 2) Find active regular contract for this vehicle
-        contract_qs = self._contract_repo.filter(
-            vehicle=vehicle,
-            valid_from__lte=now,
-            valid_to__gte=now,
-        )
-        if not contract_qs.exists():
-            return {
-                "success": False,
-                "open_gate": False,
-                "reason": "No active season ticket for this license plate.",
-            }
+        With the plate cached (contracts.cache), the resolve query becomes a
+        primary-key lookup of the cached contract; a stale entry falls back
+        to the full lookup.
 
-        contract = contract_qs.select_for_update().first()
+        An open movement created on the contract after the in-use check
+        (admin, another process) makes the OpenMovement one-to-one reject
+        the entry; it is rolled back and reported as "already in use".
+        """
 
-        # 3) Check if there is already an open movement
-        open_movement_exists = self._movement_repo.filter(
-            contract=contract,
-            exit_time__isnull=True,
-        ).exists()
+        now = timezone.now()
+        normalized_plate = license_plate.strip().upper()
 
-        if open_movement_exists:
+        # 0) Unregistered plates (misreads, visitors) never reach the database
+        with span("plate_filter"):
+            registered = self._plate_filter.might_contain(normalized_plate)
+        if not registered:
             return {
                 "success": False,
                 "open_gate": False,
-                "reason": "Season ticket already in use.",
+                "reason": "No vehicle with this license plate.",
             }
 
-        # 4) Validate gate
         try:
-            gate = self._gate_repo.get(pk=gate_id)
-        except self._gate_repo.model.DoesNotExist:
+            with transaction.atomic():
+                # 1) Active contract + "in use" + "gate exists" in one round trip
+                with span("resolve_contract") as resolve:
+                    entry = None
+                    cached = self._plate_cache.get(normalized_plate, now)
+                    resolve.set(cached=cached is not None)
+                    if cached is not None:
+                        entry = self._resolve_season_entry(normalized_plate, gate_id, now, contract_id=cached.contract_id)
+                        if entry is None:
+                            self._plate_cache.invalidate(normalized_plate)
+                    if entry is None:
+                        entry = self._resolve_season_entry(normalized_plate, gate_id, now)
+                        if entry is not None:
+                            self._plate_cache.remember(normalized_plate, entry)
+
+                if entry is None:
+                    with span("find_vehicle"):
+                        vehicle_exists = self._vehicle_repo.filter(license_plate=normalized_plate).exists()
+                    if not vehicle_exists:
+                        return {
+                            "success": False,
+                            "open_gate": False,
+                            "reason": "No vehicle with this license plate.",
+                        }
+                    return {
+                        "success": False,
+                        "open_gate": False,
+                        "reason": "No active season ticket for this license plate.",
+                    }
+
+                # 2) Check if there is already an open movement
+                if entry["in_use"]:
+                    return {
+                        "success": False,
+                        "open_gate": False,
+                        "reason": "Season ticket already in use.",
+                    }
+
+                # 3) Validate gate
+                if not entry["gate_exists"]:
+                    return {
+                        "success": False,
+                        "open_gate": False,
+                        "reason": "Gate not found.",
+                    }
+
+                # 4) Only now create movement
+                with span("create_movement"):
+                    movement = self._movement_repo.create(
+                        contract_id=entry["pk"],
+                        entry_time=now,
+                    )
+        except IntegrityError:
+            # A movement opened on the contract after the in-use check
+            # (admin, another process): the OpenMovement one-to-one rejects
+            # the second one and the entry is rolled back.
             return {
                 "success": False,
                 "open_gate": False,
-                "reason": "Gate not found.",
+                "reason": "Season ticket already in use.",
             }
 
-        # 5) Only now create movement
-        movement = self._movement_repo.create(
-            contract=contract,
-            entry_time=now,
-        )
-
         return {
             "success": True,
             "open_gate": True,
@@ -201,6 +290,43 @@ class TicketService(ITicketService):
             "movement_id": movement.pk,
         }
 
+    def _resolve_season_entry(self, normalized_plate, gate_id, now, contract_id=None):
+        """
+        Returns {"pk", "vehicle_id", "valid_from", "valid_to", "in_use",
+        "gate_exists"} for the active season contract of the plate (locked
+        for update), or None if there is none. With a (cached) contract_id,
+        that contract is looked up by primary key instead.
+        """
+        return self._season_entry_query(normalized_plate, gate_id, now, contract_id).first()
+
+    def _season_entry_query(self, normalized_plate, gate_id, now, contract_id=None):
+        if contract_id is not None:
+            lookup = {"pk": contract_id}
+        else:
+            lookup = {"vehicle__license_plate": normalized_plate}
+
+        lock_options = {}
+        if connection.features.has_select_for_update_of:
+            # Lock the contract rows only, not the joined vehicle row.
+            lock_options["of"] = ("self", "contract_ptr")
+
+        return (
+            self._contract_repo
+            .select_for_update(**lock_options)
+            .filter(
+                valid_from__lte=now,
+                valid_to__gte=now,
+                **lookup,
+            )
+            .annotate(
+                in_use=Exists(self._open_movement_repo.filter(contract=OuterRef("pk"))),
+                gate_exists=Exists(self._gate_repo.filter(pk=gate_id)),
+            )
+            .order_by("valid_from")
+            .values("pk", "vehicle_id", "valid_from", "valid_to", "in_use", "gate_exists")
+        )
+
+    @traced("TicketService.exit_with_season_ticket")
     def exit_with_season_ticket(self, license_plate, gate_id):
         """
         Handles exit with a season ticket:
@@ -209,14 +335,47 @@ class TicketService(ITicketService):
         - Find active contract
         - Find open movement (no exit_time)
         - Close movement and open gate
+
+        With the plate cached (contracts.cache), steps 1-2 are skipped and
+        the gate is validated within the open-movement query.
         """
         now = timezone.now()
         normalized_plate = license_plate.strip().upper()
 
+        with span("plate_filter"):
+            registered = self._plate_filter.might_contain(normalized_plate)
+        if not registered:
+            return {
+                "success": False,
+                "open_gate": False,
+                "reason": "No vehicle with this license plate.",
+            }
+
         with transaction.atomic():
+            cached = self._plate_cache.get(normalized_plate, now)
+            if cached is not None:
+                with span("find_open_movement", cached=True):
+                    movement = (
+                        self._movement_repo
+                        .select_for_update()
+                        .filter(open_entry__contract_id=cached.contract_id)
+                        .annotate(gate_exists=Exists(self._gate_repo.filter(pk=gate_id)))
+                        .first()
+                    )
+                if movement is not None:
+                    if not movement.gate_exists:
+                        return {
+                            "success": False,
+                            "open_gate": False,
+                            "reason": "Gate not found.",
+                        }
+                    return self._close_season_movement(movement, now)
+                # No open movement for the cached contract: full lookup below.
+
             # 1) Find vehicle
             try:
-                vehicle = self._vehicle_repo.get(license_plate=normalized_plate)
+                with span("find_vehicle"):
+                    vehicle = self._vehicle_repo.get(license_plate=normalized_plate)
             except self._vehicle_repo.model.DoesNotExist:
                 return {
                     "success": False,
@@ -225,31 +384,37 @@ class TicketService(ITicketService):
                 }
 
             # 2) Active season contract
-            contract = (
-                self._contract_repo
-                .select_for_update()
-                .filter(
-                    vehicle=vehicle,
-                    valid_from__lte=now,
-                    valid_to__gte=now,
+            with span("lock_contract"):
+                contract = (
+                    self._contract_repo
+                    .select_for_update()
+                    .filter(
+                        vehicle=vehicle,
+                        valid_from__lte=now,
+                        valid_to__gte=now,
+                    )
+                    .first()
                 )
-                .first()
-            )
             if not contract:
                 return {
                     "success": False,
                     "open_gate": False,
                     "reason": "No active season ticket for this vehicle.",
                 }
+            self._plate_cache.put(
+                normalized_plate,
+                CachedContract(contract.pk, vehicle.pk, contract.valid_from, contract.valid_to),
+            )
 
             # 3) Open movement
-            movement = (
-                self._movement_repo
-                .select_for_update()
-                .filter(contract=contract, exit_time__isnull=True)
-                .order_by("-entry_time")
-                .first()
-            )
+            with span("find_open_movement", cached=False):
+                movement = (
+                    self._movement_repo
+                    .select_for_update()
+                    .filter(open_entry__contract=contract)
+                    .order_by("-entry_time")
+                    .first()
+                )
             if not movement:
                 return {
                     "success": False,
@@ -259,7 +424,8 @@ class TicketService(ITicketService):
 
             # 4) Validate gate
             try:
-                gate = self._gate_repo.get(pk=gate_id)
+                with span("validate_gate"):
+                    gate = self._gate_repo.get(pk=gate_id)
             except self._gate_repo.model.DoesNotExist:
                 return {
                     "success": False,
@@ -268,6 +434,10 @@ class TicketService(ITicketService):
                 }
 
             # 5) Close movement
+            return self._close_season_movement(movement, now)
+
+    def _close_season_movement(self, movement, now):
+        with span("close_movement"):
             movement.exit_time = now
             movement.save(update_fields=["exit_time"])
 
@@ -279,40 +449,26 @@ class TicketService(ITicketService):
         }
     
     #--------Occasional Ticket Methods--------#
+    @traced("TicketService.start_occasional_entry")
     @transaction.atomic
     def start_occasional_entry(self, license_plate: str, gate_id) -> dict:
         """
         Creates an anonymous single-use ticket for an occasional customer.
 
-        - Finds a free slot (no active season contract now, no open occasional ticket)
+        - Lets the slot allocator claim a free slot from the free-slot pool
+          (no active season contract now, no open occasional ticket); a
+          registered vehicle's size / permit is taken into account
         - Records entry_time
         """
         normalized_plate = license_plate.strip().upper()
         now = timezone.now()
 
-        active_contracts = RegularContract.objects.filter(
-            reserved_slot=OuterRef("pk"),
-            valid_from__lte=now,
-            valid_to__gte=now,
-        )
-
-        open_occasional = OccasionalTicket.objects.filter(
-            slot=OuterRef("pk"),
-            is_closed=False,
-        )
-
-        free_slot = (
-            ParkingSlot.objects
-            .select_for_update()
-            .select_related("slot_type", "area")
-            .annotate(
-                has_season=Exists(active_contracts),
-                has_open_occasional=Exists(open_occasional),
-            )
-            .filter(has_season=False, has_open_occasional=False)
-            .order_by("slot_type__code", "area__name", "number")
-            .first()
-        )
+        vehicle = None
+        with span("find_vehicle"):
+            if self._plate_filter.might_contain(normalized_plate):
+                vehicle = self._vehicle_repo.filter(license_plate=normalized_plate).first()
+        with span("allocate_slot"):
+            free_slot = self._allocator.allocate(self._slot_pool, vehicle=vehicle, at=now)
 
         if not free_slot:
             return {
@@ -320,11 +476,12 @@ class TicketService(ITicketService):
                 "reason": "No free slot available for occasional customers.",
             }
 
-        ticket = OccasionalTicket.objects.create(
-            license_plate=normalized_plate,
-            slot=free_slot,
-            entry_time=now,
-        )
+        with span("create_ticket"):
+            ticket = OccasionalTicket.objects.create(
+                license_plate=normalized_plate,
+                slot=free_slot,
+                entry_time=now,
+            )
 
         return {
             "success": True,
@@ -335,6 +492,7 @@ class TicketService(ITicketService):
 
     # ---------- OCCASIONAL PRICING (CASH DEVICE) ----------
 
+    @traced("TicketService.get_occasional_pricing")
     def get_occasional_pricing(self, license_plate: str) -> dict:
         """
         Used by the cash device:
@@ -345,13 +503,14 @@ class TicketService(ITicketService):
         normalized_plate = license_plate.strip().upper()
         now = timezone.now()
 
-        ticket = (
-            OccasionalTicket.objects
-            .select_related("slot", "slot__slot_type")
-            .filter(license_plate=normalized_plate, is_closed=False)
-            .order_by("-entry_time")
-            .first()
-        )
+        with span("find_ticket"):
+            ticket = (
+                OccasionalTicket.objects
+                .select_related("slot", "slot__slot_type")
+                .filter(license_plate=normalized_plate, is_closed=False)
+                .order_by("-entry_time")
+                .first()
+            )
         if not ticket:
             return {
                 "success": False,
@@ -361,13 +520,15 @@ class TicketService(ITicketService):
         duration = now - ticket.entry_time
         duration_minutes = int(duration.total_seconds() // 60)
 
-        amount = self.pricing_service.get_occasional_price(
-            slot_id=ticket.slot.id,
-            duration_minutes=duration_minutes,
-        )
+        with span("compute_price"):
+            amount = self.pricing_service.get_occasional_price(
+                slot_id=ticket.slot.id,
+                duration_minutes=duration_minutes,
+            )
 
-        ticket.amount_due = amount
-        ticket.save(update_fields=["amount_due"])
+        with span("save_amount_due"):
+            ticket.amount_due = amount
+            ticket.save(update_fields=["amount_due"])
 
         return {
             "success": True,
@@ -378,6 +539,7 @@ class TicketService(ITicketService):
 
     # ---------- OCCASIONAL PAYMENT ----------
 
+    @traced("TicketService.pay_occasional_ticket")
     @transaction.atomic
     def pay_occasional_ticket(self, license_plate: str) -> dict:
         """
@@ -393,10 +555,11 @@ class TicketService(ITicketService):
         amount = pricing_info["amount"]
 
         # process payment via PaymentService (mock)
-        payment_ok = self.payment_service.process_payment(
-            customer_id=None,  # anonymous
-            amount=amount,
-        )
+        with span("process_payment"):
+            payment_ok = self.payment_service.process_payment(
+                customer_id=None,  # anonymous
+                amount=amount,
+            )
         if not payment_ok:
             return {
                 "success": False,
@@ -404,10 +567,11 @@ class TicketService(ITicketService):
             }
 
         now = timezone.now()
-        ticket.amount_paid = amount
-        ticket.paid_at = now
-        ticket.exit_deadline = now + timedelta(minutes=GRACE_PERIOD_MINUTES)
-        ticket.save(update_fields=["amount_paid", "paid_at", "exit_deadline"])
+        with span("save_payment"):
+            ticket.amount_paid = amount
+            ticket.paid_at = now
+            ticket.exit_deadline = now + timedelta(minutes=GRACE_PERIOD_MINUTES)
+            ticket.save(update_fields=["amount_paid", "paid_at", "exit_deadline"])
 
         return {
             "success": True,
@@ -418,6 +582,7 @@ class TicketService(ITicketService):
         }
 
     # ---------- OCCASIONAL EXIT ----------
+    @traced("TicketService.exit_with_occasional_ticket")
     @transaction.atomic
     def exit_with_occasional_ticket(self, license_plate: str, gate_id) -> dict:
         """
@@ -430,14 +595,15 @@ class TicketService(ITicketService):
         normalized_plate = license_plate.strip().upper()
         now = timezone.now()
 
-        ticket = (
-            OccasionalTicket.objects
-            .select_for_update()
-            .select_related("slot")
-            .filter(license_plate=normalized_plate, is_closed=False)
-            .order_by("-entry_time")
-            .first()
-        )
+        with span("lock_ticket"):
+            ticket = (
+                OccasionalTicket.objects
+                .select_for_update()
+                .select_related("slot")
+                .filter(license_plate=normalized_plate, is_closed=False)
+                .order_by("-entry_time")
+                .first()
+            )
         if not ticket:
             return {
                 "success": False,
@@ -465,9 +631,14 @@ class TicketService(ITicketService):
                 "reason": "Grace period expired. Additional payment required.",
             }
 
-        ticket.exit_time = now
-        ticket.is_closed = True
-        ticket.save(update_fields=["exit_time", "is_closed"])
+        with span("close_ticket"):
+            ticket.exit_time = now
+            ticket.is_closed = True
+            ticket.save(update_fields=["exit_time", "is_closed"])
+
+        # Hand the slot back to the free-slot pool once the exit is committed
+        slot = ticket.slot
+        transaction.on_commit(lambda: self._slot_pool.push(slot))
 
         return {
             "success": True,
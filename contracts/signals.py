@@ -0,0 +1,172 @@
+"""
+Signal handlers keeping derived state consistent with the models:
+
+- the plate -> active contract cache (contract and vehicle changes),
+- the OpenMovement projection (movement entry / exit),
+- the occupancy counters (parked season cars and open occasional
+  tickets), updated in the transaction of the triggering write,
+- the occupancy ledger (one interval per movement / ticket),
+- the live free-slot streams of the display boards (after commit).
+"""
+
+from django.db import transaction
+from django.db.models import Subquery
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from contracts.cache import get_active_contract_cache
+from contracts.models import (
+    OPEN_END,
+    Contract,
+    Movement,
+    OccasionalTicket,
+    OccupancyInterval,
+    OpenMovement,
+    RegularContract,
+)
+from parking.data import OccupancyCounterRepository
+from parking.live import get_occupancy_broker
+from vehicles.models import Vehicle
+
+
+def _invalidate(vehicle_id, plate=None):
+    cache = get_active_contract_cache()
+
+    def invalidate():
+        cache.invalidate_vehicle(vehicle_id)
+        if plate is not None:
+            cache.invalidate(plate)
+
+    invalidate()
+    # Again after commit: a gate event running meanwhile may have cached
+    # the pre-commit state.
+    transaction.on_commit(invalidate)
+
+
+def _occupy(slot_id=None, contract_id=None):
+    OccupancyCounterRepository().occupy(slot_id=slot_id, contract_id=contract_id)
+    get_occupancy_broker().notify(1, slot_id=slot_id, contract_id=contract_id)
+
+
+def _release(slot_id=None, contract_id=None):
+    OccupancyCounterRepository().release(slot_id=slot_id, contract_id=contract_id)
+    get_occupancy_broker().notify(-1, slot_id=slot_id, contract_id=contract_id)
+
+
+@receiver(post_save, sender=RegularContract)
+@receiver(post_delete, sender=RegularContract)
+def invalidate_contract_plate(sender, instance, **kwargs):
+    """
+    A season contract was created, changed (e.g. ended early) or deleted.
+    """
+    _invalidate(instance.vehicle_id)
+
+
+@receiver(post_save, sender=Vehicle)
+@receiver(post_delete, sender=Vehicle)
+def invalidate_vehicle_plate(sender, instance, **kwargs):
+    """
+    The license plate of a vehicle may have changed (or a plate was
+    re-registered to another vehicle).
+    """
+    _invalidate(instance.pk, instance.license_plate.strip().upper())
+
+
+@receiver(post_save, sender=Movement)
+def sync_open_movement(sender, instance, created, raw=False, **kwargs):
+    """
+    Entry adds the movement to the "currently parked" projection, exit
+    removes it. Deleted movements cascade.
+    """
+    if raw:
+        return
+    # The projection tells whether this save opened or closed the movement.
+    if instance.exit_time is not None:
+        deleted, _ = OpenMovement.objects.filter(movement_id=instance.pk).delete()
+        if deleted:
+            _release(contract_id=instance.contract_id)
+    elif created:
+        OpenMovement.objects.create(
+            movement=instance,
+            contract_id=instance.contract_id,
+            entry_time=instance.entry_time,
+        )
+        _occupy(contract_id=instance.contract_id)
+    else:
+        _, opened = OpenMovement.objects.update_or_create(
+            movement_id=instance.pk,
+            defaults={"contract_id": instance.contract_id, "entry_time": instance.entry_time},
+        )
+        if opened:
+            _occupy(contract_id=instance.contract_id)
+
+
+@receiver(post_delete, sender=Movement)
+def release_deleted_movement(sender, instance, **kwargs):
+    if instance.exit_time is None:
+        _release(contract_id=instance.contract_id)
+
+
+@receiver(post_delete, sender=OccasionalTicket)
+def release_deleted_ticket(sender, instance, **kwargs):
+    if not instance.is_closed:
+        _release(slot_id=instance.slot_id)
+
+
+@receiver(post_save, sender=Movement)
+def record_movement_interval(sender, instance, created, raw=False, **kwargs):
+    """
+    A season movement occupies the reserved slot of its contract.
+    """
+    if raw:
+        return
+    end_time = instance.exit_time or OPEN_END
+    if created:
+        # The slot is resolved inside the INSERT: no extra round trip.
+        OccupancyInterval.objects.create(
+            kind=OccupancyInterval.Kind.SEASON,
+            movement=instance,
+            slot_id=Subquery(Contract.objects.filter(pk=instance.contract_id).values("reserved_slot_id")[:1]),
+            start_time=instance.entry_time,
+            end_time=end_time,
+        )
+    else:
+        OccupancyInterval.objects.filter(movement_id=instance.pk).update(
+            start_time=instance.entry_time,
+            end_time=end_time,
+        )
+
+
+# Ticket fields the ledger depends on (payment updates are skipped).
+_TICKET_INTERVAL_FIELDS = {"slot", "entry_time", "exit_time", "is_closed"}
+
+
+@receiver(post_save, sender=OccasionalTicket)
+def record_ticket_interval(sender, instance, created, update_fields=None, raw=False, **kwargs):
+    """
+    Issuing a ticket occupies its slot; closing it (exit gate, admin,
+    scripts) releases it. Like the OpenMovement row for movements, the
+    open end of the ticket's ledger interval tells whether this save
+    opened or closed the ticket, so a re-save never counts twice.
+    """
+    if raw:
+        return
+    if update_fields is not None and not _TICKET_INTERVAL_FIELDS & set(update_fields):
+        return
+    end_time = (instance.exit_time or instance.entry_time) if instance.is_closed else OPEN_END
+    fields = {"slot_id": instance.slot_id, "start_time": instance.entry_time, "end_time": end_time}
+    if created:
+        OccupancyInterval.objects.create(kind=OccupancyInterval.Kind.OCCASIONAL, ticket=instance, **fields)
+        if not instance.is_closed:
+            _occupy(slot_id=instance.slot_id)
+        return
+
+    intervals = OccupancyInterval.objects.filter(ticket_id=instance.pk)
+    if instance.is_closed:
+        if intervals.filter(end_time=OPEN_END).update(**fields):
+            _release(slot_id=instance.slot_id)
+            return
+    elif intervals.exclude(end_time=OPEN_END).update(**fields):
+        _occupy(slot_id=instance.slot_id)
+        return
+    intervals.update(**fields)
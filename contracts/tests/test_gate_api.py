@@ -0,0 +1,140 @@
+import json
+from datetime import timedelta
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.db import DatabaseError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from customers.models import Customer
+from vehicles.models import Vehicle
+from parking.data import FreeSlotPool
+from parking.models import ParkingArea, SlotType, ParkingSlot, Gate, GateDeviceToken
+from contracts.cache import get_active_contract_cache
+from contracts.models import Movement, OccasionalTicket, RegularContract
+from contracts.services import TicketService
+
+
+class GateApiTests(TestCase):
+    def setUp(self):
+        get_active_contract_cache().clear()
+
+        area = ParkingArea.objects.create(name="Main", description="")
+        slot_type = SlotType.objects.create(code="SIMPLE", name="Simple", size_rank=1)
+        season_slot = ParkingSlot.objects.create(area=area, number="S1", slot_type=slot_type)
+        ParkingSlot.objects.create(area=area, number="S2", slot_type=slot_type)
+        self.gate = Gate.objects.create(area=area, name="North")
+        self.other_gate = Gate.objects.create(area=area, name="South")
+
+        customer = Customer.objects.create_user(username="device-owner", password="dummy")
+        vehicle = Vehicle.objects.create(owner=customer, license_plate="GA-01-PI")
+        now = timezone.now()
+        RegularContract.objects.create(
+            vehicle=vehicle,
+            customer=customer,
+            valid_from=now - timedelta(days=1),
+            valid_to=now + timedelta(days=30),
+            reserved_slot=season_slot,
+            price=Decimal("100.00"),
+        )
+        FreeSlotPool().refresh()
+
+        self.token, self.key = GateDeviceToken.issue("North controller")
+        self.url = reverse("contracts:api_gate_events")
+
+    def _post(self, events, key=None):
+        return self.client.post(
+            self.url,
+            data=json.dumps({"events": events}),
+            content_type="application/json",
+            HTTP_AUTHORIZATION=f"Token {key or self.key}",
+        )
+
+    def _event(self, event_id, event_type, plate="GA-01-PI", gate=None):
+        return {
+            "id": event_id,
+            "type": event_type,
+            "plate": plate,
+            "gate_id": str((gate or self.gate).pk),
+        }
+
+    def test_requires_valid_token(self):
+        response = self.client.post(self.url, data="{}", content_type="application/json")
+        self.assertEqual(response.status_code, 401)
+
+        response = self._post([self._event("e1", "season_entry")], key="wrong")
+        self.assertEqual(response.status_code, 401)
+
+        self.token.is_active = False
+        self.token.save()
+        response = self._post([self._event("e1", "season_entry")])
+        self.assertEqual(response.status_code, 401)
+        self.assertFalse(Movement.objects.exists())
+
+    def test_batch_returns_one_result_per_event(self):
+        response = self._post([
+            self._event("e1", "season_entry"),
+            self._event("e2", "season_entry", plate="NO-00-NE"),
+            self._event("e3", "teleport"),
+            self._event("e4", "season_exit", plate="ga-01-pi"),
+            self._event("e5", "occasional_entry", plate="OC-55-OC"),
+        ])
+
+        self.assertEqual(response.status_code, 200)
+        results = response.json()["results"]
+        self.assertEqual([r["id"] for r in results], ["e1", "e2", "e3", "e4", "e5"])
+        self.assertEqual([r["success"] for r in results], [True, False, False, True, True])
+        self.assertEqual([r["open_gate"] for r in results], [True, False, False, True, True])
+        self.assertEqual(results[1]["message"], "No vehicle with this license plate.")
+        self.assertEqual(results[2]["message"], "Unknown event type.")
+        self.assertEqual(results[4]["data"]["slot_label"], "Main / S2")
+
+        movement = Movement.objects.get()
+        self.assertIsNotNone(movement.exit_time)
+        self.assertTrue(OccasionalTicket.objects.filter(license_plate="OC-55-OC").exists())
+
+    def test_failing_event_does_not_roll_back_the_batch(self):
+        with (
+            patch.object(TicketService, "start_occasional_entry", side_effect=DatabaseError("locked")),
+            self.assertLogs("contracts.gate_api", "ERROR"),
+        ):
+            response = self._post([
+                self._event("e1", "season_entry"),
+                self._event("e2", "occasional_entry", plate="OC-55-OC"),
+            ])
+
+        results = response.json()["results"]
+        self.assertTrue(results[0]["success"])
+        self.assertFalse(results[1]["success"])
+        self.assertEqual(results[1]["message"], "Event could not be processed. Please retry.")
+        self.assertTrue(Movement.objects.exists())
+
+    def test_gate_bound_token_only_reports_its_gate(self):
+        _, key = GateDeviceToken.issue("South controller", gate=self.other_gate)
+
+        results = self._post([
+            self._event("e1", "season_entry"),
+            self._event("e2", "season_entry", gate=self.other_gate),
+        ], key=key).json()["results"]
+
+        self.assertEqual(results[0]["message"], "Token is not valid for this gate.")
+        self.assertTrue(results[1]["success"])
+
+    @override_settings(GATE_API_MAX_BATCH=2)
+    def test_rejects_malformed_and_oversized_requests(self):
+        response = self._post([self._event(str(i), "season_entry") for i in range(3)])
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.post(
+            self.url,
+            data="not json",
+            content_type="application/json",
+            HTTP_AUTHORIZATION=f"Token {self.key}",
+        )
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.get(self.url, HTTP_AUTHORIZATION=f"Token {self.key}")
+        self.assertEqual(response.status_code, 405)
+        self.assertFalse(Movement.objects.exists())
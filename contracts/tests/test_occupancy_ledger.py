@@ -0,0 +1,88 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.test import TestCase
+from django.utils import timezone
+
+from customers.models import Customer
+from vehicles.models import Vehicle
+from parking.data import MovementRepository
+from parking.models import ParkingArea, SlotType, ParkingSlot
+from parking.services import SlotService
+from contracts.models import OPEN_END, Movement, OccasionalTicket, OccupancyInterval, RegularContract
+
+
+class OccupancyLedgerTests(TestCase):
+    def setUp(self):
+        self.area = ParkingArea.objects.create(name="Main", description="")
+        self.other_area = ParkingArea.objects.create(name="Annex", description="")
+        slot_type = SlotType.objects.create(code="SIMPLE", name="Simple", size_rank=1)
+        self.season_slot = ParkingSlot.objects.create(area=self.area, number="S1", slot_type=slot_type)
+        self.occasional_slot = ParkingSlot.objects.create(area=self.area, number="S2", slot_type=slot_type)
+        ParkingSlot.objects.create(area=self.other_area, number="A1", slot_type=slot_type)
+
+        self.customer = Customer.objects.create_user(username="lena", password="dummy")
+        self.now = timezone.now()
+        self.contract = RegularContract.objects.create(
+            vehicle=Vehicle.objects.create(owner=self.customer, license_plate="LE-00-DG"),
+            customer=self.customer,
+            valid_from=self.now - timedelta(days=10),
+            valid_to=self.now + timedelta(days=30),
+            reserved_slot=self.season_slot,
+            price=Decimal("100.00"),
+        )
+        self.repo = MovementRepository()
+
+    def test_season_and_occasional_intervals_share_one_query_path(self):
+        # Season car: parked 3h ago, left 1h ago. Occasional car: parked 2h ago, still there.
+        movement = Movement.objects.create(contract=self.contract, entry_time=self.now - timedelta(hours=3))
+        movement.exit_time = self.now - timedelta(hours=1)
+        movement.save()
+        OccasionalTicket.objects.create(
+            license_plate="OC-00-LE",
+            slot=self.occasional_slot,
+            entry_time=self.now - timedelta(hours=2),
+        )
+
+        with self.assertNumQueries(1):
+            self.assertEqual(self.repo.count_occupied_at(self.now - timedelta(minutes=90)), 2)
+        self.assertEqual(self.repo.count_occupied_at(self.now), 1)
+        self.assertEqual(self.repo.count_occupied_at(self.now - timedelta(hours=4)), 0)
+        self.assertEqual(self.repo.count_occupied_at(self.now, area=self.other_area), 0)
+
+        occupancy = SlotService().get_current_occupancy(at=self.now - timedelta(minutes=90), area=self.area)
+        self.assertEqual(occupancy["occupied_slots"], 2)
+        self.assertEqual(occupancy["total_slots"], 2)
+
+    def test_closing_ticket_closes_interval(self):
+        ticket = OccasionalTicket.objects.create(
+            license_plate="OC-00-LE",
+            slot=self.occasional_slot,
+            entry_time=self.now - timedelta(hours=2),
+        )
+        self.assertEqual(ticket.occupancy_interval.end_time, OPEN_END)
+
+        ticket.amount_due = Decimal("3.00")
+        with self.assertNumQueries(1):  # payment updates leave the ledger alone
+            ticket.save(update_fields=["amount_due"])
+
+        ticket.exit_time = self.now
+        ticket.is_closed = True
+        ticket.save(update_fields=["exit_time", "is_closed"])
+
+        interval = OccupancyInterval.objects.get(ticket=ticket)
+        self.assertEqual(interval.end_time, self.now)
+        self.assertFalse(interval.is_open)
+
+    def test_contract_without_reserved_slot_occupies_nothing(self):
+        contract = RegularContract.objects.create(
+            vehicle=Vehicle.objects.create(owner=self.customer, license_plate="NO-SL-OT"),
+            customer=self.customer,
+            valid_from=self.now - timedelta(days=1),
+            valid_to=self.now + timedelta(days=1),
+            price=Decimal("10.00"),
+        )
+        movement = Movement.objects.create(contract=contract, entry_time=self.now - timedelta(hours=1))
+
+        self.assertIsNone(movement.occupancy_interval.slot_id)
+        self.assertEqual(self.repo.count_occupied_at(self.now), 0)
@@ -0,0 +1,134 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.db import IntegrityError, transaction
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from customers.models import Customer
+from vehicles.models import Vehicle
+from parking.models import ParkingArea, SlotType, ParkingSlot, Gate
+from parking.services import PaymentService, PricingService, SlotService
+from contracts.models import Movement, OpenMovement, RegularContract
+from contracts.services import TicketService
+
+
+class OpenMovementProjectionTests(TestCase):
+    def setUp(self):
+        self.area = ParkingArea.objects.create(name="Main", description="")
+        slot_type = SlotType.objects.create(code="SIMPLE", name="Simple", size_rank=1)
+        self.slots = [
+            ParkingSlot.objects.create(area=self.area, number=f"P{i}", slot_type=slot_type)
+            for i in range(4)
+        ]
+        customer = Customer.objects.create_user(username="olga", password="dummy")
+        now = timezone.now()
+        self.contracts = [
+            RegularContract.objects.create(
+                vehicle=Vehicle.objects.create(owner=customer, license_plate=f"OM-0{i}-OM"),
+                customer=customer,
+                valid_from=now - timedelta(days=1),
+                valid_to=now + timedelta(days=30),
+                reserved_slot=slot,
+                price=Decimal("100.00"),
+            )
+            for i, slot in enumerate(self.slots[:3])
+        ]
+
+    def test_entry_and_exit_maintain_projection(self):
+        contract = self.contracts[0]
+        movement = Movement.objects.create(contract=contract, entry_time=timezone.now())
+
+        self.assertEqual(OpenMovement.objects.get().movement, movement)
+        self.assertTrue(contract.has_open_movement())
+
+        movement.exit_time = timezone.now()
+        movement.save()
+
+        self.assertFalse(OpenMovement.objects.exists())
+        self.assertFalse(contract.has_open_movement())
+        self.assertIsNone(contract.get_active_movement())
+
+    def test_one_open_movement_per_contract(self):
+        contract = self.contracts[0]
+        Movement.objects.create(contract=contract, entry_time=timezone.now())
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Movement.objects.create(contract=contract, entry_time=timezone.now())
+
+    def test_entry_losing_the_race_is_rejected_as_in_use(self):
+        contract = self.contracts[0]
+        gate = Gate.objects.create(area=self.area, name="Entry")
+        for parked in self.contracts[:2]:
+            Movement.objects.create(contract=parked, entry_time=timezone.now())
+        # The in-use check misses the open movement, as if another process
+        # opened it right after the check.
+        service = TicketService(
+            pricing_service=PricingService(),
+            payment_service=PaymentService(),
+            open_movement_repo=OpenMovement.objects.exclude(contract=contract),
+        )
+
+        result = service.enter_with_season_ticket(contract.vehicle.license_plate, gate.pk)
+
+        self.assertEqual(result["reason"], "Season ticket already in use.")
+        self.assertFalse(result["open_gate"])
+        self.assertEqual(Movement.objects.filter(contract=contract).count(), 1)
+
+    def test_second_open_movement_is_a_validation_error(self):
+        contract = self.contracts[0]
+        movement = Movement.objects.create(contract=contract, entry_time=timezone.now())
+        movement.full_clean()
+        Movement(contract=contract, entry_time=timezone.now(), exit_time=timezone.now()).full_clean()
+
+        with self.assertRaises(ValidationError):
+            Movement(contract=contract, entry_time=timezone.now()).full_clean()
+
+        admin = Customer.objects.create_superuser(username="admin", password="dummy")
+        self.client.force_login(admin)
+        now = timezone.localtime()
+        response = self.client.post(
+            reverse("admin:contracts_movement_add"),
+            {
+                "contract": contract.pk,
+                "entry_time_0": now.strftime("%Y-%m-%d"),
+                "entry_time_1": now.strftime("%H:%M:%S"),
+            },
+        )
+        self.assertContains(response, "Season ticket already in use.")
+        self.assertEqual(Movement.objects.filter(contract=contract).count(), 1)
+
+    def test_current_occupancy_reads_projection(self):
+        now = timezone.now()
+        for contract in self.contracts[:2]:
+            Movement.objects.create(contract=contract, entry_time=now - timedelta(hours=1))
+        Movement.objects.create(
+            contract=self.contracts[2],
+            entry_time=now - timedelta(hours=2),
+            exit_time=now - timedelta(hours=1),
+        )
+
+        occupancy = SlotService().get_current_occupancy(at=now, area=self.area)
+
+        self.assertEqual(occupancy["total_slots"], 4)
+        self.assertEqual(occupancy["occupied_slots"], 2)
+        self.assertEqual(occupancy["occupancy_ratio"], 0.5)
+
+    def test_rebuild_command_repairs_drift(self):
+        now = timezone.now()
+        open_movement = Movement.objects.create(contract=self.contracts[0], entry_time=now)
+        closed = Movement.objects.create(contract=self.contracts[1], entry_time=now)
+        # Bulk updates bypass the signals
+        Movement.objects.filter(pk=closed.pk).update(exit_time=now)
+        OpenMovement.objects.filter(movement=open_movement).delete()
+
+        call_command("rebuild_open_movements", stdout=StringIO())
+
+        self.assertEqual(
+            list(OpenMovement.objects.values_list("movement_id", flat=True)),
+            [open_movement.pk],
+        )
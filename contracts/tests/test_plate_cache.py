@@ -0,0 +1,132 @@
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from customers.models import Customer
+from vehicles.models import Vehicle
+from parking.models import ParkingArea, SlotType, ParkingSlot, Gate
+from parking.services import PricingService, PaymentService
+from contracts.cache import ActiveContractCache, CachedContract, get_active_contract_cache
+from contracts.models import RegularContract
+from contracts.services import TicketService
+
+
+class ActiveContractCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.now = timezone.now()
+
+    def _cached(self, vehicle_id, valid_to=None):
+        return CachedContract(
+            contract_id=uuid.uuid4(),
+            vehicle_id=vehicle_id,
+            valid_from=self.now - timedelta(days=1),
+            valid_to=valid_to or self.now + timedelta(days=1),
+        )
+
+    def test_lru_eviction(self):
+        cache = ActiveContractCache(ttl_seconds=60, max_entries=2)
+        cache.put("AA", self._cached(1))
+        cache.put("BB", self._cached(2))
+        cache.get("AA", self.now)  # AA is now the most recently used
+        cache.put("CC", self._cached(3))
+
+        self.assertIsNotNone(cache.get("AA", self.now))
+        self.assertIsNone(cache.get("BB", self.now))
+        self.assertIsNotNone(cache.get("CC", self.now))
+        self.assertEqual(len(cache), 2)
+
+    def test_ttl_expiry(self):
+        cache = ActiveContractCache(ttl_seconds=-1, max_entries=10)
+        cache.put("AA", self._cached(1))
+        self.assertIsNone(cache.get("AA", self.now))
+        self.assertEqual(len(cache), 0)
+
+    def test_expired_contract_is_not_returned(self):
+        cache = ActiveContractCache(ttl_seconds=60, max_entries=10)
+        cache.put("AA", self._cached(1, valid_to=self.now + timedelta(minutes=1)))
+
+        self.assertIsNotNone(cache.get("AA", self.now))
+        self.assertIsNone(cache.get("AA", self.now + timedelta(minutes=2)))
+
+    def test_invalidate_vehicle(self):
+        cache = ActiveContractCache(ttl_seconds=60, max_entries=10)
+        cache.put("AA", self._cached(1))
+        cache.put("BB", self._cached(2))
+
+        cache.invalidate_vehicle(1)
+
+        self.assertIsNone(cache.get("AA", self.now))
+        self.assertIsNotNone(cache.get("BB", self.now))
+
+
+class GateUsesPlateCacheTests(TestCase):
+    def setUp(self):
+        get_active_contract_cache().clear()
+
+        area = ParkingArea.objects.create(name="Main", description="")
+        slot_type = SlotType.objects.create(code="SIMPLE", name="Simple", size_rank=1)
+        self.slot = ParkingSlot.objects.create(area=area, number="S1", slot_type=slot_type)
+        self.gate = Gate.objects.create(area=area, name="Gate")
+
+        self.customer = Customer.objects.create_user(username="ines", password="dummy")
+        self.vehicle = Vehicle.objects.create(owner=self.customer, license_plate="PC-20-PC")
+        self.contract = self._contract(self.slot)
+
+        self.service = TicketService(
+            pricing_service=PricingService(),
+            payment_service=PaymentService(),
+        )
+
+    def _contract(self, slot):
+        now = timezone.now()
+        return RegularContract.objects.create(
+            vehicle=self.vehicle,
+            customer=self.customer,
+            valid_from=now - timedelta(days=1),
+            valid_to=now + timedelta(days=30),
+            reserved_slot=slot,
+            price=Decimal("100.00"),
+        )
+
+    def test_exit_after_entry_only_touches_the_movement(self):
+        self.assertTrue(self.service.enter_with_season_ticket("PC-20-PC", self.gate.pk)["success"])
+
+        # savepoint, open movement (+ gate check), update movement,
+        # delete open-movement row, decrement occupancy counter, close
+        # ledger interval, release
+        with self.assertNumQueries(7):
+            result = self.service.exit_with_season_ticket("pc-20-pc", self.gate.pk)
+
+        self.assertTrue(result["success"])
+        self.assertEqual(result["reason"], "Exit granted.")
+
+    def test_cached_exit_rejects_unknown_gate(self):
+        self.service.enter_with_season_ticket("PC-20-PC", self.gate.pk)
+
+        result = self.service.exit_with_season_ticket("PC-20-PC", self.contract.pk)
+
+        self.assertFalse(result["success"])
+        self.assertEqual(result["reason"], "Gate not found.")
+
+    def test_contract_creation_invalidates_plate(self):
+        self.service.enter_with_season_ticket("PC-20-PC", self.gate.pk)
+        self.assertIsNotNone(get_active_contract_cache().get("PC-20-PC", timezone.now()))
+
+        self._contract(ParkingSlot.objects.create(area=self.slot.area, number="S2", slot_type=self.slot.slot_type))
+
+        self.assertIsNone(get_active_contract_cache().get("PC-20-PC", timezone.now()))
+
+    def test_stale_entry_falls_back_to_database(self):
+        now = timezone.now()
+        get_active_contract_cache().put(
+            "PC-20-PC",
+            CachedContract(uuid.uuid4(), self.vehicle.pk, now - timedelta(days=1), now + timedelta(days=1)),
+        )
+
+        result = self.service.enter_with_season_ticket("PC-20-PC", self.gate.pk)
+
+        self.assertTrue(result["success"])
+        self.assertEqual(get_active_contract_cache().get("PC-20-PC", now).contract_id, self.contract.pk)
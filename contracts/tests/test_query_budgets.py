@@ -0,0 +1,179 @@
+import json
+from datetime import timedelta
+from decimal import Decimal
+
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from core.testing import Budget, public_methods, query_budget, with_budgets
+from customers.models import Customer
+from vehicles.models import Vehicle
+from vehicles.plate_filter import get_registered_plate_filter
+from parking.availability import get_availability_calendar, get_slot_interval_index
+from parking.compatibility import get_compatibility_matrix
+from parking.data import FreeSlotPool
+from parking.models import ParkingArea, SlotType, ParkingSlot, Gate, GateDeviceToken
+from parking.services import PaymentService, PricingService
+from contracts.cache import get_active_contract_cache
+from contracts.models import Movement, OccasionalTicket, RegularContract
+from contracts.services import TicketService
+
+# Budgets per call, see parking/tests/test_query_budgets.py.
+TICKET_SERVICE_BUDGETS = {
+    "purchase_season_ticket": Budget(queries=9, ms=100),
+    "enter_with_season_ticket": Budget(queries=7, ms=50),
+    "exit_with_season_ticket": Budget(queries=7, ms=50),
+    # 11: an unregistered plate costs the plate filter's version read.
+    "start_occasional_entry": Budget(queries=11, ms=100),
+    "get_occasional_pricing": Budget(queries=3, ms=20),
+    "pay_occasional_ticket": Budget(queries=6, ms=50),
+    "exit_with_occasional_ticket": Budget(queries=6, ms=100),
+}
+# (method, url name, form action or None): budget, including the session
+# and user lookups of the request.
+VIEW_BUDGETS = {
+    ("GET", "contracts:season_ticket_new", None): Budget(queries=3, ms=200),
+    ("POST", "contracts:season_ticket_new", "preview"): Budget(queries=6, ms=200),
+    ("POST", "contracts:api_available_slots", None): Budget(queries=4, ms=100),
+    ("GET", "contracts:season_ticket_list", None): Budget(queries=3, ms=200),
+    ("POST", "contracts:gate_entry", None): Budget(queries=10, ms=200),
+    ("POST", "contracts:gate_exit", None): Budget(queries=10, ms=200),
+    ("POST", "contracts:gate_occasional_entry", None): Budget(queries=14, ms=200),
+    ("POST", "contracts:occasional_cash_device", "calculate"): Budget(queries=5, ms=200),
+    ("POST", "contracts:occasional_cash_device", "pay"): Budget(queries=8, ms=200),
+    ("POST", "contracts:gate_occasional_exit", None): Budget(queries=9, ms=200),
+}
+# Admin change lists: a constant number of queries however many rows are
+# listed (list_select_related covers what __str__ of the columns reads).
+ADMIN_CHANGELIST_BUDGETS = {
+    "contracts_regularcontract": Budget(queries=5, ms=300),
+    "contracts_movement": Budget(queries=5, ms=300),
+    "contracts_openmovement": Budget(queries=5, ms=300),
+    "contracts_occasionalticket": Budget(queries=5, ms=300),
+    "parking_gatedevicetoken": Budget(queries=5, ms=300),
+}
+# A batch of season entries: the token lookup, then every event runs its
+# own flow in a savepoint - a constant number of queries per event.
+GATE_API_BATCH = 5
+GATE_API_BUDGET = Budget(queries=2 + 10 * GATE_API_BATCH, ms=300)
+
+
+class TicketServiceBudgetCompletenessTests(SimpleTestCase):
+    def test_every_entry_point_has_a_budget(self):
+        self.assertEqual(public_methods(TicketService), set(TICKET_SERVICE_BUDGETS))
+
+
+class TicketServiceBudgetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        small = SlotType.objects.create(code="SIMPLE", name="Simple", size_rank=1)
+        area = ParkingArea.objects.create(name="Main", description="")
+        other = ParkingArea.objects.create(name="Roof", description="")
+        cls.gate = Gate.objects.create(area=area, name="North")
+        cls.slots = [
+            ParkingSlot.objects.create(area=area if i % 2 else other, number=f"S{i}", slot_type=small)
+            for i in range(12)
+        ]
+        cls.customer = Customer.objects.create_user(username="budget", password="dummy")
+        now = timezone.now()
+        cls.plates = []
+        cls.contracts = []
+        for i, slot in enumerate(cls.slots[:GATE_API_BATCH + 1]):
+            vehicle = Vehicle.objects.create(owner=cls.customer, license_plate=f"BU-DG-{i:02d}")
+            contract = RegularContract.objects.create(
+                vehicle=vehicle,
+                customer=cls.customer,
+                valid_from=now - timedelta(days=10),
+                valid_to=now + timedelta(days=10),
+                reserved_slot=slot,
+                price=Decimal("100.00"),
+            )
+            cls.plates.append(vehicle.license_plate)
+            cls.contracts.append(contract)
+        cls.buyer = Vehicle.objects.create(owner=cls.customer, license_plate="BU-YE-RR")
+        for i, slot in enumerate(cls.slots[-3:]):
+            OccasionalTicket.objects.create(license_plate=f"OC-CA-{i}", slot=slot, entry_time=now - timedelta(hours=2))
+
+    def setUp(self):
+        # Process-wide caches and indexes are warm in production; build them outside the budgets.
+        get_active_contract_cache().clear()
+        for index in (get_compatibility_matrix(), get_slot_interval_index(), get_availability_calendar()):
+            index.invalidate()
+            index.rebuild()
+        FreeSlotPool().refresh()
+        get_registered_plate_filter().rebuild()
+        self.service = with_budgets(
+            TicketService(pricing_service=PricingService(), payment_service=PaymentService()),
+            TICKET_SERVICE_BUDGETS,
+        )
+        now = timezone.now()
+        self.next_month = (now + timedelta(days=30), now + timedelta(days=60))
+
+    def test_season_ticket_flow(self):
+        valid_from, valid_to = self.next_month
+        result = self.service.purchase_season_ticket(
+            self.customer.pk, self.buyer.license_plate, self.slots[-1].pk, valid_from, valid_to
+        )
+        self.assertTrue(result["success"], result)
+        self.assertTrue(self.service.enter_with_season_ticket(self.plates[0], self.gate.pk)["success"])
+        self.assertTrue(self.service.exit_with_season_ticket(self.plates[0], self.gate.pk)["success"])
+
+    def test_occasional_ticket_flow(self):
+        self.assertTrue(self.service.start_occasional_entry("OC-NE-W1", self.gate.pk)["success"])
+        self.assertTrue(self.service.get_occasional_pricing("OC-CA-0")["success"])
+        self.assertTrue(self.service.pay_occasional_ticket("OC-CA-0")["success"])
+        self.assertTrue(self.service.exit_with_occasional_ticket("OC-CA-0", self.gate.pk)["success"])
+
+    def test_views(self):
+        self.client.force_login(self.customer)
+        valid_from, valid_to = self.next_month
+        period = {"valid_from": valid_from.isoformat(), "valid_to": valid_to.isoformat()}
+        forms = {
+            "contracts:season_ticket_new": {"vehicle_id": self.buyer.pk, "slot_id": self.slots[-1].pk, **period},
+            "contracts:api_available_slots": {"vehicle_id": self.buyer.pk, **period},
+            "contracts:gate_entry": {"license_plate": self.plates[1], "gate_id": self.gate.pk},
+            "contracts:gate_exit": {"license_plate": self.plates[1], "gate_id": self.gate.pk},
+            "contracts:gate_occasional_entry": {"license_plate": "OC-NE-W2", "gate_id": self.gate.pk},
+            "contracts:occasional_cash_device": {"license_plate": "OC-CA-1"},
+            "contracts:gate_occasional_exit": {"license_plate": "OC-CA-1", "gate_id": self.gate.pk},
+        }
+        for (method, name, action), budget in VIEW_BUDGETS.items():
+            label = " ".join(filter(None, (method, name, action)))
+            url = reverse(name)
+            with query_budget(budget.queries, budget.ms, label=label):
+                if method == "GET":
+                    response = self.client.get(url)
+                else:
+                    data = dict(forms[name], **({"action": action} if action else {}))
+                    response = self.client.post(url, data)
+            self.assertEqual(response.status_code, 200, label)
+
+    def test_gate_api_batch(self):
+        _, key = GateDeviceToken.issue("North controller")
+        events = [
+            {"id": f"e{i}", "type": "season_entry", "plate": plate, "gate_id": str(self.gate.pk)}
+            for i, plate in enumerate(self.plates[:GATE_API_BATCH])
+        ]
+        with query_budget(GATE_API_BUDGET.queries, GATE_API_BUDGET.ms, label="api_gate_events"):
+            response = self.client.post(
+                reverse("contracts:api_gate_events"),
+                data=json.dumps({"events": events}),
+                content_type="application/json",
+                HTTP_AUTHORIZATION=f"Token {key}",
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(all(result["success"] for result in response.json()["results"]))
+
+    def test_admin_changelists(self):
+        now = timezone.now()
+        for contract in self.contracts[-3:]:
+            Movement.objects.create(contract=contract, entry_time=now - timedelta(hours=5), exit_time=now)
+            Movement.objects.create(contract=contract, entry_time=now - timedelta(hours=1))
+        for name in ("East controller", "West controller"):
+            GateDeviceToken.issue(name, gate=self.gate)
+        self.client.force_login(Customer.objects.create_superuser(username="admin", password="dummy"))
+        for name, budget in ADMIN_CHANGELIST_BUDGETS.items():
+            with query_budget(budget.queries, budget.ms, label=f"admin {name}"):
+                response = self.client.get(reverse(f"admin:{name}_changelist"))
+            self.assertEqual(response.status_code, 200, name)
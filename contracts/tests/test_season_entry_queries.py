@@ -0,0 +1,99 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.test import TestCase
+from django.utils import timezone
+
+from customers.models import Customer
+from vehicles.models import Vehicle
+from parking.models import ParkingArea, SlotType, ParkingSlot, Gate
+from parking.services import PricingService, PaymentService
+from contracts.cache import get_active_contract_cache
+from contracts.models import Movement, OpenMovement, RegularContract
+from contracts.services import TicketService
+from vehicles.plate_filter import get_registered_plate_filter
+
+
+class SeasonEntryQueryCountTests(TestCase):
+    """
+    Regression tests pinning the number of queries of UC2 entry.
+
+    Inside TestCase the transaction.atomic() block of the service shows up
+    as SAVEPOINT / RELEASE SAVEPOINT; in production it is BEGIN / COMMIT.
+    """
+
+    def setUp(self):
+        get_active_contract_cache().clear()
+
+        area = ParkingArea.objects.create(name="Main", description="")
+        slot_type = SlotType.objects.create(code="SIMPLE", name="Simple", size_rank=1)
+        slot = ParkingSlot.objects.create(area=area, number="S1", slot_type=slot_type)
+        self.gate = Gate.objects.create(area=area, name="Entry")
+
+        customer = Customer.objects.create_user(username="joao", password="dummy")
+        self.vehicle = Vehicle.objects.create(owner=customer, license_plate="QC-10-QC")
+        now = timezone.now()
+        self.contract = RegularContract.objects.create(
+            vehicle=self.vehicle,
+            customer=customer,
+            valid_from=now - timedelta(days=1),
+            valid_to=now + timedelta(days=30),
+            reserved_slot=slot,
+            price=Decimal("100.00"),
+        )
+        # Loaded outside the assertNumQueries blocks
+        get_registered_plate_filter().rebuild()
+
+        self.service = TicketService(
+            pricing_service=PricingService(),
+            payment_service=PaymentService(),
+        )
+
+    def test_entry_granted_with_a_single_lookup(self):
+        # savepoint, resolve (contract + in use + gate), insert movement,
+        # insert open-movement row, bump occupancy counter, insert ledger
+        # interval, release
+        with self.assertNumQueries(7):
+            result = self.service.enter_with_season_ticket("qc-10-qc", self.gate.pk)
+
+        self.assertTrue(result["success"])
+        self.assertTrue(result["open_gate"])
+        self.assertEqual(result["reason"], "Entry granted.")
+        self.assertTrue(
+            Movement.objects.filter(pk=result["movement_id"], contract_id=self.contract.pk).exists()
+        )
+        self.assertTrue(OpenMovement.objects.filter(movement_id=result["movement_id"]).exists())
+
+    def test_ticket_in_use_is_rejected_in_one_round_trip(self):
+        Movement.objects.create(contract=self.contract, entry_time=timezone.now())
+
+        # savepoint, resolve, release
+        with self.assertNumQueries(3):
+            result = self.service.enter_with_season_ticket("QC-10-QC", self.gate.pk)
+
+        self.assertFalse(result["success"])
+        self.assertEqual(result["reason"], "Season ticket already in use.")
+
+    def test_unknown_gate_is_rejected_in_one_round_trip(self):
+        with self.assertNumQueries(3):
+            result = self.service.enter_with_season_ticket("QC-10-QC", self.contract.pk)
+
+        self.assertFalse(result["success"])
+        self.assertEqual(result["reason"], "Gate not found.")
+        self.assertFalse(Movement.objects.exists())
+
+    def test_unregistered_plate_is_rejected_with_one_version_read(self):
+        # The registered-plate filter has never seen this plate, and no
+        # plate was registered anywhere since it was built.
+        with self.assertNumQueries(1):
+            result = self.service.enter_with_season_ticket("XX-99-XX", self.gate.pk)
+        self.assertFalse(result["success"])
+        self.assertEqual(result["reason"], "No vehicle with this license plate.")
+
+    def test_failed_lookup_tells_missing_contract_from_unknown_vehicle(self):
+        RegularContract.objects.filter(pk=self.contract.pk).update(valid_to=timezone.now() - timedelta(hours=1))
+
+        # savepoint, resolve, vehicle exists?, release
+        with self.assertNumQueries(4):
+            result = self.service.enter_with_season_ticket("QC-10-QC", self.gate.pk)
+        self.assertEqual(result["reason"], "No active season ticket for this license plate.")
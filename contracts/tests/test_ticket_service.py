@@ -98,9 +98,17 @@ class TicketServiceTests(TestCase):
         license_plate = "AA-00-AA"
         gate_id = 10
 
-        fake_vehicle = MagicMock()
-        self.vehicle_repo.get.return_value = fake_vehicle
-        self.contract_repo.filter.return_value.exists.return_value = False
+        # The vehicle is known, but the entry query finds no active contract
+        (
+            self.contract_repo
+            .select_for_update.return_value
+            .filter.return_value
+            .annotate.return_value
+            .order_by.return_value
+            .values.return_value
+            .first.return_value
+        ) = None
+        self.vehicle_repo.filter.return_value.exists.return_value = True
 
         result = self.service.enter_with_season_ticket(
             license_plate=license_plate,
@@ -0,0 +1,107 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from unittest.mock import patch
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core.event_coordinator import EventCoordinator
+from core.tracing import get_tracer, traced
+from customers.models import Customer
+from vehicles.models import Vehicle
+from parking.data import FreeSlotPool
+from parking.models import ParkingArea, SlotType, ParkingSlot, Gate
+from contracts.cache import get_active_contract_cache
+from contracts.gate_api import _build_event_coordinator
+from contracts.models import Movement, RegularContract
+from contracts.services import TicketService
+
+# @traced entry points of the flows; with TRACING_ENABLED off at import
+# they are undecorated, so the tests decorate them again.
+TRACED_METHODS = (
+    (EventCoordinator, "enter_parking_flow", "enter_parking_flow"),
+    (EventCoordinator, "exit_parking_flow", "exit_parking_flow"),
+    (EventCoordinator, "occasional_entry_flow", "occasional_entry_flow"),
+    (TicketService, "enter_with_season_ticket", "TicketService.enter_with_season_ticket"),
+    (TicketService, "exit_with_season_ticket", "TicketService.exit_with_season_ticket"),
+    (TicketService, "start_occasional_entry", "TicketService.start_occasional_entry"),
+)
+
+
+class FlowTracingTests(TestCase):
+    def setUp(self):
+        get_active_contract_cache().clear()
+        area = ParkingArea.objects.create(name="Main", description="")
+        slot_type = SlotType.objects.create(code="SIMPLE", name="Simple", size_rank=1)
+        slot = ParkingSlot.objects.create(area=area, number="S1", slot_type=slot_type)
+        ParkingSlot.objects.create(area=area, number="S2", slot_type=slot_type)
+        self.gate = Gate.objects.create(area=area, name="North")
+        customer = Customer.objects.create_user(username="traced", password="dummy")
+        vehicle = Vehicle.objects.create(owner=customer, license_plate="TR-AC-01")
+        now = timezone.now()
+        RegularContract.objects.create(
+            vehicle=vehicle,
+            customer=customer,
+            valid_from=now - timedelta(days=1),
+            valid_to=now + timedelta(days=30),
+            reserved_slot=slot,
+            price=Decimal("100.00"),
+        )
+        FreeSlotPool().refresh()
+        self.coordinator = _build_event_coordinator()
+
+        tracer = get_tracer()
+        self.addCleanup(setattr, tracer, "enabled", tracer.enabled)
+        self.addCleanup(tracer.clear)
+        tracer.clear()
+
+    def _span_names(self, trace):
+        return [record["name"] for record in trace["spans"]]
+
+    def _trace_entry_points(self):
+        with override_settings(TRACING_ENABLED=True):
+            for owner, name, span_name in TRACED_METHODS:
+                patcher = patch.object(owner, name, traced(span_name)(getattr(owner, name)))
+                patcher.start()
+                self.addCleanup(patcher.stop)
+
+    def test_gate_flows_record_their_steps(self):
+        self._trace_entry_points()
+        get_tracer().enabled = True
+        self.assertTrue(self.coordinator.enter_parking_flow("TR-AC-01", self.gate.pk).success)
+        self.assertTrue(self.coordinator.exit_parking_flow("TR-AC-01", self.gate.pk).success)
+        self.assertTrue(self.coordinator.occasional_entry_flow("VI-SI-T1", self.gate.pk).success)
+
+        entry, exit_, occasional = get_tracer().recent()
+        self.assertEqual(
+            self._span_names(entry),
+            [
+                "enter_parking_flow",
+                "TicketService.enter_with_season_ticket",
+                "plate_filter",
+                "resolve_contract",
+                "create_movement",
+            ],
+        )
+        self.assertEqual(entry["spans"][3]["attributes"], {"cached": False})
+        self.assertEqual(
+            self._span_names(exit_),
+            [
+                "exit_parking_flow",
+                "TicketService.exit_with_season_ticket",
+                "plate_filter",
+                "find_open_movement",
+                "close_movement",
+            ],
+        )
+        self.assertEqual(
+            self._span_names(occasional)[2:],
+            ["find_vehicle", "allocate_slot", "create_ticket"],
+        )
+
+    def test_disabled_tracing_records_nothing(self):
+        get_tracer().enabled = False
+        self.assertTrue(self.coordinator.enter_parking_flow("TR-AC-01", self.gate.pk).success)
+        self.assertEqual(get_tracer().recent(), [])
+        self.assertEqual(Movement.objects.count(), 1)
@@ -1,8 +1,15 @@
+from datetime import timedelta
 from unittest.mock import patch, MagicMock
 
 from django.contrib.auth import get_user_model
 from django.test import TestCase
 from django.urls import reverse
+from django.utils import timezone
+
+from parking.availability import get_availability_calendar
+from parking.compatibility import get_compatibility_matrix
+from parking.models import ParkingArea, ParkingSlot, SlotType
+from vehicles.models import Vehicle
 
 
 class SeasonTicketViewsTests(TestCase):
@@ -153,3 +160,45 @@ class SeasonTicketViewsTests(TestCase):
         )
 
         self.assertContains(response, "Exit registered, gate opened.")
+
+
+class SeasonTicketFormPeriodTests(TestCase):
+    """
+    The purchase form posts <input type="datetime-local"> values, which
+    carry no timezone.
+    """
+
+    def setUp(self) -> None:
+        self.user = get_user_model().objects.create_user(username="formuser", password="secret")
+        self.client.login(username="formuser", password="secret")
+        area = ParkingArea.objects.create(name="Main", description="")
+        slot_type = SlotType.objects.create(code="SIMPLE", name="Simple", size_rank=1)
+        self.slot = ParkingSlot.objects.create(area=area, number="S1", slot_type=slot_type)
+        self.vehicle = Vehicle.objects.create(owner=self.user, license_plate="DT-LO-01")
+        # The process-wide indexes may still describe another test's slots.
+        for index in (get_compatibility_matrix(), get_availability_calendar()):
+            index.invalidate()
+        start = timezone.localtime() + timedelta(days=3)
+        self.period = {
+            "valid_from": start.strftime("%Y-%m-%dT%H:%M"),
+            "valid_to": (start + timedelta(days=30)).strftime("%Y-%m-%dT%H:%M"),
+        }
+
+    def test_available_slots_accepts_naive_datetime_local_values(self):
+        response = self.client.post(
+            reverse("contracts:api_available_slots"),
+            {"vehicle_id": self.vehicle.pk, **self.period},
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([slot["id"] for slot in response.json()["slots"]], [self.slot.pk])
+
+    def test_preview_accepts_naive_datetime_local_values(self):
+        response = self.client.post(
+            reverse("contracts:season_ticket_new"),
+            {"vehicle_id": self.vehicle.pk, "slot_id": self.slot.pk, "action": "preview", **self.period},
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context["preview_mode"])
+        self.assertEqual(response.context["errors"], [])
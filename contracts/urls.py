@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import gate_api, views
 
 app_name = "contracts"
 
@@ -11,5 +11,6 @@ urlpatterns = [
     path("gate-occasional-entry/", views.gate_occasional_entry, name="gate_occasional_entry"),
     path("gate-occasional-exit/", views.gate_occasional_exit, name="gate_occasional_exit"),
     path("occasional-cash-device/", views.occasional_cash_device, name="occasional_cash_device"),
-    path("season-tickets/api/available-slots/",views.api_available_slots, name="api_available_slots")
+    path("season-tickets/api/available-slots/",views.api_available_slots, name="api_available_slots"),
+    path("api/gate-events/", gate_api.gate_events, name="api_gate_events"),
 ]
@@ -8,13 +8,25 @@ from parking.models import ParkingSlot, Gate
 from .models import RegularContract
 from .services import TicketService
 from parking.services import PricingService, PaymentService
+from parking.availability import get_availability_calendar
+from parking.compatibility import get_compatibility_matrix
 from django.http import JsonResponse
-from django.db.models import Exists, OuterRef
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+def _parse_form_datetime(raw):
+    """
+    parse_datetime() for the period fields: <input type="datetime-local">
+    sends naive values, which are read in the current timezone.
+    """
+    value = parse_datetime(raw)
+    if value is not None and timezone.is_naive(value):
+        value = timezone.make_aware(value)
+    return value
+
+
 def _get_available_slots_for(vehicle, valid_from, valid_to):
     """
     Returns the list of ParkingSlot objects that are available for this
@@ -25,27 +37,26 @@ def _get_available_slots_for(vehicle, valid_from, valid_to):
     - respecting accessibility rules:
         * vehicles with a disability permit only see accessible slots
         * vehicles without a disability permit do not see accessible slots
-    """
-    overlapping_contracts = RegularContract.objects.filter(
-        reserved_slot=OuterRef("pk"),
-        valid_from__lt=valid_to,
-        valid_to__gt=valid_from,
-    )
 
-    qs = ParkingSlot.objects.select_related("slot_type", "area").annotate(
-        has_overlap=Exists(overlapping_contracts)
-    ).filter(has_overlap=False)
+    Overlaps are answered by the in-memory availability calendar and
+    compatibility by the precomputed compatibility matrix, so the AJAX
+    endpoint only loads the resulting slots from the database.
+    """
+    matrix = get_compatibility_matrix()
+    candidate_ids = matrix.slot_ids_for(vehicle)
 
     has_disability = getattr(vehicle, "has_disability_permit", False)
 
     if has_disability:
-        qs = qs.filter(is_accessible=True)
+        candidate_ids = candidate_ids & matrix.accessible_slot_ids
     else:
-        qs = qs.filter(is_accessible=False)
+        candidate_ids = candidate_ids - matrix.accessible_slot_ids
 
-    compatible_slots = [slot for slot in qs if vehicle.can_use_slot(slot)]
+    free_ids = get_availability_calendar().free_slot_ids(candidate_ids, valid_from, valid_to)
 
-    return compatible_slots
+    return list(
+        ParkingSlot.objects.select_related("slot_type", "area").filter(pk__in=list(free_ids))
+    )
 
 def _build_ticket_service():
     pricing = PricingService()
@@ -93,8 +104,8 @@ def season_ticket_new(request):
         vehicle = None
 
         if not errors and action != "cancel":
-            vf = parse_datetime(valid_from_raw)
-            vt = parse_datetime(valid_to_raw)
+            vf = _parse_form_datetime(valid_from_raw)
+            vt = _parse_form_datetime(valid_to_raw)
             if not vf or not vt or vf >= vt:
                 errors.append("Invalid period.")
             else:
@@ -190,8 +201,8 @@ def api_available_slots(request):
     if not vehicle_id or not valid_from_raw or not valid_to_raw:
         return JsonResponse({"slots": []})
 
-    vf = parse_datetime(valid_from_raw)
-    vt = parse_datetime(valid_to_raw)
+    vf = _parse_form_datetime(valid_from_raw)
+    vt = _parse_form_datetime(valid_to_raw)
 
     if not vf or not vt or vf >= vt:
         return JsonResponse({"slots": []})
@@ -9,3 +9,11 @@ class CoreConfig(AppConfig):
 
     # The name attribute specifies the name of the app that this configuration belongs to.
     name: str = 'core'
+
+    def ready(self):
+        # Install the slow-query log on every new database connection.
+        from django.db.backends.signals import connection_created
+
+        from core.querylog import install_slow_query_log
+
+        connection_created.connect(install_slow_query_log, dispatch_uid="core.slow_query_log")
@@ -0,0 +1,61 @@
+"""
+Small helpers shared by the benchmark management commands.
+
+Timings are collected in seconds and reported in milliseconds.
+"""
+
+import math
+import time
+from contextlib import contextmanager
+
+
+def percentile(sorted_values, fraction: float) -> float:
+    """
+    Nearest-rank percentile of an already sorted list (fraction in [0, 1]).
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(durations) -> dict:
+    """
+    Returns count, mean, p50, p95, p99 and max (in ms) for a list of durations in seconds.
+    """
+    values = sorted(durations)
+    count = len(values)
+    to_ms = lambda seconds: round(seconds * 1000, 3)  # noqa: E731
+    return {
+        "count": count,
+        "mean_ms": to_ms(sum(values) / count) if count else 0.0,
+        "p50_ms": to_ms(percentile(values, 0.50)),
+        "p95_ms": to_ms(percentile(values, 0.95)),
+        "p99_ms": to_ms(percentile(values, 0.99)),
+        "max_ms": to_ms(values[-1]) if count else 0.0,
+    }
+
+
+@contextmanager
+def timed(durations: list):
+    """
+    Appends the duration of the with-block (in seconds) to 'durations'.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        durations.append(time.perf_counter() - started)
+
+
+class QueryCounter:
+    """
+    connection.execute_wrapper counting queries (no DEBUG query log limit).
+    """
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
@@ -1,6 +1,8 @@
 from dataclasses import dataclass
 from datetime import datetime
 
+from core.tracing import span, traced
+
 
 @dataclass
 class FlowResult:
@@ -45,6 +47,7 @@ class EventCoordinator:
     # UC1 – Purchase Season Ticket
     # ============================================================
 
+    @traced("purchase_season_ticket_flow")
     def purchase_season_ticket_flow(
         self,
         customer_id,
@@ -65,24 +68,31 @@ class EventCoordinator:
         """
 
         # 1. Validate vehicle
-        vehicle = self.vehicle_service.get_by_plate(vehicle_plate)
+        with span("validate_vehicle"):
+            vehicle = self.vehicle_service.get_by_plate(vehicle_plate)
         if not vehicle:
             return FlowResult(False, "Vehicle not found.")
 
         # 2. Check availability
         period = (valid_from, valid_to)
-        if not self.slot_service.verify_slot_available(slot_id, period):
+        with span("check_availability"):
+            available = self.slot_service.verify_slot_available(slot_id, period)
+        if not available:
             return FlowResult(False, "Selected slot is no longer available.")
 
         # 3. Compatibility
-        if not self.slot_service.verify_vehicle_slot_compatibility(vehicle, slot_id):
+        with span("check_compatibility"):
+            compatible = self.slot_service.verify_vehicle_slot_compatibility(vehicle, slot_id)
+        if not compatible:
             return FlowResult(False, "Vehicle incompatible with the chosen slot.")
 
         # 4. Pricing
-        price = self.pricing_service.get_season_price(slot_id, period)
+        with span("compute_price"):
+            price = self.pricing_service.get_season_price(slot_id, period)
 
         # 5. Payment
-        payment_ok = self.payment_service.process_payment(customer_id, price)
+        with span("process_payment"):
+            payment_ok = self.payment_service.process_payment(customer_id, price)
         if not payment_ok:
             return FlowResult(False, "Payment failed. Ticket not created.")
 
@@ -101,6 +111,7 @@ class EventCoordinator:
     # UC2 – Enter Parking with Season Ticket
     # ============================================================
 
+    @traced("enter_parking_flow")
     def enter_parking_flow(self, license_plate, gate_id) -> FlowResult:
         """
         Full UC2 flow:
@@ -116,6 +127,52 @@ class EventCoordinator:
         )
 
         if not result["success"]:
-            return FlowResult(False, result["message"])
+            return FlowResult(False, result["reason"])
+
+        return FlowResult(True, "Gate opened.", data=result)
+
+    @traced("exit_parking_flow")
+    def exit_parking_flow(self, license_plate, gate_id) -> FlowResult:
+        """
+        Exit with a season ticket: closes the open movement (TicketService).
+        """
+        result = self.ticket_service.exit_with_season_ticket(
+            license_plate, gate_id
+        )
+
+        if not result["success"]:
+            return FlowResult(False, result["reason"])
+
+        return FlowResult(True, "Gate opened.", data=result)
+
+    # ============================================================
+    # UC3 – Occasional parking at the gates
+    # ============================================================
+
+    @traced("occasional_entry_flow")
+    def occasional_entry_flow(self, license_plate, gate_id) -> FlowResult:
+        """
+        Issues a single-use ticket and assigns a free slot (TicketService).
+        """
+        result = self.ticket_service.start_occasional_entry(
+            license_plate, gate_id
+        )
+
+        if not result["success"]:
+            return FlowResult(False, result["reason"])
+
+        return FlowResult(True, "Gate opened.", data=result)
+
+    @traced("occasional_exit_flow")
+    def occasional_exit_flow(self, license_plate, gate_id) -> FlowResult:
+        """
+        Lets a paid occasional ticket out within its grace period (TicketService).
+        """
+        result = self.ticket_service.exit_with_occasional_ticket(
+            license_plate, gate_id
+        )
+
+        if not result["success"]:
+            return FlowResult(False, result["reason"])
 
         return FlowResult(True, "Gate opened.", data=result)
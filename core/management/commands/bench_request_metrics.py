@@ -0,0 +1,226 @@
+import json
+import time
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.http import HttpResponse
+from django.test import Client, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from contracts.models import RegularContract
+from core.benchmarking import summarize, timed
+from core.metrics import RequestMetrics, get_request_metrics, totals
+from core.middleware import RequestMetricsMiddleware, SqlTimer
+from customers.models import Customer
+from parking.models import Gate, GateDeviceToken, ParkingArea, ParkingSlot, SlotType
+from vehicles.models import Vehicle
+
+MIDDLEWARE_PATH = "core.middleware.RequestMetricsMiddleware"
+ENDPOINTS = {
+    "gate API": ("contracts:api_gate_events",),
+    "gate form": ("contracts:gate_entry", "contracts:gate_exit"),
+}
+
+
+class Command(BaseCommand):
+    """
+    Overhead of RequestMetricsMiddleware on the gate endpoints.
+
+    Season-ticket holders of a temporary area enter and leave through the
+    gate API (one event per request) and the gate form views, alternately
+    with a client running the full middleware stack and one without the
+    metrics middleware; rounds alternate which client goes first. Reports
+    the p50 / mean latency of both and the difference.
+
+    Request latencies vary by more than the middleware costs, so the
+    command also times the middleware's own work: per request (installing
+    the execute_wrapper, record) around a view doing nothing, and per
+    query (SqlTimer). Their cost for an endpoint's queries per request,
+    relative to its p50, is checked against --max-overhead. All writes
+    are rolled back.
+    """
+
+    help = "Measure the overhead of the request metrics middleware on the gate endpoints."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--vehicles", type=int, default=50, help="Season-ticket holders (default: 50).")
+        parser.add_argument("--rounds", type=int, default=10, help="Entry/exit rounds per client (default: 10).")
+        parser.add_argument(
+            "--max-overhead",
+            type=float,
+            default=2.0,
+            help="Fail if the bookkeeping exceeds this percentage of an endpoint's p50 (default: 2).",
+        )
+        parser.add_argument("--json", action="store_true", help="Print the results as JSON.")
+
+    def handle(self, *args, **options):
+        if MIDDLEWARE_PATH not in settings.MIDDLEWARE:
+            raise CommandError(f"{MIDDLEWARE_PATH} is not in MIDDLEWARE.")
+        if options["vehicles"] < 1 or options["rounds"] < 1:
+            raise CommandError("--vehicles and --rounds must be positive.")
+
+        with transaction.atomic():
+            endpoints = self._run(options["vehicles"], options["rounds"])
+            transaction.set_rollback(True)
+        bookkeeping = self._bookkeeping()
+        for run in endpoints:
+            cost_us = bookkeeping["per_request_us"] + bookkeeping["per_query_us"] * run["queries_per_request"]
+            run["bookkeeping_share"] = round(cost_us / 1000 / run["without"]["p50_ms"], 5)
+
+        if options["json"]:
+            self.stdout.write(json.dumps({"endpoints": endpoints, "bookkeeping": bookkeeping}, indent=2))
+        else:
+            self.stdout.write(
+                f"{'endpoint':<10} {'requests':>8} {'p50 off':>8} {'p50 on':>8} {'p50 diff':>9} "
+                f"{'mean off':>9} {'mean on':>8} {'mean diff':>9} {'bookkeeping':>11}"
+            )
+            for run in endpoints:
+                off, on = run["without"], run["with"]
+                self.stdout.write(
+                    f"{run['endpoint']:<10} {on['count']:>8} {off['p50_ms']:>8.3f} {on['p50_ms']:>8.3f} "
+                    f"{run['p50_change']:>+9.1%} {off['mean_ms']:>9.3f} {on['mean_ms']:>8.3f} "
+                    f"{run['mean_change']:>+9.1%} {run['bookkeeping_share']:>11.2%}"
+                )
+            self.stdout.write(
+                f"Middleware bookkeeping: {bookkeeping['per_request_us']:.1f} us per request "
+                f"+ {bookkeeping['per_query_us']:.2f} us per query."
+            )
+
+        worst = max(run["bookkeeping_share"] for run in endpoints)
+        if worst * 100 > options["max_overhead"]:
+            raise CommandError(f"Bookkeeping takes {worst:.2%} of a gate request, above {options['max_overhead']}%.")
+
+    # ------------------------------------------------------------------
+    # Gate endpoints
+    # ------------------------------------------------------------------
+    def _run(self, vehicle_count: int, rounds: int) -> list:
+        tag = uuid.uuid4().hex[:8]
+        slot_type = SlotType.objects.create(code=f"BENCH-{tag}", name="Benchmark", size_rank=1)
+        area = ParkingArea.objects.create(name=f"bench-metrics-{tag}", description="Temporary benchmark area")
+        user = Customer.objects.create_user(username=f"bench-metrics-{tag}")
+        gate = Gate.objects.create(area=area, name="Benchmark gate")
+        _, key = GateDeviceToken.issue(f"bench-metrics-{tag}", gate=gate)
+        now = timezone.now()
+        plates = []
+        for i in range(vehicle_count):
+            vehicle = Vehicle.objects.create(owner=user, license_plate=f"RM-{tag.upper()}-{i}")
+            RegularContract.objects.create(
+                vehicle=vehicle,
+                customer=user,
+                valid_from=now - timedelta(days=1),
+                valid_to=now + timedelta(days=30),
+                reserved_slot=ParkingSlot.objects.create(area=area, number=f"M{i}", slot_type=slot_type),
+                price=Decimal("0.00"),
+            )
+            plates.append(vehicle.license_plate)
+
+        clients = {"with": self._client(user), "without": None}
+        without_middleware = [path for path in settings.MIDDLEWARE if path != MIDDLEWARE_PATH]
+        with override_settings(MIDDLEWARE=without_middleware):
+            # The test client builds its middleware chain on the first request.
+            clients["without"] = self._client(user)
+
+        metrics = get_request_metrics()
+        before = metrics.snapshot()
+        durations = {(endpoint, mode): [] for endpoint in ENDPOINTS for mode in clients}
+        for round_number in range(rounds):
+            modes = ("with", "without") if round_number % 2 == 0 else ("without", "with")
+            for mode in modes:
+                client = clients[mode]
+                for event_type in ("season_entry", "season_exit"):
+                    for plate in plates:
+                        event = {"id": plate, "type": event_type, "plate": plate, "gate_id": str(gate.pk)}
+                        with timed(durations[("gate API", mode)]):
+                            response = client.post(
+                                reverse("contracts:api_gate_events"),
+                                data=json.dumps({"events": [event]}),
+                                content_type="application/json",
+                                HTTP_AUTHORIZATION=f"Token {key}",
+                            )
+                        if not response.json()["results"][0]["success"]:
+                            raise CommandError(f"Gate API {event_type} failed for {plate}.")
+                for url_name in ("contracts:gate_entry", "contracts:gate_exit"):
+                    for plate in plates:
+                        with timed(durations[("gate form", mode)]):
+                            client.post(reverse(url_name), {"license_plate": plate, "gate_id": str(gate.pk)})
+
+        after = metrics.snapshot()
+        results = []
+        for endpoint, views in ENDPOINTS.items():
+            off = summarize(durations[(endpoint, "without")])
+            on = summarize(durations[(endpoint, "with")])
+            requests = queries = 0
+            for view in views:
+                now_totals = totals(after[view])
+                before_totals = totals(before[view]) if view in before else {"requests": 0, "queries": 0}
+                requests += now_totals["requests"] - before_totals["requests"]
+                queries += now_totals["queries"] - before_totals["queries"]
+            results.append(
+                {
+                    "endpoint": endpoint,
+                    "without": off,
+                    "with": on,
+                    "p50_change": round(on["p50_ms"] / off["p50_ms"] - 1, 5),
+                    "mean_change": round(on["mean_ms"] / off["mean_ms"] - 1, 5),
+                    "queries_per_request": round(queries / requests, 2),
+                }
+            )
+        return results
+
+    @staticmethod
+    def _client(user) -> Client:
+        client = Client(HTTP_HOST="localhost")
+        client.force_login(user)
+        client.get(reverse("core:health_check"))
+        return client
+
+    # ------------------------------------------------------------------
+    # Bookkeeping
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _bookkeeping(calls: int = 20000) -> dict:
+        """
+        Per-request cost of the middleware around a view that does
+        nothing, minus the cost of calling that view directly, and the
+        per-query cost of SqlTimer on a trivial query.
+        """
+        response = HttpResponse()
+        request = SimpleNamespace(resolver_match=SimpleNamespace(view_name="bench:noop"))
+
+        def view(request):
+            return response
+
+        middleware = RequestMetricsMiddleware(view)
+        middleware.metrics = RequestMetrics(directory=None)
+
+        started = time.perf_counter()
+        for _ in range(calls):
+            view(request)
+        bare = time.perf_counter() - started
+
+        started = time.perf_counter()
+        for _ in range(calls):
+            middleware(request)
+        wrapped = time.perf_counter() - started
+
+        with connection.cursor() as cursor:
+            started = time.perf_counter()
+            for _ in range(calls):
+                cursor.execute("SELECT 1")
+            bare_queries = time.perf_counter() - started
+            with connection.execute_wrapper(SqlTimer()):
+                started = time.perf_counter()
+                for _ in range(calls):
+                    cursor.execute("SELECT 1")
+                timed_queries = time.perf_counter() - started
+        return {
+            "calls": calls,
+            "per_request_us": round(max(wrapped - bare, 0.0) / calls * 1e6, 3),
+            "per_query_us": round(max(timed_queries - bare_queries, 0.0) / calls * 1e6, 3),
+        }
@@ -0,0 +1,263 @@
+"""
+Per-view request metrics: latency histogram, SQL query count and SQL
+time per URL name, recorded by core.middleware.RequestMetricsMiddleware
+and exported in the Prometheus text format (core.views.metrics).
+
+Recording is lock-free: every thread writes to its own shard (a dict of
+URL name -> counters), so concurrent requests of a worker never contend.
+A snapshot sums the shards; counters only grow, so reading while other
+threads record merely misses their latest requests. When a thread ends,
+its shard is folded into a shared total and dropped.
+
+Each worker process has its own aggregate. With several workers (e.g.
+gunicorn), set REQUEST_METRICS_DIR to a directory shared by them: every
+worker writes its snapshot there at most every
+REQUEST_METRICS_FLUSH_SECONDS and the endpoint merges all files, so
+whichever worker answers the scrape reports the totals. Clear the
+directory when the service is (re)started - files of earlier processes
+are merged as they are.
+"""
+
+import bisect
+import glob
+import json
+import logging
+import os
+import threading
+import time
+import weakref
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds in seconds (Prometheus' default buckets); +Inf is implicit.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DEFAULT_FLUSH_SECONDS = 5
+# Label of requests that did not resolve to a URL pattern (404s).
+UNRESOLVED = "<unresolved>"
+FILE_PATTERN = "request-metrics-{pid}.json"
+
+# Positions in a series: counts per latency bucket (the last one is +Inf)
+# follow the totals.
+_COUNT, _SECONDS, _QUERIES, _SQL_SECONDS = range(4)
+_BUCKETS = 4
+
+
+def _new_series() -> list:
+    return [0, 0.0, 0, 0.0] + [0] * (len(LATENCY_BUCKETS) + 1)
+
+
+def totals(series) -> dict:
+    """
+    Request count, seconds, SQL queries and SQL seconds of a series.
+    """
+    return {
+        "requests": series[_COUNT],
+        "seconds": series[_SECONDS],
+        "queries": series[_QUERIES],
+        "sql_seconds": series[_SQL_SECONDS],
+    }
+
+
+def merge_snapshots(snapshots) -> dict:
+    """
+    Sums snapshots (URL name -> series) of several threads or workers.
+    """
+    merged = {}
+    for snapshot in snapshots:
+        for view, series in snapshot.items():
+            total = merged.get(view)
+            if total is None:
+                merged[view] = list(series)
+            else:
+                for i, value in enumerate(series):
+                    total[i] += value
+    return merged
+
+
+class _ShardOwner:
+    """
+    Thread-local holder of a thread's shard (dicts cannot be weakly
+    referenced).
+    """
+
+    __slots__ = ("shard", "__weakref__")
+
+    def __init__(self):
+        self.shard = {}
+
+
+class RequestMetrics:
+    """
+    Aggregate of one worker process; record() is called once per request.
+    """
+
+    def __init__(self, directory=None, flush_seconds=None):
+        if directory is None:
+            directory = getattr(settings, "REQUEST_METRICS_DIR", None)
+        if flush_seconds is None:
+            flush_seconds = getattr(settings, "REQUEST_METRICS_FLUSH_SECONDS", DEFAULT_FLUSH_SECONDS)
+        self._directory = directory
+        self._flush_seconds = flush_seconds
+        self._local = threading.local()
+        self._shards = {}  # id(shard) -> shard of a live thread
+        self._retired = {}  # counts of the threads that have ended
+        self._shards_lock = threading.Lock()  # taken when a thread's shard is created or retired
+        self._flush_lock = threading.Lock()  # never waited for: a busy flush is skipped
+        self._flushed_at = time.monotonic()
+
+    @property
+    def directory(self):
+        return self._directory
+
+    def _shard(self) -> dict:
+        owner = getattr(self._local, "owner", None)
+        if owner is None:
+            owner = self._local.owner = _ShardOwner()
+            with self._shards_lock:
+                self._shards[id(owner.shard)] = owner.shard
+            # The thread-local value goes when the thread ends: fold the
+            # shard into the retired counts then, so thread-per-request
+            # servers do not pile up shards.
+            weakref.finalize(owner, self._retire, owner.shard)
+        return owner.shard
+
+    def _retire(self, shard: dict):
+        with self._shards_lock:
+            self._shards.pop(id(shard), None)
+            self._retired = merge_snapshots([self._retired, shard])
+
+    def record(self, view: str, seconds: float, queries: int, sql_seconds: float):
+        shard = self._shard()
+        series = shard.get(view)
+        if series is None:
+            series = shard[view] = _new_series()
+        series[_COUNT] += 1
+        series[_SECONDS] += seconds
+        series[_QUERIES] += queries
+        series[_SQL_SECONDS] += sql_seconds
+        series[_BUCKETS + bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+
+        if self._directory and time.monotonic() - self._flushed_at >= self._flush_seconds:
+            self.flush()
+
+    def snapshot(self) -> dict:
+        """
+        URL name -> series of this process.
+        """
+        with self._shards_lock:
+            shards = list(self._shards.values())
+            retired = self._retired
+        # dict.copy() and list() of a shard are atomic under the GIL.
+        return merge_snapshots(
+            [retired] + [{view: list(series) for view, series in shard.copy().items()} for shard in shards]
+        )
+
+    def reset(self):
+        with self._shards_lock:
+            self._retired = {}
+            for shard in self._shards.values():
+                shard.clear()
+
+    # ------------------------------------------------------------------
+    # Merging across worker processes
+    # ------------------------------------------------------------------
+    def _path(self, pid=None) -> str:
+        return os.path.join(self._directory, FILE_PATTERN.format(pid=pid or os.getpid()))
+
+    def flush(self) -> bool:
+        """
+        Writes this process' snapshot to the shared directory. Returns
+        False if no directory is configured or another thread is flushing.
+        """
+        if not self._directory or not self._flush_lock.acquire(blocking=False):
+            return False
+        try:
+            self._flushed_at = time.monotonic()
+            path = self._path()
+            tmp_path = f"{path}.tmp"
+            try:
+                with open(tmp_path, "w") as target:
+                    json.dump(self.snapshot(), target)
+                os.replace(tmp_path, path)
+            except OSError:
+                logger.exception("Could not write request metrics to %s", path)
+                return False
+            return True
+        finally:
+            self._flush_lock.release()
+
+    def collect(self) -> tuple[dict, int]:
+        """
+        The snapshot of all workers sharing the directory (this process
+        read live, the others from their last flush) and the number of
+        workers it covers.
+        """
+        snapshots = [self.snapshot()]
+        if self._directory:
+            own_path = self._path()
+            for path in glob.glob(os.path.join(self._directory, FILE_PATTERN.format(pid="*"))):
+                if path == own_path:
+                    continue
+                try:
+                    with open(path) as source:
+                        snapshots.append(json.load(source))
+                except (OSError, ValueError):
+                    logger.warning("Skipping unreadable request metrics file %s", path)
+        return merge_snapshots(snapshots), len(snapshots)
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def render_prometheus(snapshot: dict, workers: int = 1) -> str:
+    """
+    Prometheus text exposition format (version 0.0.4) of a snapshot.
+    """
+    lines = [
+        "# HELP django_request_duration_seconds Request latency per URL name.",
+        "# TYPE django_request_duration_seconds histogram",
+    ]
+    views = sorted(snapshot)
+    for view in views:
+        series = snapshot[view]
+        label = _label(view)
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS, series[_BUCKETS:]):
+            cumulative += count
+            lines.append(f'django_request_duration_seconds_bucket{{view="{label}",le="{bound}"}} {cumulative}')
+        lines.append(f'django_request_duration_seconds_bucket{{view="{label}",le="+Inf"}} {series[_COUNT]}')
+        lines.append(f'django_request_duration_seconds_sum{{view="{label}"}} {series[_SECONDS]:.6f}')
+        lines.append(f'django_request_duration_seconds_count{{view="{label}"}} {series[_COUNT]}')
+
+    for name, position, help_text, fmt in (
+        ("django_request_sql_queries_total", _QUERIES, "SQL queries run by requests, per URL name.", "{}"),
+        ("django_request_sql_seconds_total", _SQL_SECONDS, "Time spent in SQL by requests, per URL name.", "{:.6f}"),
+    ):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} counter")
+        for view in views:
+            lines.append(f'{name}{{view="{_label(view)}"}} {fmt.format(snapshot[view][position])}')
+
+    lines.append("# HELP django_request_metrics_workers Worker processes merged into these metrics.")
+    lines.append("# TYPE django_request_metrics_workers gauge")
+    lines.append(f"django_request_metrics_workers {workers}")
+    return "\n".join(lines) + "\n"
+
+
+_request_metrics = None
+_request_metrics_lock = threading.Lock()
+
+
+def get_request_metrics() -> RequestMetrics:
+    """
+    Returns the process-wide request metrics.
+    """
+    global _request_metrics
+    if _request_metrics is None:
+        with _request_metrics_lock:
+            if _request_metrics is None:
+                _request_metrics = RequestMetrics()
+    return _request_metrics
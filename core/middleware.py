@@ -0,0 +1,57 @@
+import time
+
+from django.db import connection
+
+from core.metrics import UNRESOLVED, get_request_metrics
+
+
+class SqlTimer:
+    """
+    connection.execute_wrapper counting queries and their time.
+    """
+
+    __slots__ = ("count", "seconds")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - started
+            self.count += 1
+
+
+class RequestMetricsMiddleware:
+    """
+    Records latency, SQL query count and SQL time of every request under
+    its URL name (see core.metrics). Put it first in MIDDLEWARE so the
+    session and authentication queries are included.
+
+    Streaming responses (the live occupancy streams) are recorded when the
+    view returns the response, not when the stream ends.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.metrics = get_request_metrics()
+
+    def __call__(self, request):
+        timer = SqlTimer()
+        started = time.perf_counter()
+        # Not connection.execute_wrapper(), which pops the last wrapper on
+        # exit: a connection opened during the request adds wrappers of
+        # its own (core.querylog), so remove this timer by identity.
+        connection.execute_wrappers.append(timer)
+        try:
+            response = self.get_response(request)
+        finally:
+            connection.execute_wrappers.remove(timer)
+        elapsed = time.perf_counter() - started
+
+        match = request.resolver_match
+        self.metrics.record(match.view_name if match else UNRESOLVED, elapsed, timer.count, timer.seconds)
+        return response
@@ -0,0 +1,199 @@
+"""
+Slow-query log and query-plan helpers.
+
+SlowQueryLog is an execute wrapper installed on every database connection
+when it is opened (core.apps), if SLOW_QUERY_THRESHOLD_MS is set. Any
+statement taking at least that long is logged to the "core.slow_queries"
+logger - the settings route it to a rotating file (SLOW_QUERY_LOG_PATH) -
+with its duration, parameters and the call site: the project frames of
+the stack, innermost last. Queries below the threshold cost two clock
+reads.
+
+explain() returns the plan of a queryset (EXPLAIN QUERY PLAN on SQLite,
+EXPLAIN FORMAT=JSON on MySQL, EXPLAIN on PostgreSQL), full_scans() the tables a plan reads in full
+rather than through an index and used_indexes() the indexes it reads.
+parking.hot_queries applies them to the hot queries of the gates and the
+availability search.
+"""
+
+import json
+import logging
+import os
+import re
+import time
+import traceback
+
+import django
+from django.conf import settings
+from django.db import connections, transaction
+
+logger = logging.getLogger("core.slow_queries")
+
+# Frames from these directories are not the call site.
+_LIBRARY_DIRS = tuple(
+    os.path.dirname(os.path.dirname(module.__file__)) + os.sep
+    for module in (django, logging)
+)
+MAX_STACK_FRAMES = 8
+
+
+def _call_site(limit=MAX_STACK_FRAMES) -> str:
+    frames = [
+        frame
+        for frame in traceback.extract_stack()
+        if not frame.filename.startswith(_LIBRARY_DIRS) and frame.filename != __file__
+    ]
+    return "".join(traceback.format_list(frames[-limit:]))
+
+
+class SlowQueryLog:
+    """
+    connection.execute_wrapper logging statements slower than threshold_ms.
+    """
+
+    def __init__(self, threshold_ms: float):
+        self.threshold_ms = threshold_ms
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            if elapsed_ms >= self.threshold_ms:
+                logger.warning(
+                    "Slow query (%.1f ms, %s): %s -- params %r\nCalled from:\n%s",
+                    elapsed_ms,
+                    context["connection"].alias,
+                    sql,
+                    params if not many else "(executemany)",
+                    _call_site(),
+                )
+
+
+def install_slow_query_log(sender=None, connection=None, **kwargs):
+    """
+    connection_created handler: adds the SlowQueryLog to a new connection.
+    """
+    threshold_ms = getattr(settings, "SLOW_QUERY_THRESHOLD_MS", None)
+    if threshold_ms is None or connection is None:
+        return
+    if not any(isinstance(wrapper, SlowQueryLog) for wrapper in connection.execute_wrappers):
+        # Under the wrappers already there: connections open lazily, often
+        # inside a connection.execute_wrapper() block, which pops the last
+        # wrapper when it exits.
+        connection.execute_wrappers.insert(0, SlowQueryLog(threshold_ms))
+
+
+# ----------------------------------------------------------------------
+# Query plans
+# ----------------------------------------------------------------------
+SUPPORTED_VENDORS = ("sqlite", "mysql", "postgresql")
+
+
+def explain(queryset) -> str:
+    """
+    The plan of a queryset. Small test tables must not hide a missing
+    index, so table scans are made as expensive as possible for the
+    statement: on PostgreSQL with enable_seqscan = off (a "Seq Scan" then
+    means no index applies), on MySQL with max_seeks_for_key = 1. MySQL
+    plans are returned as JSON.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor == "mysql":
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT @@SESSION.max_seeks_for_key")
+            (max_seeks,) = cursor.fetchone()
+            cursor.execute("SET SESSION max_seeks_for_key = 1")
+            try:
+                return queryset.explain(format="json")
+            finally:
+                cursor.execute("SET SESSION max_seeks_for_key = %s", [max_seeks])
+    if connection.vendor != "postgresql":
+        return queryset.explain()
+    with transaction.atomic(using=queryset.db):
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+        return queryset.explain()
+
+
+_SQLITE_SCAN = re.compile(r"\bSCAN (\w+)")
+_POSTGRES_SCAN = re.compile(r"Seq Scan on (\w+)")
+_SQLITE_INDEX = re.compile(r"USING (?:COVERING )?INDEX (\w+)")
+_POSTGRES_INDEX = re.compile(r"Index (?:Only )?Scan (?:using|on) (\w+)")
+# Django's table aliases in joins and subqueries: "table" T3, "table" "U0",
+# `table` U0 (MySQL).
+_ALIAS = re.compile(r'["`](\w+)["`] ["`]?([TU]\d+)\b')
+
+
+# MySQL access types that read a whole table ("ALL") or a whole index.
+_MYSQL_FULL_ACCESS = ("ALL", "index")
+
+
+def _mysql_tables(plan: str):
+    """
+    The table entries ({"table_name", "access_type", "key", ...}) of a
+    MySQL EXPLAIN FORMAT=JSON plan, in joins and subqueries alike.
+    """
+    pending = [json.loads(plan)]
+    while pending:
+        node = pending.pop()
+        if isinstance(node, list):
+            pending.extend(node)
+        elif isinstance(node, dict):
+            if "access_type" in node:
+                yield node
+            pending.extend(node.values())
+
+
+def table_aliases(sql: str) -> dict:
+    """
+    Alias -> table names in the SQL of a queryset. Subqueries reuse
+    aliases (U0), so an alias may stand for several tables.
+    """
+    aliases = {}
+    for table, alias in _ALIAS.findall(sql):
+        aliases.setdefault(alias, set()).add(table)
+    return aliases
+
+
+def full_scans(plan: str, vendor: str, aliases=None) -> set:
+    """
+    Tables the plan reads in full (SQLite: SCAN, also of a covering index;
+    MySQL: access type ALL or index; PostgreSQL: Seq Scan). Aliases are resolved with 'aliases' (see
+    table_aliases); an ambiguous alias counts for all its tables.
+    """
+    if vendor == "sqlite":
+        names = _SQLITE_SCAN.findall(plan)
+    elif vendor == "mysql":
+        names = [table["table_name"] for table in _mysql_tables(plan) if table["access_type"] in _MYSQL_FULL_ACCESS]
+    elif vendor == "postgresql":
+        names = _POSTGRES_SCAN.findall(plan)
+    else:
+        raise ValueError(f"Plans of {vendor} are not supported.")
+    tables = set()
+    for name in names:
+        tables |= (aliases or {}).get(name, {name})
+    return tables
+
+
+def used_indexes(plan: str, vendor: str) -> set:
+    """
+    Names of the indexes a plan reads (primary keys not included).
+    """
+    if vendor == "sqlite":
+        return set(_SQLITE_INDEX.findall(plan))
+    if vendor == "mysql":
+        return {table["key"] for table in _mysql_tables(plan) if table.get("key") not in (None, "PRIMARY")}
+    if vendor == "postgresql":
+        return set(_POSTGRES_INDEX.findall(plan))
+    raise ValueError(f"Plans of {vendor} are not supported.")
+
+
+def queryset_full_scans(queryset) -> tuple[str, set]:
+    """
+    The plan of a queryset and the tables it reads in full.
+    """
+    plan = explain(queryset)
+    vendor = connections[queryset.db].vendor
+    return plan, full_scans(plan, vendor, table_aliases(str(queryset.query)))
@@ -182,6 +182,33 @@ class ITicketService(ABC):
         """
         pass
 
+class ISlotAllocator(ABC):
+    """
+    Strategy interface for choosing the slot a vehicle gets.
+    Implementations live in parking.allocation.
+    """
+
+    @abstractmethod
+    def allocate(self, pool, vehicle=None, at=None):
+        """
+        Claims a slot from the free-slot pool for an occasional entry.
+        Arguments:
+        - pool: parking.data.FreeSlotPool
+        - vehicle: registered vehicle for the plate, or None if unknown
+        - at: allocation time (defaults to now)
+        Returns the claimed ParkingSlot, or None if nothing fits.
+        """
+        pass
+
+    @abstractmethod
+    def choose(self, slots, vehicle=None):
+        """
+        Picks the preferred slot among already available candidates
+        (e.g. the result of SlotService.find_available_slots), or None.
+        """
+        pass
+
+
 AbstractTicketService = ITicketService
 AbstractPricingService = IPricingService
 AbstractPaymentService = IPaymentService
\ No newline at end of file
@@ -0,0 +1,96 @@
+"""
+Mergeable quantile sketch for streaming percentiles.
+
+QuantileSketch keeps a histogram over logarithmically sized buckets
+(the DDSketch scheme): a value x > 0 falls into bucket ceil(log_gamma(x))
+with gamma = (1 + a) / (1 - a), so every quantile it reports is within a
+relative error of 'a' of an actual value of the stream. Memory grows with
+the logarithm of the value range, not with the number of values, and two
+sketches with the same accuracy merge exactly by adding their buckets -
+sketches of days can be combined into sketches of any range of days.
+"""
+
+import math
+
+
+class QuantileSketch:
+    """
+    Streaming quantiles of non-negative values with relative accuracy.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be between 0 and 1.")
+        self.relative_accuracy = relative_accuracy
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self.bins = {}
+        self.zero_count = 0
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float, weight: int = 1):
+        if value < 0:
+            raise ValueError("QuantileSketch only accepts non-negative values.")
+        if value == 0:
+            self.zero_count += weight
+        else:
+            key = math.ceil(math.log(value) / self._log_gamma)
+            self.bins[key] = self.bins.get(key, 0) + weight
+        self.count += weight
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def merge(self, other: "QuantileSketch"):
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Only sketches with the same relative accuracy can be merged.")
+        for key, weight in other.bins.items():
+            self.bins[key] = self.bins.get(key, 0) + weight
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def quantile(self, fraction: float) -> float | None:
+        """
+        The value at 'fraction' (in [0, 1]) of the stream, None if empty.
+        """
+        if not 0 <= fraction <= 1:
+            raise ValueError("fraction must be between 0 and 1.")
+        if self.count == 0:
+            return None
+        rank = fraction * (self.count - 1)
+        if rank < self.zero_count:
+            return 0.0
+        seen = self.zero_count
+        for key in sorted(self.bins):
+            seen += self.bins[key]
+            if seen > rank:
+                estimate = 2 * self._gamma ** key / (self._gamma + 1)
+                return min(max(estimate, self.min), self.max)
+        return self.max
+
+    # ------------------------------------------------------------------
+    # Persistence (JSON-compatible)
+    # ------------------------------------------------------------------
+    def to_dict(self) -> dict:
+        return {
+            "relative_accuracy": self.relative_accuracy,
+            "bins": {str(key): weight for key, weight in self.bins.items()},
+            "zero_count": self.zero_count,
+            "count": self.count,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "QuantileSketch":
+        sketch = cls(data["relative_accuracy"])
+        sketch.bins = {int(key): weight for key, weight in data["bins"].items()}
+        sketch.zero_count = data["zero_count"]
+        sketch.count = data["count"]
+        if sketch.count:
+            sketch.min, sketch.max = data["min"], data["max"]
+        return sketch
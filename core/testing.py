@@ -0,0 +1,150 @@
+"""
+Query-count and wall-time budgets for tests.
+
+Service entry points and views declare how many queries (and roughly how
+many milliseconds) one call may take; tests run them under the budget:
+
+    with query_budget(queries=7, ms=50, label="enter_with_season_ticket"):
+        service.enter_with_season_ticket(plate, gate_id)
+
+    service = with_budgets(TicketService(...), {"enter_with_season_ticket": Budget(7, 50)})
+    service.enter_with_season_ticket(plate, gate_id)  # checked on every call
+
+SQL is captured with connection.execute_wrapper (no DEBUG needed). When a
+budget is exceeded the test fails with BudgetExceeded, listing the
+statements that ran more than once - an N+1 pattern shows up as the same
+SQL with different parameters - followed by all captured statements.
+
+Query counts are the deterministic regression signal and are always
+enforced. Time budgets depend on the machine (a loaded CI runner,
+coverage) and are only checked when the TEST_TIME_BUDGET_SCALE setting
+is set to a factor above 0 (default 0: off); the bench_* commands
+measure timings.
+"""
+
+import time
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.db import connections
+
+# Statements printed in a failure report, at most.
+REPORT_MAX_QUERIES = 50
+
+
+@dataclass(frozen=True)
+class Budget:
+    queries: int | None = None
+    ms: float | None = None
+
+
+class BudgetExceeded(AssertionError):
+    pass
+
+
+class QueryRecorder:
+    """
+    execute_wrapper recording (sql, params, duration in seconds) per query.
+    """
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((sql, params, time.perf_counter() - started))
+
+    def __len__(self):
+        return len(self.queries)
+
+    def duplicates(self) -> list:
+        """
+        (count, sql) of the statements that ran more than once, most
+        frequent first.
+        """
+        counts = Counter(sql for sql, _, _ in self.queries)
+        return sorted(((n, sql) for sql, n in counts.items() if n > 1), key=lambda row: -row[0])
+
+
+def _time_scale() -> float:
+    return getattr(settings, "TEST_TIME_BUDGET_SCALE", 0)
+
+
+def _report(label, recorder, problems) -> str:
+    lines = [f"{label or 'Block'} exceeded its budget: {'; '.join(problems)}."]
+    duplicates = recorder.duplicates()
+    if duplicates:
+        lines.append("Duplicated SQL:")
+        lines.extend(f"  {n}x {sql}" for n, sql in duplicates)
+    lines.append("Queries:")
+    for i, (sql, params, duration) in enumerate(recorder.queries[:REPORT_MAX_QUERIES], start=1):
+        lines.append(f"  {i}. ({duration * 1000:.1f} ms) {sql} -- {params!r}")
+    if len(recorder) > REPORT_MAX_QUERIES:
+        lines.append(f"  ... {len(recorder) - REPORT_MAX_QUERIES} more")
+    return "\n".join(lines)
+
+
+@contextmanager
+def query_budget(queries=None, ms=None, label="", using="default"):
+    """
+    Fails with BudgetExceeded if the block runs more than 'queries'
+    queries or, with TEST_TIME_BUDGET_SCALE set, takes longer than 'ms'
+    milliseconds (scaled).
+    """
+    recorder = QueryRecorder()
+    with connections[using].execute_wrapper(recorder):
+        started = time.perf_counter()
+        yield recorder
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+    problems = []
+    if queries is not None and len(recorder) > queries:
+        problems.append(f"{len(recorder)} queries, budget {queries}")
+    scale = _time_scale()
+    if ms is not None and scale and elapsed_ms > ms * scale:
+        problems.append(f"{elapsed_ms:.1f} ms, budget {ms * scale:.0f} ms")
+    if problems:
+        raise BudgetExceeded(_report(label, recorder, problems))
+
+
+class BudgetedProxy:
+    """
+    Wraps a service: calls of the methods with a declared budget run
+    under query_budget, everything else passes through.
+    """
+
+    def __init__(self, target, budgets: dict):
+        unknown = [name for name in budgets if not callable(getattr(target, name, None))]
+        if unknown:
+            raise ValueError(f"{type(target).__name__} has no method(s) {', '.join(unknown)}")
+        self._target = target
+        self._budgets = budgets
+
+    def __getattr__(self, name):
+        attribute = getattr(self._target, name)
+        budget = self._budgets.get(name)
+        if budget is None:
+            return attribute
+
+        def call(*args, **kwargs):
+            with query_budget(budget.queries, budget.ms, label=f"{type(self._target).__name__}.{name}"):
+                return attribute(*args, **kwargs)
+
+        return call
+
+
+def with_budgets(target, budgets: dict) -> BudgetedProxy:
+    return BudgetedProxy(target, budgets)
+
+
+def public_methods(cls) -> set:
+    """
+    Names of the public methods defined on cls, for checking that every
+    entry point has a budget.
+    """
+    return {name for name, value in vars(cls).items() if callable(value) and not name.startswith("_")}
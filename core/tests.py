@@ -1,3 +1,304 @@
-from django.test import TestCase
+import json
+import os
+import tempfile
+import threading
+from types import SimpleNamespace
 
-# Create your tests here.
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from core.querylog import SlowQueryLog, full_scans, install_slow_query_log, table_aliases, used_indexes
+from core.metrics import FILE_PATTERN, RequestMetrics, get_request_metrics, render_prometheus, totals
+from core.middleware import RequestMetricsMiddleware, SqlTimer
+from core.tracing import NOOP_SPAN, Tracer, get_tracer, traced
+from customers.models import Customer
+
+
+class RequestMetricsTests(SimpleTestCase):
+    def test_threads_record_into_their_own_shards(self):
+        metrics = RequestMetrics(directory=None)
+
+        def work():
+            for _ in range(1000):
+                metrics.record("contracts:gate_entry", 0.004, 3, 0.001)
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        series = metrics.snapshot()["contracts:gate_entry"]
+        self.assertEqual(totals(series)["requests"], 4000)
+        self.assertEqual(totals(series)["queries"], 12000)
+        self.assertAlmostEqual(totals(series)["sql_seconds"], 4.0)
+
+    def test_shards_of_finished_threads_are_folded_into_the_total(self):
+        metrics = RequestMetrics(directory=None)
+        for _ in range(20):
+            thread = threading.Thread(target=metrics.record, args=("parking:occupancy_board", 0.01, 1, 0.001))
+            thread.start()
+            thread.join()
+        metrics.record("parking:occupancy_board", 0.01, 1, 0.001)
+
+        self.assertEqual(len(metrics._shards), 1)  # this thread's
+        self.assertEqual(totals(metrics.snapshot()["parking:occupancy_board"])["requests"], 21)
+
+    def test_prometheus_histogram_is_cumulative(self):
+        metrics = RequestMetrics(directory=None)
+        for seconds in (0.003, 0.005, 0.02, 30.0):
+            metrics.record('odd "name"', seconds, 2, 0.001)
+
+        text = render_prometheus(metrics.snapshot())
+        self.assertIn('django_request_duration_seconds_bucket{view="odd \\"name\\"",le="0.005"} 2', text)
+        self.assertIn('django_request_duration_seconds_bucket{view="odd \\"name\\"",le="0.025"} 3', text)
+        self.assertIn('django_request_duration_seconds_bucket{view="odd \\"name\\"",le="10.0"} 3', text)
+        self.assertIn('django_request_duration_seconds_bucket{view="odd \\"name\\"",le="+Inf"} 4', text)
+        self.assertIn('django_request_duration_seconds_count{view="odd \\"name\\""} 4', text)
+        self.assertIn('django_request_sql_queries_total{view="odd \\"name\\""} 8', text)
+        self.assertIn("django_request_metrics_workers 1", text)
+
+    def test_collect_merges_the_files_of_other_workers(self):
+        with tempfile.TemporaryDirectory() as directory:
+            other = RequestMetrics(directory=None)
+            other.record("parking:occupancy_board", 0.01, 2, 0.002)
+            with open(os.path.join(directory, FILE_PATTERN.format(pid=1)), "w") as target:
+                json.dump(other.snapshot(), target)
+            with open(os.path.join(directory, FILE_PATTERN.format(pid=2)), "w") as target:
+                target.write("{truncated")
+
+            metrics = RequestMetrics(directory=directory, flush_seconds=0)
+            metrics.record("parking:occupancy_board", 0.02, 1, 0.001)
+            self.assertTrue(os.path.exists(os.path.join(directory, FILE_PATTERN.format(pid=os.getpid()))))
+
+            with self.assertLogs("core.metrics", "WARNING"):
+                snapshot, workers = metrics.collect()
+            self.assertEqual(workers, 2)
+            self.assertEqual(totals(snapshot["parking:occupancy_board"])["requests"], 2)
+            self.assertEqual(totals(snapshot["parking:occupancy_board"])["queries"], 3)
+
+
+class RequestMetricsMiddlewareTests(TestCase):
+    def setUp(self):
+        get_request_metrics().reset()
+
+    def test_requests_are_recorded_per_url_name(self):
+        self.client.get(reverse("core:health_check"))
+        self.client.get(reverse("core:health_check"))
+        with self.assertLogs("django.request", "WARNING"):
+            self.client.get("/no-such-page/")
+
+        snapshot = get_request_metrics().snapshot()
+        health = totals(snapshot["core:health_check"])
+        self.assertEqual(health["requests"], 2)
+        self.assertEqual(health["queries"], 2)
+        self.assertEqual(totals(snapshot["<unresolved>"])["requests"], 1)
+
+    def test_connection_opened_inside_the_request_leaves_no_wrapper_behind(self):
+        appended = SqlTimer()
+
+        def get_response(request):
+            # What opening the connection during the request does: core.apps
+            # installs the slow-query log, other handlers may append.
+            connection_created.send(sender=type(connection), connection=connection)
+            if appended not in connection.execute_wrappers:
+                connection.execute_wrappers.append(appended)
+            Customer.objects.exists()
+            return HttpResponse()
+
+        saved, connection.execute_wrappers = connection.execute_wrappers, []
+        try:
+            with override_settings(SLOW_QUERY_THRESHOLD_MS=60_000):
+                middleware = RequestMetricsMiddleware(get_response)
+                for _ in range(3):
+                    middleware(RequestFactory().get("/"))
+            self.assertEqual(len(connection.execute_wrappers), 2)
+            self.assertIsInstance(connection.execute_wrappers[0], SlowQueryLog)
+            self.assertIs(connection.execute_wrappers[1], appended)
+        finally:
+            connection.execute_wrappers = saved
+        self.assertEqual(totals(get_request_metrics().snapshot()["<unresolved>"])["queries"], 3)
+
+    def test_endpoint_is_staff_only(self):
+        url = reverse("core:metrics")
+        self.assertEqual(self.client.get(url).status_code, 302)
+
+        self.client.force_login(Customer.objects.create_user(username="ops", password="dummy", is_staff=True))
+        self.client.get(reverse("core:health_check"))
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain; version=0.0.4"))
+        self.assertIn('django_request_duration_seconds_count{view="core:health_check"} 1', response.content.decode())
+
+
+class TracerTests(SimpleTestCase):
+    def test_disabled_tracer_hands_out_the_noop_span(self):
+        tracer = Tracer(enabled=False)
+        with tracer.span("outer") as outer:
+            outer.set(ignored=True)
+        self.assertIs(outer, NOOP_SPAN)
+        self.assertEqual(tracer.recent(), [])
+
+    def test_nested_spans_form_one_trace(self):
+        tracer = Tracer(enabled=True, buffer_size=2)
+        with tracer.span("flow", gate_id=1):
+            with tracer.span("lookup") as lookup:
+                lookup.set(cached=False)
+            with self.assertRaises(KeyError):
+                with tracer.span("insert"):
+                    raise KeyError("slot")
+
+        (trace,) = tracer.recent()
+        self.assertEqual(trace["name"], "flow")
+        root, lookup, insert = trace["spans"]
+        self.assertEqual([lookup["parent_id"], insert["parent_id"]], [root["span_id"]] * 2)
+        self.assertEqual(root["attributes"], {"gate_id": 1})
+        self.assertEqual(lookup["attributes"], {"cached": False})
+        self.assertEqual(insert["error"], "KeyError")
+        self.assertLessEqual(lookup["offset_ms"] + lookup["duration_ms"], insert["offset_ms"] + 0.001)
+
+        for name in ("second", "third"):
+            with tracer.span(name):
+                pass
+        self.assertEqual([t["name"] for t in tracer.recent()], ["second", "third"])
+
+    def test_traced_is_decided_when_decorating(self):
+        def step():
+            return "done"
+
+        with override_settings(TRACING_ENABLED=False):
+            self.assertIs(traced("step")(step), step)
+
+        tracer = get_tracer()
+        self.addCleanup(setattr, tracer, "enabled", tracer.enabled)
+        self.addCleanup(tracer.clear)
+        tracer.enabled = True
+        tracer.clear()
+        with override_settings(TRACING_ENABLED=True):
+            wrapped = traced("step")(step)
+        self.assertEqual(wrapped(), "done")
+        self.assertEqual([trace["name"] for trace in tracer.recent()], ["step"])
+
+    def test_traces_are_exported_as_json_lines(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "traces.jsonl")
+            tracer = Tracer(enabled=True, export_path=path)
+            with tracer.span("flow"):
+                with tracer.span("step"):
+                    pass
+
+            with open(path) as source:
+                records = [json.loads(line) for line in source]
+        self.assertEqual([record["name"] for record in records], ["flow", "step"])
+        self.assertEqual(len({record["trace_id"] for record in records}), 1)
+
+
+class TraceViewTests(TestCase):
+    def setUp(self):
+        tracer = get_tracer()
+        self.addCleanup(setattr, tracer, "enabled", tracer.enabled)
+        tracer.enabled = True
+        tracer.clear()
+        self.addCleanup(tracer.clear)
+
+    def test_waterfall_lists_the_slowest_traces_to_staff(self):
+        tracer = get_tracer()
+        for name in ("fast_flow", "slow_flow"):
+            with tracer.span(name):
+                with tracer.span("step"):
+                    pass
+        tracer.recent()[-1]["duration_ms"] = 999.0
+
+        url = reverse("core:traces")
+        self.assertEqual(self.client.get(url).status_code, 302)
+
+        self.client.force_login(Customer.objects.create_user(username="ops", password="dummy", is_staff=True))
+        response = self.client.get(url, {"limit": 1})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([trace["name"] for trace in response.context["traces"]], ["slow_flow"])
+        self.assertEqual([row["depth"] for row in response.context["traces"][0]["rows"]], [0, 1])
+
+
+class SlowQueryLogTests(TestCase):
+    def test_slow_statements_are_logged_with_their_call_site(self):
+        with self.assertLogs("core.slow_queries", "WARNING") as logs:
+            with connection.execute_wrapper(SlowQueryLog(threshold_ms=0)):
+                Customer.objects.filter(username="nobody").exists()
+
+        (message,) = logs.output
+        self.assertIn("Slow query", message)
+        self.assertIn("customer_base", message)
+        self.assertIn("test_slow_statements_are_logged_with_their_call_site", message)
+
+    def test_fast_statements_are_not_logged(self):
+        with self.assertNoLogs("core.slow_queries", "WARNING"):
+            with connection.execute_wrapper(SlowQueryLog(threshold_ms=60_000)):
+                Customer.objects.filter(username="nobody").exists()
+
+    def test_installed_once_per_connection_when_enabled(self):
+        fake = SimpleNamespace(execute_wrappers=[])
+        with override_settings(SLOW_QUERY_THRESHOLD_MS=None):
+            install_slow_query_log(connection=fake)
+        self.assertEqual(fake.execute_wrappers, [])
+
+        with override_settings(SLOW_QUERY_THRESHOLD_MS=50):
+            install_slow_query_log(connection=fake)
+            install_slow_query_log(connection=fake)
+        self.assertEqual(len(fake.execute_wrappers), 1)
+        self.assertEqual(fake.execute_wrappers[0].threshold_ms, 50)
+
+    def test_connection_opened_inside_a_wrapper_block_keeps_the_block_balanced(self):
+        other = connections.create_connection(DEFAULT_DB_ALIAS)
+        try:
+            with override_settings(SLOW_QUERY_THRESHOLD_MS=50):
+                with other.execute_wrapper(SqlTimer()):
+                    other.ensure_connection()
+                    self.assertEqual(len(other.execute_wrappers), 2)
+            self.assertEqual(len(other.execute_wrappers), 1)
+            self.assertIsInstance(other.execute_wrappers[0], SlowQueryLog)
+        finally:
+            other.close()
+
+
+class QueryPlanParsingTests(SimpleTestCase):
+    def test_full_scans_resolve_subquery_aliases(self):
+        sql = 'SELECT 1 FROM "parking_parkingslot" WHERE EXISTS(SELECT 1 FROM "contracts_occasionalticket" "U0")'
+        plan = "4 0 0 SEARCH parking_parkingslot USING INTEGER PRIMARY KEY (rowid=?)\n16 0 0 SCAN U0"
+        self.assertEqual(full_scans(plan, "sqlite", table_aliases(sql)), {"contracts_occasionalticket"})
+        self.assertEqual(full_scans("Seq Scan on vehicles_vehicle  (cost=0.00..1.01)", "postgresql"), {"vehicles_vehicle"})
+        with self.assertRaises(ValueError):
+            full_scans("", "oracle")
+
+    def test_mysql_plans(self):
+        sql = (
+            "SELECT 1 FROM `parking_parkingslot` WHERE EXISTS(SELECT 1 FROM `contracts_occasionalticket` U0 "
+            "INNER JOIN `contracts_occasionalticket` T3 ON 1 INNER JOIN `vehicles_vehicle` T4 ON 1)"
+        )
+        plan = json.dumps({
+            "query_block": {
+                "select_id": 1,
+                "table": {"table_name": "parking_parkingslot", "access_type": "const", "key": "PRIMARY"},
+                "select_list_subqueries": [{
+                    "query_block": {
+                        "select_id": 2,
+                        "nested_loop": [
+                            {"table": {"table_name": "U0", "access_type": "ALL", "possible_keys": None}},
+                            {"table": {"table_name": "T3", "access_type": "ref", "key": "ticket_plate_open_idx"}},
+                            {"table": {"table_name": "T4", "access_type": "index", "key": "u_idx"}},
+                        ],
+                    },
+                }],
+            },
+        })
+        scanned = full_scans(plan, "mysql", table_aliases(sql))
+        self.assertEqual(scanned, {"contracts_occasionalticket", "vehicles_vehicle"})
+        self.assertEqual(used_indexes(plan, "mysql"), {"ticket_plate_open_idx", "u_idx"})
+
+    def test_used_indexes(self):
+        plan = "3 0 0 SEARCH t USING INDEX ticket_plate_open_idx (license_plate=?)\n9 0 0 SCAN u USING COVERING INDEX u_idx"
+        self.assertEqual(used_indexes(plan, "sqlite"), {"ticket_plate_open_idx", "u_idx"})
+        plan = "Index Scan using contract_slot_period_idx on contracts_contract\n  ->  Bitmap Index Scan on movement_idx"
+        self.assertEqual(used_indexes(plan, "postgresql"), {"contract_slot_period_idx", "movement_idx"})
@@ -0,0 +1,219 @@
+"""
+Lightweight tracing of the gate and ticket flows.
+
+    with span("resolve_contract", gate_id=gate_id):
+        ...
+
+    @traced("TicketService.enter_with_season_ticket")
+    def enter_with_season_ticket(...): ...
+
+A span without an enclosing span starts a trace; spans opened inside it
+(in the same thread or task, tracked with a context variable) become
+its children. When the outermost span ends, the trace goes to an
+in-memory ring buffer of the TRACING_BUFFER_SIZE most recent traces
+(shown by the staff waterfall view, core.views.traces) and, if
+TRACING_EXPORT_PATH is set, to that file as JSON lines, one per span.
+
+With TRACING_ENABLED off (the default), span() returns one shared no-op
+context manager: no clock reads, nothing recorded. @traced reads the
+setting once, when the function is decorated (at import): with tracing
+off it returns the function itself, so traced entry points cost nothing.
+Switching the tracer on at runtime (Tracer.enabled) records the span()
+steps only.
+"""
+
+import contextvars
+import functools
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUFFER_SIZE = 200
+
+# (trace, span id) of the innermost open span.
+_current = contextvars.ContextVar("tracing_current_span", default=None)
+# Span ids only need to be unique within a trace; next() on a count is atomic.
+_span_ids = itertools.count(1)
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, **attributes):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class _Trace:
+    __slots__ = ("trace_id", "started_at", "started", "spans")
+
+    def __init__(self):
+        self.trace_id = os.urandom(16).hex()
+        self.started_at = time.time()
+        self.started = time.perf_counter()
+        self.spans = []
+
+
+class Span:
+    """
+    One timed step; set() adds attributes while it is open.
+    """
+
+    __slots__ = ("_tracer", "name", "attributes", "_trace", "_record", "_token")
+
+    def __init__(self, tracer, name, attributes):
+        self._tracer = tracer
+        self.name = name
+        self.attributes = attributes
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def __enter__(self):
+        parent = _current.get()
+        if parent is None:
+            trace, parent_id = _Trace(), None
+        else:
+            trace, parent_id = parent
+        self._trace = trace
+        self._record = {
+            "trace_id": trace.trace_id,
+            "span_id": f"{next(_span_ids):x}",
+            "parent_id": parent_id,
+            "name": self.name,
+            "offset_ms": round((time.perf_counter() - trace.started) * 1000, 3),
+        }
+        trace.spans.append(self._record)  # parents before their children
+        self._token = _current.set((trace, self._record["span_id"]))
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        record = self._record
+        record["duration_ms"] = round((time.perf_counter() - self._trace.started) * 1000 - record["offset_ms"], 3)
+        record["attributes"] = self.attributes
+        if exc_type is not None:
+            record["error"] = exc_type.__name__
+        _current.reset(self._token)
+        if record["parent_id"] is None:
+            self._tracer._finish(self._trace)
+        return False
+
+
+class Tracer:
+    """
+    Collects finished traces; span() is the entry point.
+    """
+
+    def __init__(self, enabled=None, buffer_size=None, export_path=None):
+        if enabled is None:
+            enabled = getattr(settings, "TRACING_ENABLED", False)
+        if buffer_size is None:
+            buffer_size = getattr(settings, "TRACING_BUFFER_SIZE", DEFAULT_BUFFER_SIZE)
+        if export_path is None:
+            export_path = getattr(settings, "TRACING_EXPORT_PATH", None)
+        self.enabled = enabled
+        self.export_path = export_path
+        self._traces = deque(maxlen=buffer_size)  # append / iteration are thread-safe
+        self._export_lock = threading.Lock()
+
+    def span(self, name: str, **attributes):
+        if not self.enabled:
+            return NOOP_SPAN
+        return Span(self, name, attributes)
+
+    def _finish(self, trace: _Trace):
+        root = trace.spans[0]
+        self._traces.append(
+            {
+                "trace_id": trace.trace_id,
+                "name": root["name"],
+                "started_at": trace.started_at,
+                "duration_ms": root["duration_ms"],
+                "error": root.get("error"),
+                "spans": trace.spans,
+            }
+        )
+        if self.export_path:
+            self._export(trace)
+
+    def _export(self, trace: _Trace):
+        lines = "".join(
+            json.dumps(dict(record, started_at=trace.started_at), default=str) + "\n" for record in trace.spans
+        )
+        try:
+            with self._export_lock, open(self.export_path, "a") as target:
+                target.write(lines)
+        except OSError:
+            logger.exception("Could not export trace %s to %s", trace.trace_id, self.export_path)
+
+    def recent(self) -> list:
+        """
+        Finished traces, oldest first.
+        """
+        return list(self._traces)
+
+    def slowest(self, limit: int = 20) -> list:
+        return sorted(self._traces, key=lambda trace: trace["duration_ms"], reverse=True)[:limit]
+
+    def clear(self):
+        self._traces.clear()
+
+
+_tracer = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer() -> Tracer:
+    """
+    Returns the process-wide tracer.
+    """
+    global _tracer
+    if _tracer is None:
+        with _tracer_lock:
+            if _tracer is None:
+                _tracer = Tracer()
+    return _tracer
+
+
+def span(name: str, **attributes):
+    """
+    Context manager timing a step as a child of the current span (or as
+    the root of a new trace).
+    """
+    return get_tracer().span(name, **attributes)
+
+
+def traced(name: str):
+    """
+    Decorator running the function inside span(name); a no-op (the
+    function is returned as is) when TRACING_ENABLED is off.
+    """
+
+    def decorate(function):
+        if not getattr(settings, "TRACING_ENABLED", False):
+            return function
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with get_tracer().span(name):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
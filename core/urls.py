@@ -8,5 +8,7 @@ app_name = "core"
 urlpatterns = [
     # Map the index URL of the "core" application to the index view
     path("health", views.health_check, name="health_check"),
+    path("metrics", views.metrics, name="metrics"),
+    path("traces", views.traces, name="traces"),
     path('', views.home, name='home')
 ]
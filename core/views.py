@@ -1,7 +1,11 @@
+from django.contrib.admin.views.decorators import staff_member_required
 from django.db import connections
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse
 from django.shortcuts import render
 
+from core.metrics import get_request_metrics, render_prometheus
+from core.tracing import get_tracer
+
 def home(request):
     return render(request, 'core/home.html', {})
 
@@ -13,3 +17,52 @@ def health_check(request):
     status = db_ok
     status_code = 200 if status else 503
     return JsonResponse({"status": "ok" if status else "unhealthy"}, status=status_code)
+
+
+@staff_member_required
+def metrics(request):
+    """
+    Request metrics of all workers in the Prometheus text format.
+    """
+    snapshot, workers = get_request_metrics().collect()
+    return HttpResponse(render_prometheus(snapshot, workers), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+def _waterfall(trace) -> list:
+    """
+    The spans of a trace with their depth and their bar (left / width in
+    percent of the trace duration), parents before their children.
+    """
+    total = trace["duration_ms"] or 1.0
+    depths = {}
+    rows = []
+    for record in trace["spans"]:
+        depth = depths[record["span_id"]] = depths.get(record["parent_id"], -1) + 1
+        rows.append(
+            {
+                **record,
+                "depth": depth,
+                "indent": depth * 1.25,
+                "left": round(100 * record["offset_ms"] / total, 2),
+                "width": max(round(100 * record.get("duration_ms", 0.0) / total, 2), 0.3),
+            }
+        )
+    return rows
+
+
+@staff_member_required
+def traces(request):
+    """
+    Waterfall of the slowest recent traces (see core.tracing).
+    """
+    tracer = get_tracer()
+    try:
+        limit = min(max(int(request.GET.get("limit", 20)), 1), 200)
+    except ValueError:
+        limit = 20
+    slowest = [{**trace, "rows": _waterfall(trace)} for trace in tracer.slowest(limit)]
+    return render(
+        request,
+        "core/traces.html",
+        {"enabled": tracer.enabled, "buffered": len(tracer.recent()), "traces": slowest, "limit": limit},
+    )
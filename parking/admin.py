@@ -33,7 +33,7 @@ class ParkingSlotAdmin(admin.ModelAdmin):
     list_filter = ("area", "slot_type", "is_accessible")
     search_fields = ("number",)
 
-from .models import ParkingArea, SlotType, ParkingSlot, Gate
+from .models import ParkingArea, SlotType, ParkingSlot, Gate, GateDeviceToken, OccupancyRollup
 
 # ... existing admin classes ...
 
@@ -46,3 +46,37 @@ class GateAdmin(admin.ModelAdmin):
     list_display = ("area", "name")
     search_fields = ("name", "area__name")
     list_filter = ("area",)
+
+
+@admin.register(GateDeviceToken)
+class GateDeviceTokenAdmin(admin.ModelAdmin):
+    """
+    Admin configuration for GateDeviceToken (keys are issued by
+    'manage.py create_gate_token').
+    """
+
+    list_display = ("name", "gate", "is_active", "created_at")
+    list_select_related = ("gate__area",)
+    list_filter = ("is_active",)
+    search_fields = ("name",)
+    readonly_fields = ("key_digest", "created_at")
+
+
+@admin.register(OccupancyRollup)
+class OccupancyRollupAdmin(admin.ModelAdmin):
+    """
+    Read-only view of the occupancy rollups ('manage.py compact_occupancy').
+    """
+
+    list_display = (
+        "granularity", "bucket_start", "area", "slot_type",
+        "peak_occupied", "avg_occupied", "entries", "exits",
+    )
+    list_filter = ("granularity", "area", "slot_type")
+    date_hierarchy = "bucket_start"
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
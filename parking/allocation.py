@@ -0,0 +1,148 @@
+"""
+Slot allocation strategies (see core.services.ISlotAllocator).
+
+- FirstFitAllocator: the longest-free compatible slot, whatever its size.
+- BestFitAllocator: the smallest compatible slot type first, spreading the
+  load over the areas, so that small cars do not use up OVERSIZE slots.
+
+Neither strategy sorts the slot table: the compatibility matrix lists the
+(slot type, accessibility, areas) buckets in size order, and each bucket
+is popped from the free-slot pool with one query on the
+(slot_type, area, is_accessible, released_at) index, its areas ranked
+in the ORDER BY.
+
+The strategy used by default is selected with the SLOT_ALLOCATOR setting:
+a registered name ("best_fit", "first_fit") or a dotted path to a class.
+"""
+
+import itertools
+import threading
+from collections import Counter
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from core.services import ISlotAllocator
+from parking.compatibility import SlotCompatibilityMatrix, get_compatibility_matrix
+
+DEFAULT_ALLOCATOR = "best_fit"
+
+
+class FirstFitAllocator(ISlotAllocator):
+    """
+    Hands out the longest-free slot among all compatible slots.
+    """
+
+    name = "first_fit"
+
+    def __init__(self, compatibility_matrix: SlotCompatibilityMatrix | None = None):
+        self._compatibility = compatibility_matrix or get_compatibility_matrix()
+
+    def allocate(self, pool, vehicle=None, at=None):
+        has_permit = getattr(vehicle, "has_disability_permit", False)
+        buckets = self._compatibility.allocation_buckets(self._compatibility.min_rank_for(vehicle), has_permit)
+        if not buckets:
+            return None
+        return pool.pop(
+            at=at,
+            slot_types={slot_type_id for slot_type_id, _, _ in buckets},
+            accessible=None if has_permit else False,
+        )
+
+    def choose(self, slots, vehicle=None):
+        return next(iter(slots), None)
+
+
+class BestFitAllocator(ISlotAllocator):
+    """
+    Hands out a slot of the smallest compatible size rank.
+
+    Within a bucket the areas are tried round-robin (per allocator
+    instance), so consecutive entries are spread over the areas instead of
+    filling one area first. The rotated area order is passed to the pool,
+    which tries all areas of a bucket in one query.
+    """
+
+    name = "best_fit"
+
+    def __init__(self, compatibility_matrix: SlotCompatibilityMatrix | None = None):
+        self._compatibility = compatibility_matrix or get_compatibility_matrix()
+        self._turn = itertools.count()
+        self._turn_lock = threading.Lock()
+
+    def _next_turn(self) -> int:
+        with self._turn_lock:
+            return next(self._turn)
+
+    def allocate(self, pool, vehicle=None, at=None):
+        has_permit = getattr(vehicle, "has_disability_permit", False)
+        buckets = self._compatibility.allocation_buckets(self._compatibility.min_rank_for(vehicle), has_permit)
+        turn = self._next_turn()
+
+        for slot_type_id, is_accessible, area_ids in buckets:
+            offset = turn % len(area_ids)
+            slot = pool.pop(
+                at=at,
+                slot_type=slot_type_id,
+                areas=area_ids[offset:] + area_ids[:offset],
+                accessible=is_accessible,
+            )
+            if slot is not None:
+                return slot
+        return None
+
+    def choose(self, slots, vehicle=None):
+        slots = list(slots)
+        if not slots:
+            return None
+
+        has_permit = getattr(vehicle, "has_disability_permit", False)
+        if not has_permit:
+            slots = [slot for slot in slots if not slot.is_accessible]
+            if not slots:
+                return None
+        best_rank = min(slot.slot_type.size_rank for slot in slots)
+        best = [slot for slot in slots if slot.slot_type.size_rank == best_rank]
+        if has_permit and any(slot.is_accessible for slot in best):
+            best = [slot for slot in best if slot.is_accessible]
+
+        # Least loaded area = the one with the most available candidates.
+        per_area = Counter(slot.area_id for slot in best)
+        area_id = max(per_area, key=lambda candidate: (per_area[candidate], -candidate))
+        return next(slot for slot in best if slot.area_id == area_id)
+
+
+ALLOCATORS = {
+    FirstFitAllocator.name: FirstFitAllocator,
+    BestFitAllocator.name: BestFitAllocator,
+}
+
+
+def get_allocator(name: str | None = None, **kwargs) -> ISlotAllocator:
+    """
+    Instantiates the allocator registered under 'name' (or a dotted class
+    path); defaults to the SLOT_ALLOCATOR setting.
+    """
+    name = name or getattr(settings, "SLOT_ALLOCATOR", DEFAULT_ALLOCATOR)
+    allocator_class = ALLOCATORS.get(name)
+    if allocator_class is None:
+        if "." not in name:
+            raise ValueError(f"Unknown slot allocator: {name}")
+        allocator_class = import_string(name)
+    return allocator_class(**kwargs)
+
+
+_default_allocator = None
+_allocator_lock = threading.Lock()
+
+
+def get_default_allocator() -> ISlotAllocator:
+    """
+    Returns the process-wide allocator configured by SLOT_ALLOCATOR.
+    """
+    global _default_allocator
+    if _default_allocator is None:
+        with _allocator_lock:
+            if _default_allocator is None:
+                _default_allocator = get_allocator()
+    return _default_allocator
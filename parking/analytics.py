@@ -0,0 +1,295 @@
+"""
+Occupancy analytics over arbitrary time windows (capacity planning).
+
+Sampling MovementRepository.count_occupied_at once per point of a time
+series costs one query per sample. Instead, the start and end times of the
+occupancy ledger intervals (season movements and occasional tickets) in
+the window are streamed in sorted order - two index-ordered queries - and
+merged into one sorted stream of +1 / -1 events. The running sum over that
+stream (a sweep line) is the exact occupancy step function of the window:
+occupancy at any time, peaks, time-weighted percentiles and a time series
+at any resolution are then read from it without further queries.
+
+Runs in pure Python (heapq.merge + itertools.accumulate), in time linear in
+the number of intervals in the window.
+
+Dwell times (how long a stay lasts) are summarized per day, area and slot
+type in mergeable quantile sketches (core.sketches): DwellTimeAnalytics
+streams the finished stays of each day once, in chunks, and stores the
+sketches; percentiles over months are answered by merging daily sketches.
+"""
+
+import heapq
+from bisect import bisect_right
+from collections import Counter
+from datetime import datetime, timedelta
+from itertools import accumulate, groupby
+from operator import itemgetter
+
+from django.conf import settings
+from django.utils import timezone
+
+from core.sketches import QuantileSketch
+from parking.data import DwellTimeSketchRepository, MovementRepository
+from parking.models import DwellTimeSketch
+from parking.rollups import day_start, next_day_start
+
+DEFAULT_DWELL_TIME_ACCURACY = 0.01
+
+
+class OccupancyStepFunction:
+    """
+    Occupied slots over [start, end): levels[i] slots are occupied from
+    times[i] until times[i + 1] (the last level until 'end').
+    """
+
+    def __init__(self, start: datetime, end: datetime, times: list, levels: list):
+        self.start = start
+        self.end = end
+        self.times = times
+        self.levels = levels
+
+    def __len__(self):
+        return len(self.times)
+
+    def at(self, moment: datetime) -> int:
+        if not self.start <= moment < self.end:
+            raise ValueError("moment is outside of the analysed window.")
+        return self.levels[bisect_right(self.times, moment) - 1]
+
+    def segments(self):
+        """
+        Yields (from, until, occupied) for every step.
+        """
+        ends = self.times[1:] + [self.end]
+        yield from zip(self.times, ends, self.levels)
+
+    def peak(self) -> tuple:
+        """
+        The highest occupancy and the first time it was reached.
+        """
+        index = max(range(len(self.levels)), key=self.levels.__getitem__)
+        return self.levels[index], self.times[index]
+
+    def mean(self) -> float:
+        total = (self.end - self.start).total_seconds()
+        return sum(level * (until - since).total_seconds() for since, until, level in self.segments()) / total
+
+    def percentiles(self, fractions=(0.5, 0.9, 0.95, 0.99)) -> dict:
+        """
+        Time-weighted percentiles: for each fraction, the lowest occupancy
+        that was not exceeded during that share of the window.
+        """
+        seconds = Counter()
+        for since, until, level in self.segments():
+            seconds[level] += (until - since).total_seconds()
+        total = sum(seconds.values())
+
+        result = {}
+        levels = sorted(seconds)
+        cumulative = list(accumulate(seconds[level] for level in levels))
+        for fraction in fractions:
+            index = next(
+                (i for i, covered in enumerate(cumulative) if covered >= fraction * total),
+                len(levels) - 1,
+            )
+            result[fraction] = levels[index]
+        return result
+
+    def series(self, resolution: timedelta) -> list:
+        """
+        The step function resampled to buckets of 'resolution': per bucket
+        its start, the occupancy at the start, and the peak and
+        time-weighted mean occupancy within it.
+        """
+        if resolution <= timedelta(0):
+            raise ValueError("resolution must be positive.")
+
+        rows = []
+        count = len(self.times)
+        i = 0
+        bucket = self.start
+        while bucket < self.end:
+            bucket_end = min(bucket + resolution, self.end)
+            while i + 1 < count and self.times[i + 1] <= bucket:
+                i += 1
+            j, peak, weighted = i, self.levels[i], 0.0
+            while True:
+                since = max(self.times[j], bucket)
+                until = min(self.times[j + 1] if j + 1 < count else self.end, bucket_end)
+                weighted += self.levels[j] * (until - since).total_seconds()
+                peak = max(peak, self.levels[j])
+                if j + 1 < count and self.times[j + 1] < bucket_end:
+                    j += 1
+                else:
+                    break
+            rows.append({
+                "start": bucket,
+                "occupied": self.levels[i],
+                "peak": peak,
+                "mean": weighted / (bucket_end - bucket).total_seconds(),
+            })
+            bucket = bucket_end
+        return rows
+
+
+def sweep(starts, ends, start: datetime, end: datetime) -> OccupancyStepFunction:
+    """
+    Builds the step function from ascending interval start times and
+    ascending end times inside the window. Intervals that began before
+    'start' count from 'start' on; at equal times exits go first, as the
+    intervals are half-open.
+    """
+    events = heapq.merge(
+        ((moment, -1) for moment in ends),
+        ((max(moment, start), 1) for moment in starts),
+    )
+    times, deltas = [start], [0]
+    for moment, group in groupby(events, key=itemgetter(0)):
+        delta = sum(change for _, change in group)
+        if moment == start:
+            deltas[0] += delta
+        elif delta:
+            times.append(moment)
+            deltas.append(delta)
+    return OccupancyStepFunction(start, end, times, list(accumulate(deltas)))
+
+
+class OccupancyAnalytics:
+    """
+    Occupancy step functions over the occupancy ledger.
+    """
+
+    def __init__(self, movement_repo: MovementRepository | None = None):
+        self._movement_repo = movement_repo or MovementRepository()
+
+    def occupancy_profile(self, start: datetime, end: datetime, area=None) -> OccupancyStepFunction:
+        """
+        The exact occupancy of [start, end) (optionally one area), from
+        two streamed queries.
+        """
+        if start >= end:
+            raise ValueError("start must be before end.")
+        return sweep(
+            self._movement_repo.stream_occupancy_starts(start, end, area),
+            self._movement_repo.stream_occupancy_ends(start, end, area),
+            start,
+            end,
+        )
+
+
+class DwellTimeAnalytics:
+    """
+    Daily dwell-time sketches: compaction from the occupancy ledger and
+    percentiles over any range of days.
+
+    A stay counts on the (local) day it ended, so a day is final once it
+    is over; compact() stores complete days up to today from a high-water
+    mark, and percentiles() sketches the days after the mark on the fly.
+    """
+
+    def __init__(self, dwell_repo: DwellTimeSketchRepository | None = None, chunk_size: int = 5000):
+        self._repo = dwell_repo or DwellTimeSketchRepository()
+        self._chunk_size = chunk_size
+        self._accuracy = getattr(settings, "DWELL_TIME_SKETCH_ACCURACY", DEFAULT_DWELL_TIME_ACCURACY)
+
+    def _sketch(self, stays) -> dict:
+        sketches = {}
+        for area_id, slot_type_id, start, end in stays:
+            key = (timezone.localtime(end).date(), area_id, slot_type_id)
+            sketch = sketches.get(key)
+            if sketch is None:
+                sketch = sketches[key] = QuantileSketch(self._accuracy)
+            sketch.add((end - start).total_seconds() / 60)
+        return sketches
+
+    def compact(self, until: datetime | None = None, since: datetime | None = None) -> int:
+        """
+        Sketches the complete days before 'until' (default: today), from
+        the high-water mark or, to rebuild, from the day of 'since'.
+        Returns the number of days sketched.
+        """
+        until = day_start(until or timezone.now())
+        if since is not None:
+            position = day_start(since)
+        else:
+            position = self._repo.get_high_water()
+            if position is None:
+                earliest = self._repo.earliest_end()
+                position = day_start(earliest) if earliest is not None and earliest < until else until
+
+        days = 0
+        while position < until:
+            day_end = next_day_start(position)
+            stays = self._repo.stream_finished_stays(position, day_end, chunk_size=self._chunk_size)
+            sketches = [
+                DwellTimeSketch(
+                    day=day, area_id=area_id, slot_type_id=slot_type_id,
+                    count=sketch.count, sketch=sketch.to_dict(),
+                )
+                for (day, area_id, slot_type_id), sketch in self._sketch(stays).items()
+            ]
+            self._repo.store(
+                timezone.localtime(position).date(), timezone.localtime(day_end).date(), sketches, day_end
+            )
+            days += 1
+            position = day_end
+
+        if days == 0 and self._repo.get_high_water() is None:
+            self._repo.store(until.date(), until.date(), [], until)
+        return days
+
+    def percentiles(self, start: datetime, end: datetime, area=None, quantiles=(0.5, 0.9, 0.99)) -> dict:
+        """
+        Dwell-time percentiles (minutes) of the stays that ended on the
+        days from the day of 'start' to the day of 'end', overall and per
+        area and slot type.
+        """
+        first_day = day_start(start)
+        last_day = next_day_start(end)
+        high_water = self._repo.get_high_water() or first_day
+        stored_until = max(min(high_water, last_day), first_day)
+
+        buckets = {}
+
+        def add(key, sketch):
+            if key in buckets:
+                buckets[key].merge(sketch)
+            else:
+                buckets[key] = sketch
+
+        for row in self._repo.sketches(
+            timezone.localtime(first_day).date(), timezone.localtime(stored_until).date(), area
+        ):
+            add((row.area_id, row.slot_type_id), QuantileSketch.from_dict(row.sketch))
+        if stored_until < last_day:
+            live_end = min(last_day, timezone.now())
+            stays = self._repo.stream_finished_stays(stored_until, live_end, area, self._chunk_size)
+            for (_, area_id, slot_type_id), sketch in self._sketch(stays).items():
+                add((area_id, slot_type_id), sketch)
+
+        overall, by_area, by_slot_type = QuantileSketch(self._accuracy), {}, {}
+        for (area_id, slot_type_id), sketch in buckets.items():
+            overall.merge(sketch)
+            by_area.setdefault(area_id, QuantileSketch(self._accuracy)).merge(sketch)
+            by_slot_type.setdefault(slot_type_id, QuantileSketch(self._accuracy)).merge(sketch)
+
+        def summary(sketch, **extra):
+            return {
+                **extra,
+                "count": sketch.count,
+                **{f"p{round(q * 100)}": sketch.quantile(q) for q in quantiles},
+            }
+
+        area_names, slot_type_names = self._repo.bucket_names(by_area, by_slot_type)
+        return {
+            "overall": summary(overall),
+            "by_area": sorted(
+                (summary(s, id=pk, name=area_names.get(pk)) for pk, s in by_area.items()),
+                key=lambda row: row["name"] or "",
+            ),
+            "by_slot_type": sorted(
+                (summary(s, id=pk, name=slot_type_names.get(pk)) for pk, s in by_slot_type.items()),
+                key=lambda row: row["name"] or "",
+            ),
+        }
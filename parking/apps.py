@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class ParkingConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'parking'
+
+    def ready(self):
+        # Register the signal handlers (cache invalidation).
+        from parking import signals  # noqa: F401
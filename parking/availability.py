@@ -0,0 +1,366 @@
+"""
+In-memory availability structures for the parking domain.
+
+Searching for free slots used to issue one EXISTS query per candidate slot
+(ParkingSlot.is_free_for_period). The structures in this module keep the
+reserved contract intervals in memory so that a search over the whole
+garage is answered in a single pass without per-slot SQL.
+
+The data is loaded through the repositories in parking.data and kept in
+sync incrementally when a new contract is created (see record_reservation).
+Because every worker process holds its own copy, the structures are also
+rebuilt periodically so that reservations made by other processes become
+visible. The final confirmation of a purchase still checks the database.
+"""
+
+import logging
+import threading
+import time
+from bisect import bisect_left, insort
+from datetime import datetime, time as dt_time, timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from parking.data import ContractRepository
+from contracts.models import RegularContract
+
+logger = logging.getLogger(__name__)
+
+# Seconds after which a process-local index is reloaded from the database.
+DEFAULT_MAX_AGE_SECONDS = 300
+
+# Number of days (starting today) covered by the availability calendar.
+DEFAULT_CALENDAR_HORIZON_DAYS = 400
+
+ONE_DAY = timedelta(days=1)
+
+
+class SlotIntervalIndex:
+    """
+    Per-slot sorted arrays of reserved [valid_from, valid_to) intervals.
+
+    For every slot we keep:
+    - the interval start times, sorted ascending,
+    - the matching end times,
+    - a running maximum over the end times (prefix max).
+
+    An interval [start, end) overlaps a query [q_start, q_end) if
+    start < q_end and end > q_start (same rule as the ORM queries).
+    All intervals with start < q_end form a prefix of the sorted array,
+    so the overlap test is a bisect plus one prefix-max lookup: O(log n).
+    """
+
+    def __init__(self, contract_repo: ContractRepository | None = None, max_age_seconds=None):
+        self._contract_repo = contract_repo or ContractRepository()
+        if max_age_seconds is None:
+            max_age_seconds = getattr(settings, "AVAILABILITY_INDEX_MAX_AGE", DEFAULT_MAX_AGE_SECONDS)
+        self._max_age_seconds = max_age_seconds
+
+        self._lock = threading.RLock()
+        self._intervals = {}  # slot_id -> (starts, ends, prefix_max_ends)
+        self._loaded_at = None
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+    def rebuild(self):
+        """
+        Reloads all reservation intervals from the database (one query).
+        """
+        self.load(self._contract_repo.get_reservation_intervals())
+
+    def load(self, rows):
+        """
+        Replaces the index content with the given (slot_id, start, end) rows.
+        """
+        grouped = {}
+        for slot_id, start, end in rows:
+            grouped.setdefault(slot_id, []).append((start, end))
+
+        intervals = {}
+        for slot_id, slot_rows in grouped.items():
+            slot_rows.sort()
+            starts = [start for start, _ in slot_rows]
+            ends = [end for _, end in slot_rows]
+            intervals[slot_id] = (starts, ends, self._prefix_max(ends))
+
+        with self._lock:
+            self._intervals = intervals
+            self._loaded_at = time.monotonic()
+
+    def invalidate(self):
+        """
+        Forces a reload on the next query.
+        """
+        with self._lock:
+            self._loaded_at = None
+
+    def _ensure_fresh(self):
+        with self._lock:
+            loaded_at = self._loaded_at
+        if loaded_at is None or time.monotonic() - loaded_at > self._max_age_seconds:
+            self.rebuild()
+
+    @staticmethod
+    def _prefix_max(ends):
+        prefix = []
+        current = None
+        for end in ends:
+            current = end if current is None or end > current else current
+            prefix.append(current)
+        return prefix
+
+    # ------------------------------------------------------------------
+    # Incremental updates
+    # ------------------------------------------------------------------
+    def add(self, slot_id, start, end):
+        """
+        Registers a new reservation interval for a slot.
+
+        Only the arrays of the slot concerned are rebuilt.
+        """
+        with self._lock:
+            if self._loaded_at is None:
+                # Not loaded yet: the next query will read it from the database.
+                return
+            starts, ends, _ = self._intervals.get(slot_id, ([], [], []))
+            rows = list(zip(starts, ends))
+            insort(rows, (start, end))
+            starts = [s for s, _ in rows]
+            ends = [e for _, e in rows]
+            self._intervals[slot_id] = (starts, ends, self._prefix_max(ends))
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+    def is_free(self, slot_id, start, end) -> bool:
+        """
+        Returns True if the slot has no reservation overlapping [start, end).
+        """
+        self._ensure_fresh()
+        with self._lock:
+            return self._is_free_locked(slot_id, start, end)
+
+    def free_slot_ids(self, slot_ids, start, end) -> set:
+        """
+        Returns the subset of slot_ids that are free for [start, end).
+        """
+        self._ensure_fresh()
+        with self._lock:
+            return {slot_id for slot_id in slot_ids if self._is_free_locked(slot_id, start, end)}
+
+    def _is_free_locked(self, slot_id, start, end) -> bool:
+        entry = self._intervals.get(slot_id)
+        if entry is None:
+            return True
+        starts, _, prefix_max_ends = entry
+        # Intervals [0, k) start before the end of the query.
+        k = bisect_left(starts, end)
+        if k == 0:
+            return True
+        return not prefix_max_ends[k - 1] > start
+
+
+class AvailabilityCalendar:
+    """
+    Day-granular availability calendar for season-ticket searches.
+
+    Every slot owns one bitset with one bit per day over a rolling horizon
+    starting today (bit i set = some contract touches day i). Python ints
+    are used as bitsets, so checking a period is a shift-and-mask per slot
+    instead of an interval comparison per contract.
+
+    Day granularity is exact for the days a search period fully covers:
+    any contract touching such a day overlaps the period. Only the partially
+    covered first and last day are ambiguous; slots whose bits are set on
+    those days alone are resolved with an exact interval index built from
+    the same rows. Periods outside the horizon are answered by that index.
+    """
+
+    def __init__(
+        self,
+        contract_repo: ContractRepository | None = None,
+        horizon_days=None,
+        max_age_seconds=None,
+    ):
+        self._contract_repo = contract_repo or ContractRepository(RegularContract.objects)
+        if horizon_days is None:
+            horizon_days = getattr(settings, "AVAILABILITY_CALENDAR_HORIZON_DAYS", DEFAULT_CALENDAR_HORIZON_DAYS)
+        self._horizon_days = horizon_days
+        if max_age_seconds is None:
+            max_age_seconds = getattr(settings, "AVAILABILITY_INDEX_MAX_AGE", DEFAULT_MAX_AGE_SECONDS)
+        self._max_age_seconds = max_age_seconds
+
+        # Exact intervals for the ambiguous boundary days. It is (re)loaded
+        # together with the calendar, so it never refreshes on its own.
+        self._exact = SlotIntervalIndex(self._contract_repo, max_age_seconds=float("inf"))
+
+        self._lock = threading.RLock()
+        self._origin = None  # datetime of day 0 (midnight, current timezone)
+        self._bits = {}  # slot_id -> int bitset
+        self._degenerate = set()  # slots with zero-length contracts (exact check only)
+        self._loaded_at = None
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+    def rebuild(self):
+        """
+        Reloads the calendar from the RegularContract rows (one query).
+        """
+        rows = list(self._contract_repo.get_reservation_intervals())
+        origin = timezone.make_aware(datetime.combine(timezone.localdate(), dt_time.min))
+
+        with self._lock:
+            self._origin = origin
+            self._bits = {}
+            self._degenerate = set()
+            for slot_id, start, end in rows:
+                self._mark(slot_id, start, end)
+            self._exact.load(rows)
+            self._loaded_at = time.monotonic()
+
+    def invalidate(self):
+        """
+        Forces a reload on the next query.
+        """
+        with self._lock:
+            self._loaded_at = None
+
+    def _ensure_fresh(self):
+        with self._lock:
+            loaded_at = self._loaded_at
+            origin = self._origin
+        stale = loaded_at is None or time.monotonic() - loaded_at > self._max_age_seconds
+        # Roll the horizon forward once the day changes.
+        if stale or origin.date() != timezone.localdate():
+            self.rebuild()
+
+    # ------------------------------------------------------------------
+    # Day arithmetic
+    # ------------------------------------------------------------------
+    def _day_floor(self, moment) -> int:
+        return (moment - self._origin) // ONE_DAY
+
+    def _day_ceil(self, moment) -> int:
+        return -((self._origin - moment) // ONE_DAY)
+
+    def _mask(self, first_day, last_day) -> int:
+        """
+        Bit mask for the days [first_day, last_day), clipped to the horizon.
+        """
+        first_day = max(first_day, 0)
+        last_day = min(last_day, self._horizon_days)
+        if last_day <= first_day:
+            return 0
+        return ((1 << (last_day - first_day)) - 1) << first_day
+
+    def _mark(self, slot_id, start, end):
+        if end <= start:
+            self._degenerate.add(slot_id)
+            return
+        mask = self._mask(self._day_floor(start), self._day_ceil(end))
+        if mask:
+            self._bits[slot_id] = self._bits.get(slot_id, 0) | mask
+
+    # ------------------------------------------------------------------
+    # Incremental updates
+    # ------------------------------------------------------------------
+    def add(self, slot_id, start, end):
+        """
+        Registers a new reservation for a slot (e.g. after a purchase).
+        """
+        with self._lock:
+            if self._loaded_at is None:
+                return
+            self._mark(slot_id, start, end)
+            self._exact.add(slot_id, start, end)
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+    def free_slot_ids(self, slot_ids, start, end) -> set:
+        """
+        Returns the subset of slot_ids that are free for [start, end).
+        """
+        self._ensure_fresh()
+        slot_ids = list(slot_ids)
+
+        with self._lock:
+            first_day = self._day_floor(start)
+            last_day = self._day_ceil(end)
+            if first_day < 0 or last_day > self._horizon_days:
+                return self._exact.free_slot_ids(slot_ids, start, end)
+
+            period_mask = self._mask(first_day, last_day)
+            # Days completely covered by the period.
+            interior_mask = self._mask(self._day_ceil(start), self._day_floor(end))
+
+            free = set()
+            ambiguous = []
+            for slot_id in slot_ids:
+                bits = self._bits.get(slot_id, 0) & period_mask
+                if slot_id in self._degenerate:
+                    ambiguous.append(slot_id)
+                elif not bits:
+                    free.add(slot_id)
+                elif not bits & interior_mask:
+                    ambiguous.append(slot_id)
+
+            if ambiguous:
+                free |= self._exact.free_slot_ids(ambiguous, start, end)
+            return free
+
+
+_slot_interval_index = None
+_availability_calendar = None
+_index_lock = threading.Lock()
+
+
+def get_slot_interval_index() -> SlotIntervalIndex:
+    """
+    Returns the process-wide SlotIntervalIndex (loaded lazily on first use).
+    """
+    global _slot_interval_index
+    if _slot_interval_index is None:
+        with _index_lock:
+            if _slot_interval_index is None:
+                _slot_interval_index = SlotIntervalIndex()
+    return _slot_interval_index
+
+
+def get_availability_calendar() -> AvailabilityCalendar:
+    """
+    Returns the process-wide AvailabilityCalendar (loaded lazily on first use).
+    """
+    global _availability_calendar
+    if _availability_calendar is None:
+        with _index_lock:
+            if _availability_calendar is None:
+                _availability_calendar = AvailabilityCalendar()
+    return _availability_calendar
+
+
+def record_reservation(slot_id, start, end):
+    """
+    Keeps the in-memory availability structures in sync after a new
+    contract reserved a slot. Called by TicketService after commit.
+    """
+    get_slot_interval_index().add(slot_id, start, end)
+    get_availability_calendar().add(slot_id, start, end)
+
+
+def warm_up():
+    """
+    Loads the availability structures from the database.
+
+    Called once per worker process at startup (see wsgi.py) so that the
+    first search does not pay for the initial load. Failures are logged
+    only: the structures load lazily on first use anyway.
+    """
+    try:
+        get_slot_interval_index().rebuild()
+        get_availability_calendar().rebuild()
+    except Exception:
+        logger.warning("Could not warm up the availability structures.", exc_info=True)
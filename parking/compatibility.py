@@ -0,0 +1,174 @@
+"""
+Precomputed vehicle/slot compatibility for the parking domain.
+
+ParkingSlot.is_compatible_with only depends on the slot's SlotType.size_rank,
+its is_accessible flag and the vehicle's minimum slot type and disability
+permit. Instead of calling it for every slot on every search, the matrix
+below maps each vehicle class (minimum rank x permit) to the set of
+compatible slot ids, so that filtering becomes a set intersection.
+
+The matrix is cached per process. It is invalidated by signals when a
+SlotType or ParkingSlot changes (see parking.signals) and reloaded after
+AVAILABILITY_INDEX_MAX_AGE seconds to pick up changes made elsewhere.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+
+from django.conf import settings
+
+from parking.data import SlotRepository
+
+DEFAULT_MAX_AGE_SECONDS = 300
+
+
+class SlotCompatibilityMatrix:
+    """
+    Maps (minimum size rank, has_disability_permit) -> frozenset of slot ids.
+
+    Rules (same as ParkingSlot.is_compatible_with):
+    - the slot's size_rank must be >= the vehicle's minimum slot type rank,
+    - accessible slots require a disability permit.
+
+    Only the distinct slot ranks matter, so the matrix has at most
+    2 x (number of slot types + 1) entries.
+    """
+
+    def __init__(self, slot_repo: SlotRepository | None = None, max_age_seconds=None):
+        self._slot_repo = slot_repo or SlotRepository()
+        if max_age_seconds is None:
+            max_age_seconds = getattr(settings, "AVAILABILITY_INDEX_MAX_AGE", DEFAULT_MAX_AGE_SECONDS)
+        self._max_age_seconds = max_age_seconds
+
+        self._lock = threading.Lock()
+        self._ranks = []  # sorted distinct slot ranks
+        self._matrix = {}  # (rank position, has_permit) -> frozenset of slot ids
+        self._type_ranks = {}  # slot_type_id -> size_rank
+        self._accessible = frozenset()
+        self._buckets = []  # (size_rank, slot_type_id, is_accessible, area ids), by rank
+        self._loaded_at = None
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+    def rebuild(self):
+        """
+        Recomputes the matrix from the database (two small queries).
+        """
+        rows = list(self._slot_repo.get_compatibility_rows())
+        type_ranks = dict(self._slot_repo.get_slot_type_ranks())
+
+        ranks = sorted({rank for _, rank, _, _, _ in rows})
+        accessible = frozenset(slot_id for slot_id, _, is_accessible, _, _ in rows if is_accessible)
+
+        bucket_areas = {}
+        for _, rank, is_accessible, slot_type_id, area_id in rows:
+            bucket_areas.setdefault((rank, slot_type_id, is_accessible), set()).add(area_id)
+        buckets = [
+            (rank, slot_type_id, is_accessible, tuple(sorted(areas)))
+            for (rank, slot_type_id, is_accessible), areas in sorted(bucket_areas.items())
+        ]
+
+        matrix = {}
+        # Position i means "vehicle needs at least ranks[i]"; len(ranks) means
+        # the vehicle is larger than any slot in the garage.
+        for position in range(len(ranks) + 1):
+            min_rank = ranks[position] if position < len(ranks) else None
+            fitting = frozenset(
+                slot_id for slot_id, rank, _, _, _ in rows
+                if min_rank is not None and rank >= min_rank
+            )
+            matrix[(position, True)] = fitting
+            matrix[(position, False)] = fitting - accessible
+
+        with self._lock:
+            self._ranks = ranks
+            self._matrix = matrix
+            self._type_ranks = type_ranks
+            self._accessible = accessible
+            self._buckets = buckets
+            self._loaded_at = time.monotonic()
+
+    def invalidate(self):
+        """
+        Forces a reload on the next lookup.
+        """
+        with self._lock:
+            self._loaded_at = None
+
+    def _ensure_fresh(self):
+        with self._lock:
+            loaded_at = self._loaded_at
+        if loaded_at is None or time.monotonic() - loaded_at > self._max_age_seconds:
+            self.rebuild()
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+    def compatible_slot_ids(self, min_rank: int, has_permit: bool) -> frozenset:
+        """
+        Returns the ids of all slots a vehicle of the given class may use.
+        """
+        self._ensure_fresh()
+        with self._lock:
+            position = bisect_left(self._ranks, min_rank)
+            return self._matrix[(position, bool(has_permit))]
+
+    def min_rank_for(self, vehicle) -> int:
+        """
+        Returns the minimum slot size rank of the given vehicle (0 if unknown).
+
+        Uses minimum_slot_type_id so that no SlotType has to be loaded.
+        """
+        self._ensure_fresh()
+        type_id = getattr(vehicle, "minimum_slot_type_id", None)
+        with self._lock:
+            return self._type_ranks.get(type_id, 0) if type_id is not None else 0
+
+    def slot_ids_for(self, vehicle) -> frozenset:
+        """
+        Returns the ids of all slots the given vehicle may use.
+        """
+        min_rank = self.min_rank_for(vehicle)
+        return self.compatible_slot_ids(min_rank, getattr(vehicle, "has_disability_permit", False))
+
+    def allocation_buckets(self, min_rank: int, has_permit: bool) -> list:
+        """
+        Returns the compatible (slot_type_id, is_accessible, area ids) buckets,
+        smallest size rank first. Within a rank, permit holders get the
+        accessible buckets first; vehicles without a permit never see them.
+        """
+        self._ensure_fresh()
+        with self._lock:
+            buckets = [bucket for bucket in self._buckets if bucket[0] >= min_rank]
+        if has_permit:
+            buckets.sort(key=lambda bucket: (bucket[0], not bucket[2], bucket[1]))
+        else:
+            buckets = [bucket for bucket in buckets if not bucket[2]]
+        return [(slot_type_id, is_accessible, areas) for _, slot_type_id, is_accessible, areas in buckets]
+
+    @property
+    def accessible_slot_ids(self) -> frozenset:
+        """
+        Ids of all accessible slots.
+        """
+        self._ensure_fresh()
+        with self._lock:
+            return self._accessible
+
+
+_compatibility_matrix = None
+_matrix_lock = threading.Lock()
+
+
+def get_compatibility_matrix() -> SlotCompatibilityMatrix:
+    """
+    Returns the process-wide SlotCompatibilityMatrix (loaded lazily on first use).
+    """
+    global _compatibility_matrix
+    if _compatibility_matrix is None:
+        with _matrix_lock:
+            if _compatibility_matrix is None:
+                _compatibility_matrix = SlotCompatibilityMatrix()
+    return _compatibility_matrix
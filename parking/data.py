@@ -6,11 +6,76 @@ The service layer (SlotService, etc.) should only call these methods
 and never perform queries on models directly.
 """
 
-from django.db import transaction
-from django.db.models import Q
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import (
+    Case,
+    Count,
+    DurationField,
+    Exists,
+    ExpressionWrapper,
+    F,
+    Func,
+    IntegerField,
+    OuterRef,
+    Q,
+    Sum,
+    Value,
+    When,
+)
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 
-from parking.models import ParkingSlot, ParkingArea
-from contracts.models import Contract, Movement
+from parking.models import (
+    DwellTimeSketch,
+    FreeSlot,
+    OccupancyCounter,
+    OccupancyRollup,
+    ParkingArea,
+    ParkingSlot,
+    RollupHighWaterMark,
+    SlotType,
+)
+from contracts.models import (
+    Contract,
+    Movement,
+    OccasionalTicket,
+    OccupancyInterval,
+    OpenMovement,
+    RegularContract,
+)
+
+
+class WholeMinutes(Func):
+    """
+    Whole minutes between two datetime columns, per row:
+    floor((end - start) / 1 minute), as Movement.duration_minutes().
+
+    Datetime subtraction compiles to microseconds on SQLite
+    (django_timestamp_diff) and MySQL (TIMESTAMPDIFF(MICROSECOND, ...)),
+    to an interval on PostgreSQL.
+    """
+
+    output_field = IntegerField()
+
+    def __init__(self, start, end, **extra):
+        diff = ExpressionWrapper(F(end) - F(start), output_field=DurationField())
+        super().__init__(diff, **extra)
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        # Integer division truncates, i.e. floors non-negative durations.
+        return self.as_sql(compiler, connection, template="(%(expressions)s / 60000000)", **extra_context)
+
+    def as_mysql(self, compiler, connection, **extra_context):
+        return self.as_sql(compiler, connection, template="(%(expressions)s DIV 60000000)", **extra_context)
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        return self.as_sql(
+            compiler,
+            connection,
+            template="FLOOR(EXTRACT(EPOCH FROM %(expressions)s) / 60)::bigint",
+            **extra_context,
+        )
 
 
 class SlotRepository:
@@ -51,6 +116,17 @@ class SlotRepository:
         """
         return self._qs.select_for_update().get(pk=slot_id)
 
+    def get_area_id(self, slot_id=None, contract_id=None):
+        """
+        Area of a slot, or of the slot a contract reserves (None if there
+        is none).
+        """
+        if slot_id is not None:
+            qs = self._qs.filter(pk=slot_id)
+        else:
+            qs = self._qs.filter(contracts__pk=contract_id)
+        return qs.values_list("area_id", flat=True).first()
+
     def get_slots_for_area(self, area: ParkingArea | None = None):
         """
         Returns all slots (optionally restricted to a given area).
@@ -61,6 +137,32 @@ class SlotRepository:
             qs = qs.filter(area=area)
         return qs
 
+    def get_slots_by_ids(self, slot_ids, area: ParkingArea | None = None):
+        """
+        Returns the slots with the given ids (with area and slot type loaded),
+        optionally restricted to a given area.
+        """
+        qs = self._qs.select_related("slot_type", "area").filter(pk__in=list(slot_ids))
+        if area is not None:
+            qs = qs.filter(area=area)
+        return qs
+
+    def get_compatibility_rows(self):
+        """
+        Returns (slot_id, size_rank, is_accessible, slot_type_id, area_id)
+        tuples for all slots. Used to build the vehicle/slot compatibility
+        matrix and the allocation buckets.
+        """
+        return self._qs.values_list(
+            "pk", "slot_type__size_rank", "is_accessible", "slot_type_id", "area_id"
+        ).iterator(chunk_size=2000)
+
+    def get_slot_type_ranks(self):
+        """
+        Returns (slot_type_id, size_rank) tuples for all slot types.
+        """
+        return SlotType.objects.values_list("pk", "size_rank")
+
 
 class ContractRepository:
     """
@@ -82,29 +184,72 @@ class ContractRepository:
             valid_to__gt=start,
         ).exists()
 
+    def get_reservation_intervals(self):
+        """
+        Returns (slot_id, valid_from, valid_to) tuples for every contract
+        that reserves a slot. Used to build the in-memory availability index.
+        """
+        return self._qs.filter(reserved_slot__isnull=False).values_list(
+            "reserved_slot_id", "valid_from", "valid_to"
+        ).iterator(chunk_size=2000)
+
 
 class MovementRepository:
     """
     Repository for Movement-related queries.
     """
 
-    def __init__(self, queryset=None):
+    def __init__(self, queryset=None, ledger_queryset=None):
         # In production this will be Movement.objects
         self._qs = queryset or Movement.objects
+        # Occupancy ledger: season movements and occasional tickets
+        self._ledger_qs = ledger_queryset if ledger_queryset is not None else OccupancyInterval.objects
+
+    def _occupied_at(self, at):
+        # start_time <= at < end_time on the (end_time, start_time) index;
+        # open intervals end at OPEN_END.
+        return self._ledger_qs.filter(end_time__gt=at, start_time__lte=at, slot__isnull=False)
+
+    def count_occupied_at(self, at, area=None) -> int:
+        """
+        Counts the slots occupied at 'at' (season cars and occasional
+        tickets), optionally within one area. 'at' may be now.
+        """
+        qs = self._occupied_at(at)
+        if area is not None:
+            qs = qs.filter(slot__area=area)
+        return qs.values("slot_id").distinct().count()
 
     def count_occupied_slots_at(self, slots_qs, at) -> int:
         """
-        Counts how many of the given slots are occupied at a specific time.
+        Counts how many of the given slots are occupied at a specific time,
+        by a season movement or an occasional ticket (occupancy ledger).
+        """
+        return self._occupied_at(at).filter(slot__in=slots_qs).values("slot_id").distinct().count()
+
+    def _ledger_overlapping(self, start, end, area=None):
+        qs = self._ledger_qs.filter(end_time__gt=start, start_time__lt=end, slot__isnull=False)
+        if area is not None:
+            qs = qs.filter(slot__area=area)
+        return qs
+
+    def stream_occupancy_starts(self, start, end, area=None):
+        """
+        Start times of the ledger intervals overlapping [start, end),
+        ascending, streamed in chunks.
+        """
+        return self._ledger_overlapping(start, end, area).order_by("start_time").values_list(
+            "start_time", flat=True
+        ).iterator(chunk_size=5000)
 
-        A slot is considered occupied if:
-        - it has at least one active contract at 'at'
-        - that contract has an open movement (exit_time is NULL).
+    def stream_occupancy_ends(self, start, end, area=None):
+        """
+        End times inside [start, end) of the ledger intervals overlapping
+        it, ascending, streamed in chunks (open intervals never end).
         """
-        return slots_qs.filter(
-            contracts__valid_from__lte=at,
-            contracts__valid_to__gte=at,
-            contracts__movements__exit_time__isnull=True,
-        ).distinct().count()
+        return self._ledger_overlapping(start, end, area).filter(end_time__lt=end).order_by(
+            "end_time"
+        ).values_list("end_time", flat=True).iterator(chunk_size=5000)
 
     def get_movements_overlapping_period(self, start, end, area=None):
         """
@@ -119,3 +264,481 @@ class MovementRepository:
             qs = qs.filter(contract__reserved_slot__area=area)
 
         return qs.select_related("contract")
+
+    def get_usage_rows(self, start, end, area=None):
+        """
+        Movements overlapping [start, end] grouped by area and slot type of
+        the contract's reserved slot, with their count and total whole
+        minutes. One aggregate query; no movement is loaded.
+        """
+        qs = self._qs.filter(entry_time__lt=end, exit_time__gt=start)
+        if area is not None:
+            qs = qs.filter(contract__reserved_slot__area=area)
+
+        return list(
+            qs.values(
+                area_id=F("contract__reserved_slot__area_id"),
+                area_name=F("contract__reserved_slot__area__name"),
+                slot_type_id=F("contract__reserved_slot__slot_type_id"),
+                slot_type_name=F("contract__reserved_slot__slot_type__name"),
+            )
+            .annotate(
+                movements=Count("pk"),
+                parked_minutes=Coalesce(Sum(WholeMinutes("entry_time", "exit_time")), 0),
+            )
+            .order_by()
+        )
+
+
+class OccupancyCounterRepository:
+    """
+    Per (area, slot type) occupancy counters (parking.models.OccupancyCounter).
+
+    occupy / release are single UPDATE statements with F() expressions:
+    concurrent gates never lose an update, and the change commits or rolls
+    back together with the movement / ticket write that triggered it.
+    """
+
+    def __init__(self, queryset=None):
+        self._qs = queryset if queryset is not None else OccupancyCounter.objects
+
+    # ------------------------------------------------------------------
+    # Incremental updates
+    # ------------------------------------------------------------------
+    def _adjust(self, delta, slots) -> int:
+        # 'slots' selects the one slot whose bucket changes.
+        return self._qs.filter(
+            Exists(slots.filter(area=OuterRef("area"), slot_type=OuterRef("slot_type")))
+        ).update(occupied_slots=F("occupied_slots") + delta)
+
+    def occupy(self, slot_id=None, contract_id=None):
+        """
+        A car parked on a slot (occasional ticket) or on the reserved slot
+        of a contract (season movement).
+        """
+        self._adjust(1, self._slot_filter(slot_id, contract_id))
+
+    def release(self, slot_id=None, contract_id=None):
+        self._adjust(-1, self._slot_filter(slot_id, contract_id))
+
+    @staticmethod
+    def _slot_filter(slot_id, contract_id):
+        if slot_id is not None:
+            return ParkingSlot.objects.filter(pk=slot_id)
+        return ParkingSlot.objects.filter(contracts__pk=contract_id)
+
+    # ------------------------------------------------------------------
+    # Reads (cost grows with the number of buckets, not with traffic)
+    # ------------------------------------------------------------------
+    def totals(self, area=None) -> dict:
+        qs = self._qs.all() if area is None else self._qs.filter(area=area)
+        return qs.aggregate(
+            total_slots=Coalesce(Sum("total_slots"), 0),
+            occupied_slots=Coalesce(Sum("occupied_slots"), 0),
+        )
+
+    def by_area(self):
+        return list(
+            self._qs.values("area_id", "area__name")
+            .annotate(total_slots=Sum("total_slots"), occupied_slots=Sum("occupied_slots"))
+            .order_by("area__name")
+        )
+
+    def by_slot_type(self):
+        return list(
+            self._qs.values("slot_type_id", "slot_type__name")
+            .annotate(total_slots=Sum("total_slots"), occupied_slots=Sum("occupied_slots"))
+            .order_by("slot_type__size_rank", "slot_type__name")
+        )
+
+    # ------------------------------------------------------------------
+    # Recomputation
+    # ------------------------------------------------------------------
+    def refresh_totals(self):
+        """
+        Recomputes total_slots of every bucket (after slot changes) and
+        creates missing buckets.
+        """
+        totals = {
+            (row["area_id"], row["slot_type_id"]): row["n"]
+            for row in ParkingSlot.objects.values("area_id", "slot_type_id").annotate(n=Count("pk"))
+        }
+        with transaction.atomic():
+            existing = {(c.area_id, c.slot_type_id): c for c in self._qs.select_for_update()}
+            changed = []
+            for key, counter in existing.items():
+                total = totals.get(key, 0)
+                if counter.total_slots != total:
+                    counter.total_slots = total
+                    changed.append(counter)
+            self._qs.bulk_update(changed, ["total_slots"])
+            self._qs.bulk_create(
+                [
+                    OccupancyCounter(area_id=area_id, slot_type_id=slot_type_id, total_slots=total)
+                    for (area_id, slot_type_id), total in totals.items()
+                    if (area_id, slot_type_id) not in existing
+                ]
+            )
+
+    def reconcile(self, dry_run=False) -> list:
+        """
+        Recomputes occupied_slots from the open season movements and open
+        occasional tickets. Returns the drifted buckets as
+        (area_id, slot_type_id, counted, actual) tuples and, unless
+        dry_run, fixes them. Run it when traffic is low: a gate event
+        committing in between is only seen on the next run.
+        """
+        actual = {}
+        season = OpenMovement.objects.filter(contract__reserved_slot__isnull=False).values(
+            area_id=F("contract__reserved_slot__area_id"),
+            slot_type_id=F("contract__reserved_slot__slot_type_id"),
+        )
+        occasional = OccasionalTicket.objects.filter(is_closed=False).values(
+            area_id=F("slot__area_id"),
+            slot_type_id=F("slot__slot_type_id"),
+        )
+        for qs in (season, occasional):
+            for row in qs.annotate(n=Count("pk")).order_by():
+                key = (row["area_id"], row["slot_type_id"])
+                actual[key] = actual.get(key, 0) + row["n"]
+
+        if not dry_run:
+            self.refresh_totals()
+        with transaction.atomic():
+            drift = []
+            for counter in self._qs.select_for_update():
+                counted, real = counter.occupied_slots, actual.get((counter.area_id, counter.slot_type_id), 0)
+                if counted != real:
+                    drift.append((counter.area_id, counter.slot_type_id, counted, real))
+                    counter.occupied_slots = real
+                    if not dry_run:
+                        counter.save(update_fields=["occupied_slots"])
+        return drift
+
+
+class OccupancyRollupRepository:
+    """
+    Stored hourly / daily occupancy rollups, their high-water mark, and
+    the occupancy-ledger reads the compactor (parking.rollups) needs.
+    """
+
+    HIGH_WATER_MARK = "occupancy_rollup"
+
+    def __init__(self, queryset=None, ledger_queryset=None, high_water_queryset=None):
+        self._qs = queryset if queryset is not None else OccupancyRollup.objects
+        self._ledger_qs = ledger_queryset if ledger_queryset is not None else OccupancyInterval.objects
+        self._marks = high_water_queryset if high_water_queryset is not None else RollupHighWaterMark.objects
+
+    # ------------------------------------------------------------------
+    # High-water mark
+    # ------------------------------------------------------------------
+    def get_high_water(self):
+        mark = self._marks.filter(name=self.HIGH_WATER_MARK).first()
+        return mark.position if mark is not None else None
+
+    # ------------------------------------------------------------------
+    # Ledger
+    # ------------------------------------------------------------------
+    def earliest_interval_start(self):
+        return self._ledger_qs.filter(slot__isnull=False).order_by("start_time").values_list(
+            "start_time", flat=True
+        ).first()
+
+    def intervals_between(self, start, end, area=None):
+        """
+        (area_id, slot_type_id, start_time, end_time) of the ledger
+        intervals overlapping [start, end), streamed in chunks.
+        """
+        qs = self._ledger_qs.filter(end_time__gt=start, start_time__lt=end, slot__isnull=False)
+        if area is not None:
+            qs = qs.filter(slot__area=area)
+        return qs.values_list("slot__area_id", "slot__slot_type_id", "start_time", "end_time").iterator(
+            chunk_size=5000
+        )
+
+    # ------------------------------------------------------------------
+    # Rollups
+    # ------------------------------------------------------------------
+    def buckets(self, granularity, start, end, area=None) -> list:
+        """
+        Stored rollups of one granularity with bucket_start in [start, end).
+        """
+        qs = self._qs.filter(granularity=granularity, bucket_start__gte=start, bucket_start__lt=end)
+        if area is not None:
+            qs = qs.filter(area=area)
+        return list(qs.order_by("bucket_start"))
+
+    def store(self, start, end, hourly, daily=None, daily_start=None):
+        """
+        Replaces the hourly rollups in [start, end) (and, if 'daily' is
+        given, the daily ones in [daily_start, end)) and moves the
+        high-water mark to 'end', atomically.
+        """
+        with transaction.atomic():
+            self._qs.filter(
+                granularity=OccupancyRollup.Granularity.HOUR, bucket_start__gte=start, bucket_start__lt=end
+            ).delete()
+            self._qs.bulk_create(hourly)
+            if daily is not None:
+                self._qs.filter(
+                    granularity=OccupancyRollup.Granularity.DAY, bucket_start__gte=daily_start, bucket_start__lt=end
+                ).delete()
+                self._qs.bulk_create(daily)
+            self._marks.update_or_create(name=self.HIGH_WATER_MARK, defaults={"position": end})
+
+
+class DwellTimeSketchRepository:
+    """
+    Stored daily dwell-time sketches, their high-water mark, and the
+    streamed reads of finished stays from the occupancy ledger.
+    """
+
+    HIGH_WATER_MARK = "dwell_time_sketch"
+
+    def __init__(self, queryset=None, ledger_queryset=None, high_water_queryset=None):
+        self._qs = queryset if queryset is not None else DwellTimeSketch.objects
+        self._ledger_qs = ledger_queryset if ledger_queryset is not None else OccupancyInterval.objects
+        self._marks = high_water_queryset if high_water_queryset is not None else RollupHighWaterMark.objects
+
+    def get_high_water(self):
+        mark = self._marks.filter(name=self.HIGH_WATER_MARK).first()
+        return mark.position if mark is not None else None
+
+    def earliest_end(self):
+        return self._ledger_qs.filter(slot__isnull=False).order_by("end_time").values_list(
+            "end_time", flat=True
+        ).first()
+
+    def stream_finished_stays(self, start, end, area=None, chunk_size=5000):
+        """
+        (area_id, slot_type_id, start_time, end_time) of the stays that
+        ended in [start, end), read 'chunk_size' rows at a time.
+        """
+        qs = self._ledger_qs.filter(end_time__gte=start, end_time__lt=end, slot__isnull=False)
+        if area is not None:
+            qs = qs.filter(slot__area=area)
+        return qs.values_list("slot__area_id", "slot__slot_type_id", "start_time", "end_time").iterator(
+            chunk_size=chunk_size
+        )
+
+    def sketches(self, first_day, last_day, area=None) -> list:
+        """
+        Stored sketches for the days in [first_day, last_day).
+        """
+        qs = self._qs.filter(day__gte=first_day, day__lt=last_day)
+        if area is not None:
+            qs = qs.filter(area=area)
+        return list(qs)
+
+    def bucket_names(self, area_ids, slot_type_ids):
+        return (
+            dict(ParkingArea.objects.filter(pk__in=area_ids).values_list("pk", "name")),
+            dict(SlotType.objects.filter(pk__in=slot_type_ids).values_list("pk", "name")),
+        )
+
+    def store(self, first_day, last_day, sketches, high_water):
+        """
+        Replaces the sketches of the days in [first_day, last_day) and
+        moves the high-water mark, atomically.
+        """
+        with transaction.atomic():
+            self._qs.filter(day__gte=first_day, day__lt=last_day).delete()
+            self._qs.bulk_create(sketches)
+            self._marks.update_or_create(name=self.HIGH_WATER_MARK, defaults={"position": high_water})
+
+
+class FreeSlotPool:
+    """
+    Persisted free-list of slots available for occasional parking.
+
+    - pop():  takes the longest-free slot (optionally per slot type / area)
+              via an index lookup instead of scanning all slots,
+    - push(): returns a slot to the pool (occasional exit),
+    - discard(): removes a slot (e.g. it became reserved by a season ticket),
+    - refresh(): reconciles the pool with the slot table (new slots, expired
+      season contracts). Run periodically via 'manage.py refresh_free_slot_pool'.
+
+    The pool is treated as a hint: every popped slot is re-validated against
+    active RegularContract reservations and open occasional tickets, so a
+    slot that became reserved since it was pushed is dropped, not handed out.
+
+    Claiming with parallel entry gates (FREE_SLOT_CLAIM_MODE setting):
+
+    - "skip_locked": the head row is read with SELECT ... FOR UPDATE SKIP
+      LOCKED (only the pool row is locked, not the joined slot/area rows),
+      so concurrent gates each lock a *different* free slot instead of
+      queueing on the same first row.
+    - "optimistic": fallback for backends without row locks (SQLite). The
+      head row is read without a lock and claimed with a DELETE; if the
+      DELETE removes nothing, another gate won the race and the next row
+      is tried. SQLite serializes writers anyway, so gates cannot claim in
+      parallel there; use OPTIONS={"transaction_mode": "IMMEDIATE"} so the
+      write lock is taken at BEGIN instead of failing on lock upgrade.
+    - "auto" (default): "skip_locked" where the backend supports it,
+      "optimistic" otherwise.
+    """
+
+    CLAIM_MODES = ("auto", "skip_locked", "optimistic")
+
+    def __init__(self, queryset=None, claim_mode=None):
+        # In production this will be FreeSlot.objects. May also be a filtered
+        # queryset (e.g. one area); "or" would evaluate it, hence the None check.
+        self._qs = queryset if queryset is not None else FreeSlot.objects
+        claim_mode = claim_mode or getattr(settings, "FREE_SLOT_CLAIM_MODE", "auto")
+        if claim_mode not in self.CLAIM_MODES:
+            raise ValueError(f"Unknown claim mode: {claim_mode}")
+        self._claim_mode = claim_mode
+
+    @property
+    def claim_mode(self) -> str:
+        """
+        The effective claim mode for the pool's database.
+        """
+        if self._claim_mode != "auto":
+            return self._claim_mode
+        features = connections[self._qs.db].features
+        return "skip_locked" if features.has_select_for_update_skip_locked else "optimistic"
+
+    def _claim_queryset(self):
+        qs = self._qs.select_related("slot", "slot__area", "slot__slot_type")
+        if self.claim_mode == "skip_locked":
+            features = connections[self._qs.db].features
+            lock_options = {"skip_locked": True}
+            if features.has_select_for_update_of:
+                # Lock the pool row only, not the joined slot/area/type rows.
+                lock_options["of"] = ("self",)
+            qs = qs.select_for_update(**lock_options)
+        return qs
+
+    @staticmethod
+    def _blocking_reservations(at):
+        """
+        Subqueries for the two reasons a slot cannot be used at 'at'.
+        """
+        active_contracts = RegularContract.objects.filter(
+            reserved_slot=OuterRef("pk"),
+            valid_from__lte=at,
+            valid_to__gte=at,
+        )
+        open_occasional = OccasionalTicket.objects.filter(
+            slot=OuterRef("pk"),
+            is_closed=False,
+        )
+        return Exists(active_contracts), Exists(open_occasional)
+
+    def _usable(self, slot_id, at):
+        has_season, has_open_occasional = self._blocking_reservations(at)
+        return ParkingSlot.objects.filter(pk=slot_id).annotate(
+            has_season=has_season,
+            has_open_occasional=has_open_occasional,
+        ).filter(has_season=False, has_open_occasional=False)
+
+    def _is_usable(self, slot_id, at) -> bool:
+        return self._usable(slot_id, at).exists()
+
+    @transaction.atomic
+    def pop(self, at=None, slot_type=None, area=None, slot_types=None, accessible=None, areas=None):
+        """
+        Removes and returns the longest-free usable slot, or None.
+
+        Optional filters: a single slot type, an area, several slot types
+        (ids) and accessibility (False = only non-accessible slots).
+        'areas' (ids) restricts the areas in order of preference: the
+        longest-free slot of the first area that has one is taken, in the
+        same query.
+        """
+        at = at or timezone.now()
+        qs = self._claim_queryset()
+        ordering = ["released_at"]
+        if slot_type is not None:
+            qs = qs.filter(slot_type=slot_type)
+        if area is not None:
+            qs = qs.filter(area=area)
+        if areas is not None:
+            areas = list(areas)
+            qs = qs.filter(area_id__in=areas)
+            if len(areas) > 1:
+                preference = Case(
+                    *(When(area_id=area_id, then=Value(rank)) for rank, area_id in enumerate(areas)),
+                    output_field=IntegerField(),
+                )
+                ordering.insert(0, preference)
+        if slot_types is not None:
+            qs = qs.filter(slot_type_id__in=list(slot_types))
+        if accessible is not None:
+            qs = qs.filter(is_accessible=accessible)
+
+        while True:
+            entry = qs.order_by(*ordering).first()
+            if entry is None:
+                return None
+            slot = entry.slot
+            # With SKIP LOCKED the row is already ours. In optimistic mode
+            # another gate may have claimed it in between: nothing is deleted.
+            deleted, _ = self._qs.filter(pk=slot.pk).delete()
+            if not deleted:
+                continue
+            if self._is_usable(slot.pk, at):
+                return slot
+
+    def push(self, slot, at=None):
+        """
+        Puts a slot (back) into the pool.
+        """
+        self._qs.update_or_create(
+            slot_id=slot.pk,
+            defaults={
+                "slot_type_id": slot.slot_type_id,
+                "area_id": slot.area_id,
+                "is_accessible": slot.is_accessible,
+                "released_at": at or timezone.now(),
+            },
+        )
+
+    def discard(self, slot_id):
+        """
+        Removes a slot from the pool, if present.
+        """
+        self._qs.filter(slot_id=slot_id).delete()
+
+    @transaction.atomic
+    def refresh(self, at=None) -> dict:
+        """
+        Reconciles the pool with the current reservations.
+
+        Returns the number of entries added and removed.
+        """
+        at = at or timezone.now()
+        has_season, has_open_occasional = self._blocking_reservations(at)
+        usable = {
+            slot_id: (slot_type_id, area_id, is_accessible)
+            for slot_id, slot_type_id, area_id, is_accessible in ParkingSlot.objects.annotate(
+                has_season=has_season,
+                has_open_occasional=has_open_occasional,
+            ).filter(has_season=False, has_open_occasional=False).values_list(
+                "pk", "slot_type_id", "area_id", "is_accessible"
+            )
+        }
+        pooled = set(self._qs.values_list("slot_id", flat=True))
+
+        stale = pooled - usable.keys()
+        missing = usable.keys() - pooled
+
+        if stale:
+            self._qs.filter(slot_id__in=list(stale)).delete()
+        self._qs.bulk_create(
+            [
+                FreeSlot(
+                    slot_id=slot_id,
+                    slot_type_id=usable[slot_id][0],
+                    area_id=usable[slot_id][1],
+                    is_accessible=usable[slot_id][2],
+                    released_at=at,
+                )
+                for slot_id in missing
+            ],
+            batch_size=1000,
+            ignore_conflicts=True,
+        )
+
+        return {"added": len(missing), "removed": len(stale)}
@@ -0,0 +1,119 @@
+"""
+The hot queries of the gates and the availability search, for plan
+checks (see core.querylog and the explain_hot_queries command).
+
+Each entry builds its queryset through the code path that runs it in
+production, with placeholder arguments (plans do not depend on them),
+and names the tables the plan must read through an index and the
+indexes it must use. A plan that reads one of those tables in full or
+skips one of those indexes means a missing or unusable index; the tests
+in parking/tests/test_hot_query_plans.py fail on it.
+"""
+
+from dataclasses import dataclass
+from typing import Callable
+
+from django.utils import timezone
+
+from contracts.models import Contract, Movement, OccasionalTicket
+from contracts.services import TicketService
+from parking.data import FreeSlotPool, MovementRepository
+from parking.models import ParkingSlot
+from vehicles.models import Vehicle
+
+PLATE = "XX-00-XX"
+
+
+@dataclass(frozen=True)
+class HotQuery:
+    name: str
+    description: str
+    build: Callable
+    indexed_tables: tuple
+    indexes: tuple = ()
+
+
+def _ticket_service():
+    return TicketService(pricing_service=None, payment_service=None)
+
+
+HOT_QUERIES = (
+    HotQuery(
+        "season_entry.by_plate",
+        "TicketService.enter_with_season_ticket: plate -> active contract, in use, gate exists",
+        lambda: _ticket_service()._season_entry_query(PLATE, 0, timezone.now()),
+        ("vehicles_vehicle", "contracts_contract", "contracts_regularcontract", "contracts_openmovement", "parking_gate"),
+        ("contract_vehicle_period_idx",),
+    ),
+    HotQuery(
+        "season_entry.by_contract",
+        "TicketService.enter_with_season_ticket with the plate cached",
+        lambda: _ticket_service()._season_entry_query(PLATE, 0, timezone.now(), contract_id=0),
+        ("contracts_contract", "contracts_regularcontract", "contracts_openmovement", "parking_gate"),
+    ),
+    HotQuery(
+        "season_exit.open_movement",
+        "TicketService.exit_with_season_ticket with the plate cached",
+        lambda: Movement.objects.filter(open_entry__contract_id=0),
+        ("contracts_movement", "contracts_openmovement"),
+    ),
+    HotQuery(
+        "season_exit.contract_by_vehicle",
+        "TicketService.exit_with_season_ticket: active contract of the vehicle",
+        lambda: Contract.objects.filter(vehicle=0, valid_from__lte=timezone.now(), valid_to__gte=timezone.now()),
+        ("contracts_contract",),
+        ("contract_vehicle_period_idx",),
+    ),
+    HotQuery(
+        "reservation.slot_overlap",
+        "TicketService.purchase_season_ticket / ContractRepository: contracts of a slot overlapping a period",
+        lambda: Contract.objects.filter(reserved_slot=0, valid_from__lt=timezone.now(), valid_to__gt=timezone.now()),
+        ("contracts_contract",),
+        ("contract_slot_period_idx",),
+    ),
+    HotQuery(
+        "movement.open",
+        "rebuild_open_movements: the open movements of the history (a scan of the partial index)",
+        lambda: Movement.objects.filter(exit_time__isnull=True).order_by("entry_time"),
+        (),
+        ("movement_open_contract_idx",),
+    ),
+    HotQuery(
+        "plate.vehicle",
+        "Vehicle by plate (season exit, occasional entry, unknown-plate check)",
+        lambda: Vehicle.objects.filter(license_plate=PLATE),
+        ("vehicles_vehicle",),
+    ),
+    HotQuery(
+        "plate.open_ticket",
+        "Open occasional ticket by plate (cash device, occasional exit)",
+        lambda: OccasionalTicket.objects.filter(license_plate=PLATE, is_closed=False).order_by("-entry_time"),
+        ("contracts_occasionalticket",),
+        ("ticket_plate_open_idx",),
+    ),
+    HotQuery(
+        "occasional_entry.usable_slot",
+        "FreeSlotPool: Exists subqueries (season contract now, open ticket) of a claimed slot",
+        lambda: FreeSlotPool()._usable(0, timezone.now()),
+        ("parking_parkingslot", "contracts_contract", "contracts_occasionalticket"),
+        ("contract_slot_period_idx", "ticket_slot_open_idx"),
+    ),
+    HotQuery(
+        "occasional_entry.pool_claim",
+        "FreeSlotPool.pop: longest-free slot of a bucket",
+        lambda: FreeSlotPool()._claim_queryset().filter(slot_type=0, area=0, is_accessible=False).order_by("released_at"),
+        ("parking_freeslot", "parking_parkingslot"),
+    ),
+    HotQuery(
+        "available_slots.load",
+        "_get_available_slots_for: the free slots found by the availability calendar",
+        lambda: ParkingSlot.objects.select_related("slot_type", "area").filter(pk__in=[1, 2, 3]),
+        ("parking_parkingslot", "parking_slottype", "parking_parkingarea"),
+    ),
+    HotQuery(
+        "occupancy.occupied_in_area",
+        "MovementRepository.count_occupied_at: ledger intervals open at a time, joined to their slot's area",
+        lambda: MovementRepository()._occupied_at(timezone.now()).filter(slot__area=0).values("slot_id").distinct(),
+        ("contracts_occupancyinterval",),
+    ),
+)
@@ -0,0 +1,241 @@
+"""
+Live free-slot counts per parking area for the entrance display boards.
+
+The boards keep a Server-Sent Events connection open
+(parking.views.occupancy_stream) instead of polling. OccupancyBroker is
+an in-process publish / subscribe hub:
+
+- the first subscriber of an area seeds the area's counts from the
+  occupancy counters (one query, under the broker lock so that no event
+  falls between the read and the registration); later subscribers get
+  them from memory,
+- every entry / exit (contracts.signals, after commit) publishes one
+  delta event - +1 or -1 free slot with the resulting count and a
+  sequence number - that is fanned out to all subscribers of the area;
+  nothing is recomputed per event or per subscriber,
+- a subscriber that falls behind by LIVE_OCCUPANCY_MAX_PENDING events
+  only keeps the newest one (it carries the absolute count),
+- idle streams re-read the counters at most every LIVE_OCCUPANCY_RESYNC
+  seconds per area, which also picks up changes made by other worker
+  processes (events only reach subscribers of the process they happen in).
+
+Without subscribers, publishing costs a single dict lookup.
+"""
+
+import threading
+import time
+from collections import OrderedDict, deque
+
+from django.conf import settings
+from django.db import transaction
+
+from parking.data import OccupancyCounterRepository, SlotRepository
+
+DEFAULT_MAX_PENDING = 100
+DEFAULT_RESYNC_SECONDS = 60
+# Slot / contract -> area lookups kept in memory.
+AREA_CACHE_SIZE = 10_000
+
+
+class Subscription:
+    """
+    Event queue of one connected client.
+    """
+
+    def __init__(self, area_id, max_pending: int):
+        self.area_id = area_id
+        self._max_pending = max_pending
+        self._events = deque()
+        self._ready = threading.Condition()
+        self.closed = False
+        self.overflows = 0
+
+    def push(self, event: dict):
+        with self._ready:
+            if len(self._events) >= self._max_pending:
+                # Too slow: skip ahead, the newest event has the absolute count.
+                self._events.clear()
+                self.overflows += 1
+            self._events.append(event)
+            self._ready.notify()
+
+    def get(self, timeout: float | None = None) -> dict | None:
+        """
+        The next event, or None after 'timeout' seconds without one.
+        """
+        with self._ready:
+            if not self._events and not self.closed:
+                self._ready.wait(timeout)
+            return self._events.popleft() if self._events else None
+
+    def close(self):
+        with self._ready:
+            self.closed = True
+            self._ready.notify_all()
+
+
+class OccupancyBroker:
+    """
+    Fans out free-slot changes per area to the subscribed clients.
+    """
+
+    def __init__(
+        self,
+        counter_repo: OccupancyCounterRepository | None = None,
+        slot_repo: SlotRepository | None = None,
+        max_pending: int | None = None,
+        resync_seconds: float | None = None,
+    ):
+        self._counter_repo = counter_repo or OccupancyCounterRepository()
+        self._slot_repo = slot_repo or SlotRepository()
+        if max_pending is None:
+            max_pending = getattr(settings, "LIVE_OCCUPANCY_MAX_PENDING", DEFAULT_MAX_PENDING)
+        if resync_seconds is None:
+            resync_seconds = getattr(settings, "LIVE_OCCUPANCY_RESYNC", DEFAULT_RESYNC_SECONDS)
+        self._max_pending = max_pending
+        self._resync_seconds = resync_seconds
+
+        self._lock = threading.Lock()
+        self._subscribers = {}  # area_id -> set of Subscription
+        self._state = {}  # area_id -> {"total_slots", "occupied_slots", "seq", "synced_at"}
+        self._areas = OrderedDict()  # ("slot" | "contract", id) -> area_id
+
+    def has_subscribers(self) -> bool:
+        return bool(self._subscribers)
+
+    def subscriber_count(self, area_id=None) -> int:
+        with self._lock:
+            if area_id is not None:
+                return len(self._subscribers.get(area_id, ()))
+            return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+    # ------------------------------------------------------------------
+    # Subscriptions
+    # ------------------------------------------------------------------
+    def subscribe(self, area_id) -> Subscription:
+        """
+        Registers a client; its first event is a snapshot of the area.
+        """
+        subscription = Subscription(area_id, self._max_pending)
+        with self._lock:
+            state = self._state.get(area_id)
+            if state is None:
+                # publish() drops the events of unseeded areas: read the
+                # counts and register before any of them can be published.
+                totals = self._counter_repo.totals(area_id)
+                state = self._state[area_id] = {**totals, "seq": 0, "synced_at": time.monotonic()}
+            self._subscribers.setdefault(area_id, set()).add(subscription)
+            subscription.push(self._event("snapshot", area_id, state))
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        subscription.close()
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.area_id)
+            if subscribers is None:
+                return
+            subscribers.discard(subscription)
+            if not subscribers:
+                # Nobody listens: the next subscriber re-seeds the counts.
+                del self._subscribers[subscription.area_id]
+                self._state.pop(subscription.area_id, None)
+
+    # ------------------------------------------------------------------
+    # Publishing
+    # ------------------------------------------------------------------
+    def publish(self, area_id, occupied_delta: int) -> int:
+        """
+        Applies an occupancy change and fans it out. Returns the number of
+        subscribers reached.
+        """
+        with self._lock:
+            state = self._state.get(area_id)
+            if state is None:
+                return 0
+            state["occupied_slots"] += occupied_delta
+            state["seq"] += 1
+            event = self._event("delta", area_id, state, delta=-occupied_delta)
+            subscribers = list(self._subscribers.get(area_id, ()))
+        for subscription in subscribers:
+            subscription.push(event)
+        return len(subscribers)
+
+    def resync(self, area_id, force=False):
+        """
+        Re-reads the area's counts if the last read is older than the
+        resync interval, and sends a snapshot if they drifted.
+        """
+        with self._lock:
+            state = self._state.get(area_id)
+            if state is None or (not force and time.monotonic() - state["synced_at"] < self._resync_seconds):
+                return
+            state["synced_at"] = time.monotonic()
+            seq = state["seq"]
+        totals = self._counter_repo.totals(area_id)
+        with self._lock:
+            state = self._state.get(area_id)
+            if state is None:
+                return
+            if state["seq"] != seq:
+                # Events arrived during the read: the counts may predate
+                # them, retry on the next idle interval.
+                state["synced_at"] = 0
+                return
+            if all(state[name] == value for name, value in totals.items()):
+                return
+            state.update(totals)
+            state["seq"] += 1
+            event = self._event("snapshot", area_id, state)
+            subscribers = list(self._subscribers.get(area_id, ()))
+        for subscription in subscribers:
+            subscription.push(event)
+
+    def notify(self, occupied_delta: int, slot_id=None, contract_id=None):
+        """
+        Called for every entry (+1) / exit (-1) inside the writing
+        transaction; publishes once it commits.
+        """
+        if not self.has_subscribers():
+            return
+        transaction.on_commit(lambda: self._publish_change(occupied_delta, slot_id, contract_id))
+
+    def _publish_change(self, occupied_delta, slot_id, contract_id):
+        key = ("slot", slot_id) if slot_id is not None else ("contract", contract_id)
+        with self._lock:
+            area_id = self._areas.get(key)
+        if area_id is None:
+            area_id = self._slot_repo.get_area_id(slot_id=slot_id, contract_id=contract_id)
+            if area_id is None:
+                return
+            with self._lock:
+                self._areas[key] = area_id
+                while len(self._areas) > AREA_CACHE_SIZE:
+                    self._areas.popitem(last=False)
+        self.publish(area_id, occupied_delta)
+
+    @staticmethod
+    def _event(kind, area_id, state, **extra) -> dict:
+        return {
+            "type": kind,
+            "area": area_id,
+            "seq": state["seq"],
+            **extra,
+            "free_slots": max(state["total_slots"] - state["occupied_slots"], 0),
+            "total_slots": state["total_slots"],
+        }
+
+
+_occupancy_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_occupancy_broker() -> OccupancyBroker:
+    """
+    Returns the process-wide occupancy broker.
+    """
+    global _occupancy_broker
+    if _occupancy_broker is None:
+        with _broker_lock:
+            if _occupancy_broker is None:
+                _occupancy_broker = OccupancyBroker()
+    return _occupancy_broker
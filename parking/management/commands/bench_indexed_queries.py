@@ -0,0 +1,236 @@
+import json
+import random
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from contracts.models import Contract, Movement, OccasionalTicket
+from contracts.services import TicketService
+from core.benchmarking import summarize
+from core.querylog import SUPPORTED_VENDORS, explain, used_indexes
+from parking.data import FreeSlotPool
+from parking.models import Gate
+
+BENCHMARKS = (
+    "season_entry.by_plate",
+    "season_exit.contract_by_vehicle",
+    "reservation.slot_overlap",
+    "movement.open_by_contract",
+    "movement.open_all",
+    "ticket.open_by_plate",
+    "ticket.open_by_slot",
+    "ticket.open_by_bucket",
+)
+
+
+class Command(BaseCommand):
+    """
+    Times the queries served by the composite and partial indexes of
+    contracts.Contract, Movement and OccasionalTicket on the current
+    data, one query per operation with arguments sampled from the data:
+
+    - season_entry.by_plate: TicketService's season-entry resolve,
+    - season_exit.contract_by_vehicle: active contract of a vehicle,
+    - reservation.slot_overlap: overlapping contracts of a slot (purchase,
+      ContractRepository.has_overlapping_for_slot),
+    - movement.open_by_contract / open_all: open movements in the history
+      (per contract, and all of them as rebuild_open_movements reads them),
+    - ticket.open_by_plate: open ticket of a plate (cash device, exit),
+    - ticket.open_by_slot: FreeSlotPool's usable-slot check,
+    - ticket.open_by_bucket: open tickets per bucket (counter reconcile).
+
+    Timings cover the statement on the database cursor, without the ORM;
+    each result names the indexes of the query plan. Run it before and
+    after a schema change with --output / --compare, e.g.
+
+        manage.py migrate contracts 0004
+        manage.py bench_indexed_queries --output before.json
+        manage.py migrate
+        manage.py bench_indexed_queries --compare before.json
+    """
+
+    help = "Time the queries served by the contract, movement and ticket indexes on the current data."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--samples", type=int, default=200, help="Operations per benchmark (default: 200).")
+        parser.add_argument(
+            "--full-samples",
+            type=int,
+            default=10,
+            help="Operations for the benchmarks reading all open rows (default: 10).",
+        )
+        parser.add_argument("--seed", type=int, default=42, help="Random seed of the samples (default: 42).")
+        parser.add_argument(
+            "--only",
+            default=",".join(BENCHMARKS),
+            help="Comma-separated benchmarks to run (default: all).",
+        )
+        parser.add_argument("--output", help="Write the JSON results to this file.")
+        parser.add_argument("--compare", help="JSON results of an earlier run to compare against.")
+        parser.add_argument("--json", action="store_true", help="Print the results as JSON.")
+
+    def handle(self, *args, **options):
+        if connection.vendor not in SUPPORTED_VENDORS:
+            raise CommandError(f"Plans of {connection.vendor} are not supported.")
+        selected = [name.strip() for name in options["only"].split(",") if name.strip()]
+        unknown = sorted(set(selected) - set(BENCHMARKS))
+        if unknown:
+            raise CommandError(f"Unknown benchmark(s): {', '.join(unknown)}. Choose from {', '.join(BENCHMARKS)}.")
+        if options["samples"] < 1 or options["full_samples"] < 1:
+            raise CommandError("--samples and --full-samples must be positive.")
+        baseline = None
+        if options["compare"]:
+            try:
+                with open(options["compare"]) as source:
+                    baseline = json.load(source)["benchmarks"]
+            except (OSError, ValueError, KeyError) as exc:
+                raise CommandError(f"Cannot read {options['compare']}: {exc}")
+
+        self._samples = options["samples"]
+        self._full_samples = options["full_samples"]
+        self._random = random.Random(options["seed"])
+        self._now = timezone.now()
+        results = {
+            "vendor": connection.vendor,
+            "started_at": self._now.isoformat(),
+            "dataset": {
+                "contracts": Contract.objects.count(),
+                "movements": Movement.objects.count(),
+                "tickets": OccasionalTicket.objects.count(),
+            },
+            "benchmarks": {},
+        }
+        # The season-entry resolve locks its rows: run inside a transaction.
+        with transaction.atomic():
+            for name in BENCHMARKS:
+                if name in selected:
+                    results["benchmarks"][name] = getattr(self, "_bench_" + name.replace(".", "_"))()
+            transaction.set_rollback(True)
+
+        if options["output"]:
+            with open(options["output"], "w") as target:
+                json.dump(results, target, indent=2)
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+
+        dataset = ", ".join(f"{count} {name}" for name, count in results["dataset"].items())
+        self.stdout.write(f"Backend: {results['vendor']}, data: {dataset}")
+        header = f"{'benchmark':<32} {'ops':>5} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"
+        self.stdout.write(header + (f" {'base p50':>9} {'change':>7}" if baseline else "") + "  indexes")
+        for name, run in results["benchmarks"].items():
+            line = f"{name:<32} {run['count']:>5} {run['p50_ms']:>8.3f} {run['p95_ms']:>8.3f} {run['p99_ms']:>8.3f}"
+            before = (baseline or {}).get(name)
+            if baseline:
+                if before and before.get("p50_ms"):
+                    line += f" {before['p50_ms']:>9.3f} {run['p50_ms'] / before['p50_ms'] - 1:>+7.1%}"
+                else:
+                    line += f" {'':>9} {'':>7}"
+            self.stdout.write(f"{line}  {', '.join(run['indexes']) or '-'}")
+
+    # ------------------------------------------------------------------
+    # Measuring
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _measure(build, arguments) -> dict:
+        """
+        Runs the SQL of the queryset build(argument) per argument on a
+        cursor, so the timings are the database's (no model
+        instantiation). The plan is the one of the first argument.
+        """
+        arguments = list(arguments)
+        if not arguments:
+            return {**summarize([]), "indexes": [], "plan": ""}
+        plan = explain(build(arguments[0]))
+        durations = []
+        with connection.cursor() as cursor:
+            for argument in arguments:
+                sql, params = build(argument).query.sql_with_params()
+                started = time.perf_counter()
+                cursor.execute(sql, params)
+                cursor.fetchall()
+                durations.append(time.perf_counter() - started)
+        return {
+            **summarize(durations),
+            "indexes": sorted(used_indexes(plan, connection.vendor)),
+            "plan": plan,
+        }
+
+    def _sample(self, queryset, field):
+        """
+        --samples values of 'field', the same ones on every run with the
+        same seed and data (ORDER BY RANDOM() is not seeded).
+        """
+        values = list(queryset.order_by("pk").values_list(field, flat=True))
+        return self._random.sample(values, min(self._samples, len(values)))
+
+    # ------------------------------------------------------------------
+    # Benchmarks
+    # ------------------------------------------------------------------
+    def _bench_season_entry_by_plate(self):
+        service = TicketService(pricing_service=None, payment_service=None)
+        gate_id = Gate.objects.values_list("pk", flat=True).first()
+        plates = self._sample(
+            Contract.objects.filter(valid_from__lte=self._now, valid_to__gte=self._now),
+            "vehicle__license_plate",
+        )
+        return self._measure(lambda plate: service._season_entry_query(plate, gate_id, self._now)[:1], plates)
+
+    def _bench_season_exit_contract_by_vehicle(self):
+        vehicles = self._sample(Contract.objects.all(), "vehicle_id")
+        return self._measure(
+            lambda vehicle_id: Contract.objects.filter(
+                vehicle_id=vehicle_id, valid_from__lte=self._now, valid_to__gte=self._now
+            )[:1],
+            vehicles,
+        )
+
+    def _bench_reservation_slot_overlap(self):
+        start = self._now + timedelta(days=30)
+        end = start + timedelta(days=30)
+        slots = self._sample(Contract.objects.filter(reserved_slot__isnull=False), "reserved_slot_id")
+        return self._measure(
+            lambda slot_id: Contract.objects.filter(reserved_slot=slot_id, valid_from__lt=end, valid_to__gt=start)
+            .values("pk")[:1],
+            slots,
+        )
+
+    def _bench_movement_open_by_contract(self):
+        contracts = self._sample(Contract.objects.filter(movements__isnull=False), "pk")
+        return self._measure(
+            lambda contract_id: Movement.objects.filter(contract_id=contract_id, exit_time__isnull=True),
+            contracts,
+        )
+
+    def _bench_movement_open_all(self):
+        return self._measure(
+            lambda _: Movement.objects.filter(exit_time__isnull=True)
+            .order_by("entry_time")
+            .values_list("pk", "contract_id", "entry_time"),
+            range(self._full_samples),
+        )
+
+    def _bench_ticket_open_by_plate(self):
+        plates = self._sample(OccasionalTicket.objects.all(), "license_plate")
+        return self._measure(
+            lambda plate: OccasionalTicket.objects.filter(license_plate=plate, is_closed=False).order_by("-entry_time")[:1],
+            plates,
+        )
+
+    def _bench_ticket_open_by_slot(self):
+        pool = FreeSlotPool()
+        slots = self._sample(OccasionalTicket.objects.all(), "slot_id")
+        return self._measure(lambda slot_id: pool._usable(slot_id, self._now), slots)
+
+    def _bench_ticket_open_by_bucket(self):
+        return self._measure(
+            lambda _: OccasionalTicket.objects.filter(is_closed=False)
+            .values(area_id=F("slot__area_id"), slot_type_id=F("slot__slot_type_id"))
+            .annotate(n=Count("pk"))
+            .order_by(),
+            range(self._full_samples),
+        )
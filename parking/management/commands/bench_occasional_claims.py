@@ -0,0 +1,171 @@
+import json
+import threading
+import time
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, close_old_connections, connection
+
+from contracts.models import OccasionalTicket
+from contracts.services import TicketService
+from core.benchmarking import summarize, timed
+from core.services import ISlotAllocator
+from parking.data import FreeSlotPool
+from parking.models import FreeSlot, Gate, ParkingArea, ParkingSlot, SlotType
+from parking.services import PaymentService, PricingService
+
+
+class _PoolHeadAllocator(ISlotAllocator):
+    """
+    Claims the head of the pool: the benchmark measures claim contention,
+    not the allocation policy (see bench_slot_allocation for that).
+    """
+
+    def allocate(self, pool, vehicle=None, at=None):
+        return pool.pop(at=at)
+
+    def choose(self, slots, vehicle=None):
+        return next(iter(slots), None)
+
+
+class Command(BaseCommand):
+    """
+    Multi-threaded benchmark for concurrent occasional entries.
+
+    For every gate count, a temporary area with enough free slots is created
+    and each gate (one thread with its own DB connection) issues tickets via
+    TicketService.start_occasional_entry as fast as it can. Reports
+    throughput, latency percentiles, errors and whether any slot was handed
+    out twice, then removes everything it created.
+
+    With skip_locked (PostgreSQL, MySQL 8, Oracle) throughput should grow
+    with the number of gates; with the optimistic SQLite fallback writers
+    are serialized and throughput stays roughly flat.
+    """
+
+    help = "Benchmark concurrent occasional slot claiming for 1..N parallel entry gates."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--gates",
+            default="1,2,4,8",
+            help="Comma-separated numbers of concurrent gates (default: 1,2,4,8).",
+        )
+        parser.add_argument(
+            "--entries-per-gate",
+            type=int,
+            default=50,
+            help="Tickets issued by each gate (default: 50).",
+        )
+        parser.add_argument(
+            "--claim-mode",
+            choices=FreeSlotPool.CLAIM_MODES,
+            default=None,
+            help="Override FREE_SLOT_CLAIM_MODE for this run.",
+        )
+        parser.add_argument("--json", action="store_true", help="Print the results as JSON.")
+
+    def handle(self, *args, **options):
+        try:
+            gate_counts = [int(value) for value in options["gates"].split(",") if value.strip()]
+        except ValueError:
+            raise CommandError("--gates must be a comma-separated list of integers.")
+        if not gate_counts or min(gate_counts) < 1 or options["entries_per_gate"] < 1:
+            raise CommandError("Gate counts and --entries-per-gate must be positive.")
+
+        mode = FreeSlotPool(claim_mode=options["claim_mode"]).claim_mode
+        results = [
+            self._run(gates, options["entries_per_gate"], options["claim_mode"])
+            for gates in gate_counts
+        ]
+
+        if options["json"]:
+            self.stdout.write(json.dumps({"claim_mode": mode, "vendor": connection.vendor, "runs": results}, indent=2))
+            return
+
+        self.stdout.write(f"Backend: {connection.vendor}, claim mode: {mode}")
+        self.stdout.write(
+            f"{'gates':>5} {'claims':>7} {'errors':>6} {'dupes':>5} {'claims/s':>9} "
+            f"{'p50 ms':>8} {'p95 ms':>8} {'max ms':>8}"
+        )
+        for run in results:
+            latency = run["latency"]
+            self.stdout.write(
+                f"{run['gates']:>5} {run['claims']:>7} {run['errors']:>6} {run['duplicates']:>5} "
+                f"{run['throughput_per_s']:>9.1f} {latency['p50_ms']:>8.2f} "
+                f"{latency['p95_ms']:>8.2f} {latency['max_ms']:>8.2f}"
+            )
+
+    # ------------------------------------------------------------------
+    # One benchmark run
+    # ------------------------------------------------------------------
+    def _run(self, gates: int, entries_per_gate: int, claim_mode) -> dict:
+        tag = uuid.uuid4().hex[:8]
+        slot_type = SlotType.objects.create(code=f"BENCH-{tag}", name="Benchmark", size_rank=1)
+        area = ParkingArea.objects.create(name=f"bench-claims-{tag}", description="Temporary benchmark area")
+        try:
+            slots = ParkingSlot.objects.bulk_create(
+                [
+                    ParkingSlot(area=area, number=f"B{i}", slot_type=slot_type)
+                    for i in range(gates * entries_per_gate)
+                ]
+            )
+            # bulk_create bypasses the post_save signal that fills the pool
+            FreeSlot.objects.bulk_create(
+                [FreeSlot(slot_id=slot.pk, slot_type_id=slot_type.pk, area_id=area.pk) for slot in slots]
+            )
+            gate_ids = [Gate.objects.create(area=area, name=f"Gate {i}").pk for i in range(gates)]
+
+            durations = [[] for _ in range(gates)]
+            errors = [0] * gates
+            barrier = threading.Barrier(gates + 1)
+
+            def gate_worker(index):
+                service = TicketService(
+                    pricing_service=PricingService(),
+                    payment_service=PaymentService(),
+                    # Restricted to the benchmark area: real slots are never handed out.
+                    slot_pool=FreeSlotPool(queryset=FreeSlot.objects.filter(area=area), claim_mode=claim_mode),
+                    allocator=_PoolHeadAllocator(),
+                )
+                try:
+                    barrier.wait()
+                    for n in range(entries_per_gate):
+                        try:
+                            with timed(durations[index]):
+                                result = service.start_occasional_entry(f"BN-{tag}-{index}-{n}", gate_ids[index])
+                            if not result["success"]:
+                                errors[index] += 1
+                        except DatabaseError:
+                            errors[index] += 1
+                finally:
+                    connection.close()
+
+            threads = [threading.Thread(target=gate_worker, args=(i,)) for i in range(gates)]
+            for thread in threads:
+                thread.start()
+            barrier.wait()
+            started = time.perf_counter()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - started
+            close_old_connections()
+
+            tickets = OccasionalTicket.objects.filter(slot__area=area)
+            claims = tickets.count()
+            distinct_slots = tickets.values("slot_id").distinct().count()
+
+            return {
+                "gates": gates,
+                "claims": claims,
+                "errors": sum(errors),
+                "duplicates": claims - distinct_slots,
+                "elapsed_s": round(elapsed, 4),
+                "throughput_per_s": round(claims / elapsed, 1) if elapsed else 0.0,
+                "latency": summarize([d for per_gate in durations for d in per_gate]),
+            }
+        finally:
+            # Tickets protect their slots; remove them before the area cascade.
+            OccasionalTicket.objects.filter(slot__area=area).delete()
+            area.delete()
+            slot_type.delete()
@@ -0,0 +1,141 @@
+import json
+import threading
+import time
+import tracemalloc
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.benchmarking import summarize
+from parking.live import OccupancyBroker
+from parking.models import ParkingArea
+
+
+class Command(BaseCommand):
+    """
+    Fan-out harness for the live occupancy streams (parking.live).
+
+    For every subscriber count, that many simulated display boards
+    subscribe to one temporary area, each consuming its events on its own
+    thread (as an SSE connection does on a worker thread). Events are
+    published at a fixed interval and every receipt is timed. Reports:
+
+    - publish: time spent in OccupancyBroker.publish (enqueueing the event
+      for all subscribers),
+    - delivery: publish -> receipt, per subscriber and event,
+    - fan-out: publish -> receipt by the last subscriber, per event,
+    - memory per subscription (tracemalloc; thread stacks not included).
+    """
+
+    help = "Measure fan-out latency and memory per connection of the live occupancy streams."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--subscribers",
+            default="100,500,1000",
+            help="Comma-separated numbers of concurrent subscribers (default: 100,500,1000).",
+        )
+        parser.add_argument("--events", type=int, default=200, help="Events published per run (default: 200).")
+        parser.add_argument(
+            "--interval-ms",
+            type=float,
+            default=5.0,
+            help="Pause between two events in milliseconds (default: 5).",
+        )
+        parser.add_argument("--json", action="store_true", help="Print the results as JSON.")
+
+    def handle(self, *args, **options):
+        try:
+            counts = [int(value) for value in options["subscribers"].split(",") if value.strip()]
+        except ValueError:
+            raise CommandError("--subscribers must be a comma-separated list of integers.")
+        if not counts or min(counts) < 1 or options["events"] < 1 or options["interval_ms"] < 0:
+            raise CommandError("Subscriber counts and --events must be positive.")
+
+        area = ParkingArea.objects.create(
+            name=f"bench-stream-{uuid.uuid4().hex[:8]}", description="Temporary benchmark area"
+        )
+        try:
+            results = [
+                self._run(area.pk, subscribers, options["events"], options["interval_ms"] / 1000)
+                for subscribers in counts
+            ]
+        finally:
+            area.delete()
+
+        if options["json"]:
+            self.stdout.write(json.dumps({"runs": results}, indent=2))
+            return
+
+        self.stdout.write(
+            f"{'subs':>6} {'delivered':>10} {'dropped':>7} {'publish p50':>12} {'deliv p95':>10} "
+            f"{'fanout p50':>11} {'fanout p99':>11} {'bytes/sub':>10}"
+        )
+        for run in results:
+            self.stdout.write(
+                f"{run['subscribers']:>6} {run['delivered']:>10} {run['dropped']:>7} "
+                f"{run['publish']['p50_ms']:>12.3f} {run['delivery']['p95_ms']:>10.3f} "
+                f"{run['fan_out']['p50_ms']:>11.3f} {run['fan_out']['p99_ms']:>11.3f} "
+                f"{run['bytes_per_subscription']:>10}"
+            )
+
+    def _run(self, area_id, subscriber_count: int, event_count: int, interval: float) -> dict:
+        broker = OccupancyBroker(max_pending=event_count + 1)
+
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        subscriptions = [broker.subscribe(area_id) for _ in range(subscriber_count)]
+        after = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        allocated = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+
+        received = [[] for _ in range(subscriber_count)]  # (seq, perf_counter) per subscriber
+
+        def consume(index):
+            subscription = subscriptions[index]
+            subscription.get()  # the snapshot
+            while True:
+                event = subscription.get(timeout=5)
+                if event is None:
+                    return
+                received[index].append((event["seq"], time.perf_counter()))
+                if event["seq"] >= event_count:
+                    return
+
+        threads = [threading.Thread(target=consume, args=(i,), daemon=True) for i in range(subscriber_count)]
+        for thread in threads:
+            thread.start()
+
+        published_at = {}
+        publish_durations = []
+        for n in range(event_count):
+            started = time.perf_counter()
+            broker.publish(area_id, 1 if n % 2 == 0 else -1)
+            publish_durations.append(time.perf_counter() - started)
+            published_at[n + 1] = started
+            if interval:
+                time.sleep(interval)
+        for thread in threads:
+            thread.join(10)
+
+        last_receipt = {}
+        deliveries = []
+        for per_subscriber in received:
+            for seq, at in per_subscriber:
+                deliveries.append(at - published_at[seq])
+                last_receipt[seq] = max(last_receipt.get(seq, 0.0), at)
+        fan_out = [at - published_at[seq] for seq, at in last_receipt.items()]
+
+        for subscription in subscriptions:
+            broker.unsubscribe(subscription)
+
+        return {
+            "subscribers": subscriber_count,
+            "events": event_count,
+            "delivered": len(deliveries),
+            "dropped": sum(subscription.overflows for subscription in subscriptions),
+            "publish": summarize(publish_durations),
+            "delivery": summarize(deliveries),
+            "fan_out": summarize(fan_out),
+            "bytes_per_subscription": round(allocated / subscriber_count),
+        }
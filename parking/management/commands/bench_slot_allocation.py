@@ -0,0 +1,160 @@
+import json
+import random
+import time
+import uuid
+from collections import Counter
+from datetime import timedelta
+from types import SimpleNamespace
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from core.benchmarking import summarize, timed
+from parking.allocation import ALLOCATORS, get_allocator
+from parking.compatibility import SlotCompatibilityMatrix
+from parking.data import FreeSlotPool, SlotRepository
+from parking.models import FreeSlot, ParkingArea, ParkingSlot, SlotType
+
+# (size rank, share of the slots, share of the arriving vehicles)
+SIZE_MIX = [
+    (1, 0.6, 0.55),
+    (2, 0.3, 0.3),
+    (3, 0.1, 0.15),
+]
+# Arriving vehicles as a share of the slots
+DEMAND = 0.9
+
+
+class Command(BaseCommand):
+    """
+    Compares slot allocation strategies on the same synthetic garage.
+
+    For each strategy, temporary areas with a mix of small / medium /
+    oversize slots (shuffled, so the longest-free order ignores sizes) are
+    created and vehicles for 90% of the capacity arrive in a seeded
+    random order. Reports allocation latency and the rejection rate per
+    vehicle size, then removes everything it created.
+    """
+
+    help = "Benchmark slot allocation strategies (latency and rejection rate)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--slots", type=int, default=300, help="Slots in the garage (default: 300).")
+        parser.add_argument("--areas", type=int, default=3, help="Number of areas (default: 3).")
+        parser.add_argument(
+            "--strategies",
+            default=",".join(ALLOCATORS),
+            help=f"Comma-separated allocators (default: {','.join(ALLOCATORS)}).",
+        )
+        parser.add_argument("--seed", type=int, default=42, help="Random seed (default: 42).")
+        parser.add_argument("--json", action="store_true", help="Print the results as JSON.")
+
+    def handle(self, *args, **options):
+        if options["slots"] < 1 or options["areas"] < 1:
+            raise CommandError("--slots and --areas must be positive.")
+        strategies = [name.strip() for name in options["strategies"].split(",") if name.strip()]
+
+        results = []
+        for name in strategies:
+            try:
+                results.append(self._run(name, options["slots"], options["areas"], options["seed"]))
+            except ValueError as exc:
+                raise CommandError(str(exc))
+
+        if options["json"]:
+            self.stdout.write(json.dumps({"runs": results}, indent=2))
+            return
+
+        self.stdout.write(
+            f"{'strategy':<12} {'arrivals':>8} {'rejected':>8} {'rate':>6} {'by rank':<18} "
+            f"{'p50 ms':>8} {'p95 ms':>8} {'per area':<20}"
+        )
+        for run in results:
+            latency = run["latency"]
+            by_rank = " ".join(f"{rank}:{count}" for rank, count in sorted(run["rejected_by_rank"].items()))
+            per_area = "/".join(str(count) for count in run["claims_per_area"])
+            self.stdout.write(
+                f"{run['strategy']:<12} {run['arrivals']:>8} {run['rejected']:>8} "
+                f"{run['rejection_rate']:>6.1%} {by_rank:<18} {latency['p50_ms']:>8.2f} "
+                f"{latency['p95_ms']:>8.2f} {per_area:<20}"
+            )
+
+    # ------------------------------------------------------------------
+    # One benchmark run
+    # ------------------------------------------------------------------
+    def _run(self, strategy: str, slot_count: int, area_count: int, seed: int) -> dict:
+        rng = random.Random(seed)
+        tag = uuid.uuid4().hex[:8]
+        slot_types = {
+            rank: SlotType.objects.create(code=f"BENCH{rank}-{tag}", name=f"Benchmark {rank}", size_rank=rank)
+            for rank, _, _ in SIZE_MIX
+        }
+        areas = [
+            ParkingArea.objects.create(name=f"bench-alloc-{tag}-{i}", description="Temporary benchmark area")
+            for i in range(area_count)
+        ]
+        try:
+            ranks = [rank for rank, slot_share, _ in SIZE_MIX for _ in range(round(slot_count * slot_share))]
+            rng.shuffle(ranks)
+            slots = ParkingSlot.objects.bulk_create(
+                [
+                    ParkingSlot(area=areas[i % area_count], number=f"B{i}", slot_type=slot_types[rank])
+                    for i, rank in enumerate(ranks)
+                ]
+            )
+            # bulk_create bypasses the post_save signal that fills the pool
+            released_at = timezone.now() - timedelta(hours=1)
+            FreeSlot.objects.bulk_create(
+                [
+                    FreeSlot(
+                        slot_id=slot.pk,
+                        slot_type_id=slot.slot_type_id,
+                        area_id=slot.area_id,
+                        released_at=released_at + timedelta(microseconds=i),
+                    )
+                    for i, slot in enumerate(slots)
+                ]
+            )
+
+            # Both pool and matrix only see the benchmark areas.
+            bench_slots = ParkingSlot.objects.filter(area__in=areas)
+            matrix = SlotCompatibilityMatrix(slot_repo=SlotRepository(bench_slots), max_age_seconds=float("inf"))
+            matrix.rebuild()
+            allocator = get_allocator(strategy, compatibility_matrix=matrix)
+            pool = FreeSlotPool(queryset=FreeSlot.objects.filter(area__in=areas))
+
+            arrivals = rng.choices(
+                [rank for rank, _, _ in SIZE_MIX],
+                weights=[vehicle_share for _, _, vehicle_share in SIZE_MIX],
+                k=round(len(slots) * DEMAND),
+            )
+            durations = []
+            rejected = Counter()
+            claims_per_area = Counter()
+            started = time.perf_counter()
+            for rank in arrivals:
+                vehicle = SimpleNamespace(minimum_slot_type_id=slot_types[rank].pk, has_disability_permit=False)
+                with timed(durations):
+                    slot = allocator.allocate(pool, vehicle=vehicle)
+                if slot is None:
+                    rejected[rank] += 1
+                else:
+                    claims_per_area[slot.area_id] += 1
+            elapsed = time.perf_counter() - started
+
+            return {
+                "strategy": strategy,
+                "slots": len(slots),
+                "arrivals": len(arrivals),
+                "rejected": sum(rejected.values()),
+                "rejection_rate": round(sum(rejected.values()) / len(arrivals), 4),
+                "rejected_by_rank": {rank: rejected[rank] for rank in slot_types},
+                "claims_per_area": [claims_per_area[area.pk] for area in areas],
+                "elapsed_s": round(elapsed, 4),
+                "latency": summarize(durations),
+            }
+        finally:
+            for area in areas:
+                area.delete()
+            for slot_type in slot_types.values():
+                slot_type.delete()
@@ -0,0 +1,284 @@
+import json
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from contracts.models import Movement, OccasionalTicket, OccupancyInterval, OpenMovement, RegularContract
+from contracts.services import TicketService
+from contracts.views import _get_available_slots_for
+from core.benchmarking import QueryCounter, summarize
+from customers.models import Customer
+from parking.models import Gate, ParkingArea, ParkingSlot
+from parking.services import PaymentService, PricingService, SlotService
+from parking.views import _compute_stats
+from vehicles.models import Vehicle
+
+BENCHMARKS = (
+    "find_available_slots",
+    "available_slots_view",
+    "season_entry",
+    "season_exit",
+    "occasional_entry",
+    "occasional_pricing",
+    "occasional_payment",
+    "occasional_exit",
+    "pricing",
+    "stats_compute",
+    "stats_view",
+    "occupancy_board",
+)
+
+
+class Command(BaseCommand):
+    """
+    Benchmark suite for the hot paths, run against the data in the
+    database - typically a garage generated with generate_garage.
+
+    Every benchmark repeats one operation on a random sample (vehicles
+    with a current season contract, open occasional tickets, ...):
+
+    - find_available_slots / available_slots_view: SlotService and the
+      season-ticket form's slot list for a period next month,
+    - season_entry / season_exit: TicketService gate entry and exit,
+    - occasional_entry: slot allocation from the free-slot pool,
+    - occasional_pricing / _payment / _exit: cash device and exit gate,
+    - pricing: PricingService.get_occasional_price,
+    - stats_compute: the uncached statistics computation,
+    - stats_view / occupancy_board: the views through the full stack.
+
+    The first operation of a benchmark (cold caches) is reported apart
+    from the rest. All writes are rolled back, so repeated runs measure
+    the same data. Results, including the dataset size and the queries
+    per operation, are written as JSON (--json / --output); --compare
+    prints the p50 change against an earlier result file.
+    """
+
+    help = "Time the hot paths (availability, gates, allocation, pricing, statistics) on the current data."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--samples", type=int, default=200, help="Operations per benchmark (default: 200).")
+        parser.add_argument(
+            "--view-samples",
+            type=int,
+            default=20,
+            help="Operations for the statistics benchmarks (default: 20).",
+        )
+        parser.add_argument(
+            "--only",
+            default=",".join(BENCHMARKS),
+            help="Comma-separated benchmarks to run (default: all).",
+        )
+        parser.add_argument("--output", help="Write the JSON results to this file.")
+        parser.add_argument("--compare", help="JSON results of an earlier run to compare against.")
+        parser.add_argument("--json", action="store_true", help="Print the results as JSON.")
+
+    def handle(self, *args, **options):
+        selected = [name.strip() for name in options["only"].split(",") if name.strip()]
+        unknown = sorted(set(selected) - set(BENCHMARKS))
+        if unknown:
+            raise CommandError(f"Unknown benchmark(s): {', '.join(unknown)}. Choose from {', '.join(BENCHMARKS)}.")
+        if options["samples"] < 1 or options["view_samples"] < 1:
+            raise CommandError("--samples and --view-samples must be positive.")
+        baseline = None
+        if options["compare"]:
+            try:
+                with open(options["compare"]) as source:
+                    baseline = json.load(source)["benchmarks"]
+            except (OSError, ValueError, KeyError) as exc:
+                raise CommandError(f"Cannot read {options['compare']}: {exc}")
+
+        results = {
+            "vendor": connection.vendor,
+            "started_at": timezone.now().isoformat(),
+            "samples": options["samples"],
+            "dataset": self._dataset(),
+            "benchmarks": {},
+        }
+        self._samples = options["samples"]
+        self._view_samples = options["view_samples"]
+        with transaction.atomic():
+            for name in BENCHMARKS:
+                if name in selected:
+                    results["benchmarks"][name] = getattr(self, f"_bench_{name}")()
+            transaction.set_rollback(True)
+
+        if options["output"]:
+            with open(options["output"], "w") as target:
+                json.dump(results, target, indent=2)
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+
+        dataset = ", ".join(f"{count} {name}" for name, count in results["dataset"].items())
+        self.stdout.write(f"Backend: {results['vendor']}, data: {dataset}")
+        header = (
+            f"{'benchmark':<22} {'ops':>5} {'ok':>5} {'first ms':>9} {'p50 ms':>8} {'p95 ms':>8} "
+            f"{'p99 ms':>8} {'q/op':>6}"
+        )
+        self.stdout.write(header + (f" {'base p50':>9} {'change':>7}" if baseline else ""))
+        for name, run in results["benchmarks"].items():
+            line = (
+                f"{name:<22} {run['operations']:>5} {run['ok']:>5} {run['first_ms']:>9.2f} {run['p50_ms']:>8.3f} "
+                f"{run['p95_ms']:>8.3f} {run['p99_ms']:>8.3f} {run['queries_per_op']:>6.1f}"
+            )
+            before = (baseline or {}).get(name)
+            if before and before.get("p50_ms"):
+                line += f" {before['p50_ms']:>9.3f} {run['p50_ms'] / before['p50_ms'] - 1:>+7.1%}"
+            self.stdout.write(line)
+
+    # ------------------------------------------------------------------
+    # Measuring
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _dataset() -> dict:
+        return {
+            "areas": ParkingArea.objects.count(),
+            "slots": ParkingSlot.objects.count(),
+            "vehicles": Vehicle.objects.count(),
+            "contracts": RegularContract.objects.count(),
+            "movements": Movement.objects.count(),
+            "tickets": OccasionalTicket.objects.count(),
+            "ledger": OccupancyInterval.objects.count(),
+        }
+
+    @staticmethod
+    def _measure(operation, arguments) -> dict:
+        """
+        Calls operation(argument) per argument; it returns whether it
+        succeeded. The first call is reported as first_ms only, the
+        latency summary covers the others.
+        """
+        durations = []
+        ok = 0
+        queries = QueryCounter()
+        with connection.execute_wrapper(queries):
+            for argument in arguments:
+                started = time.perf_counter()
+                ok += bool(operation(argument))
+                durations.append(time.perf_counter() - started)
+        if not durations:
+            return {"operations": 0, **summarize([]), "first_ms": 0.0, "ok": 0, "queries_per_op": 0.0}
+        return {
+            "operations": len(durations),
+            **summarize(durations[1:] or durations),
+            "first_ms": round(durations[0] * 1000, 3),
+            "ok": ok,
+            "queries_per_op": round(queries.count / len(durations), 2),
+        }
+
+    def _ticket_service(self):
+        return TicketService(pricing_service=PricingService(), payment_service=PaymentService())
+
+    # ------------------------------------------------------------------
+    # Samples
+    # ------------------------------------------------------------------
+    def _season_plates(self):
+        """
+        Plates of current season-ticket holders that are not parked;
+        entered by season_entry, so season_exit can let them out.
+        """
+        if not hasattr(self, "_plates"):
+            now = timezone.now()
+            self._plates = list(
+                RegularContract.objects.filter(valid_from__lte=now, valid_to__gte=now)
+                .exclude(pk__in=OpenMovement.objects.values("contract_id"))
+                .order_by("?")
+                .values_list("vehicle__license_plate", flat=True)[: self._samples]
+            )
+        return self._plates
+
+    def _gate_id(self):
+        gate = Gate.objects.order_by("?").values_list("pk", flat=True).first()
+        return str(gate) if gate else None
+
+    def _open_ticket_plates(self):
+        if not hasattr(self, "_ticket_plates"):
+            self._ticket_plates = list(
+                OccasionalTicket.objects.filter(is_closed=False, entry_time__lt=timezone.now() - timedelta(minutes=5))
+                .order_by("?")
+                .values_list("license_plate", flat=True)[: self._samples]
+            )
+        return self._ticket_plates
+
+    def _vehicles(self):
+        return list(Vehicle.objects.select_related("minimum_slot_type").order_by("?")[: self._samples])
+
+    @staticmethod
+    def _next_month():
+        start = timezone.now() + timedelta(days=30)
+        return start, start + timedelta(days=30)
+
+    # ------------------------------------------------------------------
+    # Benchmarks
+    # ------------------------------------------------------------------
+    def _bench_find_available_slots(self):
+        service = SlotService()
+        period = self._next_month()
+        return self._measure(lambda vehicle: service.find_available_slots(vehicle, period), self._vehicles())
+
+    def _bench_available_slots_view(self):
+        valid_from, valid_to = self._next_month()
+        return self._measure(
+            lambda vehicle: _get_available_slots_for(vehicle, valid_from, valid_to),
+            self._vehicles(),
+        )
+
+    def _bench_season_entry(self):
+        service, gate_id = self._ticket_service(), self._gate_id()
+        return self._measure(
+            lambda plate: service.enter_with_season_ticket(plate, gate_id)["success"],
+            self._season_plates(),
+        )
+
+    def _bench_season_exit(self):
+        service, gate_id = self._ticket_service(), self._gate_id()
+        return self._measure(
+            lambda plate: service.exit_with_season_ticket(plate, gate_id)["success"],
+            self._season_plates(),
+        )
+
+    def _bench_occasional_entry(self):
+        service, gate_id = self._ticket_service(), self._gate_id()
+        return self._measure(
+            lambda i: service.start_occasional_entry(f"BENCH-{i:06d}", gate_id)["success"],
+            range(self._samples),
+        )
+
+    def _bench_occasional_pricing(self):
+        service = self._ticket_service()
+        return self._measure(lambda plate: service.get_occasional_pricing(plate)["success"], self._open_ticket_plates())
+
+    def _bench_occasional_payment(self):
+        service = self._ticket_service()
+        return self._measure(lambda plate: service.pay_occasional_ticket(plate)["success"], self._open_ticket_plates())
+
+    def _bench_occasional_exit(self):
+        service, gate_id = self._ticket_service(), self._gate_id()
+        return self._measure(
+            lambda plate: service.exit_with_occasional_ticket(plate, gate_id)["success"],
+            self._open_ticket_plates(),
+        )
+
+    def _bench_pricing(self):
+        pricing = PricingService()
+        slot_ids = list(ParkingSlot.objects.order_by("?").values_list("pk", flat=True)[: self._samples])
+        return self._measure(lambda slot_id: pricing.get_occasional_price(slot_id, 135) > 0, slot_ids)
+
+    def _bench_stats_compute(self):
+        return self._measure(lambda _: _compute_stats(), range(self._view_samples))
+
+    def _bench_stats_view(self):
+        client = Client(HTTP_HOST="localhost")
+        client.force_login(Customer.objects.create_user(username=f"bench-suite-{time.time_ns()}", is_staff=True))
+        url = reverse("parking:stats_overview")
+        return self._measure(lambda _: client.get(url).status_code == 200, range(self._view_samples))
+
+    def _bench_occupancy_board(self):
+        client = Client(HTTP_HOST="localhost")
+        url = reverse("parking:occupancy_board")
+        return self._measure(lambda _: client.get(url).status_code == 200, range(self._view_samples))
@@ -0,0 +1,186 @@
+import json
+import random
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from contracts.models import Movement, RegularContract
+from core.benchmarking import summarize, timed
+from customers.models import Customer
+from parking.data import MovementRepository
+from parking.models import ParkingArea, ParkingSlot, SlotType
+from parking.services import SlotService
+from vehicles.models import Vehicle
+
+BATCH_SIZE = 5000
+
+
+class Command(BaseCommand):
+    """
+    Benchmark for SlotService.get_usage_summary.
+
+    Fills a temporary area with closed movements spread over the last
+    --days days, then compares, for every period length:
+
+    - legacy: count() plus iterating the overlapping movements in Python
+      and summing Movement.duration_minutes (the previous implementation),
+    - aggregate: the grouped SQL aggregate behind get_usage_summary.
+
+    Everything runs inside one transaction that is rolled back at the end,
+    so a million rows cost no cleanup.
+    """
+
+    help = "Benchmark the usage summary: Python loop over movements vs. DB-side aggregate."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--movements",
+            type=int,
+            default=1_000_000,
+            help="Closed movements to generate (default: 1000000).",
+        )
+        parser.add_argument(
+            "--contracts",
+            type=int,
+            default=200,
+            help="Contracts (and reserved slots) the movements are spread over (default: 200).",
+        )
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=30,
+            help="Movements are spread over the last N days (default: 30).",
+        )
+        parser.add_argument(
+            "--periods",
+            default="24,168,720",
+            help="Comma-separated period lengths in hours, ending now (default: 24,168,720).",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=3,
+            help="Timed runs per path and period (default: 3).",
+        )
+        parser.add_argument("--json", action="store_true", help="Print the results as JSON.")
+
+    def handle(self, *args, **options):
+        try:
+            periods = [int(value) for value in options["periods"].split(",") if value.strip()]
+        except ValueError:
+            raise CommandError("--periods must be a comma-separated list of integers.")
+        if not periods or min(periods) < 1:
+            raise CommandError("Period lengths must be positive.")
+        for name in ("movements", "contracts", "days", "repeat"):
+            if options[name] < 1:
+                raise CommandError(f"--{name} must be positive.")
+
+        with transaction.atomic():
+            area = self._populate(options["movements"], options["contracts"], options["days"])
+            results = [self._run(area, hours, options["repeat"]) for hours in periods]
+            transaction.set_rollback(True)
+
+        if options["json"]:
+            self.stdout.write(json.dumps(
+                {"vendor": connection.vendor, "movements": options["movements"], "runs": results},
+                indent=2,
+            ))
+            return
+
+        self.stdout.write(f"Backend: {connection.vendor}, movements: {options['movements']}")
+        self.stdout.write(
+            f"{'hours':>5} {'rows':>9} {'path':>9} {'p50 ms':>10} {'max ms':>10} {'speedup':>8}"
+        )
+        for run in results:
+            for path in ("legacy", "aggregate"):
+                latency = run[path]
+                speedup = f"{run['speedup']:>7.1f}x" if path == "aggregate" else ""
+                self.stdout.write(
+                    f"{run['hours']:>5} {run['total_movements']:>9} {path:>9} "
+                    f"{latency['p50_ms']:>10.2f} {latency['max_ms']:>10.2f} {speedup:>8}"
+                )
+
+    # ------------------------------------------------------------------
+    # Data
+    # ------------------------------------------------------------------
+    def _populate(self, movement_count: int, contract_count: int, days: int):
+        tag = uuid.uuid4().hex[:8]
+        area = ParkingArea.objects.create(name=f"bench-usage-{tag}", description="Temporary benchmark area")
+        slot_types = [
+            SlotType.objects.create(code=f"BENCH-{tag}-{rank}", name=f"Benchmark {rank}", size_rank=rank)
+            for rank in (1, 2)
+        ]
+        user = Customer.objects.create_user(username=f"bench-usage-{tag}")
+        now = timezone.now()
+
+        contract_ids = []
+        for i in range(contract_count):
+            contract = RegularContract.objects.create(
+                vehicle=Vehicle.objects.create(owner=user, license_plate=f"UB-{tag.upper()}-{i}"),
+                customer=user,
+                valid_from=now - timedelta(days=days + 1),
+                valid_to=now + timedelta(days=1),
+                reserved_slot=ParkingSlot.objects.create(
+                    area=area, number=f"U{i}", slot_type=slot_types[i % len(slot_types)]
+                ),
+                price=Decimal("0.00"),
+            )
+            contract_ids.append(contract.pk)
+
+        # bulk_create skips the movement signals: no open-movement rows,
+        # counters or ledger intervals for these closed, historical rows.
+        rng = random.Random(1)
+        span = days * 86400
+        for offset in range(0, movement_count, BATCH_SIZE):
+            batch = []
+            for _ in range(min(BATCH_SIZE, movement_count - offset)):
+                entry = now - timedelta(seconds=rng.randrange(span))
+                batch.append(Movement(
+                    contract_id=rng.choice(contract_ids),
+                    entry_time=entry,
+                    exit_time=entry + timedelta(seconds=rng.randrange(600, 36000)),
+                ))
+            Movement.objects.bulk_create(batch)
+        return area
+
+    # ------------------------------------------------------------------
+    # One period
+    # ------------------------------------------------------------------
+    def _run(self, area, hours: int, repeat: int) -> dict:
+        end = timezone.now()
+        start = end - timedelta(hours=hours)
+        repo = MovementRepository()
+        service = SlotService(movement_repo=repo)
+
+        legacy_durations = []
+        for _ in range(repeat):
+            with timed(legacy_durations):
+                movements = repo.get_movements_overlapping_period(start, end, area)
+                legacy_count = movements.count()
+                legacy_minutes = sum(m.duration_minutes() for m in movements)
+
+        aggregate_durations = []
+        for _ in range(repeat):
+            with timed(aggregate_durations):
+                summary = service.get_usage_summary((start, end), area=area)
+
+        if (legacy_count, legacy_minutes) != (summary["total_movements"], summary["total_parked_minutes"]):
+            raise CommandError(
+                f"Paths disagree for {hours}h: legacy {legacy_count}/{legacy_minutes}, "
+                f"aggregate {summary['total_movements']}/{summary['total_parked_minutes']}."
+            )
+
+        legacy = summarize(legacy_durations)
+        aggregate = summarize(aggregate_durations)
+        return {
+            "hours": hours,
+            "total_movements": summary["total_movements"],
+            "total_parked_minutes": summary["total_parked_minutes"],
+            "legacy": legacy,
+            "aggregate": aggregate,
+            "speedup": round(legacy["p50_ms"] / aggregate["p50_ms"], 1) if aggregate["p50_ms"] else 0.0,
+        }
@@ -0,0 +1,58 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from parking.analytics import DwellTimeAnalytics
+
+
+class Command(BaseCommand):
+    """
+    Sketches the dwell times of the finished stays per day, area and slot
+    type, for every complete day after the high-water mark.
+
+    Meant to run periodically, e.g. nightly from cron, or as a
+    long-running worker with --every. --since rebuilds the sketches after
+    writes that bypassed the model signals.
+    """
+
+    help = "Build the daily dwell-time sketches from the occupancy ledger."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--since",
+            help="Recompute from the day of this ISO datetime instead of the high-water mark.",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=5000,
+            help="Stays read from the database at a time (default: 5000).",
+        )
+        parser.add_argument(
+            "--every",
+            type=int,
+            default=0,
+            help="Keep running and compact every N seconds (default: run once).",
+        )
+
+    def handle(self, *args, **options):
+        since = None
+        if options["since"]:
+            since = parse_datetime(options["since"])
+            if since is None:
+                raise CommandError("--since must be an ISO datetime, e.g. 2026-01-01T00:00.")
+            if timezone.is_naive(since):
+                since = timezone.make_aware(since)
+        if options["every"] < 0 or options["chunk_size"] < 1:
+            raise CommandError("--every must not be negative and --chunk-size must be positive.")
+
+        analytics = DwellTimeAnalytics(chunk_size=options["chunk_size"])
+        while True:
+            days = analytics.compact(since=since)
+            since = None
+            self.stdout.write(self.style.SUCCESS(f"Dwell-time sketches: {days} day(s) compacted."))
+            if not options["every"]:
+                return
+            time.sleep(options["every"])
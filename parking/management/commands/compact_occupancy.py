@@ -0,0 +1,52 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from parking.rollups import OccupancyRollupCompactor
+
+
+class Command(BaseCommand):
+    """
+    Compacts the occupancy ledger into the hourly / daily rollups, from
+    the high-water mark up to the start of the current hour.
+
+    Meant to run periodically, e.g. every few minutes from cron, or as a
+    long-running worker with --every. --since rebuilds history after
+    writes that bypassed the model signals.
+    """
+
+    help = "Compact the occupancy ledger into hourly and daily rollups."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--since",
+            help="Recompute from this ISO datetime instead of the high-water mark.",
+        )
+        parser.add_argument(
+            "--every",
+            type=int,
+            default=0,
+            help="Keep running and compact every N seconds (default: run once).",
+        )
+
+    def handle(self, *args, **options):
+        since = None
+        if options["since"]:
+            since = parse_datetime(options["since"])
+            if since is None:
+                raise CommandError("--since must be an ISO datetime, e.g. 2026-01-01T00:00.")
+            if timezone.is_naive(since):
+                since = timezone.make_aware(since)
+        if options["every"] < 0:
+            raise CommandError("--every must not be negative.")
+
+        compactor = OccupancyRollupCompactor()
+        while True:
+            hours = compactor.compact(since=since)
+            since = None
+            self.stdout.write(self.style.SUCCESS(f"Occupancy rollups: {hours} hour(s) compacted."))
+            if not options["every"]:
+                return
+            time.sleep(options["every"])
@@ -0,0 +1,30 @@
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from parking.models import Gate, GateDeviceToken
+
+
+class Command(BaseCommand):
+    """
+    Issues an API token for a barrier controller (contracts.gate_api).
+
+    The key is printed once; only its digest is stored.
+    """
+
+    help = "Issue an API token for a gate device."
+
+    def add_arguments(self, parser):
+        parser.add_argument("name", help="Device name, e.g. 'North entry controller'.")
+        parser.add_argument("--gate", help="Restrict the token to this gate id.")
+
+    def handle(self, *args, **options):
+        gate = None
+        if options["gate"]:
+            try:
+                gate = Gate.objects.get(pk=options["gate"])
+            except (Gate.DoesNotExist, ValidationError):
+                raise CommandError(f"Gate {options['gate']} not found.")
+
+        token, key = GateDeviceToken.issue(options["name"], gate=gate)
+        self.stdout.write(self.style.SUCCESS(f"Token '{token.name}' created. Key (shown once):"))
+        self.stdout.write(key)
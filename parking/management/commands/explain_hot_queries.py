@@ -0,0 +1,71 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from core.querylog import SUPPORTED_VENDORS, queryset_full_scans, used_indexes
+from parking.hot_queries import HOT_QUERIES
+
+
+class Command(BaseCommand):
+    """
+    Captures the query plans of the hot queries (parking.hot_queries) on
+    the current database and stores them as JSON (--output, default
+    HOT_QUERY_PLANS_PATH), so plans can be compared after a migration or
+    on production-sized data. Fails if a table that must be read through
+    an index is scanned in full, or if a query does not use an index it
+    is meant to use.
+    """
+
+    help = "Capture EXPLAIN plans of the hot queries and check that they use their indexes."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--output", help="Write the plans to this JSON file (default: HOT_QUERY_PLANS_PATH).")
+        parser.add_argument("--json", action="store_true", help="Print the plans as JSON.")
+
+    def handle(self, *args, **options):
+        if connection.vendor not in SUPPORTED_VENDORS:
+            raise CommandError(f"Plans of {connection.vendor} are not supported.")
+
+        plans = {}
+        for hot_query in HOT_QUERIES:
+            queryset = hot_query.build()
+            plan, scanned = queryset_full_scans(queryset)
+            plans[hot_query.name] = {
+                "description": hot_query.description,
+                "sql": str(queryset.query),
+                "plan": plan,
+                "full_scans": sorted(scanned),
+                "indexes": sorted(used_indexes(plan, connection.vendor)),
+                "regressions": sorted(scanned & set(hot_query.indexed_tables)),
+                "missing_indexes": sorted(set(hot_query.indexes) - used_indexes(plan, connection.vendor)),
+            }
+
+        output = options["output"] or getattr(settings, "HOT_QUERY_PLANS_PATH", None)
+        if output:
+            with open(output, "w") as target:
+                json.dump(
+                    {"vendor": connection.vendor, "captured_at": timezone.now().isoformat(), "queries": plans},
+                    target,
+                    indent=2,
+                )
+
+        if options["json"]:
+            self.stdout.write(json.dumps(plans, indent=2))
+        else:
+            for name, entry in plans.items():
+                problems = [f"FULL SCAN of {', '.join(entry['regressions'])}"] if entry["regressions"] else []
+                if entry["missing_indexes"]:
+                    problems.append(f"NOT USING {', '.join(entry['missing_indexes'])}")
+                status = "; ".join(problems) or "index"
+                self.stdout.write(f"{name:<32} {status}")
+                for line in entry["plan"].splitlines():
+                    self.stdout.write(f"    {line}")
+            if output:
+                self.stdout.write(f"Plans written to {output}.")
+
+        regressed = [name for name, entry in plans.items() if entry["regressions"] or entry["missing_indexes"]]
+        if regressed:
+            raise CommandError(f"Full scans or unused indexes in hot queries: {', '.join(regressed)}.")
@@ -0,0 +1,129 @@
+import json
+import time
+from dataclasses import fields
+
+from django.core.management.base import BaseCommand, CommandError
+
+from parking.analytics import DwellTimeAnalytics
+from parking.rollups import OccupancyRollupCompactor
+from parking.synthetic import GarageGenerator, GarageSpec, rebuild_derived_state
+
+
+class Command(BaseCommand):
+    """
+    Generates a synthetic large garage for benchmarks (see parking.synthetic).
+
+    The defaults produce 10k slots, 100k vehicles, 200k season contracts,
+    2M movements and 1M occasional tickets; --scale shrinks or grows all
+    row counts at once. Everything is written with bulk_create, after
+    which the occupancy counters, the free-slot pool and the plate filter
+    are rebuilt (bulk_create sends no signals). Run it on an empty or
+    disposable database: the rows are not meant to be removed again.
+    """
+
+    help = "Generate a synthetic large garage (slots, vehicles, contracts, movements, tickets)."
+
+    COUNTS = ("areas", "slots", "customers", "vehicles", "contracts", "movements", "tickets")
+
+    def add_arguments(self, parser):
+        defaults = GarageSpec()
+        for name in self.COUNTS:
+            parser.add_argument(
+                f"--{name}",
+                type=int,
+                default=getattr(defaults, name),
+                help=f"Number of {name} (default: {getattr(defaults, name)}).",
+            )
+        parser.add_argument(
+            "--scale",
+            type=float,
+            default=1.0,
+            help="Multiply all row counts except --areas, e.g. 0.01 for a quick run (default: 1).",
+        )
+        parser.add_argument(
+            "--season-share",
+            type=float,
+            default=defaults.season_share,
+            help=f"Share of the slots reserved by season contracts (default: {defaults.season_share}).",
+        )
+        parser.add_argument(
+            "--term-days",
+            type=int,
+            default=defaults.term_days,
+            help=f"Length of a season contract in days (default: {defaults.term_days}).",
+        )
+        parser.add_argument(
+            "--open-share",
+            type=float,
+            default=defaults.open_share,
+            help=f"Share of current contracts / free slots with a car parked now (default: {defaults.open_share}).",
+        )
+        parser.add_argument("--prefix", default=defaults.prefix, help="Name prefix of the generated rows.")
+        parser.add_argument("--seed", type=int, default=defaults.seed, help=f"Random seed (default: {defaults.seed}).")
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=defaults.batch_size,
+            help=f"Rows per bulk_create batch (default: {defaults.batch_size}).",
+        )
+        parser.add_argument(
+            "--compact",
+            action="store_true",
+            help="Also compact the occupancy rollups and dwell-time sketches of the generated history.",
+        )
+        parser.add_argument("--json", action="store_true", help="Print the results as JSON.")
+
+    def handle(self, *args, **options):
+        spec = GarageSpec(
+            **{
+                field.name: options[field.name]
+                for field in fields(GarageSpec)
+                if field.name not in self.COUNTS
+            },
+            areas=options["areas"],
+            **{name: round(options[name] * options["scale"]) for name in self.COUNTS if name != "areas"},
+        )
+        if min(getattr(spec, name) for name in ("areas", "slots", "customers", "vehicles", "batch_size")) < 1:
+            raise CommandError("--areas, --slots, --customers, --vehicles and --batch-size must be positive.")
+        if min(spec.contracts, spec.movements, spec.tickets, spec.term_days) < 0 or spec.term_days == 0:
+            raise CommandError("Row counts must not be negative and --term-days must be positive.")
+        if not (0 <= spec.season_share <= 1 and 0 <= spec.open_share <= 1):
+            raise CommandError("--season-share and --open-share must be between 0 and 1.")
+
+        progress = (lambda message: None) if options["json"] else self.stdout.write
+        timings = {}
+
+        started = time.perf_counter()
+        try:
+            counts = GarageGenerator(spec, progress=progress).generate()
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        timings["generate_s"] = round(time.perf_counter() - started, 2)
+
+        started = time.perf_counter()
+        derived = rebuild_derived_state()
+        timings["rebuild_s"] = round(time.perf_counter() - started, 2)
+
+        if options["compact"]:
+            started = time.perf_counter()
+            derived["rollup_hours"] = OccupancyRollupCompactor().compact()
+            derived["sketch_days"] = DwellTimeAnalytics().compact()
+            timings["compact_s"] = round(time.perf_counter() - started, 2)
+
+        if options["json"]:
+            self.stdout.write(json.dumps({"rows": counts, "derived": derived, "timings": timings}, indent=2))
+            return
+
+        self.stdout.write(
+            f"Derived state rebuilt: {derived['counter_buckets_fixed']} counter bucket(s), "
+            f"{derived['pool_added']} free slot(s) pooled, {derived['plates']} plates in the filter."
+        )
+        if not options["compact"]:
+            self.stdout.write("Run compact_occupancy and compact_dwell_times to pre-aggregate the history.")
+        total = sum(count for name, count in counts.items() if not name.startswith("open_"))
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Generated {total} rows in {timings['generate_s']} s "
+                f"(derived state: {timings['rebuild_s']} s)."
+            )
+        )
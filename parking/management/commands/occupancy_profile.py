@@ -0,0 +1,87 @@
+import json
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from parking.analytics import OccupancyAnalytics
+from parking.models import ParkingArea
+
+
+class Command(BaseCommand):
+    """
+    Prints the peak, mean, percentiles and a resampled time series of the
+    occupancy over a window, for capacity planning.
+    """
+
+    help = "Occupancy profile (peak, percentiles, time series) over a time window."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--start", help="Window start, ISO datetime (default: 7 days ago).")
+        parser.add_argument("--end", help="Window end, ISO datetime (default: now).")
+        parser.add_argument(
+            "--resolution",
+            type=int,
+            default=60,
+            help="Time series resolution in minutes (default: 60).",
+        )
+        parser.add_argument("--area", help="Restrict to the parking area with this name.")
+        parser.add_argument("--json", action="store_true", help="Print the results as JSON.")
+
+    def handle(self, *args, **options):
+        end = self._parse(options["end"], "--end") or timezone.now()
+        start = self._parse(options["start"], "--start") or end - timedelta(days=7)
+        if start >= end:
+            raise CommandError("--start must be before --end.")
+        if options["resolution"] < 1:
+            raise CommandError("--resolution must be positive.")
+
+        area = None
+        if options["area"]:
+            try:
+                area = ParkingArea.objects.get(name=options["area"])
+            except ParkingArea.DoesNotExist:
+                raise CommandError(f"Parking area '{options['area']}' does not exist.")
+
+        profile = OccupancyAnalytics().occupancy_profile(start, end, area)
+        peak, peak_at = profile.peak()
+        series = profile.series(timedelta(minutes=options["resolution"]))
+        percentiles = profile.percentiles()
+
+        if options["json"]:
+            self.stdout.write(json.dumps(
+                {
+                    "start": start.isoformat(),
+                    "end": end.isoformat(),
+                    "peak": peak,
+                    "peak_at": peak_at.isoformat(),
+                    "mean": round(profile.mean(), 3),
+                    "percentiles": {f"p{round(f * 100)}": level for f, level in percentiles.items()},
+                    "series": [
+                        {**row, "start": row["start"].isoformat(), "mean": round(row["mean"], 3)}
+                        for row in series
+                    ],
+                },
+                indent=2,
+            ))
+            return
+
+        self.stdout.write(f"Peak: {peak} at {peak_at:%Y-%m-%d %H:%M}, mean: {profile.mean():.2f}")
+        self.stdout.write(
+            "Percentiles: " + ", ".join(f"p{round(f * 100)}={level}" for f, level in percentiles.items())
+        )
+        self.stdout.write(f"{'start':<16} {'occupied':>8} {'peak':>6} {'mean':>8}")
+        for row in series:
+            self.stdout.write(
+                f"{row['start']:%Y-%m-%d %H:%M} {row['occupied']:>8} {row['peak']:>6} {row['mean']:>8.2f}"
+            )
+
+    @staticmethod
+    def _parse(value, option):
+        if not value:
+            return None
+        parsed = parse_datetime(value)
+        if parsed is None:
+            raise CommandError(f"{option} must be an ISO datetime, e.g. 2026-01-01T00:00.")
+        return parsed if timezone.is_aware(parsed) else timezone.make_aware(parsed)
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from parking.data import FreeSlotPool
+
+
+class Command(BaseCommand):
+    """
+    Reconciles the free-slot pool used for occasional parking.
+
+    Slots whose season contract expired are pushed back, slots that became
+    reserved (or got an open occasional ticket) are removed. Meant to run
+    periodically, e.g. every few minutes from cron.
+    """
+
+    help = "Reconcile the free-slot pool with active season contracts and open occasional tickets."
+
+    def handle(self, *args, **options):
+        result = FreeSlotPool().refresh()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Free-slot pool refreshed: {result['added']} added, {result['removed']} removed."
+            )
+        )
@@ -0,0 +1,62 @@
+# Generated by Django 6.1.2 on 2026-10-17 22:58
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+
+def fill_free_slot_pool(apps, schema_editor):
+    """
+    Puts every slot without an active season contract and without an open
+    occasional ticket into the free-slot pool.
+    """
+    ParkingSlot = apps.get_model("parking", "ParkingSlot")
+    FreeSlot = apps.get_model("parking", "FreeSlot")
+    RegularContract = apps.get_model("contracts", "RegularContract")
+    OccasionalTicket = apps.get_model("contracts", "OccasionalTicket")
+
+    now = timezone.now()
+    free_slots = ParkingSlot.objects.annotate(
+        has_season=Exists(
+            RegularContract.objects.filter(
+                reserved_slot=OuterRef("pk"), valid_from__lte=now, valid_to__gte=now
+            )
+        ),
+        has_open_occasional=Exists(
+            OccasionalTicket.objects.filter(slot=OuterRef("pk"), is_closed=False)
+        ),
+    ).filter(has_season=False, has_open_occasional=False)
+
+    FreeSlot.objects.bulk_create(
+        [
+            FreeSlot(slot_id=slot.pk, slot_type_id=slot.slot_type_id, area_id=slot.area_id, released_at=now)
+            for slot in free_slots
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('parking', '0004_alter_gate_id'),
+        ('contracts', '0002_occasionalticket'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FreeSlot',
+            fields=[
+                ('slot', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='free_entry', serialize=False, to='parking.parkingslot')),
+                ('released_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('area', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='free_entries', to='parking.parkingarea')),
+                ('slot_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='free_entries', to='parking.slottype')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['released_at'], name='freeslot_released_idx'), models.Index(fields=['slot_type', 'area', 'released_at'], name='freeslot_type_area_idx')],
+            },
+        ),
+        migrations.RunPython(fill_free_slot_pool, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 6.1.2 on 2026-10-17 23:04
+
+from django.db import migrations, models
+from django.db.models import Exists, OuterRef
+
+
+def copy_accessibility(apps, schema_editor):
+    """
+    Copies ParkingSlot.is_accessible into the existing pool entries.
+    """
+    FreeSlot = apps.get_model("parking", "FreeSlot")
+    ParkingSlot = apps.get_model("parking", "ParkingSlot")
+    FreeSlot.objects.filter(
+        Exists(ParkingSlot.objects.filter(pk=OuterRef("slot_id"), is_accessible=True))
+    ).update(is_accessible=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('parking', '0005_freeslot'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='freeslot',
+            name='freeslot_type_area_idx',
+        ),
+        migrations.AddField(
+            model_name='freeslot',
+            name='is_accessible',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddIndex(
+            model_name='freeslot',
+            index=models.Index(fields=['slot_type', 'area', 'is_accessible', 'released_at'], name='freeslot_bucket_idx'),
+        ),
+        migrations.RunPython(copy_accessibility, migrations.RunPython.noop),
+    ]
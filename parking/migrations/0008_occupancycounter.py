@@ -0,0 +1,63 @@
+# Generated by Django 6.1.2 on 2026-10-17 23:35
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, F
+
+
+def fill_occupancy_counters(apps, schema_editor):
+    """
+    One counter per (area, slot type) with its slots, parked season cars
+    and open occasional tickets.
+    """
+    ParkingSlot = apps.get_model("parking", "ParkingSlot")
+    OccupancyCounter = apps.get_model("parking", "OccupancyCounter")
+    OpenMovement = apps.get_model("contracts", "OpenMovement")
+    OccasionalTicket = apps.get_model("contracts", "OccasionalTicket")
+
+    counters = {}
+    for row in ParkingSlot.objects.values("area_id", "slot_type_id").annotate(n=Count("pk")).order_by():
+        counters[(row["area_id"], row["slot_type_id"])] = OccupancyCounter(
+            area_id=row["area_id"], slot_type_id=row["slot_type_id"], total_slots=row["n"]
+        )
+
+    occupied = [
+        OpenMovement.objects.filter(contract__reserved_slot__isnull=False).values(
+            area_id=F("contract__reserved_slot__area_id"),
+            slot_type_id=F("contract__reserved_slot__slot_type_id"),
+        ),
+        OccasionalTicket.objects.filter(is_closed=False).values(
+            area_id=F("slot__area_id"),
+            slot_type_id=F("slot__slot_type_id"),
+        ),
+    ]
+    for qs in occupied:
+        for row in qs.annotate(n=Count("pk")).order_by():
+            counters[(row["area_id"], row["slot_type_id"])].occupied_slots += row["n"]
+
+    OccupancyCounter.objects.bulk_create(counters.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('parking', '0007_gatedevicetoken'),
+        ('contracts', '0003_openmovement'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OccupancyCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_slots', models.PositiveIntegerField(default=0)),
+                ('occupied_slots', models.IntegerField(default=0)),
+                ('area', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='occupancy_counters', to='parking.parkingarea')),
+                ('slot_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='occupancy_counters', to='parking.slottype')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('area', 'slot_type'), name='occupancy_counter_bucket_uniq')],
+            },
+        ),
+        migrations.RunPython(fill_occupancy_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 6.1.2 on 2026-10-17 23:49
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('parking', '0008_occupancycounter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RollupHighWaterMark',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('position', models.DateTimeField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='OccupancyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('granularity', models.CharField(choices=[('HOUR', 'Hour'), ('DAY', 'Day')], max_length=4)),
+                ('bucket_start', models.DateTimeField()),
+                ('peak_occupied', models.PositiveIntegerField(default=0)),
+                ('avg_occupied', models.FloatField(default=0.0)),
+                ('entries', models.PositiveIntegerField(default=0)),
+                ('exits', models.PositiveIntegerField(default=0)),
+                ('parked_minutes', models.FloatField(default=0.0)),
+                ('area', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='occupancy_rollups', to='parking.parkingarea')),
+                ('slot_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='occupancy_rollups', to='parking.slottype')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('granularity', 'bucket_start', 'area', 'slot_type'), name='occupancy_rollup_bucket_uniq')],
+            },
+        ),
+    ]
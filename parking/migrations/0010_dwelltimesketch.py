@@ -0,0 +1,28 @@
+# Generated by Django 6.1.2 on 2026-10-17 23:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('parking', '0009_occupancyrollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DwellTimeSketch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('sketch', models.JSONField()),
+                ('area', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='dwell_time_sketches', to='parking.parkingarea')),
+                ('slot_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='dwell_time_sketches', to='parking.slottype')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('day', 'area', 'slot_type'), name='dwell_time_sketch_bucket_uniq')],
+            },
+        ),
+    ]
@@ -1,4 +1,7 @@
 from django.db import models
+from django.utils import timezone
+import hashlib
+import secrets
 import uuid
 
 class ParkingArea(models.Model):
@@ -115,3 +118,213 @@ class Gate(models.Model):
 
     def __str__(self) -> str:
         return f"{self.area.name} - {self.name}"
+
+
+class FreeSlot(models.Model):
+    """
+    Free-list entry for occasional parking.
+
+    One row per slot that can currently be handed out to an occasional
+    customer. Entries are popped on occasional entry and pushed back on
+    exit, so allocation does not have to scan the whole slot table.
+    Slot type, area and accessibility are denormalized to pop per
+    type/area via an index (see parking.allocation).
+    """
+
+    slot = models.OneToOneField(
+        ParkingSlot,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="free_entry",
+    )
+    slot_type = models.ForeignKey(
+        SlotType,
+        on_delete=models.CASCADE,
+        related_name="free_entries",
+    )
+    area = models.ForeignKey(
+        ParkingArea,
+        on_delete=models.CASCADE,
+        related_name="free_entries",
+    )
+    is_accessible = models.BooleanField(default=False)
+    released_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["released_at"], name="freeslot_released_idx"),
+            models.Index(
+                fields=["slot_type", "area", "is_accessible", "released_at"],
+                name="freeslot_bucket_idx",
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"Free: {self.slot_id} ({self.released_at})"
+
+
+class GateDeviceToken(models.Model):
+    """
+    API credential of a barrier controller (see contracts.gate_api).
+
+    Only the SHA-256 digest of the key is stored; the key itself is shown
+    once when the token is issued (manage.py create_gate_token). A token
+    bound to a gate may only report events for that gate.
+    """
+
+    name = models.CharField(max_length=100)
+    key_digest = models.CharField(max_length=64, unique=True, editable=False)
+    gate = models.ForeignKey(
+        Gate,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="device_tokens",
+    )
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    @staticmethod
+    def digest(key: str) -> str:
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+    @classmethod
+    def issue(cls, name: str, gate=None) -> tuple["GateDeviceToken", str]:
+        """
+        Creates a token and returns it together with its (unsaved) key.
+        """
+        key = secrets.token_urlsafe(32)
+        token = cls.objects.create(name=name, key_digest=cls.digest(key), gate=gate)
+        return token, key
+
+    def allows_gate(self, gate_id) -> bool:
+        return self.gate_id is None or str(self.gate_id) == str(gate_id)
+
+    def __str__(self) -> str:
+        return self.name
+
+
+class OccupancyCounter(models.Model):
+    """
+    Live occupancy of one (area, slot type) bucket.
+
+    occupied_slots is incremented / decremented with F() expressions in the
+    same transaction as the season movement or occasional ticket write
+    (see contracts.signals); total_slots follows slot changes. Current
+    occupancy is read from these few rows instead of joining the slot,
+    contract and movement tables. 'manage.py reconcile_occupancy'
+    recomputes both columns from scratch and reports drift.
+    """
+
+    area = models.ForeignKey(
+        ParkingArea,
+        on_delete=models.CASCADE,
+        related_name="occupancy_counters",
+    )
+    slot_type = models.ForeignKey(
+        SlotType,
+        on_delete=models.CASCADE,
+        related_name="occupancy_counters",
+    )
+    total_slots = models.PositiveIntegerField(default=0)
+    occupied_slots = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["area", "slot_type"], name="occupancy_counter_bucket_uniq"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.area_id}/{self.slot_type_id}: {self.occupied_slots}/{self.total_slots}"
+
+
+class OccupancyRollup(models.Model):
+    """
+    Occupancy of one (area, slot type) bucket over one hour or one day,
+    compacted from the occupancy ledger by 'manage.py compact_occupancy'.
+
+    - peak_occupied: most slots occupied at the same time,
+    - avg_occupied: time-weighted average of occupied slots,
+    - entries / exits: intervals starting / ending in the bucket,
+    - parked_minutes: slot-minutes parked within the bucket.
+
+    Buckets without any traffic or occupancy are not stored.
+    """
+
+    class Granularity(models.TextChoices):
+        HOUR = "HOUR", "Hour"
+        DAY = "DAY", "Day"
+
+    granularity = models.CharField(max_length=4, choices=Granularity.choices)
+    bucket_start = models.DateTimeField()
+    area = models.ForeignKey(
+        ParkingArea,
+        on_delete=models.CASCADE,
+        related_name="occupancy_rollups",
+    )
+    slot_type = models.ForeignKey(
+        SlotType,
+        on_delete=models.CASCADE,
+        related_name="occupancy_rollups",
+    )
+    peak_occupied = models.PositiveIntegerField(default=0)
+    avg_occupied = models.FloatField(default=0.0)
+    entries = models.PositiveIntegerField(default=0)
+    exits = models.PositiveIntegerField(default=0)
+    parked_minutes = models.FloatField(default=0.0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["granularity", "bucket_start", "area", "slot_type"],
+                name="occupancy_rollup_bucket_uniq",
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.granularity} {self.bucket_start:%Y-%m-%d %H:%M} {self.area_id}/{self.slot_type_id}"
+
+
+class RollupHighWaterMark(models.Model):
+    """
+    How far a rollup has been compacted: everything before 'position'
+    is stored, the compactor resumes from there.
+    """
+
+    name = models.CharField(max_length=50, primary_key=True)
+    position = models.DateTimeField()
+
+    def __str__(self) -> str:
+        return f"{self.name}: {self.position:%Y-%m-%d %H:%M}"
+
+
+class DwellTimeSketch(models.Model):
+    """
+    Dwell-time distribution (in minutes) of the stays of one (area, slot
+    type) bucket that ended on one day, as a serialized
+    core.sketches.QuantileSketch. Percentiles over any range of days are
+    answered by merging the daily sketches ('manage.py compact_dwell_times'
+    fills them).
+    """
+
+    day = models.DateField()
+    area = models.ForeignKey(
+        ParkingArea,
+        on_delete=models.CASCADE,
+        related_name="dwell_time_sketches",
+    )
+    slot_type = models.ForeignKey(
+        SlotType,
+        on_delete=models.CASCADE,
+        related_name="dwell_time_sketches",
+    )
+    count = models.PositiveIntegerField(default=0)
+    sketch = models.JSONField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["day", "area", "slot_type"], name="dwell_time_sketch_bucket_uniq"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.day} {self.area_id}/{self.slot_type_id}: {self.count} stays"
@@ -0,0 +1,178 @@
+"""
+Hourly and daily occupancy rollups (parking.models.OccupancyRollup).
+
+History used to be recomputed from the raw movement / ticket rows on every
+request. The compactor in this module sweeps the occupancy ledger
+(contracts.models.OccupancyInterval) once per hour of history and stores,
+per area and slot type, the peak and average occupancy, entries, exits and
+parked minutes of every hour; a day is stored once all its hours are.
+
+Compaction is incremental: a high-water mark records how far the rollups
+reach, and each run continues from there up to the start of the current
+hour. Run it periodically, e.g. every few minutes from cron:
+
+    manage.py compact_occupancy
+
+Hours are UTC hours; days are calendar days in the current time zone
+(which must be a whole number of hours off UTC).
+Occupancy counts ledger intervals, so a slot is counted once as long as it
+is used by one car at a time.
+"""
+
+from collections import defaultdict
+from datetime import datetime, time as dt_time, timedelta, timezone as dt_timezone
+
+from django.utils import timezone
+
+from parking.data import OccupancyRollupRepository
+from parking.models import OccupancyRollup
+
+HOUR = timedelta(hours=1)
+
+
+def floor_hour(value: datetime) -> datetime:
+    return value.astimezone(dt_timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+
+def day_start(value: datetime) -> datetime:
+    return timezone.make_aware(datetime.combine(timezone.localtime(value).date(), dt_time.min))
+
+
+def next_day_start(value: datetime) -> datetime:
+    return timezone.make_aware(
+        datetime.combine(timezone.localtime(value).date() + timedelta(days=1), dt_time.min)
+    )
+
+
+def hourly_buckets(intervals, start: datetime, end: datetime) -> list:
+    """
+    Sweeps (area_id, slot_type_id, start_time, end_time) intervals that
+    overlap [start, end) and returns one unsaved HOUR OccupancyRollup per
+    (area, slot type, hour) with any occupancy or traffic. 'start' must be
+    on an hour; the last bucket is cut short if 'end' is not.
+    """
+    events = defaultdict(list)
+    entries = defaultdict(int)
+    exits = defaultdict(int)
+    for area_id, slot_type_id, interval_start, interval_end in intervals:
+        key = (area_id, slot_type_id)
+        events[key].append((max(interval_start, start), 1))
+        if interval_start >= start:
+            entries[key, floor_hour(interval_start)] += 1
+        if interval_end < end:
+            events[key].append((interval_end, -1))
+            exits[key, floor_hour(interval_end)] += 1
+
+    buckets = []
+    for (area_id, slot_type_id), key_events in events.items():
+        # Exits sort before entries at the same instant: [start, end) intervals.
+        key_events.sort()
+        level, i, count = 0, 0, len(key_events)
+        hour = start
+        while hour < end:
+            hour_end = min(hour + HOUR, end)
+            while i < count and key_events[i][0] <= hour:
+                level += key_events[i][1]
+                i += 1
+            peak, slot_seconds, last = level, 0.0, hour
+            while i < count and key_events[i][0] < hour_end:
+                at, delta = key_events[i]
+                slot_seconds += level * (at - last).total_seconds()
+                last = at
+                level += delta
+                peak = max(peak, level)
+                i += 1
+            slot_seconds += level * (hour_end - last).total_seconds()
+
+            key = (area_id, slot_type_id)
+            bucket_entries, bucket_exits = entries.get((key, hour), 0), exits.get((key, hour), 0)
+            if peak or bucket_entries or bucket_exits:
+                buckets.append(OccupancyRollup(
+                    granularity=OccupancyRollup.Granularity.HOUR,
+                    bucket_start=hour,
+                    area_id=area_id,
+                    slot_type_id=slot_type_id,
+                    peak_occupied=peak,
+                    avg_occupied=slot_seconds / (hour_end - hour).total_seconds(),
+                    entries=bucket_entries,
+                    exits=bucket_exits,
+                    parked_minutes=slot_seconds / 60,
+                ))
+            hour = hour_end
+    return buckets
+
+
+def daily_buckets(hourly, end: datetime | None = None) -> list:
+    """
+    Folds HOUR rollups into one unsaved DAY rollup per (area, slot type,
+    day). The average is taken over the whole day, or up to 'end' for a
+    day that is not over yet.
+    """
+    days = {}
+    for bucket in hourly:
+        start = day_start(bucket.bucket_start)
+        day = days.get((bucket.area_id, bucket.slot_type_id, start))
+        if day is None:
+            day = days[bucket.area_id, bucket.slot_type_id, start] = OccupancyRollup(
+                granularity=OccupancyRollup.Granularity.DAY,
+                bucket_start=start,
+                area_id=bucket.area_id,
+                slot_type_id=bucket.slot_type_id,
+            )
+        day.peak_occupied = max(day.peak_occupied, bucket.peak_occupied)
+        day.entries += bucket.entries
+        day.exits += bucket.exits
+        day.parked_minutes += bucket.parked_minutes
+
+    for day in days.values():
+        day_end = next_day_start(day.bucket_start)
+        if end is not None:
+            day_end = min(day_end, end)
+        day.avg_occupied = day.parked_minutes * 60 / (day_end - day.bucket_start).total_seconds()
+    return list(days.values())
+
+
+class OccupancyRollupCompactor:
+    """
+    Fills the rollups from the occupancy ledger, one day-aligned chunk
+    per transaction, and advances the high-water mark with each chunk.
+    A crash loses at most the chunk in progress; re-running a chunk
+    replaces its rows.
+    """
+
+    def __init__(self, rollup_repo: OccupancyRollupRepository | None = None):
+        self._repo = rollup_repo or OccupancyRollupRepository()
+
+    def compact(self, until: datetime | None = None, since: datetime | None = None) -> int:
+        """
+        Compacts complete hours up to 'until' (default: the start of the
+        current hour), from the high-water mark or, to rebuild history,
+        from 'since'. Returns the number of hours compacted.
+        """
+        until = floor_hour(until or timezone.now())
+        if since is not None:
+            position = floor_hour(since)
+        else:
+            position = self._repo.get_high_water()
+            if position is None:
+                earliest = self._repo.earliest_interval_start()
+                position = floor_hour(earliest) if earliest is not None else until
+
+        hours = 0
+        while position < until:
+            day_end = next_day_start(position)
+            chunk_end = min(day_end, until)
+            hourly = hourly_buckets(self._repo.intervals_between(position, chunk_end), position, chunk_end)
+
+            daily, first_hour = None, day_start(position)
+            if chunk_end == day_end:
+                earlier = self._repo.buckets(OccupancyRollup.Granularity.HOUR, first_hour, position)
+                daily = daily_buckets(earlier + hourly)
+
+            self._repo.store(position, chunk_end, hourly, daily, first_hour)
+            hours += int((chunk_end - position) / HOUR)
+            position = chunk_end
+
+        if hours == 0 and self._repo.get_high_water() is None:
+            self._repo.store(until, until, [])
+        return hours
@@ -5,7 +5,19 @@ from parking.models import ParkingSlot
 
 from django.utils import timezone
 
-from parking.data import SlotRepository, ContractRepository, MovementRepository
+from parking.data import (
+    SlotRepository,
+    ContractRepository,
+    MovementRepository,
+    OccupancyCounterRepository,
+    OccupancyRollupRepository,
+)
+from parking.availability import SlotIntervalIndex, get_slot_interval_index
+from parking.compatibility import SlotCompatibilityMatrix, get_compatibility_matrix
+from parking.allocation import get_default_allocator
+from parking.analytics import DwellTimeAnalytics
+from parking.models import OccupancyRollup
+from parking.rollups import daily_buckets, day_start, floor_hour, hourly_buckets
 
 class PricingService(AbstractPricingService):
     """
@@ -49,7 +61,7 @@ class PricingService(AbstractPricingService):
 
         This helper is used by both season and occasional pricing methods.
         """
-        return self._slot_repo.get(pk=slot_id)
+        return self._slot_repo.select_related("slot_type").get(pk=slot_id)
 
     def _get_pricing_category(self, slot: ParkingSlot) -> str:
         """
@@ -64,7 +76,6 @@ class PricingService(AbstractPricingService):
 
         # Prefer an explicit mapping by size_rank
         rank = getattr(slot.slot_type, "size_rank", 1)
-        print(slot.slot_type)
         if rank == 1:
             category = "SIMPLE"
         elif rank == 2:
@@ -160,12 +171,25 @@ class SlotService:
         slot_repo: SlotRepository | None = None,
         contract_repo: ContractRepository | None = None,
         movement_repo: MovementRepository | None = None,
+        interval_index: SlotIntervalIndex | None = None,
+        compatibility_matrix: SlotCompatibilityMatrix | None = None,
+        allocator=None,
+        occupancy_repo: OccupancyCounterRepository | None = None,
+        rollup_repo: OccupancyRollupRepository | None = None,
+        dwell_analytics: DwellTimeAnalytics | None = None,
     ):
         # Default to real Django-backed repositories,
         # but allow injecting fakes/mocks in tests.
         self._slot_repo = slot_repo or SlotRepository()
         self._contract_repo = contract_repo or ContractRepository()
         self._movement_repo = movement_repo or MovementRepository()
+        self._occupancy_repo = occupancy_repo or OccupancyCounterRepository()
+        self._rollup_repo = rollup_repo or OccupancyRollupRepository()
+        self._dwell_analytics = dwell_analytics or DwellTimeAnalytics()
+        # The process-wide index is shared by all SlotService instances.
+        self._interval_index = interval_index or get_slot_interval_index()
+        self._compatibility = compatibility_matrix or get_compatibility_matrix()
+        self._allocator = allocator or get_default_allocator()
 
     # ------------------------------------------------------------------
     # 1) Query: find available slots for a vehicle and period
@@ -186,28 +210,24 @@ class SlotService:
 
         start, end = period
 
-        # Get DB candidates via repository.
-        candidates_qs = self._slot_repo.get_candidates_for_vehicle(vehicle, area)
+        # 1) Compatibility (size + accessibility) from the precomputed
+        #    matrix; same rules as ParkingSlot.is_compatible_with.
+        compatible_ids = self._compatibility.slot_ids_for(vehicle)
 
-        # Convert to list and apply domain logic on the objects.
-        candidates = list(candidates_qs)
+        # 2) Check if slot is free for the whole period.
+        #    Answered by the in-memory interval index in one pass,
+        #    instead of one EXISTS query per slot.
+        free_ids = self._interval_index.free_slot_ids(compatible_ids, start, end)
 
-        available = []
-        for slot in candidates:
-            # 1) Check compatibility via domain method (size + accessibility).
-            #    You can refine slot.is_compatible_with(vehicle) in ParkingSlot.
-            if hasattr(slot, "is_compatible_with") and not slot.is_compatible_with(vehicle):
-                continue
+        # 3) Load only the resulting slots via repository.
+        return list(self._slot_repo.get_slots_by_ids(free_ids, area))
 
-            # 2) Check if slot is free for the whole period.
-            #    Uses the domain method implemented in ParkingSlot
-            #    (which may itself hit the DB, but that's domain, not service).
-            if not slot.is_free_for_period((start, end)):
-                continue
-
-            available.append(slot)
-
-        return available
+    def choose_slot(self, vehicle, period, area=None):
+        """
+        Returns the slot the configured allocator prefers among the
+        available slots for the vehicle and period (None if there is none).
+        """
+        return self._allocator.choose(self.find_available_slots(vehicle, period, area), vehicle)
 
     # ------------------------------------------------------------------
     # 2) Command-like: verify slot availability at confirmation time
@@ -249,13 +269,19 @@ class SlotService:
         - occupied_slots: slots currently occupied
         - occupancy_ratio: occupied_slots / total_slots
 
-        The actual counting of occupied slots is delegated to the data layer.
+        Season cars and occasional tickets both count. Without 'at'
+        (i.e. now) the snapshot is read from the incremental occupancy
+        counters in constant time; for another timestamp the occupied
+        slots come from one range lookup on the occupancy ledger.
         """
 
-        at = at or timezone.now()
-
-        slots_qs = self._slot_repo.get_slots_for_area(area)
-        total_slots = slots_qs.count()
+        if at is None:
+            totals = self._occupancy_repo.totals(area)
+            total_slots = totals["total_slots"]
+            occupied_slots = totals["occupied_slots"]
+        else:
+            total_slots = self._slot_repo.get_slots_for_area(area).count()
+            occupied_slots = self._movement_repo.count_occupied_at(at, area) if total_slots else 0
 
         if total_slots == 0:
             return {
@@ -264,13 +290,19 @@ class SlotService:
                 "occupancy_ratio": 0.0,
             }
 
-        occupied_slots = self._movement_repo.count_occupied_slots_at(slots_qs, at)
-        ratio = occupied_slots / total_slots
-
         return {
             "total_slots": total_slots,
             "occupied_slots": occupied_slots,
-            "occupancy_ratio": ratio,
+            "occupancy_ratio": occupied_slots / total_slots,
+        }
+
+    def get_occupancy_breakdown(self):
+        """
+        Current occupancy per area and per slot type (occupancy counters).
+        """
+        return {
+            "by_area": self._occupancy_repo.by_area(),
+            "by_slot_type": self._occupancy_repo.by_slot_type(),
         }
 
     # ------------------------------------------------------------------
@@ -278,34 +310,101 @@ class SlotService:
     # ------------------------------------------------------------------
     def get_usage_summary(self, period, area=None):
         """
-        Returns a very simple usage summary for a given period.
+        Returns a usage summary for a given period.
 
-        Current implementation:
         - counts movements that overlap the period,
-        - aggregates total parked minutes.
+        - aggregates total parked minutes (whole minutes per movement, as
+          Movement.duration_minutes),
+        - breaks both down per area and per slot type.
 
-        This is intentionally simple but shows how the domain model supports
-        future statistics such as:
-        - weekly/day-of-week occupancy patterns,
-        - per-slot-type utilization,
-        - reporting dashboards.
+        Counting and summing run in the database as one grouped
+        aggregate; only the per (area, slot type) rows come back.
         """
 
         start, end = period
 
-        movements = self._movement_repo.get_movements_overlapping_period(
-            start, end, area
-        )
+        rows = self._movement_repo.get_usage_rows(start, end, area)
+
+        by_area = {}
+        by_slot_type = {}
+        for row in rows:
+            for breakdown, key, name in (
+                (by_area, row["area_id"], row["area_name"]),
+                (by_slot_type, row["slot_type_id"], row["slot_type_name"]),
+            ):
+                entry = breakdown.setdefault(
+                    key, {"id": key, "name": name, "movements": 0, "parked_minutes": 0}
+                )
+                entry["movements"] += row["movements"]
+                entry["parked_minutes"] += row["parked_minutes"]
 
-        total_movements = movements.count()
+        return {
+            "total_movements": sum(row["movements"] for row in rows),
+            "total_parked_minutes": sum(row["parked_minutes"] for row in rows),
+            "by_area": sorted(by_area.values(), key=lambda e: e["name"] or ""),
+            "by_slot_type": sorted(by_slot_type.values(), key=lambda e: e["name"] or ""),
+        }
 
-        total_minutes = 0
-        for m in movements:
-            # Uses the domain method on Movement (duration_minutes),
-            # which encapsulates the time difference logic.
-            total_minutes += m.duration_minutes()
+    # ------------------------------------------------------------------
+    # 5) Occupancy history (hourly / daily rollups)
+    # ------------------------------------------------------------------
+    def get_occupancy_history(self, period, area=None, granularity=OccupancyRollup.Granularity.HOUR):
+        """
+        Returns the occupancy per hour or per day over a period, oldest
+        first: one entry per bucket with traffic or occupancy, holding
+        peak_occupied, avg_occupied, entries, exits and parked_minutes
+        summed over the areas and slot types (peak_occupied is the sum of
+        the per-bucket peaks, an upper bound of the garage-wide peak).
+
+        Everything before the compactor's high-water mark (at most the
+        start of the current hour) is read from the stored rollups; only
+        the hours after it are swept from the occupancy ledger.
+        """
+        start, end = period
+        end = min(end, timezone.now())
+
+        if granularity == OccupancyRollup.Granularity.DAY:
+            first_day = day_start(start)
+            high_water = self._rollup_repo.get_high_water() or first_day
+            # Days are stored once they are complete.
+            stored_until = max(min(day_start(high_water), end), first_day)
+            buckets = self._rollup_repo.buckets(granularity, first_day, stored_until, area)
+            if stored_until < end:
+                buckets += daily_buckets(self._hourly_history(stored_until, end, area), end)
+        else:
+            buckets = self._hourly_history(floor_hour(start), end, area)
+
+        series = {}
+        for bucket in buckets:
+            entry = series.setdefault(bucket.bucket_start, {
+                "start": bucket.bucket_start,
+                "peak_occupied": 0,
+                "avg_occupied": 0.0,
+                "entries": 0,
+                "exits": 0,
+                "parked_minutes": 0.0,
+            })
+            for field in ("peak_occupied", "avg_occupied", "entries", "exits", "parked_minutes"):
+                entry[field] += getattr(bucket, field)
+        return [series[key] for key in sorted(series)]
+
+    def _hourly_history(self, start, end, area=None):
+        high_water = self._rollup_repo.get_high_water() or start
+        stored_until = max(min(high_water, end), start)
+        buckets = self._rollup_repo.buckets(OccupancyRollup.Granularity.HOUR, start, stored_until, area)
+        if stored_until < end:
+            intervals = self._rollup_repo.intervals_between(stored_until, end, area)
+            buckets += hourly_buckets(intervals, stored_until, end)
+        return buckets
 
-        return {
-            "total_movements": total_movements,
-            "total_parked_minutes": total_minutes,
-        }
\ No newline at end of file
+    # ------------------------------------------------------------------
+    # 6) Dwell times
+    # ------------------------------------------------------------------
+    def get_dwell_time_percentiles(self, period, area=None, quantiles=(0.5, 0.9, 0.99)):
+        """
+        Dwell-time percentiles in minutes (e.g. "p50", "p90", "p99") of the
+        stays that ended within the days of the period, overall and per
+        area and slot type, merged from the daily dwell-time sketches.
+        """
+        start, end = period
+        return self._dwell_analytics.percentiles(start, end, area, quantiles)
@@ -0,0 +1,71 @@
+"""
+Signal handlers keeping the process-local parking caches consistent
+with master data changes (admin edits, data imports, ...).
+"""
+
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from parking.compatibility import get_compatibility_matrix
+from parking.data import FreeSlotPool, OccupancyCounterRepository
+from parking.models import FreeSlot, OccupancyCounter, ParkingSlot, SlotType
+
+
+@receiver(post_save, sender=SlotType)
+@receiver(post_delete, sender=SlotType)
+@receiver(post_save, sender=ParkingSlot)
+@receiver(post_delete, sender=ParkingSlot)
+def invalidate_compatibility_matrix(sender, **kwargs):
+    """
+    Slot types and slots define the compatibility matrix: rebuild it lazily.
+    """
+    get_compatibility_matrix().invalidate()
+
+
+@receiver(post_save, sender=ParkingSlot)
+def sync_free_slot_pool(sender, instance, created, raw=False, **kwargs):
+    """
+    New slots join the free-slot pool; moved or re-typed slots keep the
+    denormalized slot type / area / accessibility of their pool entry up to date.
+    """
+    if raw:
+        return
+    if created:
+        FreeSlotPool().push(instance)
+    else:
+        FreeSlot.objects.filter(slot=instance).update(
+            slot_type_id=instance.slot_type_id,
+            area_id=instance.area_id,
+            is_accessible=instance.is_accessible,
+        )
+
+
+@receiver(post_save, sender=ParkingSlot)
+def count_slot(sender, instance, created, raw=False, **kwargs):
+    """
+    Keeps total_slots of the occupancy counters in line with the slots.
+    """
+    if raw:
+        return
+    if created:
+        bucket = OccupancyCounter.objects.filter(area_id=instance.area_id, slot_type_id=instance.slot_type_id)
+        if not bucket.update(total_slots=F("total_slots") + 1):
+            OccupancyCounter.objects.create(
+                area_id=instance.area_id,
+                slot_type_id=instance.slot_type_id,
+                total_slots=1,
+            )
+    else:
+        # The slot may have moved to another area / slot type.
+        OccupancyCounterRepository().refresh_totals()
+
+
+@receiver(post_delete, sender=ParkingSlot)
+def uncount_slot(sender, instance, **kwargs):
+    # Never creates buckets: also runs inside area / slot type cascades.
+    OccupancyCounter.objects.filter(
+        area_id=instance.area_id,
+        slot_type_id=instance.slot_type_id,
+        total_slots__gt=0,
+    ).update(total_slots=F("total_slots") - 1)
@@ -0,0 +1,165 @@
+"""
+Process-local stale-while-revalidate cache for the statistics dashboard.
+
+Every staff member on /parking/stats/ used to trigger the full occupancy,
+usage and history computation. Results are now cached per key:
+
+- younger than STATS_CACHE_TTL seconds: served as they are,
+- older, but within STATS_CACHE_MAX_STALE seconds: served at once, while
+  one background thread recomputes them (only one refresh per key runs
+  at a time, however many requests see the stale value),
+- missing or older than that: computed synchronously, single-flight -
+  concurrent requests wait for the one computation in progress instead
+  of stampeding the database with their own.
+
+Every result carries its age, so the page can say how fresh it is. The
+cache lives in each worker process; with N workers at most N refreshes
+run at the same time.
+"""
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL_SECONDS = 30
+DEFAULT_MAX_STALE_SECONDS = 300
+# How long a request waits for another request's computation.
+SINGLE_FLIGHT_TIMEOUT_SECONDS = 30
+
+
+@dataclass(frozen=True)
+class CachedResult:
+    value: object
+    computed_at: float  # time.time()
+    age_seconds: float
+    is_stale: bool
+
+
+def _run_in_thread(refresh):
+    def target():
+        try:
+            refresh()
+        finally:
+            # Background threads get their own connection; do not leak it.
+            connection.close()
+
+    threading.Thread(target=target, name="stats-cache-refresh", daemon=True).start()
+
+
+class StaleWhileRevalidateCache:
+    """
+    Thread-safe key -> value cache with stale-while-revalidate and
+    single-flight recomputation. 'run_in_background' takes the refresh
+    callable (default: a daemon thread).
+    """
+
+    def __init__(self, ttl_seconds=None, max_stale_seconds=None, run_in_background=None):
+        if ttl_seconds is None:
+            ttl_seconds = getattr(settings, "STATS_CACHE_TTL", DEFAULT_TTL_SECONDS)
+        if max_stale_seconds is None:
+            max_stale_seconds = getattr(settings, "STATS_CACHE_MAX_STALE", DEFAULT_MAX_STALE_SECONDS)
+        self._ttl_seconds = ttl_seconds
+        self._max_stale_seconds = max_stale_seconds
+        self._run_in_background = run_in_background or _run_in_thread
+
+        self._lock = threading.Lock()
+        self._entries = {}  # key -> (value, computed_at monotonic, computed_at wall clock)
+        self._inflight = {}  # key -> threading.Event set when the computation finished
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+
+    def get(self, key, compute) -> CachedResult:
+        """
+        Returns the value of 'key', calling compute() to (re)compute it.
+        """
+        stale = None
+        with self._lock:
+            now = time.monotonic()
+            entry = self._entries.get(key)
+            if entry is not None:
+                age = now - entry[1]
+                if age <= self._ttl_seconds:
+                    self.hits += 1
+                    return CachedResult(entry[0], entry[2], age, is_stale=False)
+                if age <= self._max_stale_seconds:
+                    self.stale_hits += 1
+                    stale = CachedResult(entry[0], entry[2], age, is_stale=True)
+                    start_refresh = key not in self._inflight
+                    if start_refresh:
+                        self._inflight[key] = threading.Event()
+
+            if stale is None:
+                self.misses += 1
+                event = self._inflight.get(key)
+                leader = event is None
+                if leader:
+                    event = self._inflight[key] = threading.Event()
+
+        if stale is not None:
+            if start_refresh:
+                self._run_in_background(lambda: self._refresh(key, compute, background=True))
+            return stale
+
+        if leader:
+            return self._refresh(key, compute)
+
+        event.wait(SINGLE_FLIGHT_TIMEOUT_SECONDS)
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None and entry[1] >= now:
+            return CachedResult(entry[0], entry[2], time.monotonic() - entry[1], is_stale=False)
+        # The leader failed or is too slow: compute without sharing.
+        return self._store(key, compute())
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _refresh(self, key, compute, background=False) -> CachedResult | None:
+        # Caller registered the in-flight event for 'key'.
+        try:
+            return self._store(key, compute())
+        except Exception:
+            if not background:
+                raise
+            # The stale value keeps being served; the next request retries.
+            logger.exception("Refreshing cached statistics %r failed.", key)
+            return None
+        finally:
+            with self._lock:
+                event = self._inflight.pop(key, None)
+            if event is not None:
+                event.set()
+
+    def _store(self, key, value) -> CachedResult:
+        computed_at = time.time()
+        with self._lock:
+            self._entries[key] = (value, time.monotonic(), computed_at)
+        return CachedResult(value, computed_at, 0.0, is_stale=False)
+
+
+_stats_cache = None
+_stats_cache_lock = threading.Lock()
+
+
+def get_stats_cache() -> StaleWhileRevalidateCache:
+    """
+    Returns the process-wide statistics cache.
+    """
+    global _stats_cache
+    if _stats_cache is None:
+        with _stats_cache_lock:
+            if _stats_cache is None:
+                _stats_cache = StaleWhileRevalidateCache()
+    return _stats_cache
@@ -0,0 +1,460 @@
+"""
+Synthetic large-garage data for benchmarks (manage.py generate_garage).
+
+Rows are written with bulk_create in batches, which bypasses the signal
+handlers maintaining derived state. The generator therefore writes the
+occupancy ledger and the OpenMovement projection itself (it knows the
+slot of every row), and rebuild_derived_state() recomputes everything
+else from the tables: occupancy counters, free-slot pool, registered-
+plate filter and the process-local caches.
+
+Shape of the data (deterministic for a seed):
+
+- areas with one gate each and slots of three sizes (60/30/10%), a few
+  of them accessible,
+- a share of the non-accessible slots reserved by season contracts: the
+  history is cut into equal contract terms, every reserved slot has one
+  contract per term and the last term runs now. Vehicles are matched to
+  slots of their size and hold at most one contract per term,
+- season movements spread over the elapsed part of each contract, some
+  still open on current contracts,
+- occasional tickets back to back on the unreserved slots, paid and
+  closed, some still open.
+"""
+
+import math
+import random
+from dataclasses import dataclass
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.utils import timezone
+
+from contracts.cache import get_active_contract_cache
+from contracts.models import (
+    OPEN_END,
+    Movement,
+    OccasionalTicket,
+    OccupancyInterval,
+    OpenMovement,
+    RegularContract,
+)
+from customers.models import Customer
+from parking.availability import get_availability_calendar, get_slot_interval_index
+from parking.compatibility import get_compatibility_matrix
+from parking.data import FreeSlotPool, OccupancyCounterRepository
+from parking.models import Gate, ParkingArea, ParkingSlot, SlotType
+from parking.services import PricingService
+from parking.stats_cache import get_stats_cache
+from vehicles.models import PlateRegistryVersion, Vehicle
+from vehicles.plate_filter import get_registered_plate_filter
+
+# (code, name, size rank, share of the slots)
+SLOT_TYPES = [
+    ("SIMPLE", "Simple", 1, 0.6),
+    ("EXTENDED", "Extended", 2, 0.3),
+    ("OVERSIZE", "Oversize", 3, 0.1),
+]
+ACCESSIBLE_SHARE = 0.03
+PERMIT_SHARE = 0.02
+# Open stays end the history of their contract / slot this long before now.
+OPEN_STAY_MARGIN = timedelta(hours=12)
+
+
+@dataclass
+class GarageSpec:
+    areas: int = 40
+    slots: int = 10_000
+    customers: int = 50_000
+    vehicles: int = 100_000
+    contracts: int = 200_000
+    movements: int = 2_000_000
+    tickets: int = 1_000_000
+    # Share of the non-accessible slots reserved by season contracts.
+    season_share: float = 0.6
+    term_days: int = 30
+    # Share of the current contracts / unreserved slots with a car parked now.
+    open_share: float = 0.3
+    prefix: str = "synthetic"
+    seed: int = 42
+    batch_size: int = 5000
+
+
+def bulk_create_inherited(model, objs, batch_size):
+    """
+    bulk_create for a child model of multi-table inheritance, which
+    QuerySet.bulk_create refuses: the parent rows are bulk-created first,
+    then the child rows are inserted with their parent pointer.
+    """
+    ((parent, link),) = model._meta.parents.items()
+    parents = [
+        parent(**{field.attname: getattr(obj, field.attname) for field in parent._meta.concrete_fields})
+        for obj in objs
+    ]
+    # Auto-increment keys come back via RETURNING (PostgreSQL, SQLite 3.35+, MariaDB).
+    parent._base_manager.bulk_create(parents, batch_size=batch_size)
+    for obj, row in zip(objs, parents):
+        setattr(obj, parent._meta.pk.attname, row.pk)
+        setattr(obj, link.attname, row.pk)
+
+    fields = model._meta.local_concrete_fields
+    quote = connection.ops.quote_name
+    sql = "INSERT INTO {} ({}) VALUES ({})".format(
+        quote(model._meta.db_table),
+        ", ".join(quote(field.column) for field in fields),
+        ", ".join(["%s"] * len(fields)),
+    )
+    with connection.cursor() as cursor:
+        for offset in range(0, len(objs), batch_size):
+            cursor.executemany(
+                sql,
+                [
+                    [field.get_db_prep_save(getattr(obj, field.attname), connection) for field in fields]
+                    for obj in objs[offset:offset + batch_size]
+                ],
+            )
+    return objs
+
+
+class GarageGenerator:
+    """
+    Writes one synthetic garage described by a GarageSpec.
+    """
+
+    def __init__(self, spec: GarageSpec, now=None, progress=None):
+        self.spec = spec
+        self.now = now or timezone.now()
+        self._rng = random.Random(spec.seed)
+        self._progress = progress or (lambda message: None)
+        self._plate_prefix = spec.prefix[:4].upper()
+        self._rank_of = {}  # slot type id -> size rank
+        self._history_start = self.now
+
+    def generate(self) -> dict:
+        """
+        Generates all rows and returns the number written per model.
+        """
+        if ParkingArea.objects.filter(name__startswith=f"{self.spec.prefix}-area-").exists():
+            raise ValueError(f"Synthetic data with prefix {self.spec.prefix!r} already exists.")
+        counts = {}
+        slot_types = self._slot_types()
+        slots = self._create_slots(slot_types, counts)
+        reserved, unreserved = self._split_slots(slots)
+        vehicles = self._create_vehicles(slot_types, reserved, counts)
+        contracts = self._create_contracts(reserved, vehicles, counts)
+        self._create_movements(contracts, counts)
+        self._create_tickets(unreserved, slot_types, counts)
+        return counts
+
+    # ------------------------------------------------------------------
+    # Master data
+    # ------------------------------------------------------------------
+    def _slot_types(self) -> dict:
+        by_rank = {}
+        for code, name, rank, _ in SLOT_TYPES:
+            slot_type, _ = SlotType.objects.get_or_create(code=code, defaults={"name": name, "size_rank": rank})
+            by_rank[rank] = slot_type
+            self._rank_of[slot_type.pk] = rank
+        return by_rank
+
+    def _create_slots(self, slot_types, counts) -> list:
+        spec = self.spec
+        areas = ParkingArea.objects.bulk_create(
+            [
+                ParkingArea(name=f"{spec.prefix}-area-{i:03d}", description="Synthetic benchmark area")
+                for i in range(spec.areas)
+            ]
+        )
+        Gate.objects.bulk_create([Gate(area=area, name="Main gate") for area in areas])
+
+        ranks = [rank for _, _, rank, share in SLOT_TYPES for _ in range(round(spec.slots * share))]
+        ranks = (ranks + [1] * spec.slots)[: spec.slots]
+        self._rng.shuffle(ranks)
+        slots = ParkingSlot.objects.bulk_create(
+            [
+                ParkingSlot(
+                    area=areas[i % spec.areas],
+                    number=f"{i // spec.areas:05d}",
+                    slot_type=slot_types[rank],
+                    is_accessible=self._rng.random() < ACCESSIBLE_SHARE,
+                )
+                for i, rank in enumerate(ranks)
+            ],
+            batch_size=spec.batch_size,
+        )
+        counts.update(areas=len(areas), gates=len(areas), slots=len(slots))
+        self._progress(f"{len(slots)} slots in {len(areas)} areas")
+        return slots
+
+    def _split_slots(self, slots):
+        candidates = [slot for slot in slots if not slot.is_accessible]
+        reserved_count = min(round(len(candidates) * self.spec.season_share), len(candidates))
+        reserved = self._rng.sample(candidates, reserved_count)
+        reserved_ids = {slot.pk for slot in reserved}
+        return reserved, [slot for slot in slots if slot.pk not in reserved_ids]
+
+    def _create_vehicles(self, slot_types, reserved, counts) -> dict:
+        """
+        Vehicles per size rank; every rank has at least as many vehicles
+        as reserved slots of that size. Returns rank -> list of vehicles.
+        """
+        spec = self.spec
+        if spec.vehicles < len(reserved):
+            raise ValueError(f"At least {len(reserved)} vehicles are needed for the reserved slots.")
+        reserved_by_rank = {rank: 0 for rank in slot_types}
+        for slot in reserved:
+            reserved_by_rank[self._rank_of[slot.slot_type_id]] += 1
+        spare = spec.vehicles - len(reserved)
+        per_rank = {
+            rank: reserved_by_rank[rank] + math.floor(spare * share)
+            for _, _, rank, share in SLOT_TYPES
+        }
+        per_rank[1] += spec.vehicles - sum(per_rank.values())
+
+        customers = bulk_create_inherited(
+            Customer,
+            [
+                Customer(username=f"{spec.prefix}-c{i:06d}", password=make_password(None))
+                for i in range(max(spec.customers, 1))
+            ],
+            spec.batch_size,
+        )
+        counts["customers"] = len(customers)
+
+        vehicles = {}
+        index = 0
+        for rank, count in per_rank.items():
+            batch = []
+            for _ in range(count):
+                batch.append(
+                    Vehicle(
+                        owner=customers[index % len(customers)],
+                        license_plate=f"{self._plate_prefix}-{index:07d}",
+                        minimum_slot_type=slot_types[rank],
+                        has_disability_permit=self._rng.random() < PERMIT_SHARE,
+                    )
+                )
+                index += 1
+            vehicles[rank] = Vehicle.objects.bulk_create(batch, batch_size=spec.batch_size)
+        counts["vehicles"] = index
+        self._progress(f"{index} vehicles of {len(customers)} customers")
+        return vehicles
+
+    # ------------------------------------------------------------------
+    # Season contracts and movements
+    # ------------------------------------------------------------------
+    def _create_contracts(self, reserved, vehicles, counts) -> list:
+        """
+        One contract per reserved slot and term, newest term first, until
+        spec.contracts are written. Returns (pk, slot_id, valid_from,
+        valid_to) per contract.
+        """
+        spec = self.spec
+        term = timedelta(days=spec.term_days)
+        current_start = (self.now - term / 2).replace(microsecond=0)
+        slots_by_rank = {}
+        for slot in reserved:
+            slots_by_rank.setdefault(self._rank_of[slot.slot_type_id], []).append(slot)
+
+        contracts = []
+        batch = []
+        remaining = spec.contracts if reserved else 0
+        age = 0
+        while remaining > 0:
+            valid_from = current_start - age * term
+            valid_to = valid_from + term - timedelta(minutes=1)
+            for rank, slots in slots_by_rank.items():
+                holders = vehicles[rank]
+                for k, slot in enumerate(slots[:remaining]):
+                    vehicle = holders[(age * len(slots) + k) % len(holders)]
+                    contract = RegularContract(
+                        vehicle=vehicle,
+                        customer_id=vehicle.owner_id,
+                        valid_from=valid_from,
+                        valid_to=valid_to,
+                        reserved_slot=slot,
+                        price=PricingService.SEASON_PRICES[SLOT_TYPES[rank - 1][0]],
+                    )
+                    batch.append(contract)
+                    contracts.append((contract.id, slot.pk, valid_from, valid_to))
+                remaining -= min(len(slots), remaining)
+                if len(batch) >= spec.batch_size:
+                    self._flush_inherited(RegularContract, batch)
+            age += 1
+        self._flush_inherited(RegularContract, batch)
+        if contracts:
+            self._history_start = current_start - (age - 1) * term
+        counts["contracts"] = len(contracts)
+        self._progress(f"{len(contracts)} season contracts over {age} terms")
+        return contracts
+
+    def _create_movements(self, contracts, counts):
+        spec = self.spec
+        elapsed = [
+            (contract, max((min(contract[3], self.now) - contract[2]).total_seconds(), 0.0))
+            for contract in contracts
+        ]
+        total_elapsed = sum(seconds for _, seconds in elapsed)
+        per_second = spec.movements / total_elapsed if total_elapsed else 0.0
+
+        movements, intervals, open_movements = [], [], []
+        written = opened = 0
+        for (pk, slot_id, valid_from, valid_to), seconds in elapsed:
+            if not seconds:
+                continue
+            is_current = valid_from <= self.now <= valid_to
+            park_now = is_current and self._rng.random() < spec.open_share
+            window_end = min(valid_to, self.now - OPEN_STAY_MARGIN if park_now else self.now)
+            stays = self._stays(valid_from, window_end, seconds * per_second, mean_minutes=240)
+            if park_now:
+                stays.append((self.now - timedelta(minutes=self._rng.uniform(5, 600)), None))
+            for entry_time, exit_time in stays:
+                movement = Movement(contract_id=pk, entry_time=entry_time, exit_time=exit_time)
+                movements.append(movement)
+                intervals.append(
+                    OccupancyInterval(
+                        kind=OccupancyInterval.Kind.SEASON,
+                        movement_id=movement.pk,
+                        slot_id=slot_id,
+                        start_time=entry_time,
+                        end_time=exit_time or OPEN_END,
+                    )
+                )
+                if exit_time is None:
+                    open_movements.append(
+                        OpenMovement(movement_id=movement.pk, contract_id=pk, entry_time=entry_time)
+                    )
+                    opened += 1
+            if len(movements) >= spec.batch_size:
+                written += self._flush(Movement, movements, intervals, OpenMovement, open_movements)
+        written += self._flush(Movement, movements, intervals, OpenMovement, open_movements)
+        counts.update(movements=written, open_movements=opened)
+        self._progress(f"{written} season movements, {opened} open")
+
+    # ------------------------------------------------------------------
+    # Occasional tickets
+    # ------------------------------------------------------------------
+    def _create_tickets(self, slots, slot_types, counts):
+        spec = self.spec
+        if not slots:
+            counts.update(tickets=0, open_tickets=0)
+            return
+        history_start = min(self._history_start, self.now - timedelta(days=spec.term_days))
+        per_slot = spec.tickets / len(slots)
+        rates = {
+            slot_type.pk: PricingService.OCCASIONAL_PRICES_PER_HOUR[SLOT_TYPES[rank - 1][0]]
+            for rank, slot_type in slot_types.items()
+        }
+
+        tickets, intervals = [], []
+        written = opened = 0
+        for slot in slots:
+            park_now = self._rng.random() < spec.open_share
+            window_end = self.now - OPEN_STAY_MARGIN if park_now else self.now
+            stays = self._stays(history_start, window_end, per_slot, mean_minutes=90)
+            if park_now:
+                stays.append((self.now - timedelta(minutes=self._rng.uniform(5, 300)), None))
+            for entry_time, exit_time in stays:
+                plate = f"{self._plate_prefix}-T{written + len(tickets):08d}"
+                if exit_time is None:
+                    ticket = OccasionalTicket(license_plate=plate, slot_id=slot.pk, entry_time=entry_time)
+                    opened += 1
+                else:
+                    minutes = (exit_time - entry_time).total_seconds() / 60
+                    amount = (Decimal(minutes / 60) * rates[slot.slot_type_id]).quantize(Decimal("0.01"))
+                    paid_at = exit_time - timedelta(minutes=self._rng.uniform(1, 10))
+                    ticket = OccasionalTicket(
+                        license_plate=plate,
+                        slot_id=slot.pk,
+                        entry_time=entry_time,
+                        exit_time=exit_time,
+                        amount_due=amount,
+                        amount_paid=amount,
+                        paid_at=paid_at,
+                        exit_deadline=paid_at + timedelta(minutes=15),
+                        is_closed=True,
+                    )
+                tickets.append(ticket)
+                intervals.append(
+                    OccupancyInterval(
+                        kind=OccupancyInterval.Kind.OCCASIONAL,
+                        ticket_id=ticket.pk,
+                        slot_id=slot.pk,
+                        start_time=entry_time,
+                        end_time=exit_time or OPEN_END,
+                    )
+                )
+            if len(tickets) >= spec.batch_size:
+                written += self._flush(OccasionalTicket, tickets, intervals)
+        written += self._flush(OccasionalTicket, tickets, intervals)
+        counts.update(tickets=written, open_tickets=opened)
+        self._progress(f"{written} occasional tickets, {opened} open")
+
+    # ------------------------------------------------------------------
+    # Helpers
+    # ------------------------------------------------------------------
+    def _stays(self, start, end, expected, mean_minutes) -> list:
+        """
+        About 'expected' non-overlapping (entry, exit) stays in [start, end],
+        one per equal share of the window, with log-normal durations.
+        """
+        span = (end - start).total_seconds()
+        count = int(expected) + (self._rng.random() < expected % 1)
+        if span <= 0 or count <= 0:
+            return []
+        spacing = span / count
+        stays = []
+        for i in range(count):
+            duration = min(self._rng.lognormvariate(math.log(mean_minutes * 60), 0.8), spacing * 0.8)
+            entry_time = start + timedelta(seconds=i * spacing + self._rng.uniform(0, spacing - duration))
+            stays.append((entry_time, entry_time + timedelta(seconds=max(duration, 60))))
+        return stays
+
+    def _flush(self, model, rows, intervals, projection_model=None, projection=None) -> int:
+        written = len(rows)
+        with transaction.atomic():
+            model.objects.bulk_create(rows, batch_size=self.spec.batch_size)
+            OccupancyInterval.objects.bulk_create(intervals, batch_size=self.spec.batch_size)
+            if projection:
+                projection_model.objects.bulk_create(projection, batch_size=self.spec.batch_size)
+        rows.clear()
+        intervals.clear()
+        if projection is not None:
+            projection.clear()
+        return written
+
+    def _flush_inherited(self, model, rows):
+        with transaction.atomic():
+            bulk_create_inherited(model, rows, self.spec.batch_size)
+        rows.clear()
+
+
+def rebuild_derived_state() -> dict:
+    """
+    Recomputes the state the signal handlers keep up to date, after rows
+    were written with bulk_create (or any other write bypassing them).
+    Process-local caches are only dropped in this process; other worker
+    processes pick the changes up when their caches expire.
+    """
+    drift = OccupancyCounterRepository().reconcile()
+    pool = FreeSlotPool().refresh()
+
+    PlateRegistryVersion.bump()  # other processes' filters: see vehicles.plate_filter
+    plate_filter = get_registered_plate_filter()
+    bloom = plate_filter.rebuild()
+    if plate_filter.snapshot_path:
+        plate_filter.write_snapshot(bloom)
+
+    get_compatibility_matrix().invalidate()
+    get_slot_interval_index().invalidate()
+    get_availability_calendar().invalidate()
+    get_active_contract_cache().clear()
+    get_stats_cache().clear()
+    return {
+        "counter_buckets_fixed": len(drift),
+        "pool_added": pool["added"],
+        "pool_removed": pool["removed"],
+        "plates": plate_filter.stats()["plates"],
+    }
@@ -0,0 +1,116 @@
+# parking/tests/test_allocation.py
+
+from decimal import Decimal
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from customers.models import Customer
+from vehicles.models import Vehicle
+from parking.allocation import BestFitAllocator, FirstFitAllocator, get_allocator
+from parking.compatibility import SlotCompatibilityMatrix
+from parking.data import FreeSlotPool
+from parking.models import FreeSlot, ParkingArea, SlotType, ParkingSlot, Gate
+from parking.services import PricingService, PaymentService
+from contracts.services import TicketService
+
+
+class BestFitAllocatorTests(TestCase):
+    def setUp(self):
+        self.areas = [
+            ParkingArea.objects.create(name="North", description=""),
+            ParkingArea.objects.create(name="South", description=""),
+        ]
+        self.simple = SlotType.objects.create(code="SIMPLE", name="Simple", size_rank=1)
+        self.oversize = SlotType.objects.create(code="OVERSIZE", name="Oversize", size_rank=3)
+
+        # The oversize slots are the longest free ones.
+        self.oversize_slots = [
+            ParkingSlot.objects.create(area=area, number="O1", slot_type=self.oversize)
+            for area in self.areas
+        ]
+        self.accessible_slot = ParkingSlot.objects.create(
+            area=self.areas[0], number="A1", slot_type=self.simple, is_accessible=True
+        )
+        self.simple_slots = [
+            ParkingSlot.objects.create(area=area, number=f"S{i}", slot_type=self.simple)
+            for area in self.areas
+            for i in range(2)
+        ]
+
+        customer = Customer.objects.create_user(username="eva", password="dummy")
+        self.truck = Vehicle.objects.create(owner=customer, license_plate="TR-00-CK", minimum_slot_type=self.oversize)
+        self.permit_car = Vehicle.objects.create(
+            owner=customer, license_plate="PE-00-RM", has_disability_permit=True
+        )
+
+        self.pool = FreeSlotPool()
+        self.allocator = BestFitAllocator(compatibility_matrix=SlotCompatibilityMatrix())
+
+    def test_small_car_gets_smallest_slot_not_the_longest_free(self):
+        self.assertEqual(FirstFitAllocator(SlotCompatibilityMatrix()).allocate(self.pool).slot_type, self.oversize)
+
+        slot = self.allocator.allocate(self.pool)
+
+        self.assertEqual(slot.slot_type, self.simple)
+        self.assertFalse(slot.is_accessible)
+
+    def test_large_vehicle_gets_oversize_slot(self):
+        slot = self.allocator.allocate(self.pool, vehicle=self.truck)
+        self.assertEqual(slot.slot_type, self.oversize)
+
+    def test_accessible_slots_only_for_permit_holders(self):
+        claimed = [self.allocator.allocate(self.pool) for _ in range(6)]
+        self.assertNotIn(self.accessible_slot, claimed)
+        # Nothing but the accessible slot is left for cars without permit.
+        self.assertIsNone(self.allocator.allocate(self.pool))
+
+        self.assertEqual(self.allocator.allocate(self.pool, vehicle=self.permit_car), self.accessible_slot)
+
+    def test_consecutive_entries_are_spread_over_areas(self):
+        areas = [self.allocator.allocate(self.pool).area for _ in range(4)]
+        self.assertEqual(areas.count(self.areas[0]), 2)
+        self.assertEqual(areas.count(self.areas[1]), 2)
+        self.assertNotEqual(areas[0], areas[1])
+
+    def test_areas_of_a_bucket_are_tried_in_one_query(self):
+        FreeSlot.objects.filter(area=self.areas[0], slot_type=self.simple).delete()
+
+        with CaptureQueriesContext(connection) as queries:
+            slot = self.allocator.allocate(self.pool)  # North's turn, but North is full
+
+        self.assertEqual(slot.area, self.areas[1])
+        head_reads = [
+            query["sql"] for query in queries.captured_queries
+            if query["sql"].startswith("SELECT") and f'FROM "{FreeSlot._meta.db_table}"' in query["sql"]
+        ]
+        self.assertEqual(len(head_reads), 1)
+
+    def test_choose_prefers_smallest_rank_in_least_loaded_area(self):
+        ParkingSlot.objects.create(area=self.areas[1], number="S9", slot_type=self.simple)
+        candidates = ParkingSlot.objects.select_related("slot_type").all()
+
+        slot = self.allocator.choose(candidates)
+
+        self.assertEqual(slot.slot_type, self.simple)
+        self.assertEqual(slot.area, self.areas[1])
+
+    def test_occasional_entry_uses_registered_vehicle_size(self):
+        gate = Gate.objects.create(area=self.areas[0], name="Entry")
+        service = TicketService(
+            pricing_service=PricingService(),
+            payment_service=PaymentService(),
+            allocator=self.allocator,
+        )
+
+        result = service.start_occasional_entry("tr-00-ck", gate.pk)
+
+        self.assertTrue(result["success"])
+        self.assertIn("O1", result["slot_label"])
+        self.assertEqual(FreeSlot.objects.filter(slot_type=self.oversize).count(), 1)
+
+    def test_unknown_allocator_is_rejected(self):
+        with self.assertRaises(ValueError):
+            get_allocator("worst_fit")
+        self.assertIsInstance(get_allocator("first_fit"), FirstFitAllocator)
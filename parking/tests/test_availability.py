@@ -0,0 +1,238 @@
+# parking/tests/test_availability.py
+
+from datetime import timedelta
+from unittest.mock import MagicMock, patch
+
+from django.test import TestCase
+from django.utils import timezone
+
+from customers.models import Customer
+from vehicles.models import Vehicle
+from parking.models import FreeSlot, ParkingArea, SlotType, ParkingSlot
+from parking.availability import (
+    AvailabilityCalendar,
+    SlotIntervalIndex,
+    get_availability_calendar,
+    get_slot_interval_index,
+)
+from parking.compatibility import SlotCompatibilityMatrix
+from parking.services import SlotService
+from contracts.models import Contract, RegularContract
+from contracts.services import TicketService
+
+
+class SlotIntervalIndexTests(TestCase):
+    def setUp(self):
+        self.area = ParkingArea.objects.create(name="Main", description="")
+        self.slot_type = SlotType.objects.create(code="SIMPLE", name="Simple", size_rank=1)
+        self.slot_a = ParkingSlot.objects.create(area=self.area, number="A1", slot_type=self.slot_type)
+        self.slot_b = ParkingSlot.objects.create(area=self.area, number="A2", slot_type=self.slot_type)
+
+        self.customer = Customer.objects.create_user(username="ivo", password="dummy")
+        self.vehicle = Vehicle.objects.create(
+            owner=self.customer,
+            license_plate="IX-11-IX",
+            minimum_slot_type=self.slot_type,
+        )
+
+        self.now = timezone.now()
+        Contract.objects.create(
+            vehicle=self.vehicle,
+            valid_from=self.now,
+            valid_to=self.now + timedelta(days=10),
+            reserved_slot=self.slot_a,
+        )
+        Contract.objects.create(
+            vehicle=self.vehicle,
+            valid_from=self.now + timedelta(days=20),
+            valid_to=self.now + timedelta(days=30),
+            reserved_slot=self.slot_a,
+        )
+
+    def test_overlap_rules_match_orm_query(self):
+        index = SlotIntervalIndex()
+        day = timedelta(days=1)
+
+        self.assertFalse(index.is_free(self.slot_a.pk, self.now + day, self.now + 2 * day))
+        self.assertFalse(index.is_free(self.slot_a.pk, self.now - day, self.now + 40 * day))
+        # Gap between both contracts
+        self.assertTrue(index.is_free(self.slot_a.pk, self.now + 10 * day, self.now + 20 * day))
+        # Before everything
+        self.assertTrue(index.is_free(self.slot_a.pk, self.now - 2 * day, self.now))
+        self.assertTrue(index.is_free(self.slot_b.pk, self.now, self.now + day))
+
+        for start, end in [
+            (self.now + day, self.now + 2 * day),
+            (self.now + 10 * day, self.now + 20 * day),
+            (self.now + 5 * day, self.now + 25 * day),
+        ]:
+            self.assertEqual(
+                index.is_free(self.slot_a.pk, start, end),
+                self.slot_a.is_free_for_period((start, end)),
+            )
+
+    def test_add_updates_index_incrementally(self):
+        index = SlotIntervalIndex()
+        start = self.now + timedelta(days=2)
+        end = self.now + timedelta(days=3)
+        self.assertTrue(index.is_free(self.slot_b.pk, start, end))
+
+        index.add(self.slot_b.pk, start, end)
+
+        with self.assertNumQueries(0):
+            self.assertFalse(index.is_free(self.slot_b.pk, start, end))
+            self.assertEqual(
+                index.free_slot_ids([self.slot_a.pk, self.slot_b.pk], start, end),
+                set(),
+            )
+
+    def test_find_available_slots_without_per_slot_queries(self):
+        for i in range(10):
+            ParkingSlot.objects.create(area=self.area, number=f"B{i}", slot_type=self.slot_type)
+
+        service = SlotService(
+            interval_index=SlotIntervalIndex(),
+            compatibility_matrix=SlotCompatibilityMatrix(),
+        )
+        period = (self.now + timedelta(days=1), self.now + timedelta(days=2))
+
+        # Loading the index (1) and the compatibility matrix (2),
+        # then one query for the resulting slots.
+        with self.assertNumQueries(4):
+            slots = service.find_available_slots(self.vehicle, period)
+
+        self.assertEqual(len(slots), 11)
+        self.assertNotIn(self.slot_a, slots)
+
+        with self.assertNumQueries(1):
+            service.find_available_slots(self.vehicle, period)
+
+
+class PurchaseUpdatesIndexTests(TestCase):
+    @patch("contracts.services.record_reservation")
+    def test_purchase_records_reservation_after_commit(self, mock_record):
+        pricing = MagicMock()
+        pricing.get_season_price.return_value = 99.0
+        payment = MagicMock()
+        payment.process_payment.return_value = True
+
+        slot_repo = MagicMock()
+        slot_repo.select_for_update.return_value.get.return_value = MagicMock(pk=7)
+        contract_repo = MagicMock()
+        contract_repo.filter.return_value.exists.return_value = False
+
+        service = TicketService(
+            pricing_service=pricing,
+            payment_service=payment,
+            slot_repo=slot_repo,
+            vehicle_repo=MagicMock(),
+            contract_repo=contract_repo,
+        )
+
+        valid_from = timezone.now()
+        valid_to = valid_from + timedelta(days=30)
+        with self.captureOnCommitCallbacks(execute=True):
+            result = service.purchase_season_ticket(1, "AA-00-AA", 7, valid_from, valid_to)
+
+        self.assertTrue(result["success"])
+        mock_record.assert_called_once_with(7, valid_from, valid_to)
+
+    def test_purchase_with_a_naive_period_updates_the_indexes(self):
+        area = ParkingArea.objects.create(name="Main", description="")
+        slot_type = SlotType.objects.create(code="SIMPLE", name="Simple", size_rank=1)
+        slot = ParkingSlot.objects.create(area=area, number="N1", slot_type=slot_type)
+        customer = Customer.objects.create_user(username="nina", password="dummy")
+        Vehicle.objects.create(owner=customer, license_plate="NA-IV-01")
+        for index in (get_slot_interval_index(), get_availability_calendar()):
+            index.invalidate()
+            index.rebuild()
+        pricing = MagicMock()
+        pricing.get_season_price.return_value = 99.0
+        payment = MagicMock()
+        payment.process_payment.return_value = True
+        service = TicketService(pricing_service=pricing, payment_service=payment)
+
+        valid_from = timezone.localtime().replace(tzinfo=None) - timedelta(hours=1)
+        valid_to = valid_from + timedelta(days=30)
+        with self.captureOnCommitCallbacks(execute=True):
+            result = service.purchase_season_ticket(customer.pk, "NA-IV-01", slot.pk, valid_from, valid_to)
+
+        self.assertTrue(result["success"])
+        self.assertEqual(RegularContract.objects.get().valid_from, timezone.make_aware(valid_from))
+        self.assertFalse(FreeSlot.objects.filter(slot=slot).exists())
+        start, end = timezone.now(), timezone.now() + timedelta(days=1)
+        self.assertEqual(get_availability_calendar().free_slot_ids([slot.pk], start, end), set())
+
+
+class AvailabilityCalendarTests(TestCase):
+    def setUp(self):
+        self.area = ParkingArea.objects.create(name="Main", description="")
+        self.slot_type = SlotType.objects.create(code="SIMPLE", name="Simple", size_rank=1)
+        self.slots = [
+            ParkingSlot.objects.create(area=self.area, number=f"C{i}", slot_type=self.slot_type)
+            for i in range(4)
+        ]
+        self.customer = Customer.objects.create_user(username="rui", password="dummy")
+        self.vehicle = Vehicle.objects.create(owner=self.customer, license_plate="RU-22-RU")
+
+        today = timezone.localtime().replace(hour=0, minute=0, second=0, microsecond=0)
+        self.day = lambda n, hour=0: today + timedelta(days=n, hours=hour)
+
+        # Slot 0: days 2..5, slot 1: ends at 10:00 on day 3, slot 2: far in the future
+        self._contract(self.slots[0], self.day(2), self.day(6))
+        self._contract(self.slots[1], self.day(1, 8), self.day(3, 10))
+        self._contract(self.slots[2], self.day(500), self.day(530))
+
+    def _contract(self, slot, valid_from, valid_to):
+        return RegularContract.objects.create(
+            vehicle=self.vehicle,
+            customer=self.customer,
+            valid_from=valid_from,
+            valid_to=valid_to,
+            reserved_slot=slot,
+            price=100,
+        )
+
+    def _orm_free_ids(self, start, end):
+        return {
+            slot.pk for slot in self.slots
+            if not RegularContract.objects.filter(
+                reserved_slot=slot, valid_from__lt=end, valid_to__gt=start
+            ).exists()
+        }
+
+    def test_matches_orm_overlap_rules(self):
+        calendar = AvailabilityCalendar()
+        ids = [slot.pk for slot in self.slots]
+
+        periods = [
+            (self.day(3), self.day(4)),
+            (self.day(3, 12), self.day(7)),  # starts after slot 1 is released
+            (self.day(3, 9), self.day(3, 11)),
+            (self.day(6), self.day(10)),
+            (self.day(0, 6), self.day(2, 1)),
+            (self.day(490), self.day(510)),  # beyond the horizon
+            (self.day(-3), self.day(-1)),  # in the past
+        ]
+        for start, end in periods:
+            with self.subTest(start=start, end=end):
+                self.assertEqual(calendar.free_slot_ids(ids, start, end), self._orm_free_ids(start, end))
+
+    def test_query_after_load_hits_no_database(self):
+        calendar = AvailabilityCalendar()
+        calendar.rebuild()
+        ids = [slot.pk for slot in self.slots]
+
+        with self.assertNumQueries(0):
+            free = calendar.free_slot_ids(ids, self.day(3, 12), self.day(20))
+
+        self.assertEqual(free, {self.slots[1].pk, self.slots[2].pk, self.slots[3].pk})
+
+    def test_add_keeps_calendar_in_sync(self):
+        calendar = AvailabilityCalendar()
+        calendar.rebuild()
+
+        calendar.add(self.slots[3].pk, self.day(10, 6), self.day(12, 18))
+
+        self.assertEqual(calendar.free_slot_ids([self.slots[3].pk], self.day(11), self.day(11, 1)), set())
+        self.assertEqual(calendar.free_slot_ids([self.slots[3].pk], self.day(12, 19), self.day(13)), {self.slots[3].pk})
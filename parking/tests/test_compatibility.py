@@ -0,0 +1,73 @@
+# parking/tests/test_compatibility.py
+
+from django.test import TestCase
+
+from customers.models import Customer
+from vehicles.models import Vehicle
+from parking.models import ParkingArea, SlotType, ParkingSlot
+from parking.compatibility import SlotCompatibilityMatrix, get_compatibility_matrix
+
+
+class SlotCompatibilityMatrixTests(TestCase):
+    def setUp(self):
+        self.area = ParkingArea.objects.create(name="Main", description="")
+        self.types = [
+            SlotType.objects.create(code="SIMPLE", name="Simple", size_rank=1),
+            SlotType.objects.create(code="EXTENDED", name="Extended", size_rank=2),
+            SlotType.objects.create(code="OVERSIZE", name="Oversize", size_rank=3),
+        ]
+        self.slots = []
+        for slot_type in self.types:
+            for accessible in (False, True):
+                self.slots.append(
+                    ParkingSlot.objects.create(
+                        area=self.area,
+                        number=f"{slot_type.code}-{int(accessible)}",
+                        slot_type=slot_type,
+                        is_accessible=accessible,
+                    )
+                )
+
+        customer = Customer.objects.create_user(username="ana", password="dummy")
+        self.vehicles = []
+        for i, minimum in enumerate([None] + self.types):
+            for permit in (False, True):
+                self.vehicles.append(
+                    Vehicle.objects.create(
+                        owner=customer,
+                        license_plate=f"CM-{i}{int(permit)}-CM",
+                        minimum_slot_type=minimum,
+                        has_disability_permit=permit,
+                    )
+                )
+
+    def test_matrix_matches_domain_rules(self):
+        matrix = SlotCompatibilityMatrix()
+
+        for vehicle in self.vehicles:
+            expected = {slot.pk for slot in self.slots if slot.is_compatible_with(vehicle)}
+            with self.subTest(vehicle=vehicle.license_plate):
+                self.assertEqual(matrix.slot_ids_for(vehicle), expected)
+
+    def test_lookups_after_load_hit_no_database(self):
+        matrix = SlotCompatibilityMatrix()
+        matrix.rebuild()
+
+        with self.assertNumQueries(0):
+            ids = matrix.compatible_slot_ids(2, False)
+            accessible = matrix.accessible_slot_ids
+
+        self.assertEqual(len(ids), 2)
+        self.assertEqual(len(accessible), 3)
+
+    def test_vehicle_larger_than_any_slot(self):
+        matrix = SlotCompatibilityMatrix()
+        self.assertEqual(matrix.compatible_slot_ids(4, True), frozenset())
+
+    def test_slot_changes_invalidate_process_matrix(self):
+        matrix = get_compatibility_matrix()
+        before = matrix.compatible_slot_ids(3, False)
+
+        new_slot = ParkingSlot.objects.create(area=self.area, number="X1", slot_type=self.types[2])
+
+        self.assertEqual(matrix.compatible_slot_ids(3, False), before | {new_slot.pk})
@@ -0,0 +1,121 @@
+import random
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from core.sketches import QuantileSketch
+from customers.models import Customer
+from vehicles.models import Vehicle
+from parking.models import ParkingArea, SlotType, ParkingSlot, DwellTimeSketch
+from parking.rollups import day_start
+from parking.services import SlotService
+from contracts.models import Movement, OccasionalTicket, OccupancyInterval, RegularContract
+
+
+class QuantileSketchTests(SimpleTestCase):
+    def test_quantiles_within_relative_accuracy(self):
+        rng = random.Random(7)
+        values = [rng.lognormvariate(4, 1) for _ in range(5000)]
+        sketch = QuantileSketch(0.01)
+        for value in values:
+            sketch.add(value)
+
+        values.sort()
+        for fraction in (0.5, 0.9, 0.99):
+            exact = values[round(fraction * (len(values) - 1))]
+            self.assertAlmostEqual(sketch.quantile(fraction), exact, delta=exact * 0.011)
+
+    def test_merged_halves_equal_the_whole(self):
+        whole, left, right = QuantileSketch(), QuantileSketch(), QuantileSketch()
+        for value in range(1, 1001):
+            whole.add(value)
+            (left if value % 2 else right).add(value)
+
+        merged = QuantileSketch.from_dict(left.to_dict()).merge(QuantileSketch.from_dict(right.to_dict()))
+
+        self.assertEqual(merged.to_dict(), whole.to_dict())
+        self.assertEqual(merged.quantile(0), 1)
+        self.assertEqual(merged.quantile(1), 1000)
+
+
+class DwellTimeAnalyticsTests(TestCase):
+    def setUp(self):
+        self.main = ParkingArea.objects.create(name="Main", description="")
+        self.annex = ParkingArea.objects.create(name="Annex", description="")
+        slot_type = SlotType.objects.create(code="SIMPLE", name="Simple", size_rank=1)
+        season_slot = ParkingSlot.objects.create(area=self.main, number="M1", slot_type=slot_type)
+        self.annex_slot = ParkingSlot.objects.create(area=self.annex, number="A1", slot_type=slot_type)
+
+        customer = Customer.objects.create_user(username="dora", password="dummy")
+        self.contract = RegularContract.objects.create(
+            vehicle=Vehicle.objects.create(owner=customer, license_plate="DW-EL-01"),
+            customer=customer,
+            valid_from=timezone.now() - timedelta(days=30),
+            valid_to=timezone.now() + timedelta(days=30),
+            reserved_slot=season_slot,
+            price=Decimal("100.00"),
+        )
+        self.today = day_start(timezone.now())
+
+    def _season_stay(self, days_ago, minutes):
+        exit_time = self.today - timedelta(days=days_ago) + timedelta(hours=12)
+        Movement.objects.create(
+            contract=self.contract,
+            entry_time=exit_time - timedelta(minutes=minutes),
+            exit_time=exit_time,
+        )
+
+    def _occasional_stay(self, days_ago, minutes):
+        exit_time = self.today - timedelta(days=days_ago) + timedelta(hours=12)
+        OccasionalTicket.objects.create(
+            license_plate="DW-OC-01",
+            slot=self.annex_slot,
+            entry_time=exit_time - timedelta(minutes=minutes),
+            exit_time=exit_time,
+            is_closed=True,
+        )
+
+    def test_percentiles_merge_daily_sketches(self):
+        for minutes in range(10, 101, 10):
+            self._season_stay(2, minutes)
+        for minutes in (200, 400):
+            self._season_stay(1, minutes)
+        self._occasional_stay(1, 30)
+
+        call_command("compact_dwell_times", "--chunk-size", "3", stdout=StringIO())
+        self.assertEqual(
+            sorted(DwellTimeSketch.objects.values_list("area__name", "count")),
+            [("Annex", 1), ("Main", 2), ("Main", 10)],
+        )
+
+        # Later ledger changes to compacted days are not rescanned.
+        OccupancyInterval.objects.update(start_time=self.today - timedelta(days=5))
+        result = SlotService().get_dwell_time_percentiles((self.today - timedelta(days=3), timezone.now()))
+
+        self.assertEqual(result["overall"]["count"], 13)
+        self.assertAlmostEqual(result["overall"]["p50"], 60, delta=0.6)
+        self.assertAlmostEqual(result["overall"]["p90"], 100, delta=1)
+        self.assertAlmostEqual(result["overall"]["p99"], 200, delta=2)
+        self.assertEqual(
+            [(row["name"], row["count"]) for row in result["by_area"]],
+            [("Annex", 1), ("Main", 12)],
+        )
+        self.assertEqual(result["by_slot_type"][0]["count"], 13)
+
+    def test_days_after_the_high_water_mark_are_sketched_live(self):
+        self._season_stay(1, 90)
+        call_command("compact_dwell_times", stdout=StringIO())
+        Movement.objects.create(
+            contract=self.contract,
+            entry_time=timezone.now() - timedelta(minutes=45),
+            exit_time=timezone.now(),
+        )
+
+        result = SlotService().get_dwell_time_percentiles((self.today - timedelta(days=1), timezone.now()))
+
+        self.assertEqual(result["overall"]["count"], 2)
+        self.assertEqual(DwellTimeSketch.objects.count(), 1)
@@ -1,4 +1,4 @@
-from unittest.mock import MagicMock
+from unittest.mock import ANY, MagicMock
 from django.test import TestCase
 from django.utils import timezone
 from parking.models import Gate
@@ -41,32 +41,38 @@ class EnterWithSeasonTicketTests(TestCase):
 
         self.now = timezone.now()
 
+    def _resolve_entry(self, entry):
+        """
+        Result of the single plate -> contract / in-use / gate query.
+        """
+        (
+            self.mock_contract_repo
+            .select_for_update.return_value
+            .filter.return_value
+            .annotate.return_value
+            .order_by.return_value
+            .values.return_value
+            .first.return_value
+        ) = entry
+
     # ---------------------------------------------------------
     # HAPPY PATH
     # ---------------------------------------------------------
     def test_entry_success(self):
         """UC2: Should open gate when vehicle + contract + movement OK."""
 
-        vehicle_mock = MagicMock()
-        self.mock_vehicle_repo.get.return_value = vehicle_mock
-
-        contract_mock = MagicMock()
-        self.mock_contract_repo.filter.return_value.exists.return_value = True
-        self.mock_contract_repo.filter.return_value.select_for_update.return_value.first.return_value = contract_mock
-
-        # No open movements
-        self.mock_movement_repo.filter.return_value.exists.return_value = False
+        # Active contract, no open movement, gate exists
+        self._resolve_entry({"pk": 42, "in_use": False, "gate_exists": True})
 
         movement_instance = MagicMock(pk=999)
         self.mock_movement_repo.create.return_value = movement_instance
 
-        self.mock_gate_repo.get.return_value = MagicMock()
-
         result = self.service.enter_with_season_ticket(self.plate, self.gate_id)
 
         self.assertTrue(result["success"])
         self.assertTrue(result["open_gate"])
         self.assertEqual(result["movement_id"], 999)
+        self.mock_movement_repo.create.assert_called_once_with(contract_id=42, entry_time=ANY)
 
     # ---------------------------------------------------------
     # NEGATIVE CASES
@@ -75,63 +81,46 @@ class EnterWithSeasonTicketTests(TestCase):
     def test_vehicle_not_found(self):
         """UC2: Should fail when vehicle does not exist."""
 
-        self.mock_vehicle_repo.get.side_effect = self.mock_vehicle_repo.model.DoesNotExist
+        self._resolve_entry(None)
+        self.mock_vehicle_repo.filter.return_value.exists.return_value = False
 
         result = self.service.enter_with_season_ticket(self.plate, self.gate_id)
 
         self.assertFalse(result["success"])
         self.assertFalse(result["open_gate"])
+        self.assertIn("No vehicle", result["reason"])
 
     def test_no_active_ticket(self):
         """UC2: Should fail when no valid contract exists."""
 
-        self.mock_vehicle_repo.get.return_value = MagicMock()
-
-        # No contracts returned
-        self.mock_contract_repo.filter.return_value.exists.return_value = False
+        # No contract returned, but the vehicle is known
+        self._resolve_entry(None)
+        self.mock_vehicle_repo.filter.return_value.exists.return_value = True
 
         result = self.service.enter_with_season_ticket(self.plate, self.gate_id)
 
         self.assertFalse(result["success"])
         self.assertFalse(result["open_gate"])
+        self.assertIn("No active season ticket", result["reason"])
 
     def test_ticket_already_in_use(self):
         """UC2: Should reject if an open movement already exists."""
 
-        self.mock_vehicle_repo.get.return_value = MagicMock()
-
-        # Contract exists
-        contract_qs = MagicMock()
-        contract_qs.exists.return_value = True
-        contract_qs.select_for_update.return_value.first.return_value = MagicMock()
-        self.mock_contract_repo.filter.return_value = contract_qs
-
-        # Movement exists (open)
-        self.mock_movement_repo.filter.return_value.exists.return_value = True
+        self._resolve_entry({"pk": 42, "in_use": True, "gate_exists": True})
 
         result = self.service.enter_with_season_ticket(self.plate, self.gate_id)
 
         self.assertFalse(result["success"])
         self.assertFalse(result["open_gate"])
+        self.mock_movement_repo.create.assert_not_called()
 
     def test_gate_not_found(self):
         """UC2: Should fail if gate does not exist."""
 
-        self.mock_vehicle_repo.get.return_value = MagicMock()
-
-        # Contract exists
-        contract_qs = MagicMock()
-        contract_qs.exists.return_value = True
-        contract_qs.select_for_update.return_value.first.return_value = MagicMock()
-        self.mock_contract_repo.filter.return_value = contract_qs
-
-        # No open movement
-        self.mock_movement_repo.filter.return_value.exists.return_value = False
-
-        # Gate fails
-        self.mock_gate_repo.get.side_effect = Gate.DoesNotExist
+        self._resolve_entry({"pk": 42, "in_use": False, "gate_exists": False})
 
         result = self.service.enter_with_season_ticket(self.plate, self.gate_id)
 
         self.assertFalse(result["success"])
         self.assertFalse(result["open_gate"])
+        self.mock_movement_repo.create.assert_not_called()
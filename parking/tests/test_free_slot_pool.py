@@ -0,0 +1,145 @@
+# parking/tests/test_free_slot_pool.py
+
+from datetime import timedelta
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.db.models.query import QuerySet
+from django.test import TestCase
+from django.utils import timezone
+
+from customers.models import Customer
+from vehicles.models import Vehicle
+from parking.data import FreeSlotPool
+from parking.models import FreeSlot, ParkingArea, SlotType, ParkingSlot, Gate
+from parking.services import PricingService, PaymentService
+from contracts.models import RegularContract, OccasionalTicket
+from contracts.services import TicketService
+
+
+class FreeSlotPoolTests(TestCase):
+    def setUp(self):
+        self.area = ParkingArea.objects.create(name="Main", description="")
+        self.slot_type = SlotType.objects.create(code="SIMPLE", name="Simple", size_rank=1)
+        self.gate = Gate.objects.create(area=self.area, name="Entry")
+        self.slots = [
+            ParkingSlot.objects.create(area=self.area, number=f"P{i}", slot_type=self.slot_type)
+            for i in range(3)
+        ]
+
+        self.customer = Customer.objects.create_user(username="lia", password="dummy")
+        self.vehicle = Vehicle.objects.create(owner=self.customer, license_plate="LI-33-LI")
+
+        self.pool = FreeSlotPool()
+        self.service = TicketService(
+            pricing_service=PricingService(),
+            payment_service=PaymentService(),
+        )
+
+    def _season_contract(self, slot, valid_from, valid_to):
+        return RegularContract.objects.create(
+            vehicle=self.vehicle,
+            customer=self.customer,
+            valid_from=valid_from,
+            valid_to=valid_to,
+            reserved_slot=slot,
+            price=Decimal("100.00"),
+        )
+
+    def test_new_slots_join_the_pool(self):
+        self.assertEqual(
+            set(FreeSlot.objects.values_list("slot_id", flat=True)),
+            {slot.pk for slot in self.slots},
+        )
+
+    def test_occasional_entries_pop_distinct_slots_until_empty(self):
+        labels = set()
+        for i in range(3):
+            result = self.service.start_occasional_entry(f"oc-0{i}", self.gate.pk)
+            self.assertTrue(result["success"])
+            labels.add(result["slot_label"])
+
+        self.assertEqual(len(labels), 3)
+        self.assertFalse(FreeSlot.objects.exists())
+
+        result = self.service.start_occasional_entry("oc-99", self.gate.pk)
+        self.assertFalse(result["success"])
+
+    def test_pop_skips_slots_reserved_by_active_season_contract(self):
+        now = timezone.now()
+        for slot in self.slots[:2]:
+            self._season_contract(slot, now - timedelta(days=1), now + timedelta(days=1))
+
+        slot = self.pool.pop(at=now)
+
+        self.assertEqual(slot, self.slots[2])
+        # The reserved slots were dropped from the pool on the way.
+        self.assertFalse(FreeSlot.objects.exists())
+
+    def test_pop_cost_does_not_depend_on_garage_size(self):
+        for i in range(50):
+            ParkingSlot.objects.create(area=self.area, number=f"Q{i}", slot_type=self.slot_type)
+
+        # savepoint, select + delete of the pool head, one validation query, release
+        with self.assertNumQueries(5):
+            self.assertIsNotNone(self.pool.pop())
+
+    def test_exit_pushes_slot_back(self):
+        result = self.service.start_occasional_entry("oc-11-22", self.gate.pk)
+        self.assertTrue(result["success"])
+        ticket = OccasionalTicket.objects.get(license_plate="OC-11-22")
+        self.assertFalse(FreeSlot.objects.filter(slot=ticket.slot).exists())
+
+        now = timezone.now()
+        OccasionalTicket.objects.filter(pk=ticket.pk).update(
+            amount_due=Decimal("3.00"),
+            amount_paid=Decimal("3.00"),
+            paid_at=now,
+            exit_deadline=now + timedelta(minutes=15),
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            result = self.service.exit_with_occasional_ticket("oc-11-22", self.gate.pk)
+
+        self.assertTrue(result["success"])
+        self.assertTrue(FreeSlot.objects.filter(slot=ticket.slot).exists())
+
+    def test_refresh_reconciles_expired_and_new_reservations(self):
+        now = timezone.now()
+        # Slot 0 becomes reserved while it sits in the pool...
+        self._season_contract(self.slots[0], now - timedelta(hours=1), now + timedelta(days=1))
+        # ...slot 1 was taken out of the pool by a contract that has expired.
+        FreeSlot.objects.filter(slot=self.slots[1]).delete()
+        self._season_contract(self.slots[1], now - timedelta(days=10), now - timedelta(days=1))
+
+        result = self.pool.refresh(at=now)
+
+        self.assertEqual(result, {"added": 1, "removed": 1})
+        self.assertEqual(
+            set(FreeSlot.objects.values_list("slot_id", flat=True)),
+            {self.slots[1].pk, self.slots[2].pk},
+        )
+
+    def test_unknown_claim_mode_is_rejected(self):
+        with self.assertRaises(ValueError):
+            FreeSlotPool(claim_mode="first-come")
+
+    def test_optimistic_claim_retries_when_another_gate_wins(self):
+        pool = FreeSlotPool(claim_mode="optimistic")
+        original_first = QuerySet.first
+        claimed_by_other_gate = []
+
+        def racing_first(qs):
+            # Another gate claims the head row between our SELECT and DELETE.
+            entry = original_first(qs)
+            if entry is not None and not claimed_by_other_gate:
+                claimed_by_other_gate.append(entry.pk)
+                FreeSlot.objects.filter(pk=entry.pk).delete()
+            return entry
+
+        with patch.object(QuerySet, "first", racing_first):
+            slot = pool.pop()
+
+        self.assertIsNotNone(slot)
+        self.assertNotEqual(slot.pk, claimed_by_other_gate[0])
+        self.assertEqual(FreeSlot.objects.count(), 1)
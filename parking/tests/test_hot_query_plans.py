@@ -0,0 +1,44 @@
+from unittest import skipIf, skipUnless
+
+from django.db import connection
+from django.test import TestCase
+
+from core.querylog import SUPPORTED_VENDORS, explain, queryset_full_scans, used_indexes
+from contracts.models import OccasionalTicket
+from parking.hot_queries import HOT_QUERIES
+
+
+@skipUnless(connection.vendor in SUPPORTED_VENDORS, "No plan parser for this database.")
+class HotQueryPlanTests(TestCase):
+    def test_hot_queries_search_their_indexes(self):
+        for hot_query in HOT_QUERIES:
+            with self.subTest(hot_query.name):
+                plan, scanned = queryset_full_scans(hot_query.build())
+                self.assertFalse(
+                    scanned & set(hot_query.indexed_tables),
+                    f"{hot_query.name} reads {sorted(scanned)} in full:\n{plan}",
+                )
+
+    def test_hot_queries_use_the_hot_path_indexes(self):
+        for hot_query in HOT_QUERIES:
+            with self.subTest(hot_query.name):
+                plan = explain(hot_query.build())
+                missing = set(hot_query.indexes) - used_indexes(plan, connection.vendor)
+                self.assertFalse(missing, f"{hot_query.name} does not use {sorted(missing)}:\n{plan}")
+
+    @skipIf(connection.vendor == "mysql", "DROP INDEX commits the transaction on MySQL.")
+    def test_a_dropped_index_shows_up_as_a_full_scan(self):
+        table = OccasionalTicket._meta.db_table
+        constraints = connection.introspection.get_constraints(connection.cursor(), table)
+        (index_name,) = [
+            name
+            for name, info in constraints.items()
+            if info["index"] and not info["unique"] and info["columns"][0] == "license_plate"
+        ]
+        hot_query = next(query for query in HOT_QUERIES if query.name == "plate.open_ticket")
+
+        with connection.cursor() as cursor:
+            # Rolled back with the test's transaction.
+            cursor.execute(f"DROP INDEX {connection.ops.quote_name(index_name)}")
+        _, scanned = queryset_full_scans(hot_query.build())
+        self.assertIn(table, scanned)
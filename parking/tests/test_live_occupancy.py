@@ -0,0 +1,180 @@
+import json
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from threading import Thread
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from customers.models import Customer
+from vehicles.models import Vehicle
+from parking.live import OccupancyBroker, Subscription, get_occupancy_broker
+from parking.models import ParkingArea, SlotType, ParkingSlot, Gate
+from parking.services import PricingService, PaymentService
+from contracts.models import Movement, RegularContract
+from contracts.services import TicketService
+
+
+class SubscriptionTests(SimpleTestCase):
+    def test_slow_subscriber_skips_to_the_newest_event(self):
+        subscription = Subscription(area_id=1, max_pending=2)
+        for seq in range(1, 4):
+            subscription.push({"seq": seq})
+
+        self.assertEqual(subscription.get(0), {"seq": 3})
+        self.assertIsNone(subscription.get(0))
+        self.assertEqual(subscription.overflows, 1)
+
+
+class LiveOccupancyTests(TestCase):
+    def setUp(self):
+        self.area = ParkingArea.objects.create(name="Main", description="")
+        slot_type = SlotType.objects.create(code="SIMPLE", name="Simple", size_rank=1)
+        season_slot = ParkingSlot.objects.create(area=self.area, number="S1", slot_type=slot_type)
+        ParkingSlot.objects.create(area=self.area, number="S2", slot_type=slot_type)
+        self.gate = Gate.objects.create(area=self.area, name="Gate")
+
+        customer = Customer.objects.create_user(username="lisa", password="dummy")
+        self.contract = RegularContract.objects.create(
+            vehicle=Vehicle.objects.create(owner=customer, license_plate="LI-VE-01"),
+            customer=customer,
+            valid_from=timezone.now() - timedelta(days=1),
+            valid_to=timezone.now() + timedelta(days=30),
+            reserved_slot=season_slot,
+            price=Decimal("100.00"),
+        )
+        self.broker = get_occupancy_broker()
+
+    def _subscribe(self):
+        subscription = self.broker.subscribe(self.area.pk)
+        self.addCleanup(self.broker.unsubscribe, subscription)
+        return subscription
+
+    def test_entries_and_exits_publish_deltas_after_commit(self):
+        subscription = self._subscribe()
+        self.assertEqual(subscription.get(0)["free_slots"], 2)
+        tickets = TicketService(pricing_service=PricingService(), payment_service=PaymentService())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            tickets.start_occasional_entry("LI-OC-01", self.gate.pk)
+            self.assertIsNone(subscription.get(0))  # not before the commit
+        with self.captureOnCommitCallbacks(execute=True):
+            movement = Movement.objects.create(contract=self.contract, entry_time=timezone.now())
+        with self.captureOnCommitCallbacks(execute=True):
+            movement.exit_time = timezone.now()
+            movement.save()
+
+        events = [subscription.get(0) for _ in range(3)]
+        self.assertEqual(
+            [(event["type"], event["delta"], event["free_slots"], event["seq"]) for event in events],
+            [("delta", -1, 1, 1), ("delta", -1, 0, 2), ("delta", 1, 1, 3)],
+        )
+
+    def test_no_subscribers_no_work(self):
+        broker = OccupancyBroker()
+        with self.captureOnCommitCallbacks() as callbacks:
+            broker.notify(1, slot_id=1)
+        self.assertEqual(callbacks, [])
+
+    def test_event_published_while_the_first_subscriber_seeds_is_not_lost(self):
+        broker = OccupancyBroker()
+        totals = broker._counter_repo.totals
+        entries = []
+
+        def totals_then_entry(area_id):
+            # An entry commits in another worker thread while the counts are read.
+            result = totals(area_id)
+            entry = Thread(target=broker.publish, args=(area_id, 1))
+            entry.start()
+            entry.join(0.1)
+            entries.append(entry)
+            return result
+
+        with patch.object(broker._counter_repo, "totals", totals_then_entry):
+            subscription = broker.subscribe(self.area.pk)
+        entries[0].join()
+
+        self.assertEqual(subscription.get(0)["free_slots"], 2)
+        event = subscription.get(0)
+        self.assertEqual((event["type"], event["free_slots"]), ("delta", 1))
+
+    def test_resync_ignores_counts_read_before_a_concurrent_event(self):
+        subscription = self._subscribe()
+        subscription.get(0)
+        totals = self.broker._counter_repo.totals
+
+        def totals_then_entry(area_id):
+            result = totals(area_id)
+            self.broker.publish(self.area.pk, 1)
+            return {**result, "occupied_slots": result["occupied_slots"] + 5}
+
+        with patch.object(self.broker._counter_repo, "totals", totals_then_entry):
+            self.broker.resync(self.area.pk, force=True)
+        self.assertEqual(subscription.get(0)["type"], "delta")
+        self.assertIsNone(subscription.get(0))
+
+    def test_resync_sends_a_snapshot_after_drift(self):
+        subscription = self._subscribe()
+        subscription.get(0)
+        self.broker.publish(self.area.pk, 5)  # e.g. an event that never committed here
+        subscription.get(0)
+
+        self.broker.resync(self.area.pk, force=True)
+
+        event = subscription.get(0)
+        self.assertEqual((event["type"], event["free_slots"]), ("snapshot", 2))
+
+    def test_sse_stream(self):
+        response = self.client.get(reverse("parking:occupancy_stream", args=[self.area.pk]))
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        stream = iter(response.streaming_content)
+
+        self.assertEqual(next(stream), b"retry: 5000\n\n")
+        self.assertIn(b'event: snapshot\ndata: {"type": "snapshot"', next(stream))
+        self.broker.publish(self.area.pk, 1)
+        chunk = next(stream).decode()
+
+        self.assertTrue(chunk.startswith("id: 1\nevent: delta\n"))
+        self.assertEqual(json.loads(chunk.split("data: ")[1])["free_slots"], 1)
+        response.close()
+        self.assertEqual(self.broker.subscriber_count(self.area.pk), 0)
+
+    def test_fan_out_harness_with_hundreds_of_subscribers(self):
+        out = StringIO()
+        call_command(
+            "bench_occupancy_stream", "--subscribers", "300", "--events", "20", "--interval-ms", "1", "--json",
+            stdout=out,
+        )
+
+        run = json.loads(out.getvalue())["runs"][0]
+        self.assertEqual(run["delivered"], 300 * 20)
+        self.assertEqual(run["dropped"], 0)
+        self.assertGreater(run["bytes_per_subscription"], 0)
+        self.assertEqual(run["fan_out"]["count"], 20)
+
+
+class OccupancyStreamConnectionTests(TransactionTestCase):
+    def test_stream_holds_no_database_connection(self):
+        area = ParkingArea.objects.create(name="Main", description="")
+        broker = get_occupancy_broker()
+        database = connections[DEFAULT_DB_ALIAS]
+
+        with (
+            override_settings(LIVE_OCCUPANCY_KEEPALIVE=0.01),
+            patch.object(broker, "_resync_seconds", 0),
+            patch.object(database, "close", wraps=database.close) as close,
+        ):
+            response = self.client.get(reverse("parking:occupancy_stream", args=[area.pk]))
+            self.assertEqual(close.call_count, 1)  # before the first byte
+
+            stream = iter(response.streaming_content)
+            next(stream)  # retry
+            next(stream)  # snapshot
+            self.assertEqual(next(stream), b": keepalive\n\n")
+            self.assertEqual(close.call_count, 2)  # after the resync
+            response.close()
@@ -0,0 +1,80 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+import json
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from customers.models import Customer
+from vehicles.models import Vehicle
+from parking.analytics import OccupancyAnalytics, sweep
+from parking.data import MovementRepository
+from parking.models import ParkingArea, SlotType, ParkingSlot
+from contracts.models import Movement, OccasionalTicket, RegularContract
+
+
+class OccupancySweepTests(TestCase):
+    def setUp(self):
+        area = ParkingArea.objects.create(name="Main", description="")
+        slot_type = SlotType.objects.create(code="SIMPLE", name="Simple", size_rank=1)
+        slots = [ParkingSlot.objects.create(area=area, number=f"P{i}", slot_type=slot_type) for i in range(4)]
+        customer = Customer.objects.create_user(username="sven", password="dummy")
+
+        self.start = timezone.now().replace(microsecond=0) - timedelta(hours=10)
+        at = lambda minutes: self.start + timedelta(minutes=minutes)  # noqa: E731
+        for i, (entry, exit_) in enumerate([(-30, 60), (30, 90), (60, 120)]):
+            contract = RegularContract.objects.create(
+                vehicle=Vehicle.objects.create(owner=customer, license_plate=f"SW-0{i}-EP"),
+                customer=customer,
+                valid_from=self.start - timedelta(days=1),
+                valid_to=self.start + timedelta(days=1),
+                reserved_slot=slots[i],
+                price=Decimal("100.00"),
+            )
+            Movement.objects.create(contract=contract, entry_time=at(entry), exit_time=at(exit_))
+        OccasionalTicket.objects.create(license_plate="SW-OC-01", slot=slots[3], entry_time=at(45))
+        self.end = at(180)
+
+    def test_profile_matches_point_queries(self):
+        with self.assertNumQueries(2):
+            profile = OccupancyAnalytics().occupancy_profile(self.start, self.end)
+
+        repo = MovementRepository()
+        for minutes in range(0, 180, 5):
+            moment = self.start + timedelta(minutes=minutes)
+            self.assertEqual(profile.at(moment), repo.count_occupied_at(moment), minutes)
+
+        # 0:45-0:60 car 0, 1 and the ticket; at 1:00 car 0 leaves as car 2 arrives.
+        self.assertEqual(profile.peak(), (3, self.start + timedelta(minutes=45)))
+        self.assertEqual(profile.percentiles((0.5, 1.0)), {0.5: 1, 1.0: 3})
+        self.assertAlmostEqual(profile.mean(), (30 + 2 * 15 + 3 * 15 + 3 * 30 + 2 * 30 + 60) / 180)
+
+    def test_series_resampling(self):
+        profile = OccupancyAnalytics().occupancy_profile(self.start, self.end)
+
+        series = profile.series(timedelta(hours=1))
+
+        self.assertEqual([(row["occupied"], row["peak"]) for row in series], [(1, 3), (3, 3), (1, 1)])
+        self.assertAlmostEqual(series[0]["mean"], (30 + 2 * 15 + 3 * 15) / 60)
+
+    def test_sweep_orders_exits_before_entries(self):
+        start = self.start
+        at = lambda minutes: start + timedelta(minutes=minutes)  # noqa: E731
+
+        profile = sweep([at(0), at(10)], [at(10)], start, at(20))
+
+        self.assertEqual(profile.peak(), (1, start))
+        self.assertEqual(len(profile), 1)
+
+    def test_command_prints_json(self):
+        out = StringIO()
+        call_command(
+            "occupancy_profile", "--start", self.start.isoformat(), "--end", self.end.isoformat(),
+            "--resolution", "60", "--json", stdout=out,
+        )
+
+        result = json.loads(out.getvalue())
+        self.assertEqual(result["peak"], 3)
+        self.assertEqual(len(result["series"]), 3)
@@ -0,0 +1,128 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from customers.models import Customer
+from vehicles.models import Vehicle
+from parking.models import ParkingArea, SlotType, ParkingSlot, Gate, OccupancyCounter
+from parking.services import SlotService, PricingService, PaymentService
+from contracts.models import Movement, OccasionalTicket, RegularContract
+from contracts.services import TicketService
+
+
+class OccupancyCounterTests(TestCase):
+    def setUp(self):
+        self.area = ParkingArea.objects.create(name="Main", description="")
+        self.simple = SlotType.objects.create(code="SIMPLE", name="Simple", size_rank=1)
+        self.large = SlotType.objects.create(code="LARGE", name="Large", size_rank=2)
+        self.season_slot = ParkingSlot.objects.create(area=self.area, number="S1", slot_type=self.simple)
+        ParkingSlot.objects.create(area=self.area, number="S2", slot_type=self.simple)
+        ParkingSlot.objects.create(area=self.area, number="L1", slot_type=self.large)
+        self.gate = Gate.objects.create(area=self.area, name="Gate")
+
+        customer = Customer.objects.create_user(username="paula", password="dummy")
+        now = timezone.now()
+        self.contract = RegularContract.objects.create(
+            vehicle=Vehicle.objects.create(owner=customer, license_plate="OC-CU-01"),
+            customer=customer,
+            valid_from=now - timedelta(days=1),
+            valid_to=now + timedelta(days=30),
+            reserved_slot=self.season_slot,
+            price=Decimal("100.00"),
+        )
+        self.service = SlotService()
+
+    def _occupied(self, slot_type):
+        return OccupancyCounter.objects.get(area=self.area, slot_type=slot_type).occupied_slots
+
+    def test_slot_changes_maintain_totals(self):
+        self.assertEqual(OccupancyCounter.objects.get(area=self.area, slot_type=self.simple).total_slots, 2)
+
+        slot = ParkingSlot.objects.get(number="S2")
+        slot.slot_type = self.large
+        slot.save()
+        self.assertEqual(OccupancyCounter.objects.get(area=self.area, slot_type=self.large).total_slots, 2)
+
+        slot.delete()
+        self.assertEqual(OccupancyCounter.objects.get(area=self.area, slot_type=self.large).total_slots, 1)
+        self.assertEqual(self.service.get_current_occupancy()["total_slots"], 2)
+
+    def test_season_and_occasional_traffic_update_counters(self):
+        tickets = TicketService(pricing_service=PricingService(), payment_service=PaymentService())
+
+        movement = Movement.objects.create(contract=self.contract, entry_time=timezone.now())
+        result = tickets.start_occasional_entry("OC-VI-01", self.gate.pk)
+        self.assertTrue(result["success"])
+        self.assertEqual(self._occupied(self.simple) + self._occupied(self.large), 2)
+
+        movement.exit_time = timezone.now()
+        movement.save()
+        movement.save()  # re-saving a closed movement does not release twice
+        ticket = OccasionalTicket.objects.get(license_plate="OC-VI-01")
+        ticket.is_closed = True
+        ticket.exit_time = timezone.now()
+        ticket.save(update_fields=["exit_time", "is_closed"])
+
+        self.assertEqual(self._occupied(self.simple), 0)
+        self.assertEqual(self._occupied(self.large), 0)
+
+    def test_closing_a_ticket_releases_its_slot_once_however_it_is_saved(self):
+        tickets = TicketService(pricing_service=PricingService(), payment_service=PaymentService())
+        self.assertTrue(tickets.start_occasional_entry("OC-VI-02", self.gate.pk)["success"])
+        ticket = OccasionalTicket.objects.get(license_plate="OC-VI-02")
+        self.assertEqual(self._occupied(ticket.slot.slot_type), 1)
+
+        # A plain save (admin, shell) closes it too.
+        ticket.is_closed = True
+        ticket.exit_time = timezone.now()
+        ticket.save()
+        self.assertEqual(self._occupied(ticket.slot.slot_type), 0)
+
+        # Re-saving a closed ticket does not release it again.
+        ticket.save(update_fields=["is_closed"])
+        ticket.save()
+        self.assertEqual(self._occupied(ticket.slot.slot_type), 0)
+
+        # Reopening occupies the slot again.
+        ticket.is_closed = False
+        ticket.save()
+        self.assertEqual(self._occupied(ticket.slot.slot_type), 1)
+
+    def test_current_occupancy_reads_counters_in_constant_time(self):
+        Movement.objects.create(contract=self.contract, entry_time=timezone.now())
+
+        with self.assertNumQueries(1):
+            occupancy = self.service.get_current_occupancy()
+
+        self.assertEqual(occupancy["total_slots"], 3)
+        self.assertEqual(occupancy["occupied_slots"], 1)
+
+        breakdown = self.service.get_occupancy_breakdown()
+        self.assertEqual(
+            [(row["slot_type__name"], row["occupied_slots"]) for row in breakdown["by_slot_type"]],
+            [("Simple", 1), ("Large", 0)],
+        )
+
+    def test_reconcile_reports_and_fixes_drift(self):
+        Movement.objects.create(contract=self.contract, entry_time=timezone.now())
+        OccupancyCounter.objects.filter(slot_type=self.simple).update(occupied_slots=5)
+
+        out = StringIO()
+        call_command("reconcile_occupancy", "--dry-run", stdout=out)
+        self.assertIn("counted 5, actual 1", out.getvalue())
+        self.assertEqual(self._occupied(self.simple), 5)
+
+        call_command("reconcile_occupancy", stdout=StringIO())
+        self.assertEqual(self._occupied(self.simple), 1)
+
+    def test_display_board_shows_free_slots_per_area(self):
+        Movement.objects.create(contract=self.contract, entry_time=timezone.now())
+
+        response = self.client.get(reverse("parking:occupancy_board"))
+
+        self.assertEqual(response.json(), {"areas": [{"area": "Main", "total_slots": 3, "free_slots": 2}]})
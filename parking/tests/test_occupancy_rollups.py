@@ -0,0 +1,102 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from customers.models import Customer
+from vehicles.models import Vehicle
+from parking.data import OccupancyRollupRepository
+from parking.models import ParkingArea, SlotType, ParkingSlot, OccupancyRollup, RollupHighWaterMark
+from parking.rollups import OccupancyRollupCompactor, floor_hour, next_day_start
+from parking.services import SlotService
+from contracts.models import Movement, OccasionalTicket, OccupancyInterval, RegularContract
+
+
+class OccupancyRollupTests(TestCase):
+    def setUp(self):
+        self.area = ParkingArea.objects.create(name="Main", description="")
+        self.simple = SlotType.objects.create(code="SIMPLE", name="Simple", size_rank=1)
+        season_slot = ParkingSlot.objects.create(area=self.area, number="S1", slot_type=self.simple)
+        self.occasional_slot = ParkingSlot.objects.create(area=self.area, number="S2", slot_type=self.simple)
+
+        customer = Customer.objects.create_user(username="rolf", password="dummy")
+        self.contract = RegularContract.objects.create(
+            vehicle=Vehicle.objects.create(owner=customer, license_plate="RO-LL-01"),
+            customer=customer,
+            valid_from=timezone.now() - timedelta(days=10),
+            valid_to=timezone.now() + timedelta(days=10),
+            reserved_slot=season_slot,
+            price=Decimal("100.00"),
+        )
+        # Hour 0: season car 0:15-1:45, occasional car from 0:30 (still parked).
+        self.base = floor_hour(timezone.now()) - timedelta(hours=5)
+        Movement.objects.create(
+            contract=self.contract,
+            entry_time=self.base + timedelta(minutes=15),
+            exit_time=self.base + timedelta(minutes=105),
+        )
+        OccasionalTicket.objects.create(
+            license_plate="RO-LL-02",
+            slot=self.occasional_slot,
+            entry_time=self.base + timedelta(minutes=30),
+        )
+        self.compactor = OccupancyRollupCompactor()
+
+    def _hours(self):
+        return list(
+            OccupancyRollup.objects.filter(granularity=OccupancyRollup.Granularity.HOUR)
+            .order_by("bucket_start")
+            .values_list("peak_occupied", "avg_occupied", "entries", "exits", "parked_minutes")
+        )
+
+    def test_compaction_sweeps_the_ledger_per_hour(self):
+        self.assertEqual(self.compactor.compact(until=self.base + timedelta(hours=3)), 3)
+
+        self.assertEqual(self._hours(), [
+            (2, 1.25, 2, 0, 75.0),
+            (2, 1.75, 0, 1, 105.0),
+            (1, 1.0, 0, 0, 60.0),
+        ])
+        self.assertEqual(OccupancyRollupRepository().get_high_water(), self.base + timedelta(hours=3))
+
+    def test_compaction_resumes_from_the_high_water_mark(self):
+        self.compactor.compact(until=self.base + timedelta(hours=2))
+
+        self.assertEqual(self.compactor.compact(until=self.base + timedelta(hours=2)), 0)
+        self.assertEqual(self.compactor.compact(until=self.base + timedelta(hours=4)), 2)
+        self.assertEqual(len(self._hours()), 4)
+
+        # Rebuilding replaces rows instead of duplicating them.
+        call_command("compact_occupancy", "--since", self.base.isoformat(), stdout=StringIO())
+        self.assertEqual(len(self._hours()), 5)
+
+    def test_completed_days_are_rolled_up(self):
+        day_end = next_day_start(self.base)
+        self.compactor.compact(until=day_end)
+
+        day = OccupancyRollup.objects.get(granularity=OccupancyRollup.Granularity.DAY)
+        self.assertEqual((day.peak_occupied, day.entries, day.exits), (2, 2, 1))
+        self.assertAlmostEqual(day.parked_minutes, sum(row[4] for row in self._hours()))
+
+    def test_history_reads_rollups_and_sweeps_only_the_rest(self):
+        service = SlotService()
+        period = (self.base, timezone.now())
+        live = service.get_occupancy_history(period)
+
+        self.compactor.compact(until=self.base + timedelta(hours=2))
+        # Rewriting the compacted past in the ledger shows which hours come from the rollups.
+        OccupancyInterval.objects.filter(movement__isnull=False).update(end_time=self.base + timedelta(minutes=45))
+        history = service.get_occupancy_history(period)
+
+        self.assertEqual(history, live)
+        self.assertEqual([hour["entries"] for hour in history], [2, 0, 0, 0, 0, 0])
+        uncompacted = SlotService(
+            rollup_repo=OccupancyRollupRepository(high_water_queryset=RollupHighWaterMark.objects.none())
+        )
+        self.assertNotEqual(uncompacted.get_occupancy_history(period)[1], history[1])
+
+        days = service.get_occupancy_history(period, granularity=OccupancyRollup.Granularity.DAY)
+        self.assertEqual(sum(day["entries"] for day in days), 2)
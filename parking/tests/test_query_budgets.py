@@ -0,0 +1,162 @@
+import time
+from datetime import timedelta
+from io import StringIO
+from decimal import Decimal
+from types import SimpleNamespace
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from core.testing import Budget, BudgetExceeded, public_methods, query_budget, with_budgets
+from customers.models import Customer
+from vehicles.models import Vehicle
+from parking.availability import get_availability_calendar, get_slot_interval_index
+from parking.compatibility import get_compatibility_matrix
+from parking.models import ParkingArea, SlotType, ParkingSlot, OccupancyRollup
+from parking.services import PaymentService, PricingService, SlotService
+from parking.stats_cache import get_stats_cache
+from contracts.models import Movement, OccasionalTicket, RegularContract
+
+# Budgets per call; the fixture has several areas, slots and movements, so
+# a query per row (N+1) exceeds them. Milliseconds catch gross regressions.
+SLOT_SERVICE_BUDGETS = {
+    "find_available_slots": Budget(queries=1, ms=50),
+    "choose_slot": Budget(queries=1, ms=50),
+    "verify_slot_available": Budget(queries=4, ms=50),
+    "get_current_occupancy": Budget(queries=2, ms=50),
+    "get_occupancy_breakdown": Budget(queries=2, ms=50),
+    "get_usage_summary": Budget(queries=1, ms=100),
+    "get_occupancy_history": Budget(queries=5, ms=200),
+    "get_dwell_time_percentiles": Budget(queries=5, ms=200),
+}
+PRICING_SERVICE_BUDGETS = {
+    "get_season_price": Budget(queries=1, ms=20),
+    "get_occasional_price": Budget(queries=1, ms=20),
+    "get_single_use_price": Budget(queries=0, ms=5),
+}
+PAYMENT_SERVICE_BUDGETS = {
+    "process_payment": Budget(queries=0, ms=5),
+}
+VIEW_BUDGETS = {
+    # session + user, then the figures
+    "parking:stats_overview": Budget(queries=2 + 9, ms=500),
+    "parking:occupancy_board": Budget(queries=2, ms=50),
+}
+
+
+class QueryBudgetTests(SimpleTestCase):
+    databases = {"default"}
+
+    def test_report_lists_duplicated_sql(self):
+        with self.assertRaises(BudgetExceeded) as failure:
+            with query_budget(queries=2, label="N+1"):
+                for pk in range(3):
+                    list(ParkingSlot.objects.filter(pk=pk))
+
+        report = str(failure.exception)
+        self.assertIn("N+1 exceeded its budget: 3 queries, budget 2.", report)
+        self.assertIn("Duplicated SQL:\n  3x SELECT", report)
+
+    def test_time_budgets_are_checked_only_when_scaled(self):
+        with query_budget(ms=0.001, label="Sleep"):
+            time.sleep(0.01)
+
+        with override_settings(TEST_TIME_BUDGET_SCALE=1):
+            with self.assertRaises(BudgetExceeded) as failure:
+                with query_budget(ms=0.001, label="Sleep"):
+                    time.sleep(0.01)
+        self.assertIn("Sleep exceeded its budget:", str(failure.exception))
+
+    def test_proxy_checks_declared_methods_only(self):
+        service = with_budgets(PaymentService(), {"process_payment": Budget(queries=0)})
+        self.assertTrue(service.process_payment(None, Decimal("1.00")))
+        with self.assertRaises(ValueError):
+            with_budgets(PaymentService(), {"refund": Budget(queries=0)})
+
+    def test_every_entry_point_has_a_budget(self):
+        self.assertEqual(public_methods(SlotService), set(SLOT_SERVICE_BUDGETS))
+        self.assertEqual(public_methods(PricingService), set(PRICING_SERVICE_BUDGETS))
+        self.assertEqual(public_methods(PaymentService), set(PAYMENT_SERVICE_BUDGETS))
+
+
+class ParkingServiceBudgetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        small = SlotType.objects.create(code="SIMPLE", name="Simple", size_rank=1)
+        large = SlotType.objects.create(code="OVERSIZE", name="Oversize", size_rank=3)
+        cls.areas = [ParkingArea.objects.create(name=f"Level {i}", description="") for i in range(3)]
+        cls.slots = [
+            ParkingSlot.objects.create(
+                area=cls.areas[i % 3], number=f"S{i}", slot_type=large if i % 4 == 0 else small, is_accessible=i == 5
+            )
+            for i in range(12)
+        ]
+        customer = Customer.objects.create_user(username="budget", password="dummy")
+        cls.vehicle = Vehicle.objects.create(owner=customer, license_plate="BU-DG-00")
+        now = timezone.now()
+        for i, slot in enumerate(cls.slots[:6]):
+            contract = RegularContract.objects.create(
+                vehicle=Vehicle.objects.create(owner=customer, license_plate=f"BU-DG-{i + 1:02d}"),
+                customer=customer,
+                valid_from=now - timedelta(days=10),
+                valid_to=now + timedelta(days=10),
+                reserved_slot=slot,
+                price=Decimal("100.00"),
+            )
+            for days_ago in (3, 2, 1):
+                Movement.objects.create(
+                    contract=contract,
+                    entry_time=now - timedelta(days=days_ago, hours=2),
+                    exit_time=now - timedelta(days=days_ago),
+                )
+            Movement.objects.create(contract=contract, entry_time=now - timedelta(hours=i + 1))
+        for i, slot in enumerate(cls.slots[6:]):
+            OccasionalTicket.objects.create(
+                license_plate=f"OC-{i}",
+                slot=slot,
+                entry_time=now - timedelta(hours=3),
+                exit_time=now - timedelta(hours=1),
+                is_closed=True,
+            )
+        call_command("compact_occupancy", stdout=StringIO())
+        call_command("compact_dwell_times", stdout=StringIO())
+
+    def setUp(self):
+        # Process-wide indexes are warm in production; build them outside the budgets.
+        for index in (get_compatibility_matrix(), get_slot_interval_index(), get_availability_calendar()):
+            index.invalidate()
+            index.rebuild()
+        self.slot_service = with_budgets(SlotService(), SLOT_SERVICE_BUDGETS)
+        self.pricing = with_budgets(PricingService(), PRICING_SERVICE_BUDGETS)
+        now = timezone.now()
+        self.next_month = (now + timedelta(days=30), now + timedelta(days=60))
+        self.last_week = (now - timedelta(days=7), now)
+
+    def test_slot_service(self):
+        self.assertEqual(len(self.slot_service.find_available_slots(self.vehicle, self.next_month)), 11)
+        self.assertIsNotNone(self.slot_service.choose_slot(self.vehicle, self.next_month))
+        self.assertTrue(self.slot_service.verify_slot_available(self.slots[0].pk, self.next_month)["is_available"])
+        self.assertEqual(self.slot_service.get_current_occupancy()["occupied_slots"], 6)
+        self.slot_service.get_current_occupancy(at=timezone.now() - timedelta(days=1, hours=1))
+        self.assertEqual(len(self.slot_service.get_occupancy_breakdown()["by_area"]), 3)
+        self.assertEqual(len(self.slot_service.get_usage_summary(self.last_week)["by_area"]), 3)
+        self.slot_service.get_occupancy_history(self.last_week)
+        self.slot_service.get_occupancy_history(self.last_week, granularity=OccupancyRollup.Granularity.DAY)
+        self.assertEqual(self.slot_service.get_dwell_time_percentiles(self.last_week)["overall"]["count"], 24)
+
+    def test_pricing_and_payment(self):
+        self.assertEqual(self.pricing.get_season_price(self.slots[0].pk, self.next_month), 160.0)
+        self.assertEqual(self.pricing.get_occasional_price(self.slots[1].pk, 90), 4.5)
+        slot_type = SimpleNamespace(hourly_rate=Decimal("2.00"))
+        self.assertEqual(self.pricing.get_single_use_price(slot_type, timedelta(minutes=61)), Decimal("4.00"))
+        payment = with_budgets(PaymentService(), PAYMENT_SERVICE_BUDGETS)
+        self.assertTrue(payment.process_payment(None, Decimal("4.00")))
+
+    def test_views(self):
+        self.client.force_login(Customer.objects.create_user(username="staff", password="dummy", is_staff=True))
+        get_stats_cache().clear()
+        for name, budget in VIEW_BUDGETS.items():
+            with query_budget(budget.queries, budget.ms, label=name):
+                self.assertEqual(self.client.get(reverse(name)).status_code, 200)
@@ -0,0 +1,108 @@
+import threading
+import time
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from customers.models import Customer
+from parking.stats_cache import StaleWhileRevalidateCache, get_stats_cache
+
+
+class StaleWhileRevalidateCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.refreshes = []
+        self.calls = 0
+
+    def _compute(self):
+        self.calls += 1
+        return self.calls
+
+    def _cache(self, ttl_seconds=60, max_stale_seconds=600):
+        return StaleWhileRevalidateCache(
+            ttl_seconds=ttl_seconds,
+            max_stale_seconds=max_stale_seconds,
+            run_in_background=self.refreshes.append,
+        )
+
+    def test_fresh_value_is_reused(self):
+        cache = self._cache()
+
+        self.assertEqual(cache.get("k", self._compute).value, 1)
+        result = cache.get("k", self._compute)
+
+        self.assertEqual((result.value, result.is_stale), (1, False))
+        self.assertEqual(self.calls, 1)
+
+    def test_stale_value_is_served_while_one_refresh_runs(self):
+        cache = self._cache(ttl_seconds=0)
+        cache.get("k", self._compute)
+
+        with mock.patch("parking.stats_cache.time.monotonic", return_value=time.monotonic() + 5):
+            first = cache.get("k", self._compute)
+            second = cache.get("k", self._compute)
+
+        self.assertEqual((first.value, first.is_stale, second.value), (1, True, 1))
+        self.assertGreaterEqual(first.age_seconds, 5)
+        self.assertEqual(len(self.refreshes), 1)
+
+        self.refreshes[0]()
+        self.assertEqual(cache.get("k", self._compute).value, 2)
+
+    def test_failed_refresh_keeps_the_stale_value(self):
+        cache = self._cache(ttl_seconds=0)
+        cache.get("k", self._compute)
+
+        def broken():
+            raise RuntimeError("database is down")
+
+        with mock.patch("parking.stats_cache.time.monotonic", return_value=time.monotonic() + 5):
+            with self.assertLogs("parking.stats_cache", level="ERROR"):
+                cache.get("k", broken)
+                self.refreshes[0]()
+            self.assertEqual(cache.get("k", self._compute).value, 1)
+        self.assertEqual(len(self.refreshes), 2)
+
+    def test_concurrent_misses_compute_once(self):
+        cache = self._cache()
+        started = threading.Event()
+        release = threading.Event()
+
+        def slow():
+            started.set()
+            release.wait(5)
+            return self._compute()
+
+        results = []
+        leader = threading.Thread(target=lambda: results.append(cache.get("k", slow).value))
+        leader.start()
+        started.wait(5)
+        followers = [
+            threading.Thread(target=lambda: results.append(cache.get("k", slow).value)) for _ in range(8)
+        ]
+        for thread in followers:
+            thread.start()
+        time.sleep(0.05)
+        release.set()
+        for thread in [leader, *followers]:
+            thread.join(5)
+
+        self.assertEqual(results, [1] * 9)
+        self.assertEqual(self.calls, 1)
+
+
+class CachedStatsPageTests(TestCase):
+    def setUp(self):
+        self.client.force_login(Customer.objects.create_user(username="stella", password="dummy", is_staff=True))
+        get_stats_cache().clear()
+
+    def test_repeated_requests_reuse_the_figures(self):
+        first = self.client.get(reverse("parking:stats_overview"))
+        # Session and user only: the figures come from the cache.
+        with self.assertNumQueries(2):
+            second = self.client.get(reverse("parking:stats_overview"))
+
+        self.assertEqual(first["Age"], "0")
+        self.assertIn(second["Age"], ("0", "1"))
+        self.assertEqual(second.context["now"], first.context["now"])
+        self.assertFalse(second.context["cache_is_stale"])
@@ -0,0 +1,89 @@
+import json
+from io import StringIO
+
+from django.core.management import call_command
+from django.db.models import Count
+from django.test import TestCase
+
+from contracts.models import Movement, OccasionalTicket, OccupancyInterval, OpenMovement, RegularContract
+from customers.models import Customer
+from parking.data import OccupancyCounterRepository
+from parking.models import FreeSlot, ParkingSlot
+from parking.synthetic import GarageGenerator, GarageSpec, bulk_create_inherited, rebuild_derived_state
+from vehicles.models import Vehicle
+from vehicles.plate_filter import get_registered_plate_filter
+
+SMALL = dict(areas=3, slots=60, customers=20, vehicles=50, contracts=90, movements=600, tickets=300, batch_size=100)
+
+
+class SyntheticGarageTests(TestCase):
+    def test_bulk_create_inherited(self):
+        customers = bulk_create_inherited(
+            Customer, [Customer(username=f"bulk-{i}", ssn=str(i)) for i in range(3)], batch_size=2
+        )
+
+        self.assertEqual(
+            sorted(Customer.objects.values_list("username", "ssn")),
+            [("bulk-0", "0"), ("bulk-1", "1"), ("bulk-2", "2")],
+        )
+        self.assertEqual(Customer.objects.get(username="bulk-1").pk, customers[1].pk)
+
+    def test_generated_garage_is_consistent(self):
+        counts = GarageGenerator(GarageSpec(**SMALL)).generate()
+        rebuild_derived_state()
+
+        self.assertEqual(counts["slots"], ParkingSlot.objects.count())
+        self.assertEqual(counts["contracts"], RegularContract.objects.count())
+        self.assertEqual(Customer.objects.count(), 20)
+        self.assertEqual(Vehicle.objects.count(), 50)
+        # Within +-5% of the requested history.
+        self.assertAlmostEqual(Movement.objects.count(), 600, delta=30)
+        self.assertAlmostEqual(OccasionalTicket.objects.count(), 300, delta=15)
+
+        # The ledger and the projection were written alongside; counters and pool rebuilt.
+        self.assertEqual(OccupancyInterval.objects.count(), counts["movements"] + counts["tickets"])
+        self.assertEqual(OpenMovement.objects.count(), Movement.objects.filter(exit_time__isnull=True).count())
+        self.assertGreater(counts["open_movements"], 0)
+        self.assertEqual(OccupancyCounterRepository().reconcile(dry_run=True), [])
+        self.assertEqual(
+            FreeSlot.objects.count(),
+            ParkingSlot.objects.filter(contracts__isnull=True).count() - counts["open_tickets"],
+        )
+        self.assertTrue(get_registered_plate_filter().might_contain(Vehicle.objects.first().license_plate))
+
+        # One contract per slot and term; vehicles fit their slots and hold one contract per term.
+        self.assertFalse(
+            RegularContract.objects.values("reserved_slot", "valid_from").annotate(n=Count("pk")).filter(n__gt=1)
+        )
+        self.assertFalse(
+            RegularContract.objects.values("vehicle", "valid_from").annotate(n=Count("pk")).filter(n__gt=1)
+        )
+        for contract in RegularContract.objects.select_related("vehicle", "reserved_slot")[:20]:
+            self.assertTrue(contract.reserved_slot.is_compatible_with(contract.vehicle))
+
+    def test_commands_report_json(self):
+        out = StringIO()
+        call_command("generate_garage", *self._small_options(), "--json", stdout=out)
+        self.assertEqual(json.loads(out.getvalue())["rows"]["slots"], 60)
+
+        out = StringIO()
+        call_command(
+            "bench_suite", "--samples", "5", "--view-samples", "2",
+            "--only", "find_available_slots,season_entry,season_exit,occasional_entry,stats_compute",
+            "--json", stdout=out,
+        )
+        results = json.loads(out.getvalue())
+
+        self.assertEqual(results["dataset"]["slots"], 60)
+        benchmarks = results["benchmarks"]
+        self.assertEqual(list(benchmarks)[:3], ["find_available_slots", "season_entry", "season_exit"])
+        self.assertEqual(benchmarks["season_entry"]["ok"], 5)
+        self.assertEqual(benchmarks["season_exit"]["ok"], 5)
+        self.assertEqual(benchmarks["season_entry"]["count"], 4)  # the first, cold call is apart
+        self.assertIn("queries_per_op", benchmarks["occasional_entry"])
+        # Everything the suite wrote was rolled back.
+        self.assertEqual(OccasionalTicket.objects.filter(license_plate__startswith="BENCH-").count(), 0)
+
+    @staticmethod
+    def _small_options():
+        return [f"--{name.replace('_', '-')}={value}" for name, value in SMALL.items()]
@@ -0,0 +1,86 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from customers.models import Customer
+from vehicles.models import Vehicle
+from parking.models import ParkingArea, SlotType, ParkingSlot
+from parking.services import SlotService
+from parking.stats_cache import get_stats_cache
+from contracts.models import Movement, RegularContract
+
+
+class UsageSummaryTests(TestCase):
+    def setUp(self):
+        self.customer = Customer.objects.create_user(username="uma", password="dummy", is_staff=True)
+        self.now = timezone.now()
+        main = ParkingArea.objects.create(name="Main", description="")
+        annex = ParkingArea.objects.create(name="Annex", description="")
+        simple = SlotType.objects.create(code="SIMPLE", name="Simple", size_rank=1)
+        large = SlotType.objects.create(code="LARGE", name="Large", size_rank=2)
+        self.main = main
+
+        self.contracts = [
+            self._contract(ParkingSlot.objects.create(area=area, number=number, slot_type=slot_type), number)
+            for area, number, slot_type in [(main, "M1", simple), (main, "M2", large), (annex, "A1", simple)]
+        ]
+
+    def _contract(self, slot, plate):
+        return RegularContract.objects.create(
+            vehicle=Vehicle.objects.create(owner=self.customer, license_plate=f"US-{plate}"),
+            customer=self.customer,
+            valid_from=self.now - timedelta(days=10),
+            valid_to=self.now + timedelta(days=10),
+            reserved_slot=slot,
+            price=Decimal("100.00"),
+        )
+
+    def _movement(self, contract, hours_ago, duration):
+        entry = self.now - timedelta(hours=hours_ago)
+        return Movement.objects.create(contract=contract, entry_time=entry, exit_time=entry + duration)
+
+    def test_summary_matches_per_movement_whole_minutes(self):
+        movements = [
+            self._movement(self.contracts[0], 5, timedelta(minutes=90, seconds=59, microseconds=999999)),
+            self._movement(self.contracts[0], 3, timedelta(seconds=59)),
+            self._movement(self.contracts[1], 2, timedelta(minutes=61)),
+            self._movement(self.contracts[2], 4, timedelta(hours=2, seconds=30)),
+        ]
+        self._movement(self.contracts[2], 48, timedelta(hours=1))  # outside the period
+        Movement.objects.create(contract=self.contracts[1], entry_time=self.now)  # still open
+
+        with self.assertNumQueries(1):
+            summary = SlotService().get_usage_summary((self.now - timedelta(hours=24), self.now))
+
+        self.assertEqual(summary["total_movements"], 4)
+        self.assertEqual(summary["total_parked_minutes"], sum(m.duration_minutes() for m in movements))
+        self.assertEqual(
+            [(row["name"], row["movements"], row["parked_minutes"]) for row in summary["by_area"]],
+            [("Annex", 1, 120), ("Main", 3, 151)],
+        )
+        self.assertEqual(
+            [(row["name"], row["movements"], row["parked_minutes"]) for row in summary["by_slot_type"]],
+            [("Large", 1, 61), ("Simple", 3, 210)],
+        )
+
+    def test_summary_for_one_area(self):
+        self._movement(self.contracts[0], 2, timedelta(minutes=30))
+        self._movement(self.contracts[2], 2, timedelta(minutes=45))
+
+        summary = SlotService().get_usage_summary((self.now - timedelta(hours=24), self.now), area=self.main)
+
+        self.assertEqual(summary["total_movements"], 1)
+        self.assertEqual(summary["total_parked_minutes"], 30)
+
+    def test_stats_page_shows_breakdowns(self):
+        self._movement(self.contracts[2], 2, timedelta(minutes=45))
+        self.client.force_login(self.customer)
+        get_stats_cache().clear()
+
+        response = self.client.get(reverse("parking:stats_overview"))
+
+        self.assertContains(response, "Annex")
+        self.assertEqual(response.context["summary"]["total_parked_minutes"], 45)
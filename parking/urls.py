@@ -6,4 +6,6 @@ app_name = "parking"
 
 urlpatterns = [
     path("stats/", views.stats_overview, name="stats_overview"),
+    path("occupancy-board/", views.occupancy_board, name="occupancy_board"),
+    path("areas/<int:area_id>/occupancy-stream/", views.occupancy_stream, name="occupancy_stream"),
 ]
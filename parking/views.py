@@ -1,28 +1,131 @@
+import json
+
+from django.conf import settings
 from django.contrib.admin.views.decorators import staff_member_required
-from django.shortcuts import render
+from django.db import connection
+from django.http import JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404, render
+from django.views.decorators.http import require_GET
 from django.utils import timezone
 
+from parking.live import get_occupancy_broker
+from parking.models import OccupancyRollup, ParkingArea
 from parking.services import SlotService
+from parking.stats_cache import get_stats_cache
 
 
-@staff_member_required
-def stats_overview(request):
-    """
-    Simple admin statistics dashboard:
-    - current occupancy snapshot
-    - last 24h usage summary
-    """
+def _compute_stats():
     service = SlotService()
 
     now = timezone.now()
-    occupancy = service.get_current_occupancy(at=now)
+    occupancy = service.get_current_occupancy()
+    breakdown = service.get_occupancy_breakdown()
     summary = service.get_usage_summary(
         period=(now - timezone.timedelta(hours=24), now)
     )
 
-    context = {
+    history = service.get_occupancy_history(
+        period=(now - timezone.timedelta(days=7), now),
+        granularity=OccupancyRollup.Granularity.DAY,
+    )
+
+    return {
         "now": now,
         "occupancy": occupancy,
+        "breakdown": breakdown,
         "summary": summary,
+        "history": history,
+    }
+
+
+@staff_member_required
+def stats_overview(request):
+    """
+    Simple admin statistics dashboard:
+    - current occupancy snapshot
+    - last 24h usage summary
+    - last 7 days, per day (from the occupancy rollups)
+
+    The figures come from the stats cache (stale-while-revalidate, see
+    parking.stats_cache); their age is shown on the page and sent in the
+    Age header.
+    """
+    cached = get_stats_cache().get("stats_overview", _compute_stats)
+
+    context = {
+        **cached.value,
+        "cache_age": int(cached.age_seconds),
+        "cache_is_stale": cached.is_stale,
     }
-    return render(request, "parking/stats_overview.html", context)
+    response = render(request, "parking/stats_overview.html", context)
+    response["Age"] = str(int(cached.age_seconds))
+    return response
+
+
+@require_GET
+def occupancy_board(request):
+    """
+    Free slots per area for the display boards at the entrances.
+    Read from the occupancy counters (constant time, no login).
+    """
+    areas = SlotService().get_occupancy_breakdown()["by_area"]
+    return JsonResponse(
+        {
+            "areas": [
+                {
+                    "area": row["area__name"],
+                    "total_slots": row["total_slots"],
+                    "free_slots": max(row["total_slots"] - row["occupied_slots"], 0),
+                }
+                for row in areas
+            ],
+        }
+    )
+
+
+def _release_connection():
+    """
+    Closes the request's database connection; the next query opens a new
+    one. Inside a transaction (ATOMIC_REQUESTS, tests) it has to stay open.
+    """
+    if not connection.in_atomic_block:
+        connection.close()
+
+
+@require_GET
+def occupancy_stream(request, area_id):
+    """
+    Server-Sent Events stream of the free slots of one area, for the LED
+    boards at its entrances: a "snapshot" event on connect, then one
+    "delta" event per entry / exit (see parking.live). Keep-alive
+    comments every LIVE_OCCUPANCY_KEEPALIVE seconds keep proxies from
+    closing the idle connection.
+
+    The stream holds no database connection: it is closed before the
+    response is returned, and each periodic resync uses a short-lived one.
+    """
+    area = get_object_or_404(ParkingArea, pk=area_id)
+    broker = get_occupancy_broker()
+    keepalive = getattr(settings, "LIVE_OCCUPANCY_KEEPALIVE", 15)
+    subscription = broker.subscribe(area.pk)
+
+    def events():
+        try:
+            yield "retry: 5000\n\n"
+            while not subscription.closed:
+                event = subscription.get(timeout=keepalive)
+                if event is None:
+                    broker.resync(area.pk)
+                    _release_connection()
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"id: {event['seq']}\nevent: {event['type']}\ndata: {json.dumps(event)}\n\n"
+        finally:
+            broker.unsubscribe(subscription)
+
+    _release_connection()
+    response = StreamingHttpResponse(events(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    # Stop nginx from buffering the stream.
+    response["X-Accel-Buffering"] = "no"
+    return response
@@ -47,6 +47,7 @@ INSTALLED_APPS = [
 
 # Middleware classes used in request-response processing
 MIDDLEWARE = [
+    "core.middleware.RequestMetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -95,10 +96,25 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
+        # Parallel entry gates claim free slots concurrently: take SQLite's
+        # write lock at BEGIN and wait for it instead of failing with
+        # "database is locked" on lock upgrade (see parking.data.FreeSlotPool).
+        "OPTIONS": {
+            "transaction_mode": "IMMEDIATE",
+            "timeout": 20,
+        },
     }
 }
 
 
+# Slow-query log (see core.querylog): statements taking at least
+# SLOW_QUERY_THRESHOLD_MS (None: off) are logged with their call site to
+# SLOW_QUERY_LOG_PATH, rotated at 5 MB with three old files kept.
+SLOW_QUERY_THRESHOLD_MS = 100
+SLOW_QUERY_LOG_PATH = BASE_DIR / "slow_queries.log"
+# Where explain_hot_queries stores the plans of the hot queries.
+HOT_QUERY_PLANS_PATH = BASE_DIR / "hot_query_plans.json"
+
 LOGGING = {
     "version": 1,
     "disable_existing_loggers": False,
@@ -116,6 +132,14 @@ LOGGING = {
             "class": "logging.StreamHandler",
             "formatter": "verbose",
         },
+        "slow-queries": {
+            "class": "logging.handlers.RotatingFileHandler",
+            "filename": SLOW_QUERY_LOG_PATH,
+            "maxBytes": 5 * 1024 * 1024,
+            "backupCount": 3,
+            "delay": True,  # no file until the first slow query
+            "formatter": "verbose",
+        },
         # Add other handlers as needed for your project
     },
     "loggers": {
@@ -123,6 +147,11 @@ LOGGING = {
             "handlers": ["console"],
             "level": "INFO",
         },
+        "core.slow_queries": {
+            "handlers": ["slow-queries"],
+            "level": "WARNING",
+            "propagate": False,
+        },
         # Add other app loggers as needed
     },
 }
@@ -197,3 +226,63 @@ CUSTOMER_MODEL = "customers.CustomerBase"
 VEHICLE_MODEL = "vehicles.Vehicle"
 
 SESSION_SERIALIZER = "django.contrib.sessions.serializers.JSONSerializer"
+
+# How concurrent entry gates claim free slots for occasional parking:
+# "auto", "skip_locked" or "optimistic" (see parking.data.FreeSlotPool).
+FREE_SLOT_CLAIM_MODE = "auto"
+
+# Slot allocation strategy: "best_fit", "first_fit" or a dotted path to an
+# ISlotAllocator implementation (see parking.allocation).
+SLOT_ALLOCATOR = "best_fit"
+
+# Process-local plate -> active season contract cache used at the gates
+# (see contracts.cache).
+PLATE_CACHE_TTL = 300
+PLATE_CACHE_MAX_ENTRIES = 10000
+
+# Bloom filter of registered plates used to reject unknown plates at the
+# gates without a query (see vehicles.plate_filter).
+PLATE_FILTER_MAX_AGE = 60
+PLATE_FILTER_ERROR_RATE = 0.01
+PLATE_FILTER_PATH = None
+
+# Maximum number of events per request on the gate-device JSON API
+# (see contracts.gate_api).
+GATE_API_MAX_BATCH = 100
+
+# Relative accuracy of the daily dwell-time percentile sketches
+# (see parking.analytics.DwellTimeAnalytics).
+DWELL_TIME_SKETCH_ACCURACY = 0.01
+
+# Statistics dashboard cache (see parking.stats_cache): results younger
+# than STATS_CACHE_TTL seconds are served as they are, older ones up to
+# STATS_CACHE_MAX_STALE seconds are served while they are refreshed.
+STATS_CACHE_TTL = 30
+STATS_CACHE_MAX_STALE = 300
+
+# Live free-slot streams for the display boards (see parking.live):
+# keep-alive interval and counter re-read interval in seconds, and the
+# events a slow client may fall behind before it skips ahead.
+LIVE_OCCUPANCY_KEEPALIVE = 15
+LIVE_OCCUPANCY_RESYNC = 60
+LIVE_OCCUPANCY_MAX_PENDING = 100
+
+# Per-view request metrics (see core.metrics), served at /metrics to
+# staff: with several worker processes, point REQUEST_METRICS_DIR to a
+# directory they share; each worker writes its figures there every
+# REQUEST_METRICS_FLUSH_SECONDS and the endpoint merges them.
+REQUEST_METRICS_DIR = None
+REQUEST_METRICS_FLUSH_SECONDS = 5
+
+# Tracing of the gate and ticket flows (see core.tracing): the last
+# TRACING_BUFFER_SIZE traces are kept for the staff waterfall at
+# /traces and, with TRACING_EXPORT_PATH set, appended to that file as
+# JSON lines. Off by default; spans are no-ops then.
+TRACING_ENABLED = False
+TRACING_BUFFER_SIZE = 200
+TRACING_EXPORT_PATH = None
+
+# Factor applied to the millisecond budgets of the query-budget tests
+# (see core.testing). 0 (default) checks query counts only: timings vary
+# with the machine and are left to the bench_* commands.
+TEST_TIME_BUDGET_SCALE = 0
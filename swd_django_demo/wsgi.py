@@ -26,3 +26,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'swd_django_demo.settings')
 
 application = get_wsgi_application()
+
+# Load the in-memory availability structures once per worker process.
+from parking.availability import warm_up  # noqa: E402
+
+warm_up()
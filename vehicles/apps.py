@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class VehiclesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'vehicles'
+
+    def ready(self):
+        # Register the signal handlers (registered-plate filter).
+        from vehicles import signals  # noqa: F401
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+
+from vehicles.models import PlateRegistryVersion
+from vehicles.plate_filter import get_registered_plate_filter
+
+
+class Command(BaseCommand):
+    """
+    Rebuilds the registered-plate Bloom filter from Vehicle.license_plate.
+
+    With PLATE_FILTER_PATH set, the filter is also written to that file;
+    gate processes load the snapshot instead of scanning the vehicle table.
+    Run it from cron more often than PLATE_FILTER_MAX_AGE, or after bulk
+    imports of vehicles (bulk_create does not send post_save): it also
+    bumps PlateRegistryVersion, so other processes stop rejecting plates
+    their filters do not know.
+    """
+
+    help = "Rebuild the Bloom filter of registered license plates."
+
+    def handle(self, *args, **options):
+        PlateRegistryVersion.bump()
+        plate_filter = get_registered_plate_filter()
+        bloom = plate_filter.rebuild()
+
+        stats = plate_filter.stats()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Plate filter rebuilt: {stats['plates']} plates, {stats['bits']} bits, "
+                f"{stats['hashes']} hashes, estimated false positive rate "
+                f"{stats['estimated_error_rate']:.4%}."
+            )
+        )
+
+        if plate_filter.snapshot_path:
+            plate_filter.write_snapshot(bloom)
+            self.stdout.write(f"Snapshot written to {plate_filter.snapshot_path}.")
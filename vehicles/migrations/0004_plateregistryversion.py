@@ -0,0 +1,20 @@
+# Generated by Django 6.1.2 on 2026-10-18 01:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vehicles', '0003_remove_vehicle_is_oversize_vehicle_minimum_slot_type_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlateRegistryVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.BigIntegerField(default=0)),
+            ],
+        ),
+    ]
@@ -2,6 +2,7 @@
 import uuid
 from django.conf import settings
 from django.db import models
+from django.db.models import F
 from customers.models import Customer
 from parking.models import ParkingSlot
 
@@ -94,3 +95,29 @@ class Vehicle(models.Model):
         Representation for admin and logs.
         """
         return f"{self.license_plate} ({self.owner})"
+
+
+class PlateRegistryVersion(models.Model):
+    """
+    Single row counting changes to the registered plates (new vehicles,
+    changed plates), shared by all processes.
+
+    The in-memory plate filters (vehicles.plate_filter) remember the
+    version they were built at; a plate they do not know is only
+    rejected while the version has not moved.
+    """
+
+    ROW_ID = 1
+
+    version = models.BigIntegerField(default=0)
+
+    @classmethod
+    def current(cls) -> int:
+        version = cls.objects.filter(pk=cls.ROW_ID).values_list("version", flat=True).first()
+        return version or 0
+
+    @classmethod
+    def bump(cls):
+        if not cls.objects.filter(pk=cls.ROW_ID).update(version=F("version") + 1):
+            cls.objects.get_or_create(pk=cls.ROW_ID)
+            cls.objects.filter(pk=cls.ROW_ID).update(version=F("version") + 1)
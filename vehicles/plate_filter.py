@@ -0,0 +1,288 @@
+"""
+In-memory Bloom filter of registered license plates.
+
+Most unregistered plates at the gates (ANPR misreads, occasional
+visitors in the season lane) can be rejected without a database query:
+if the filter says "definitely not registered", there is no vehicle.
+A "maybe" still goes to the database (false positive rate
+PLATE_FILTER_ERROR_RATE, 1% by default).
+
+A Bloom filter has no false negatives for the plates it was given, but
+plates registered by *other* processes are not given to this one. So:
+
+- the filter remembers the PlateRegistryVersion it was built at (a
+  shared counter bumped with every registration or plate change, see
+  vehicles.signals); a plate it does not know is only rejected while
+  that version has not moved - one primary-key read instead of the
+  vehicle and contract lookups. Otherwise the answer is "maybe",
+- it is built from Vehicle.license_plate on first use and rebuilt after
+  PLATE_FILTER_MAX_AGE seconds, which brings its version up to date,
+- the Vehicle post_save signal adds plates registered in this process,
+- 'manage.py rebuild_plate_filter' rebuilds it and, when
+  PLATE_FILTER_PATH is set, writes a snapshot (with its version) that
+  processes load instead of scanning the vehicle table.
+
+Removed or renamed plates stay in the filter until the next rebuild
+(harmless: they are just false positives).
+"""
+
+import hashlib
+import logging
+import math
+import os
+import struct
+import threading
+import time
+
+from django.apps import apps
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ERROR_RATE = 0.01
+DEFAULT_MAX_AGE_SECONDS = 60
+MIN_CAPACITY = 1024
+# Plates added while a rebuild runs, replayed into the new filter; beyond
+# this many the version check alone keeps them from being rejected.
+MAX_RECENT_PLATES = 10_000
+
+_HEADER = struct.Struct(">QIQ")  # bit count, hash count, item count
+_SNAPSHOT_VERSION = struct.Struct(">Q")  # PlateRegistryVersion of a snapshot
+
+
+def normalize_plate(license_plate: str) -> str:
+    return license_plate.strip().upper()
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over strings (double hashing on blake2b).
+    """
+
+    def __init__(self, capacity: int, error_rate: float = DEFAULT_ERROR_RATE):
+        capacity = max(capacity, 1)
+        self.bit_count = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.bit_count / capacity * math.log(2)))
+        self._bits = bytearray((self.bit_count + 7) // 8)
+        self.item_count = 0
+
+    def _positions(self, value: str):
+        digest = hashlib.blake2b(value.encode("utf-8"), digest_size=16).digest()
+        h1, h2 = struct.unpack(">QQ", digest)
+        h2 |= 1  # odd step: visits distinct positions
+        for i in range(self.hash_count):
+            yield (h1 + i * h2) % self.bit_count
+
+    def add(self, value: str):
+        for position in self._positions(value):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.item_count += 1
+
+    def __contains__(self, value: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
+
+    def estimated_error_rate(self) -> float:
+        """
+        Expected false positive rate for the current number of items.
+        """
+        return (1 - math.exp(-self.hash_count * self.item_count / self.bit_count)) ** self.hash_count
+
+    def to_bytes(self) -> bytes:
+        return _HEADER.pack(self.bit_count, self.hash_count, self.item_count) + bytes(self._bits)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "BloomFilter":
+        bit_count, hash_count, item_count = _HEADER.unpack_from(data)
+        bloom = cls.__new__(cls)
+        bloom.bit_count = bit_count
+        bloom.hash_count = hash_count
+        bloom.item_count = item_count
+        bloom._bits = bytearray(data[_HEADER.size:])
+        if len(bloom._bits) != (bit_count + 7) // 8:
+            raise ValueError("Corrupt Bloom filter snapshot.")
+        return bloom
+
+
+class RegisteredPlateFilter:
+    """
+    Process-wide filter answering "may this plate be registered?".
+    """
+
+    def __init__(self, vehicle_repo=None, max_age_seconds=None, error_rate=None, snapshot_path=None):
+        self._vehicle_repo = vehicle_repo
+        if max_age_seconds is None:
+            max_age_seconds = getattr(settings, "PLATE_FILTER_MAX_AGE", DEFAULT_MAX_AGE_SECONDS)
+        if error_rate is None:
+            error_rate = getattr(settings, "PLATE_FILTER_ERROR_RATE", DEFAULT_ERROR_RATE)
+        if snapshot_path is None:
+            snapshot_path = getattr(settings, "PLATE_FILTER_PATH", None)
+        self._max_age_seconds = max_age_seconds
+        self._error_rate = error_rate
+        self._snapshot_path = snapshot_path
+
+        self._lock = threading.Lock()
+        self._bloom = None
+        self._version = None
+        self._loaded_at = None
+        # Plates added while a rebuild runs: replayed into the new filter
+        # so that a registration racing with the rebuild is kept.
+        self._rebuilds = 0
+        self._recent = []
+
+    @property
+    def snapshot_path(self):
+        return self._snapshot_path
+
+    def _repo(self):
+        if self._vehicle_repo is None:
+            self._vehicle_repo = apps.get_model(settings.VEHICLE_MODEL).objects
+        return self._vehicle_repo
+
+    @staticmethod
+    def _current_version() -> int:
+        return apps.get_model("vehicles", "PlateRegistryVersion").current()
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+    def rebuild(self) -> BloomFilter:
+        """
+        Builds the filter from all registered plates (two queries).
+        """
+        repo = self._repo()
+        with self._lock:
+            self._rebuilds += 1
+        try:
+            # Read before the plates: a registration in between only
+            # makes the version look newer than the filter is.
+            version = self._current_version()
+            bloom = BloomFilter(max(MIN_CAPACITY, 2 * repo.count()), self._error_rate)
+            for plate in repo.values_list("license_plate", flat=True).iterator(chunk_size=5000):
+                bloom.add(normalize_plate(plate))
+            self._install(bloom, version)
+        finally:
+            with self._lock:
+                self._rebuilds -= 1
+                if not self._rebuilds:
+                    self._recent = []
+        return bloom
+
+    def load_snapshot(self) -> bool:
+        """
+        Loads the snapshot written by rebuild_plate_filter if it is fresh.
+        """
+        path = self._snapshot_path
+        if not path or not os.path.exists(path):
+            return False
+        age = time.time() - os.path.getmtime(path)
+        if age > self._max_age_seconds:
+            return False
+        try:
+            with open(path, "rb") as snapshot:
+                data = snapshot.read()
+            (version,) = _SNAPSHOT_VERSION.unpack_from(data)
+            bloom = BloomFilter.from_bytes(data[_SNAPSHOT_VERSION.size:])
+        except (OSError, ValueError, struct.error):
+            logger.warning("Could not read plate filter snapshot %s", path, exc_info=True)
+            return False
+        # Expires when the snapshot does, not max_age after loading it.
+        self._install(bloom, version, loaded_at=time.monotonic() - max(age, 0))
+        return True
+
+    def write_snapshot(self, bloom: BloomFilter):
+        """
+        Writes the filter last built by rebuild() with its version.
+        """
+        with self._lock:
+            version = self._version or 0
+        path = self._snapshot_path
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as snapshot:
+            snapshot.write(_SNAPSHOT_VERSION.pack(version) + bloom.to_bytes())
+        os.replace(tmp_path, path)
+
+    def _install(self, bloom, version, loaded_at=None):
+        with self._lock:
+            for plate in self._recent:
+                bloom.add(plate)
+            self._recent = []
+            self._bloom = bloom
+            self._version = version
+            self._loaded_at = time.monotonic() if loaded_at is None else loaded_at
+
+    def invalidate(self):
+        with self._lock:
+            self._loaded_at = None
+
+    def _ensure_fresh(self):
+        with self._lock:
+            loaded_at = self._loaded_at
+        if loaded_at is None or time.monotonic() - loaded_at > self._max_age_seconds:
+            if not self.load_snapshot():
+                self.rebuild()
+
+    # ------------------------------------------------------------------
+    # Lookups / updates
+    # ------------------------------------------------------------------
+    def might_contain(self, license_plate: str) -> bool:
+        """
+        False means the plate is certainly not registered.
+        """
+        self._ensure_fresh()
+        plate = normalize_plate(license_plate)
+        with self._lock:
+            if plate in self._bloom:
+                return True
+            version = self._version
+        # Unknown here - but maybe registered by another process since.
+        return self._current_version() != version
+
+    def add(self, license_plate: str):
+        """
+        Adds a plate registered in this process.
+        """
+        plate = normalize_plate(license_plate)
+        with self._lock:
+            if self._rebuilds and len(self._recent) < MAX_RECENT_PLATES:
+                self._recent.append(plate)
+            if self._bloom is not None:
+                self._bloom.add(plate)
+
+    def stats(self) -> dict:
+        self._ensure_fresh()
+        with self._lock:
+            return {
+                "plates": self._bloom.item_count,
+                "bits": self._bloom.bit_count,
+                "hashes": self._bloom.hash_count,
+                "estimated_error_rate": self._bloom.estimated_error_rate(),
+            }
+
+
+class NullPlateFilter:
+    """
+    Filter that never rejects. Used when a service runs on injected
+    repositories, whose vehicles are unknown to the process filter.
+    """
+
+    def might_contain(self, license_plate: str) -> bool:
+        return True
+
+    def add(self, license_plate: str):
+        pass
+
+
+_plate_filter = None
+_filter_lock = threading.Lock()
+
+
+def get_registered_plate_filter() -> RegisteredPlateFilter:
+    """
+    Returns the process-wide registered-plate filter (loaded lazily).
+    """
+    global _plate_filter
+    if _plate_filter is None:
+        with _filter_lock:
+            if _plate_filter is None:
+                _plate_filter = RegisteredPlateFilter()
+    return _plate_filter
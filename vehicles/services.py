@@ -8,6 +8,7 @@ from django.db import models
 
 from customers.models import Customer
 from parking.models import SlotType
+from vehicles.plate_filter import NullPlateFilter, get_registered_plate_filter
 
 class VehicleService:
     """
@@ -23,18 +24,24 @@ class VehicleService:
     via settings.VEHICLE_MODEL.
     """
 
-    def __init__(self, vehicle_repo: Optional[models.Manager] = None) -> None:
+    def __init__(self, vehicle_repo: Optional[models.Manager] = None, plate_filter=None) -> None:
         """
         Constructor with an optional repository abstraction.
 
         By default, we use Vehicle.objects (Django ORM manager).
         In tests, we may inject a fake or mocked repository.
+
+        The registered-plate filter (vehicles.plate_filter) describes the
+        default database only, so an injected repository gets a filter
+        that never rejects.
         """
         if vehicle_repo is not None:
             self._vehicle_repo = vehicle_repo
+            self._plate_filter = plate_filter or NullPlateFilter()
         else:
             vehicle_model = apps.get_model(settings.VEHICLE_MODEL)
             self._vehicle_repo = vehicle_model.objects
+            self._plate_filter = plate_filter or get_registered_plate_filter()
 
     # --------------------------------------------------
     # Registration / CRUD
@@ -45,16 +52,18 @@ class VehicleService:
 
         This method:
           - normalizes the license plate (upper-cased),
-          - creates and persists the Vehicle entity.
+          - creates and persists the Vehicle entity (the post_save signal
+            adds the plate to the registered-plate filter).
         """
         normalized_plate = license_plate.strip().upper()
 
-        return self._vehicle_repo.create(
+        vehicle = self._vehicle_repo.create(
             owner=owner,
             license_plate=normalized_plate,
             minimum_slot_type=minimum_slot_type,
             has_disability_permit=has_disability_permit,
         )
+        return vehicle
 
     # --------------------------------------------------
     # Queries
@@ -66,9 +75,15 @@ class VehicleService:
         Returns:
           - Vehicle instance if found,
           - None otherwise.
+
+        Plates the registered-plate filter has never seen are rejected
+        without looking up the vehicle.
         """
         normalized_plate = license_plate.strip().upper()
 
+        if not self._plate_filter.might_contain(normalized_plate):
+            return None
+
         try:
             return self._vehicle_repo.get(license_plate=normalized_plate)
         except self._vehicle_repo.model.DoesNotExist:
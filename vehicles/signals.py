@@ -0,0 +1,22 @@
+"""
+Signal handlers keeping the registered-plate filters in sync with vehicle
+registrations (VehicleService, admin, data imports, ...).
+"""
+
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from vehicles.models import PlateRegistryVersion, Vehicle
+from vehicles.plate_filter import get_registered_plate_filter
+
+
+@receiver(post_save, sender=Vehicle)
+def add_plate_to_filter(sender, instance, created, update_fields=None, **kwargs):
+    """
+    New or renamed plates must never be rejected by a filter: this
+    process's filter learns the plate, the others see the version move.
+    """
+    if not created and update_fields is not None and "license_plate" not in update_fields:
+        return
+    get_registered_plate_filter().add(instance.license_plate)
+    PlateRegistryVersion.bump()
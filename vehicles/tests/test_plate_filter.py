@@ -0,0 +1,112 @@
+# vehicles/tests/test_plate_filter.py
+
+import os
+import tempfile
+import time
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+
+from customers.models import Customer
+from vehicles.models import Vehicle
+from vehicles.plate_filter import BloomFilter, RegisteredPlateFilter, get_registered_plate_filter
+from vehicles.services import VehicleService
+
+
+class BloomFilterTests(SimpleTestCase):
+    def test_no_false_negatives_and_few_false_positives(self):
+        bloom = BloomFilter(capacity=2000, error_rate=0.01)
+        plates = [f"AA-{i:04d}" for i in range(2000)]
+        for plate in plates:
+            bloom.add(plate)
+
+        self.assertTrue(all(plate in bloom for plate in plates))
+
+        false_positives = sum(f"ZZ-{i:04d}" in bloom for i in range(10000))
+        self.assertLess(false_positives, 300)  # ~1% expected
+
+    def test_snapshot_round_trip(self):
+        bloom = BloomFilter(capacity=100)
+        bloom.add("AB-12-CD")
+
+        restored = BloomFilter.from_bytes(bloom.to_bytes())
+
+        self.assertIn("AB-12-CD", restored)
+        self.assertEqual(restored.item_count, 1)
+        with self.assertRaises(ValueError):
+            BloomFilter.from_bytes(bloom.to_bytes()[:-1])
+
+
+class RegisteredPlateFilterTests(TestCase):
+    def setUp(self):
+        self.customer = Customer.objects.create(username="rita")
+        Vehicle.objects.create(owner=self.customer, license_plate="RI-00-TA")
+        get_registered_plate_filter().rebuild()
+        self.service = VehicleService()
+
+    def test_unknown_plate_is_rejected_after_the_version_check(self):
+        with self.assertNumQueries(1):
+            self.assertIsNone(self.service.get_by_plate("NO-00-NE"))
+
+        with self.assertNumQueries(1):
+            self.assertIsNotNone(self.service.get_by_plate("ri-00-ta"))
+
+    def test_register_vehicle_adds_plate_incrementally(self):
+        self.service.register_vehicle(self.customer, "ne-77-ew")
+
+        with self.assertNumQueries(1):
+            self.assertIsNotNone(self.service.get_by_plate("NE-77-EW"))
+
+    def test_rebuild_command_writes_snapshot(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "plates.bloom")
+            with patch(
+                "vehicles.management.commands.rebuild_plate_filter.get_registered_plate_filter",
+                return_value=RegisteredPlateFilter(snapshot_path=path),
+            ):
+                call_command("rebuild_plate_filter", stdout=StringIO())
+
+            loaded = RegisteredPlateFilter(snapshot_path=path)
+            self.assertTrue(loaded.load_snapshot())
+            with self.assertNumQueries(0):
+                self.assertTrue(loaded.might_contain("RI-00-TA"))
+            with self.assertNumQueries(1):
+                self.assertFalse(loaded.might_contain("NO-00-NE"))
+
+    def test_plate_registered_by_another_process_is_not_rejected(self):
+        other_process = RegisteredPlateFilter()
+        other_process.rebuild()
+        self.assertFalse(other_process.might_contain("NE-77-EW"))
+
+        # Registered here: the signal feeds this process's filter only.
+        self.service.register_vehicle(self.customer, "ne-77-ew")
+
+        self.assertTrue(other_process.might_contain("NE-77-EW"))
+        other_process.rebuild()
+        self.assertTrue(other_process.might_contain("NE-77-EW"))
+        self.assertFalse(other_process.might_contain("NO-00-NE"))
+
+    def test_loaded_snapshot_expires_with_the_snapshot(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "plates.bloom")
+            plate_filter = RegisteredPlateFilter(snapshot_path=path, max_age_seconds=60)
+            plate_filter.write_snapshot(plate_filter.rebuild())
+            os.utime(path, (time.time() - 50, time.time() - 50))
+
+            self.assertTrue(plate_filter.load_snapshot())
+            self.assertGreaterEqual(time.monotonic() - plate_filter._loaded_at, 50)
+
+    def test_plates_are_only_kept_for_replay_during_a_rebuild(self):
+        plate_filter = RegisteredPlateFilter()
+        plate_filter.rebuild()
+        for i in range(100):
+            plate_filter.add(f"AD-{i:04d}")
+        self.assertEqual(plate_filter._recent, [])
+
+    def test_registration_adds_the_plate_once(self):
+        plate_filter = get_registered_plate_filter()
+        before = plate_filter.stats()["plates"]
+        self.service.register_vehicle(self.customer, "on-11-ce")
+        self.assertEqual(plate_filter.stats()["plates"], before + 1)